@@ -9,6 +9,9 @@ AI对话接口主程序
 import os
 import sys
 import json
+import argparse
+import concurrent.futures
+from typing import Optional
 
 # 添加当前目录到路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -16,7 +19,10 @@ sys.path.append(current_dir)
 
 from module.AICore.AIManager import AIFactory
 from module.Agent.Agent import Agent
+from module.Agent.ResultCompactor import ResultCompactor
+from module.Agent.FastRouter import FastRouter
 from module.MCP.client.MCPClient import MCPClient
+from tools import StartupProfiler
 import time
 
 class AIAssistant:
@@ -27,52 +33,79 @@ class AIAssistant:
     - 双AI协同：对话模型负责规划和回答，知识模型负责数据收集
     - MCP工具：所有操作通过标准化的MCP工具完成
     - 简化流程：1个while循环 + 2个for循环实现完整对话
+
+    参数:
+        mcp_transport: MCP 传输方式，默认 "stdio"；"daemon" 连接本机常驻的 MCP 服务（多个助手进程共用，
+                       启动时不再包含 MCP 服务的启动耗时）
+        profiler: 启动耗时分析器，默认新建一个；启动后可通过 self.profiler.report() 查看各阶段耗时
     """
-    def __init__(self):
-        #print("\n" + "=" * 80)
-        #print("AI 助手初始化中...")
-        #print("=" * 80)
+    def __init__(self, mcp_transport: str = "stdio", profiler: Optional[StartupProfiler] = None):
+        # 启动分两路并行：AI 模型（适配器、openai 客户端，分词器在其后台线程中加载）和 MCP 服务，
+        # 把工具注入模型是唯一的汇合点；各阶段耗时记录在 self.profiler 中
+        self.profiler = profiler or StartupProfiler()
 
         # 初始化 AI 工厂
-        #print("\n[1/3] 初始化 AI 模型...")
         self.factory = AIFactory()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup-models") as pool:
+            models = pool.submit(self._connect_models)
+
+            # 创建并启动 MCP 客户端
+            mcp_started = time.perf_counter()
+            self.mcp_client = MCPClient(transport=mcp_transport)
+            self.mcp_client.start()
+            self._init_router()
+
+            try:
+                # 等待MCP客户端初始化完成
+                while not self.mcp_client.get_initialized():
+                    time.sleep(0.01)
+                tools = self.mcp_client.list_tools()
+                self.profiler.record("MCP 服务", mcp_started, time.perf_counter())
+
+                # 汇合：模型就绪后把MCP工具列表添加到模型
+                models.result()
+            except BaseException:
+                self.mcp_client.close()
+                raise
 
-        self.factory.connect(
-            dialogue_vendor="deepseek",
-            dialogue_model_name="deepseek-reasoner",
-            knowledge_vendor="deepseek",
-            knowledge_model_name="deepseek-reasoner"
-        )
-        #print("✓ AI 模型连接成功")
-
-        # 创建并启动 MCP 客户端
-        #print("\n[2/3] 启动 MCP 服务...")
-        self.mcp_client = MCPClient()
-        self.mcp_client.start()
-
-        # 等待MCP客户端初始化完成
-        while not self.mcp_client.get_initialized():
-            time.sleep(0.1)
-        #print("✓ MCP 服务启动成功")
-
-        # 获取MCP工具列表并添加到模型
-        tools = self.mcp_client.list_tools()
-        self.factory.add_tools(tools, model_type="dialogue")
-        self.factory.add_tools(tools, model_type="knowledge")
+        with self.profiler.phase("工具注入"):
+            self.factory.add_tools(tools, model_type="dialogue")
+            self.factory.add_tools(tools, model_type="knowledge")
 
         # 创建状态机（对话处理器）
-        #print("\n[3/3] 初始化状态机...")
         self.state_machine = Agent(
             dialogue_callback=self.factory.dialogue_callback,
             knowledge_callback=self.factory.knowledge_callback,
             mcp_client_add_task_callback=self.mcp_client.add,
-            mcp_client_execute_task_callback=self.mcp_client.get_result
+            mcp_client_execute_task_callback=self.mcp_client.get_result,
+            mcp_client_add_batch_callback=self.mcp_client.add_batch,
+            # 工具结果回传给模型前先压缩，避免大结果撑大后续每次请求
+            result_compactor=ResultCompactor(
+                max_tokens=2000,
+                token_callback=self.factory.dialogue_ai.token_callback
+            )
         )
-        #print("✓ 状态机初始化完成")
 
-        #print("\n" + "=" * 80)
-        #print("初始化完成！")
-        #print("=" * 80)
+    def _connect_models(self):
+        """连接双AI模型（在启动线程中运行），分词器的加载单独记录"""
+        with self.profiler.phase("AI 模型"):
+            self.factory.connect(
+                dialogue_vendor="deepseek",
+                dialogue_model_name="deepseek-reasoner",
+                knowledge_vendor="deepseek",
+                knowledge_model_name="deepseek-reasoner"
+            )
+        for tokenizer in self.factory.tokenizers():
+            if getattr(tokenizer, "finished", None) is not None:
+                self.profiler.record(f"分词器 {tokenizer.key}", tokenizer.started, tokenizer.finished, tokenizer.thread_name)
+
+    def _init_router(self):
+        """本地快速路由：退出、四则运算等简单输入不调用模型"""
+        # 只使用规则：分类器只能把输入路由到注册了参数提取函数的单工具意图，
+        # 内置服务端没有这样的工具（工作区等工具未启用），启动时训练的分类器不会改变任何路由，因此不训练。
+        # 启用这类工具后先 register_extractor，再用 train_from_log 训练（种子数据需包含对应标签）。
+        # 轮次日志默认关闭；收集训练数据时传入 log_path（放在用户数据目录，不要写进源码目录）
+        self.router = FastRouter()
 
     def run(self):
         """运行 AI 助手"""
@@ -86,18 +119,26 @@ class AIAssistant:
                     # 获取用户输入
                     user_input = input("\n你: ").strip()
 
+                    # 跳过空输入
+                    if not user_input:
+                        continue
+
+                    # 本地快速路由
+                    route = self.router.route(user_input)
+
                     # 检查退出命令
-                    if user_input.lower() in ['exit', 'quit', '退出']:
+                    if route.intent == "exit":
                         print("\n再见！")
                         break
 
-                    # 跳过空输入
-                    if not user_input:
+                    print("\nAI: ", end="", flush=True)
+                    if route.handled:
+                        print(self.answer_locally(route))
                         continue
 
                     # 运行状态机处理用户输入
-                    print("\nAI: ", end="", flush=True)
                     self.state_machine.run(user_input)
+                    self.router.log_turn(user_input, self.state_machine.last_turn_tools)
 
                 except KeyboardInterrupt:
                     print("\n\n对话被中断")
@@ -115,6 +156,26 @@ class AIAssistant:
         finally:
             self.cleanup()
 
+    def answer_locally(self, route) -> str:
+        """
+        处理快速路由命中的输入：直接给出答案，或执行单个工具调用
+
+        参数:
+            route: FastRouter.route 的返回值
+
+        返回:
+            回答文本
+        """
+        if route.answer is not None:
+            return route.answer
+        task_id = self.mcp_client.add(route.tool_call)
+        result = self.mcp_client.get_result(task_id)
+        text = Agent.result_text(result)
+        try:
+            return str(json.loads(text)["message"])
+        except (TypeError, ValueError, KeyError):
+            return str(text)
+
     def cleanup(self):
         """清理资源"""
         print("\n正在清理资源...")
@@ -126,8 +187,14 @@ class AIAssistant:
             print(f"清理资源时出错: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI 助手")
+    parser.add_argument("--profile-startup", action="store_true", help="启动后输出各阶段耗时和重量级依赖的导入耗时")
+    args = parser.parse_args()
     try:
         ai_assistant = AIAssistant()
+        if args.profile_startup:
+            ai_assistant.profiler.measure_imports()
+            print(ai_assistant.profiler.report())
         ai_assistant.run()
     except KeyboardInterrupt:
         print("\n\n程序启动被中断")
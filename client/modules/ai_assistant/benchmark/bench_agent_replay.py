@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent 流程基准测试（基于录制/回放，离线可复现）
+尽快回放同一份录制文件，测量 Agent 自身处理一轮对话的开销（片段合并、工具合并、结果压缩等），
+不包含模型和MCP服务的耗时。
+
+用法:
+    python benchmark/bench_agent_replay.py [录制文件.jsonl] [--rounds 200] [--input 1+2]
+未提供录制文件时自动生成一份包含大量片段和工具调用的合成录制
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from module.Agent.Agent import Agent
+from module.Agent.Replay import Replayer
+
+
+def synthesize(path: str, user_input: str, chunks: int = 500, tools: int = 5):
+    """生成合成录制：一次带多个工具调用的流，工具结果回传后的长文本流"""
+    tool_chunks = []
+    for i in range(tools):
+        tool_chunks.append([0.0, {"tool_calls": [{"index": i, "id": f"call_{i}", "type": "function",
+                                                  "function": {"name": "add", "arguments": ""}}]}])
+        for piece in ('{"a": ', str(i), ', "b": ', "1}"):
+            tool_chunks.append([0.0, {"tool_calls": [{"index": i, "id": None, "type": None,
+                                                      "function": {"name": None, "arguments": piece}}]}])
+    results = []
+    for i in range(tools):
+        payload = {"task_type": "add", "message": i + 1}
+        results.append(json.dumps(payload))
+    answer = [[0.0, {"thinking": "思考"}] for _ in range(chunks // 5)] + [[0.0, {"content": f"片段{i}"}] for i in range(chunks)]
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"kind": "stream", "channel": "dialogue", "role": "user", "problem": user_input,
+                            "chunks": tool_chunks}, ensure_ascii=False) + "\n")
+        for i, text in enumerate(results):
+            f.write(json.dumps({"kind": "tool", "name": "add", "arguments": json.dumps({"a": i, "b": 1}),
+                                "elapsed": 0.0, "result": {"content": [{"type": "text", "text": text}],
+                                                           "structuredContent": json.loads(text), "isError": False}},
+                               ensure_ascii=False) + "\n")
+        f.write(json.dumps({"kind": "stream", "channel": "dialogue", "role": "system", "problem": str(results),
+                            "chunks": answer}, ensure_ascii=False) + "\n")
+
+
+def bench(path: str, user_input: str, rounds: int):
+    """回放多轮，返回每轮耗时（毫秒）"""
+    replayer = Replayer(path)
+    timings = []
+    for _ in range(rounds):
+        replayer.load()
+        agent = Agent(**replayer.agent_callbacks())
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            agent.run(user_input)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agent 回放基准测试")
+    parser.add_argument("path", nargs="?", help="录制文件路径")
+    parser.add_argument("--rounds", type=int, default=200, help="回放轮数")
+    parser.add_argument("--input", default="1+2", help="录制时的用户输入")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = os.path.join(tmp, "synthetic.jsonl")
+            synthesize(path, args.input)
+
+        timings = sorted(bench(path, args.input, args.rounds))
+        print("=" * 60)
+        print(f"Agent 回放基准测试（{args.rounds} 轮）")
+        print("=" * 60)
+        print(f"p50={statistics.median(timings):.3f}ms  "
+              f"p95={timings[int(len(timings) * 0.95) - 1]:.3f}ms  "
+              f"mean={statistics.mean(timings):.3f}ms")
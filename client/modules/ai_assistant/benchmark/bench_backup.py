@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在线备份对读写延迟的影响基准测试
+备份进行期间，一个线程不断 write，一个线程不断按 ID 查询（database_table_data_exists），记录每次调用的延迟；
+对比不同的备份方式：
+- 一步复制：每步页数大于数据库页数，一次复制完
+- 分步无暂停：每步 --pages 页，步间不暂停
+- 分步暂停：每步 --pages 页，步间暂停 --pause 秒（DatabaseBackup 的默认方式）
+输出备份耗时、读写次数和 p50/p99 延迟
+
+用法:
+    python benchmark/bench_backup.py [--rows 200000] [--pages 256] [--pause 0.005]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.DatabaseBackup import DatabaseBackup
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+
+def run(db: str, target: str, rows: int, pages: int, pause: float) -> dict:
+    """备份期间测量读写延迟"""
+    editor, inquire = DatabaseEditor(), DataInquire()
+    stop = threading.Event()
+    latencies = {"write": [], "read": []}
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            editor.write(db, "w", str(i % 100), f"写入{i}")
+            latencies["write"].append(time.perf_counter() - start)
+            i += 1
+
+    def reader():
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            inquire.database_table_data_exists(db, "t", str(i % rows))
+            latencies["read"].append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    ok, result = DatabaseBackup().backup(db, target, pages=pages, pause=pause)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert ok, result
+    return {
+        "seconds": result["seconds"], "steps": result["steps"],
+        "writes": len(latencies["write"]), "reads": len(latencies["read"]),
+        "write_p50": percentile(latencies["write"], 0.5), "write_p99": percentile(latencies["write"], 0.99),
+        "read_p50": percentile(latencies["read"], 0.5), "read_p99": percentile(latencies["read"], 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在线备份对读写延迟的影响基准测试")
+    parser.add_argument("--rows", type=int, default=200000, help="数据行数")
+    parser.add_argument("--pages", type=int, default=256, help="分步备份每步页数")
+    parser.add_argument("--pause", type=float, default=0.005, help="分步备份步间暂停秒数")
+    args = parser.parse_args()
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db, target = os.path.join(tmp, "bench.db"), os.path.join(tmp, "copy.db")
+        editor.connect(db)
+        for start in range(0, args.rows, 10000):
+            editor.write_many(db, "t", [{"data_id": str(i), "content": f"第{i}条内容" * 10} for i in range(start, min(start + 10000, args.rows))])
+        print(f"{args.rows} 行，数据库 {os.path.getsize(db) / 1024 / 1024:.1f} MB")
+
+        modes = (
+            ("一步复制", 1 << 30, 0.0),
+            ("分步无暂停", args.pages, 0.0),
+            ("分步暂停", args.pages, args.pause),
+        )
+        print(f"{'方式':<10}{'耗时(s)':>9}{'步数':>7}{'写入':>7}{'写p50':>8}{'写p99':>8}{'读取':>8}{'读p50':>8}{'读p99':>8}  (延迟单位 ms)")
+        for name, pages, pause in modes:
+            r = run(db, target, args.rows, pages, pause)
+            print(f"{name:<10}{r['seconds']:>9.2f}{r['steps']:>7}{r['writes']:>7}{r['write_p50']:>8.2f}{r['write_p99']:>8.2f}"
+                  f"{r['reads']:>8}{r['read_p50']:>8.2f}{r['read_p99']:>8.2f}")
+        DatabaseRegistry.release(db)
+
+
+if __name__ == "__main__":
+    main()
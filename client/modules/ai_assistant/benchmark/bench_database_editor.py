@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DatabaseEditor 单行操作吞吐基准测试
+- 复用：引擎、表对象、语句和表名缓存由 DatabaseRegistry 在调用之间复用（当前行为）
+- 每次重建：每次调用前清空注册表，相当于每次调用都创建引擎、打开文件、读取表结构、最后销毁（旧行为）
+- 批量写入：同样的行数逐行 write（每行一个事务）与一次 write_many（一个事务）对比
+
+用法:
+    python benchmark/bench_database_editor.py [--ops 500]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+
+
+def run(editor: DatabaseEditor, db: str, name: str, ops: int, cold: bool) -> float:
+    """执行 ops 次操作，返回每秒操作数"""
+    calls = {
+        "write": lambda i: editor.write(db, "t", str(i), f"内容{i}"),
+        "read": lambda i: editor.read(db, "t", str(i)),
+        "update_data": lambda i: editor.update_data(db, "t", str(i), f"新内容{i}"),
+        "data_exists": lambda i: editor.data_exists(db, "t", str(i)),
+    }
+    call = calls[name]
+    start = time.perf_counter()
+    for i in range(ops):
+        if cold:
+            DatabaseRegistry.clear()
+        ok, message = call(i)
+        assert ok, message
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DatabaseEditor 单行操作吞吐基准测试")
+    parser.add_argument("--ops", type=int, default=500, help="每种操作的次数")
+    args = parser.parse_args()
+
+    editor = DatabaseEditor()
+    print(f"{'操作':<14}{'每次重建(ops/s)':>18}{'复用(ops/s)':>16}{'提升':>8}")
+    for name in ("write", "read", "update_data", "data_exists"):
+        results = {}
+        for cold in (True, False):
+            with tempfile.TemporaryDirectory() as tmp:
+                db = os.path.join(tmp, "bench.db")
+                editor.connect(db)
+                if name != "write":
+                    run(editor, db, "write", args.ops, cold=False) # 准备数据
+                results[cold] = run(editor, db, name, args.ops, cold)
+                DatabaseRegistry.release(db)
+        print(f"{name:<14}{results[True]:>18.0f}{results[False]:>16.0f}{results[False] / results[True]:>7.1f}x")
+
+    print(f"\n{'写入方式':<14}{'耗时(ms)':>12}{'行/秒':>12}")
+    rows = [{"data_id": str(i), "content": f"内容{i}"} for i in range(args.ops)]
+    for name in ("write", "write_many"):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = os.path.join(tmp, "bench.db")
+            editor.connect(db)
+            editor.create_table(db, "t")
+            start = time.perf_counter()
+            if name == "write":
+                for row in rows:
+                    editor.write(db, "t", row["data_id"], row["content"])
+            else:
+                ok, result = editor.write_many(db, "t", rows)
+                assert ok, result
+            elapsed = time.perf_counter() - start
+            DatabaseRegistry.release(db)
+        print(f"{name:<14}{elapsed * 1000:>12.1f}{args.ops / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
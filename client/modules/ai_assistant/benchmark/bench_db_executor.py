@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库工具混合负载延迟基准测试
+在一个事件循环中同时运行：
+- 扫描：若干协程不断执行全表聚合（database_table_aggregate，content contains 过滤，每次扫描整张表）
+- 写入：若干协程不断 write
+- 查找：一个协程每 10ms 执行一次 database_table_data_exists，记录从计划时刻到完成的延迟
+对比三种执行方式：
+- 同步：直接在事件循环中调用（未包装的同步工具）
+- 共享线程池：所有调用进同一个线程池（线程数与执行器的扫描+查找线程数相同）
+- 执行器：DatabaseExecutor（每个数据库一个写线程，扫描、查找各自的线程池）
+
+用法:
+    python benchmark/bench_db_executor.py [--rows 100000] [--scanners 4] [--writers 2] [--seconds 3]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import functools
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools import DatabaseExecutor as executor_module
+from module.MCP.server.tools.DatabaseExecutor import DatabaseExecutor
+
+
+def make_runner(mode: str):
+    """返回 (run(lane, fn, *args) 协程函数, 关闭函数)"""
+    if mode == "同步":
+        async def run(lane, fn, *args):
+            return fn(*args)
+        return run, lambda: None
+    if mode == "共享线程池":
+        pool = ThreadPoolExecutor(max_workers=executor_module.LOOKUP_WORKERS + executor_module.SCAN_WORKERS)
+
+        async def run(lane, fn, *args):
+            return await asyncio.get_running_loop().run_in_executor(pool, functools.partial(fn, *args))
+        return run, pool.shutdown
+    executor = DatabaseExecutor()
+    return executor.run, executor.shutdown
+
+
+async def mixed_load(run, db: str, rows: int, scanners: int, writers: int, seconds: float) -> dict:
+    editor, inquire = DatabaseEditor(), DataInquire()
+    stop = time.perf_counter() + seconds
+    counts = {"scan": 0, "write": 0}
+    latencies = []
+    spec = {"filter": [{"field": "content", "op": "contains", "value": "不存在"}]}
+
+    async def scan():
+        while time.perf_counter() < stop:
+            await run("scan", inquire.database_table_aggregate, db, "t", spec)
+            counts["scan"] += 1
+            await asyncio.sleep(0) # 两次请求之间让出事件循环（同步方式下其它协程只能在这里执行）
+
+    async def write(index: int):
+        i = 0
+        while time.perf_counter() < stop:
+            await run("write", editor.write, db, "t", f"w{index}-{i % 100}", "写入")
+            counts["write"] += 1
+            i += 1
+            await asyncio.sleep(0)
+
+    async def lookup():
+        # 延迟从计划发出请求的时刻算起，包括事件循环被阻塞而晚执行的时间
+        i, due = 0, time.perf_counter()
+        while time.perf_counter() < stop:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await run("lookup", inquire.database_table_data_exists, db, "t", str(i % rows))
+            finished = time.perf_counter()
+            latencies.append(finished - due)
+            i += 1
+            due = max(due + 0.01, finished)
+
+    await asyncio.gather(*(scan() for _ in range(scanners)), *(write(i) for i in range(writers)), lookup())
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000 if len(latencies) > 1 else latencies[0] * 1000,
+        "lookups": len(latencies),
+        "scans": counts["scan"] / seconds,
+        "writes": counts["write"] / seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库工具混合负载延迟基准测试")
+    parser.add_argument("--rows", type=int, default=100000, help="数据行数")
+    parser.add_argument("--scanners", type=int, default=4, help="扫描协程数")
+    parser.add_argument("--writers", type=int, default=2, help="写入协程数")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每种方式的运行时间")
+    args = parser.parse_args()
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        editor.connect(db)
+        for start in range(0, args.rows, 10000):
+            editor.write_many(db, "t", [{"data_id": str(i), "content": f"第{i}条内容"} for i in range(start, min(start + 10000, args.rows))])
+
+        print(f"{args.rows} 行，扫描协程 {args.scanners}，写入协程 {args.writers}，每种方式 {args.seconds} 秒")
+        print(f"{'方式':<10}{'查找p50(ms)':>13}{'查找p95(ms)':>13}{'查找次数':>10}{'扫描/秒':>10}{'写入/秒':>10}")
+        for mode in ("同步", "共享线程池", "执行器"):
+            run, close = make_runner(mode)
+            result = asyncio.run(mixed_load(run, db, args.rows, args.scanners, args.writers, args.seconds))
+            close()
+            print(f"{mode:<10}{result['p50']:>13.1f}{result['p95']:>13.1f}{result['lookups']:>10}{result['scans']:>10.1f}{result['writes']:>10.1f}")
+        DatabaseRegistry.release(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FastRouter 基准测试
+- 准确率：在样本集上做 K 折交叉验证，统计整体准确率、各标签准确率，
+  以及"误拦截"数（本应交给模型却被本地处理的输入，这是代价最高的错误）
+- 延迟：单次 route() 的 p50/p99 耗时
+
+用法:
+    python benchmark/bench_fast_router.py [样本文件.jsonl ...]
+默认使用 Data/router/seed_turns.jsonl；收集到的轮次日志作为参数传入
+"""
+
+import os
+import sys
+import time
+import random
+import statistics
+from collections import Counter
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from module.Agent.FastRouter import FastRouter, TfidfLinearClassifier
+
+ROUTER_DIR = os.path.join(parent_dir, "Data", "router")
+
+
+def load(paths):
+    """读取全部样本文件"""
+    texts, labels = [], []
+    for path in paths:
+        if os.path.isfile(path):
+            t, l = FastRouter.load_samples(path)
+            texts += t
+            labels += l
+    return texts, labels
+
+
+def cross_validate(texts, labels, folds: int = 5, seed: int = 0):
+    """K 折交叉验证，返回 (预测列表, 真实标签列表)"""
+    indices = list(range(len(texts)))
+    random.Random(seed).shuffle(indices)
+    predicted, expected = [], []
+    for k in range(folds):
+        test = set(indices[k::folds])
+        train = [i for i in indices if i not in test]
+        router = FastRouter(classifier=TfidfLinearClassifier().fit(
+            [texts[i] for i in train], [labels[i] for i in train]))
+        for i in sorted(test):
+            predicted.append(router.route(texts[i]).intent)
+            expected.append(labels[i])
+    return predicted, expected
+
+
+def bench_latency(router: FastRouter, texts, rounds: int = 20):
+    """统计 route() 的单次耗时（微秒）"""
+    timings = []
+    for _ in range(rounds):
+        for text in texts:
+            start = time.perf_counter()
+            router.route(text)
+            timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p99": timings[int(len(timings) * 0.99) - 1],
+        "mean": statistics.mean(timings),
+    }
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [os.path.join(ROUTER_DIR, "seed_turns.jsonl")]
+    texts, labels = load(paths)
+    print("=" * 60)
+    print(f"FastRouter 基准测试（样本 {len(texts)} 条: {dict(Counter(labels))}）")
+    print("=" * 60)
+
+    # 准确率
+    predicted, expected = cross_validate(texts, labels)
+    correct = sum(p == e for p, e in zip(predicted, expected))
+    wrongly_handled = sum(e == "llm" and p != "llm" for p, e in zip(predicted, expected))
+    print(f"\n准确率: {correct / len(expected):.1%} ({correct}/{len(expected)})")
+    for label in sorted(set(expected)):
+        pairs = [(p, e) for p, e in zip(predicted, expected) if e == label]
+        hit = sum(p == e for p, e in pairs)
+        print(f"  {label:<8} {hit}/{len(pairs)}")
+    print(f"误拦截（应交给模型却在本地处理）: {wrongly_handled}")
+    skipped = sum(p != "llm" for p in predicted)
+    print(f"本地处理比例: {skipped / len(predicted):.1%}")
+
+    # 延迟
+    router = FastRouter(classifier=TfidfLinearClassifier().fit(texts, labels))
+    rules_only = FastRouter()
+    print("\n单次 route() 耗时（微秒）:")
+    for name, r in (("规则+分类器", router), ("仅规则", rules_only)):
+        stats = bench_latency(r, texts)
+        print(f"  {name:<8} p50={stats['p50']:.1f}  p99={stats['p99']:.1f}  mean={stats['mean']:.1f}")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模糊查询基准测试
+同一张 (id, content) 表上对比：
+- LIKE 扫描：FullTextIndex.scan（逐行匹配，旧的 database_table_data_filter 的做法）
+- 全文索引：FullTextIndex.search（FTS5 trigram 索引，按相关度排序）
+查询分两类：命中少的（每行唯一的编号）和命中多的（常见词组合，LIKE 扫描凑够 limit 行即可提前结束，
+而全文索引要对全部命中排序），以及为已有数据的旧表补建索引的耗时
+
+用法:
+    python benchmark/bench_full_text_search.py [--rows 50000] [--queries 50] [--limit 20]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools import FullTextIndex
+from module.MCP.server.tools.SQLiteConnection import connect
+
+WORDS = "天气 预报 苹果 香蕉 数据库 索引 查询 模型 对话 记忆 工具 文件 用户 助手 日志 配置".split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模糊查询基准测试")
+    parser.add_argument("--rows", type=int, default=50000, help="数据行数")
+    parser.add_argument("--queries", type=int, default=50, help="查询次数")
+    parser.add_argument("--limit", type=int, default=20, help="每次查询返回的行数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    query_sets = (
+        ("命中少", [f"编号{rng.randrange(args.rows)}号" for _ in range(args.queries)]),
+        ("命中多", [rng.choice(WORDS) + rng.choice(WORDS) for _ in range(args.queries)]),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        with contextlib.closing(connect(db)) as conn:
+            conn.execute("CREATE TABLE t (id TEXT PRIMARY KEY, content TEXT)")
+            conn.executemany("INSERT INTO t VALUES (?, ?)", (
+                (str(i), "".join(rng.choice(WORDS) for _ in range(30)) + f"编号{i}号") for i in range(args.rows)
+            ))
+            conn.commit()
+
+            start = time.perf_counter()
+            FullTextIndex.ensure(conn, "t")
+            print(f"补建索引（{args.rows} 行）: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            print(f"{'查询':<8}{'方式':<12}{'平均(ms)':>12}{'查询/秒':>12}")
+            for kind, queries in query_sets:
+                for name, func in (("LIKE 扫描", FullTextIndex.scan), ("全文索引", FullTextIndex.search)):
+                    start = time.perf_counter()
+                    for query in queries:
+                        func(conn, "t", query, args.limit)
+                    elapsed = time.perf_counter() - start
+                    print(f"{kind:<8}{name:<12}{elapsed / args.queries * 1000:>12.2f}{args.queries / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
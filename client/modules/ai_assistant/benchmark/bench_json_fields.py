@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 字段索引基准测试
+同样的 JSON 数据分别写入普通数据表和声明了字段的 JSON 数据表（生成列 + B-tree 索引），对比 DataInquire 的查询耗时：
+- 等值过滤：database_table_data_query，$.type = ?
+- 范围过滤：database_table_data_query，$.score 在一个窄区间内
+- 分组计数：database_table_aggregate，按 $.type 分组
+普通表上按 json_extract 逐行解析，JSON 数据表上走索引；另外输出两种表的写入耗时
+
+用法:
+    python benchmark/bench_json_fields.py [--rows 1000000] [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.SQLiteConnection import connect
+
+TYPES = [f"type{i}" for i in range(50)]
+BATCH = 10000
+
+
+def fill(db: str, table: str, rows: int):
+    """用 sqlite3 直接分批写入（全文索引和字段索引由触发器/生成列维护），返回耗时"""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    with contextlib.closing(connect(db)) as conn:
+        for begin in range(0, rows, BATCH):
+            conn.executemany(f'INSERT INTO "{table}" (id, content) VALUES (?, ?)', (
+                (f"{i:08d}", json.dumps({"type": rng.choice(TYPES), "score": rng.randrange(rows), "text": f"第{i}条"}))
+                for i in range(begin, min(begin + BATCH, rows))
+            ))
+            conn.commit()
+    return time.perf_counter() - start
+
+
+def timed(func, repeat: int):
+    """返回 (平均毫秒, 最后一次结果)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    assert not isinstance(result, str), result
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 字段索引基准测试")
+    parser.add_argument("--rows", type=int, default=1000000, help="数据行数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个查询的重复次数")
+    args = parser.parse_args()
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        editor.connect(db)
+        editor.create_table(db, "plain")
+        editor.create_table(db, "indexed", ["$.type", "$.score"])
+        DatabaseRegistry.release(db)
+
+        for table in ("plain", "indexed"):
+            print(f"写入 {table}: {args.rows} 行 {fill(db, table, args.rows):.1f} 秒")
+
+        window = max(1, args.rows // 10000)
+        queries = (
+            ("等值过滤", lambda table: inquire.database_table_data_query(
+                db, table, [{"field": "$.type", "op": "eq", "value": "type7"}], limit=100)),
+            ("范围过滤", lambda table: inquire.database_table_data_query(
+                db, table, [{"field": "$.score", "op": "ge", "value": 5000}, {"field": "$.score", "op": "lt", "value": 5000 + window}], limit=100)),
+            ("分组计数", lambda table: inquire.database_table_aggregate(
+                db, table, {"group_by": [{"field": "$.type"}], "limit": 100})),
+        )
+        print(f"\n{'查询':<10}{'普通表(ms)':>14}{'JSON表(ms)':>14}{'提升':>10}")
+        for name, query in queries:
+            plain, expected = timed(lambda: query("plain"), args.repeat)
+            indexed, result = timed(lambda: query("indexed"), args.repeat)
+            assert result == expected, f"{name} 结果不一致"
+            print(f"{name:<10}{plain:>14.1f}{indexed:>14.1f}{plain / indexed:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
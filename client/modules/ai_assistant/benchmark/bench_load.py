@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发压测：一台机器能同时服务多少个 AI 助手会话
+在子进程中启动模拟的 OpenAI 兼容流式服务器（fake_openai_server.py），
+本进程内创建 N 个独立的 AIFactory + Agent 会话并发对话，统计：
+- 单轮耗时 p50/p95/p99
+- 首字延迟（TTFT，从提问到对话模型输出第一个片段）
+- 本进程 CPU 时间与占用率、内存（RSS）
+结果保存为 JSON，可用 --compare 与之前版本的结果对比。
+
+工具调用由进程内的 mathematics 工具直接执行（不启动 MCP 服务），只测量模型流与 Agent 的开销。
+
+用法:
+    python benchmark/bench_load.py --sessions 20 --turns 5 --shape deepseek --ttft 0.2 --rate 50
+    python benchmark/bench_load.py --sessions 20 --compare benchmark/results/load_xxx.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+import contextlib
+import subprocess
+import multiprocessing
+from dataclasses import asdict
+
+try:
+    import psutil
+except ImportError:  # 没有 psutil 时用 resource 统计（仅类 Unix 系统）
+    psutil = None
+    import resource
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+sys.path.append(current_dir)
+
+from fake_openai_server import ServerConfig, serve
+from module.AICore.AIManager import AIFactory
+from module.Agent.Agent import Agent
+from module.Agent.Replay import load_result
+from module.MCP.server.tools.mathematics import mathematics
+
+ROLE_DIR = os.path.join(parent_dir, "module", "AICore", "role")
+RESULT_DIR = os.path.join(current_dir, "results") # 本机运行的结果，已在 .gitignore 中忽略
+
+# 各形状使用的供应商与模型
+SHAPES = {
+    "deepseek": ("deepseek", "deepseek-chat"),
+    "doubao": ("doubao", "doubao-seed-1-6-lite-251015"),
+}
+
+
+def percentiles(values):
+    """统计 p50/p95/p99/mean/max（毫秒）"""
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+    return {
+        "p50": round(statistics.median(values), 2),
+        "p95": round(pick(0.95), 2),
+        "p99": round(pick(0.99), 2),
+        "mean": round(statistics.mean(values), 2),
+        "max": round(values[-1], 2),
+    }
+
+
+class LocalTools:
+    """进程内执行 mathematics 工具，接口与 MCPClient 的 add/get_result 一致"""
+    def __init__(self):
+        self.math = mathematics()
+        self.tasks = {}
+        self.lock = threading.Lock()
+
+    def add(self, tool: dict) -> str:
+        with self.lock:
+            task_id = f"task_{len(self.tasks)}"
+            self.tasks[task_id] = tool
+        return task_id
+
+    def get_result(self, task_id, block=True, timeout=None):
+        function = self.tasks.pop(task_id)["function"]
+        payload = getattr(self.math, function["name"])(**json.loads(function["arguments"]))
+        return load_result({"content": [{"type": "text", "text": json.dumps(payload, ensure_ascii=False)}],
+                            "structuredContent": payload, "isError": False})
+
+
+class Session:
+    """一个独立的对话会话：自己的角色目录、AIFactory 和 Agent"""
+    def __init__(self, index: int, base_url: str, shape: str, workdir: str):
+        role_dir = os.path.join(workdir, f"session_{index}")
+        for role in ("role_A", "role_B"):
+            os.makedirs(os.path.join(role_dir, role), exist_ok=True)
+            shutil.copy(os.path.join(ROLE_DIR, role, "assistant.json"), os.path.join(role_dir, role))
+
+        vendor, model = SHAPES[shape]
+        self.factory = AIFactory(role_dir=role_dir, base_url=base_url)
+        self.factory.connect(vendor, model, vendor, model)
+        self.tools = LocalTools()
+        self.first_chunk = None
+        self.agent = Agent(self._timed(self.factory.dialogue_callback), self.factory.knowledge_callback,
+                           self.tools.add, self.tools.get_result)
+        self.latencies, self.ttfts, self.errors = [], [], []
+
+    def _timed(self, callback):
+        """记录本轮对话模型输出第一个片段的时间"""
+        def wrapper(problem, role="user"):
+            for chunk in callback(problem, role):
+                if self.first_chunk is None:
+                    self.first_chunk = time.perf_counter()
+                yield chunk
+        return wrapper
+
+    def run(self, turns: int, barrier: threading.Barrier):
+        barrier.wait()
+        for turn in range(turns):
+            self.first_chunk = None
+            start = time.perf_counter()
+            try:
+                self.agent.run(f"第{turn}个问题")
+            except Exception as e:
+                self.errors.append(str(e))
+                continue
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            if self.first_chunk is not None:
+                self.ttfts.append((self.first_chunk - start) * 1000)
+
+
+class ResourceSampler:
+    """后台采样本进程的 RSS，并统计 CPU 时间"""
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.process = psutil.Process() if psutil else None
+
+    def rss_mb(self) -> float:
+        if self.process is not None:
+            return self.process.memory_info().rss / 1024 / 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux 下单位为 KB，且为峰值
+
+    def cpu_seconds(self):
+        times = os.times()
+        return times.user, times.system
+
+    def __enter__(self):
+        self.cpu_start = self.cpu_seconds()
+        self.wall_start = time.perf_counter()
+        self.rss_start = self.rss_mb()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.samples.append(self.rss_mb())
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.wall = time.perf_counter() - self.wall_start
+        user, system = self.cpu_seconds()
+        self.cpu_user = user - self.cpu_start[0]
+        self.cpu_system = system - self.cpu_start[1]
+
+    def result(self):
+        samples = self.samples or [self.rss_mb()]
+        return {
+            "cpu": {
+                "user_s": round(self.cpu_user, 3),
+                "system_s": round(self.cpu_system, 3),
+                "percent": round((self.cpu_user + self.cpu_system) / self.wall * 100, 1),
+            },
+            "rss_mb": {
+                "start": round(self.rss_start, 1),
+                "peak": round(max(samples), 1),
+                "end": round(samples[-1], 1),
+            },
+        }
+
+
+def git_version() -> str:
+    """当前代码版本（用于对比不同版本的结果）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args) -> dict:
+    config = ServerConfig(shape=args.shape, ttft=args.ttft, rate=args.rate, tokens=args.tokens,
+                          thinking_tokens=args.thinking_tokens, tool_call_rate=args.tool_call_rate)
+
+    # 服务器放在子进程，避免其 CPU 占用计入被测进程
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(config, "127.0.0.1", 0, ready), daemon=True)
+    server.start()
+    base_url = ready.get(timeout=30)
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup_start = time.perf_counter()
+            sessions = [Session(i, base_url, args.shape, workdir) for i in range(args.sessions)]
+            setup = time.perf_counter() - setup_start
+
+            barrier = threading.Barrier(args.sessions)
+            threads = [threading.Thread(target=s.run, args=(args.turns, barrier)) for s in sessions]
+            with ResourceSampler() as sampler:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+    finally:
+        server.terminate()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = [v for s in sessions for v in s.latencies]
+    ttfts = [v for s in sessions for v in s.ttfts]
+    errors = [e for s in sessions for e in s.errors]
+    result = {
+        "version": git_version(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": dict(asdict(config), sessions=args.sessions, turns=args.turns),
+        "setup_s": round(setup, 3),
+        "wall_s": round(sampler.wall, 3),
+        "turns": len(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "throughput_turns_per_s": round(len(latencies) / sampler.wall, 2),
+        "turn_latency_ms": percentiles(latencies),
+        "ttft_ms": percentiles(ttfts),
+    }
+    result.update(sampler.result())
+    return result
+
+
+def compare(old: dict, new: dict):
+    """打印两次结果的关键指标对比"""
+    print(f"\n对比 {old.get('version')} -> {new.get('version')}:")
+    rows = [("单轮 p50", "turn_latency_ms", "p50"), ("单轮 p95", "turn_latency_ms", "p95"),
+            ("单轮 p99", "turn_latency_ms", "p99"), ("TTFT p50", "ttft_ms", "p50"),
+            ("TTFT p99", "ttft_ms", "p99"), ("CPU %", "cpu", "percent"), ("RSS 峰值", "rss_mb", "peak")]
+    for name, group, key in rows:
+        a, b = old.get(group, {}).get(key), new.get(group, {}).get(key)
+        if a is None or b is None:
+            continue
+        change = (b - a) / a * 100 if a else 0.0
+        print(f"  {name:<10} {a:>10} -> {b:<10} ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    defaults = ServerConfig()
+    parser = argparse.ArgumentParser(description="AI 助手并发压测")
+    parser.add_argument("--sessions", type=int, default=10, help="并发会话数")
+    parser.add_argument("--turns", type=int, default=5, help="每个会话的对话轮数")
+    parser.add_argument("--shape", choices=sorted(SHAPES), default=defaults.shape, help="片段格式")
+    parser.add_argument("--ttft", type=float, default=defaults.ttft, help="首字延迟（秒）")
+    parser.add_argument("--rate", type=float, default=defaults.rate, help="输出速率（tokens/秒）")
+    parser.add_argument("--tokens", type=int, default=defaults.tokens, help="每次回复的 token 数")
+    parser.add_argument("--thinking-tokens", type=int, default=defaults.thinking_tokens, help="每次回复的思考 token 数")
+    parser.add_argument("--tool-call-rate", type=float, default=defaults.tool_call_rate, help="工具调用注入比例")
+    parser.add_argument("--output", help="结果文件路径，默认 benchmark/results/load_<时间>.json")
+    parser.add_argument("--compare", help="与之前的结果文件对比")
+    args = parser.parse_args()
+
+    result = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    output = args.output or os.path.join(RESULT_DIR, f"load_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCPClient 调度开销基准测试
+- 空闲 CPU：客户端启动后空闲若干秒，本进程消耗的 CPU 时间
+- 单次调用往返：顺序调用 add 工具，统计 add() 到 get_result() 返回的耗时
+- 客户端开销：往返耗时减去直接在同一会话上 await call_tool 的耗时（服务端处理 + 传输）
+
+用法:
+    python benchmark/bench_mcp_dispatch.py [--calls 300] [--idle 2]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.client.MCPClient import MCPClient
+
+
+def tool_call(a: int, b: int) -> dict:
+    return {"type": "function", "function": {"name": "add", "arguments": json.dumps({"a": a, "b": b})}}
+
+
+def summary(values):
+    values = sorted(values)
+    return {
+        "p50": statistics.median(values),
+        "p95": values[int(len(values) * 0.95) - 1],
+        "mean": statistics.mean(values),
+    }
+
+
+def bench_idle(client: MCPClient, seconds: float) -> float:
+    """空闲期间本进程消耗的 CPU 时间（秒）"""
+    before = os.times()
+    time.sleep(seconds)
+    after = os.times()
+    return (after.user - before.user) + (after.system - before.system)
+
+
+def bench_round_trip(client: MCPClient, calls: int):
+    """顺序调用的往返耗时（毫秒）"""
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        task = client.add(tool_call(i, 1))
+        client.get_result(task, timeout=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def bench_direct(client: MCPClient, calls: int):
+    """在客户端的事件循环内直接 await call_tool 的耗时（毫秒），作为不含调度开销的基线"""
+    async def run():
+        timings = []
+        for i in range(calls):
+            start = time.perf_counter()
+            await client.session.call_tool("add", {"a": i, "b": 1})
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+    return asyncio.run_coroutine_threadsafe(run(), client.loop).result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCPClient 调度开销基准测试")
+    parser.add_argument("--calls", type=int, default=300, help="顺序调用次数")
+    parser.add_argument("--idle", type=float, default=2.0, help="空闲测量时长（秒）")
+    args = parser.parse_args()
+
+    client = MCPClient()
+    start = time.perf_counter()
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.01)
+    startup = time.perf_counter() - start
+
+    try:
+        bench_round_trip(client, 20)  # 预热
+        idle_cpu = bench_idle(client, args.idle)
+        round_trip = summary(bench_round_trip(client, args.calls))
+        direct = summary(bench_direct(client, args.calls))
+    finally:
+        client.close()
+
+    print("=" * 60)
+    print("MCPClient 调度开销基准测试")
+    print("=" * 60)
+    print(f"启动耗时: {startup:.2f} 秒")
+    print(f"空闲 {args.idle:.0f} 秒 CPU 时间: {idle_cpu:.3f} 秒 ({idle_cpu / args.idle * 100:.1f}%)")
+    print(f"往返耗时 (ms):      p50={round_trip['p50']:.3f}  p95={round_trip['p95']:.3f}  mean={round_trip['mean']:.3f}")
+    print(f"直接 call_tool (ms): p50={direct['p50']:.3f}  p95={direct['p95']:.3f}  mean={direct['mean']:.3f}")
+    print(f"客户端调度开销 (ms): p50={round_trip['p50'] - direct['p50']:.3f}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCPClient 传输方式基准测试：stdio（子进程 + 管道）对比 memory（本进程内运行服务端）
+- 启动耗时：start() 到 get_initialized() 为真，每种方式在独立的子进程中测量，包含冷导入
+- 单次调用往返：顺序调用 add 工具，统计 add() 到 get_result() 返回的耗时
+- 直接 call_tool：在客户端事件循环内直接 await 会话的 call_tool，不含调度开销
+
+用法:
+    python benchmark/bench_mcp_transport.py [--calls 300]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, current_dir)
+
+from bench_mcp_dispatch import summary, bench_round_trip, bench_direct
+
+MODES = ("stdio", "memory")
+
+
+def measure(mode: str, calls: int) -> dict:
+    """在当前进程中测量一种传输方式"""
+    start = time.perf_counter()
+    from module.MCP.client.MCPClient import MCPClient
+    client = MCPClient(transport=mode)
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.005)
+    startup = time.perf_counter() - start
+
+    try:
+        bench_round_trip(client, 20)  # 预热
+        round_trip = summary(bench_round_trip(client, calls))
+        direct = summary(bench_direct(client, calls))
+    finally:
+        client.close()
+    return {"mode": mode, "startup": startup, "round_trip": round_trip, "direct": direct}
+
+
+def run_isolated(mode: str, calls: int) -> dict:
+    """在独立子进程中测量，避免导入缓存影响启动耗时"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--mode", mode, "--calls", str(calls), "--json"],
+        capture_output=True, text=True, check=True, cwd=parent_dir,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCPClient 传输方式基准测试")
+    parser.add_argument("--calls", type=int, default=300, help="顺序调用次数")
+    parser.add_argument("--mode", choices=MODES, help="只测量一种方式（内部使用）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出（内部使用）")
+    args = parser.parse_args()
+
+    if args.mode:
+        result = measure(args.mode, args.calls)
+        print(json.dumps(result) if args.json else result)
+        sys.exit(0)
+
+    results = [run_isolated(mode, args.calls) for mode in MODES]
+
+    print("=" * 60)
+    print("MCPClient 传输方式基准测试")
+    print("=" * 60)
+    print(f"{'方式':<8}{'启动(秒)':>10}{'往返p50(ms)':>14}{'往返p95(ms)':>14}{'call_tool p50(ms)':>20}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['startup']:>10.3f}{r['round_trip']['p50']:>14.3f}"
+              f"{r['round_trip']['p95']:>14.3f}{r['direct']['p50']:>20.3f}")
+    stdio, memory = results
+    print(f"启动加速: {stdio['startup'] / memory['startup']:.1f}x, "
+          f"往返加速: {stdio['round_trip']['p50'] / memory['round_trip']['p50']:.1f}x")
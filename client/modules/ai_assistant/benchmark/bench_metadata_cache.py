@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元数据缓存基准测试
+对比 DataInquire 的表列表、表存在检查和行数统计在两种方式下的耗时：
+- 每次查询：打开连接，查询 sqlite_master，COUNT(*)（引入 MetadataCache 之前的做法）
+- 元数据缓存：MetadataCache（data_version 未变化时直接返回缓存）
+另外测量 DatabaseEditor 写入后第一次统计的耗时（缓存中的行数由写入直接更新，不重新计数）
+
+用法:
+    python benchmark/bench_metadata_cache.py [--rows 500000] [--repeat 200]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.SQLiteConnection import connect
+from module.MCP.server.tools import FullTextIndex
+
+
+def uncached_tables(db: str):
+    with contextlib.closing(connect(db)) as conn:
+        return FullTextIndex.list_tables(conn)
+
+
+def uncached_exists(db: str, table: str):
+    with contextlib.closing(connect(db)) as conn:
+        return conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+
+def uncached_count(db: str, table: str):
+    with contextlib.closing(connect(db)) as conn:
+        if conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is None:
+            return None
+        return conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+
+def timed(func, repeat: int) -> float:
+    """平均毫秒"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="元数据缓存基准测试")
+    parser.add_argument("--rows", type=int, default=500000, help="数据行数")
+    parser.add_argument("--repeat", type=int, default=200, help="每项的重复次数")
+    args = parser.parse_args()
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        editor.connect(db)
+        for start in range(0, args.rows, 10000):
+            editor.write_many(db, "t", [{"data_id": str(i), "content": f"第{i}条内容"} for i in range(start, min(start + 10000, args.rows))])
+        for i in range(20):
+            editor.create_table(db, f"other{i}")
+        inquire.database_table_data_count(db, "t") # 第一次统计建立缓存
+
+        items = (
+            ("表列表", lambda: uncached_tables(db), lambda: inquire.database_all_table(db)),
+            ("表存在检查", lambda: uncached_exists(db, "missing"), lambda: inquire.database_table_data_exists(db, "missing", "1")),
+            ("行数统计", lambda: uncached_count(db, "t"), lambda: inquire.database_table_data_count(db, "t")),
+        )
+        print(f"{args.rows} 行，21 张表，每项 {args.repeat} 次")
+        print(f"{'操作':<12}{'每次查询(ms)':>14}{'元数据缓存(ms)':>16}{'提升':>10}")
+        for name, uncached, cached in items:
+            before, after = timed(uncached, args.repeat), timed(cached, args.repeat)
+            print(f"{name:<12}{before:>14.3f}{after:>16.3f}{before / after:>9.0f}x")
+
+        counter = iter(range(10 ** 9))
+
+        def write_then_count():
+            editor.write(db, "t", f"new{next(counter)}", "新增")
+            return inquire.database_table_data_count(db, "t")
+
+        def write_then_scan():
+            editor.write(db, "t", f"new{next(counter)}", "新增")
+            return uncached_count(db, "t")
+
+        repeat = max(1, args.repeat // 10)
+        before, after = timed(write_then_scan, repeat), timed(write_then_count, repeat)
+        assert inquire.database_table_data_count(db, "t") == uncached_count(db, "t")
+        print(f"{'写入后统计':<12}{before:>14.3f}{after:>16.3f}{before / after:>9.0f}x")
+        DatabaseRegistry.release(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 读写并发基准测试
+写线程用 DatabaseEditor.write 逐行写入，读线程同时用 DataInquire 读取同一个数据库，
+对比旧的默认设置（回滚日志、synchronous=FULL）与 SQLiteConnection.PRAGMAS（WAL、synchronous=NORMAL 等）：
+- 写入/读取吞吐（ops/s）
+- 读取延迟 p50/p95（毫秒）
+- 报错次数（database is locked 等）
+
+用法:
+    python benchmark/bench_sqlite_concurrency.py [--writers 2] [--readers 4] [--seconds 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools import SQLiteConnection
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+
+# 改动前的设置：SQLite 默认的回滚日志和完整同步，5 秒锁等待（sqlite3 与 SQLAlchemy 的默认值）
+LEGACY_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000}
+ROWS = 2000
+
+
+def run(db: str, writers: int, readers: int, seconds: float) -> dict:
+    editor, inquire = DatabaseEditor(), DataInquire()
+    stop = threading.Event()
+    writes, latencies, errors = [0] * writers, [[] for _ in range(readers)], [0]
+
+    def write(index: int):
+        rng = random.Random(index)
+        while not stop.is_set():
+            ok, _ = editor.write(db, "t", str(rng.randrange(ROWS)), f"内容{rng.random()}")
+            if ok:
+                writes[index] += 1
+            else:
+                errors[0] += 1
+
+    def read(index: int):
+        rng = random.Random(100 + index)
+        while not stop.is_set():
+            ids = [str(rng.randrange(ROWS)) for _ in range(20)]
+            start = time.perf_counter()
+            result = inquire.database_table_data_batch(db, "t", ids)
+            if isinstance(result, dict):
+                latencies[index].append(time.perf_counter() - start)
+            else:
+                errors[0] += 1
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples = sorted(l for per_thread in latencies for l in per_thread)
+    return {
+        "writes": sum(writes) / seconds,
+        "reads": len(samples) / seconds,
+        "p50": statistics.median(samples) * 1000 if samples else float("nan"),
+        "p95": samples[int(len(samples) * 0.95) - 1] * 1000 if samples else float("nan"),
+        "errors": errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 读写并发基准测试")
+    parser.add_argument("--writers", type=int, default=2, help="写线程数")
+    parser.add_argument("--readers", type=int, default=4, help="读线程数")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每种设置的运行时间")
+    args = parser.parse_args()
+
+    tuned = SQLiteConnection.PRAGMAS
+    print(f"写线程 {args.writers}，读线程 {args.readers}，每种设置 {args.seconds} 秒")
+    print(f"{'设置':<10}{'写入(ops/s)':>14}{'读取(ops/s)':>14}{'读p50(ms)':>12}{'读p95(ms)':>12}{'报错':>6}")
+    for name, pragmas in (("默认", LEGACY_PRAGMAS), ("WAL", tuned)):
+        SQLiteConnection.PRAGMAS = pragmas
+        DatabaseRegistry.clear()
+        with tempfile.TemporaryDirectory() as tmp:
+            db = os.path.join(tmp, "bench.db")
+            editor = DatabaseEditor()
+            editor.connect(db)
+            editor.write_many(db, "t", [{"data_id": str(i), "content": "初始"} for i in range(ROWS)])
+            result = run(db, args.writers, args.readers, args.seconds)
+            DatabaseRegistry.release(db)
+        print(f"{name:<10}{result['writes']:>14.0f}{result['reads']:>14.0f}{result['p50']:>12.2f}{result['p95']:>12.2f}{result['errors']:>6}")
+    SQLiteConnection.PRAGMAS = tuned
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟的 OpenAI 兼容流式服务器（压测用）
+POST /chat/completions（以及 /v1/chat/completions）返回 SSE 流，片段格式模拟：
+- deepseek：先输出 reasoning_content（思考），再输出 content，最后一个 choices 为空的 usage 块
+- doubao：只输出 content，最后一个 choices 为空的 usage 块
+
+可配置首字延迟（TTFT）、输出速率（tokens/秒）、每次回复的 token 数，
+以及按比例注入工具调用（最后一条消息为用户提问时，以 tool_call_rate 的概率返回 add 工具调用）。
+
+用法:
+    python benchmark/fake_openai_server.py --shape deepseek --port 8765 --ttft 0.2 --rate 50
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class ServerConfig:
+    """模拟服务器配置"""
+    shape: str = "deepseek"        # 片段格式：deepseek / doubao
+    ttft: float = 0.2              # 首个片段前的延迟（秒）
+    rate: float = 50.0             # 输出速率（tokens/秒），<=0 表示不限速
+    tokens: int = 40               # 每次回复的 content token 数
+    thinking_tokens: int = 20      # 每次回复的思考 token 数（仅 deepseek）
+    tool_call_rate: float = 0.5    # 用户提问时返回工具调用的概率
+    seed: int = 0                  # 随机种子
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """处理 chat.completions 流式请求"""
+    protocol_version = "HTTP/1.1"
+    config: ServerConfig = ServerConfig()
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def log_message(self, format, *args):  # 关闭默认的访问日志
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = body.get("model", self.config.shape)
+        messages = body.get("messages", [])
+
+        with self.rng_lock:
+            inject = bool(messages) and messages[-1].get("role") == "user" and self.rng.random() < self.config.tool_call_rate
+            a, b = self.rng.randint(0, 100), self.rng.randint(0, 100)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{time.time_ns()}"
+        created = int(time.time())
+
+        def send(delta=None, finish_reason=None, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+                "usage": usage,
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        interval = 1.0 / self.config.rate if self.config.rate > 0 else 0.0
+        try:
+            time.sleep(self.config.ttft)
+            send({"role": "assistant", "content": "" if self.config.shape == "doubao" else None})
+            completion_tokens = 0
+
+            if self.config.shape == "deepseek":
+                for i in range(self.config.thinking_tokens):
+                    send({"content": None, "reasoning_content": f"思考{i}"})
+                    completion_tokens += 1
+                    time.sleep(interval)
+
+            if inject:
+                arguments = json.dumps({"a": a, "b": b})
+                send({"content": None, "tool_calls": [{"index": 0, "id": f"call_{completion_id}", "type": "function",
+                                                       "function": {"name": "add", "arguments": ""}}]})
+                for i in range(0, len(arguments), 4):
+                    send({"content": None, "tool_calls": [{"index": 0, "function": {"arguments": arguments[i:i + 4]}}]})
+                    completion_tokens += 1
+                    time.sleep(interval)
+                send({"content": None}, finish_reason="tool_calls")
+            else:
+                for i in range(self.config.tokens):
+                    send({"content": f"词{i}"})
+                    completion_tokens += 1
+                    time.sleep(interval)
+                send({"content": ""}, finish_reason="stop")
+
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 2
+            send(usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端提前断开
+
+
+class FakeOpenAIServer:
+    """
+    在后台线程中运行的模拟服务器
+
+    示例:
+        >>> with FakeOpenAIServer(ServerConfig(shape="doubao", ttft=0.1)) as server:
+        ...     factory = AIFactory(base_url=server.base_url)
+    """
+
+    def __init__(self, config: ServerConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or ServerConfig()
+        handler = type("Handler", (FakeOpenAIHandler,), {
+            "config": self.config,
+            "rng": random.Random(self.config.seed),
+            "rng_lock": threading.Lock(),
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def serve(config: ServerConfig, host: str, port: int, ready=None):
+    """在当前进程中运行服务器（供子进程调用），ready 为 multiprocessing 队列时回传地址"""
+    server = FakeOpenAIServer(config, host, port)
+    if ready is not None:
+        ready.put(server.base_url)
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模拟的 OpenAI 兼容流式服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for field, value in asdict(ServerConfig()).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    config = ServerConfig(**{field: getattr(args, field) for field in asdict(ServerConfig())})
+    print(f"模拟服务器: http://{args.host}:{args.port}/v1 {asdict(config)}")
+    serve(config, args.host, args.port)
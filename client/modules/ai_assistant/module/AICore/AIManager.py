@@ -51,10 +51,18 @@ class AIFactory:
         - role/role_B/: 知识模型的角色目录
     """
 
-    def __init__(self) -> None:
+    def __init__(self, role_dir: Optional[str] = None, base_url: Optional[str] = None) -> None:
         """
         初始化AI工厂
+
+        参数:
+            role_dir: 角色目录（包含 role_A/role_B 子目录），默认为模块自带的 role 目录；
+                      同一进程内运行多个会话时各自指定，避免共用同一份 history.json
+            base_url: 覆盖配置文件中的 base_url，用于本地代理或压测用的模拟服务器
         """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.role_dir = role_dir or os.path.join(script_dir, "role")  # 角色目录
+        self.base_url = base_url  # 覆盖的 base_url
         self.dialogue_ai = None  # 对话模型实例
         self.knowledge_ai = None  # 知识模型实例
         self.dialogue_ai_client = None  # 对话模型客户端
@@ -138,15 +146,24 @@ class AIFactory:
             ...     knowledge_model_name="qwen-turbo"
             ... )
         """
+        # 先创建两个模型适配器并在后台加载分词器，分词器加载与 openai 客户端的创建并行
         if dialogue_vendor and dialogue_model_name:
             # 提取模型参数
             dialogue_ai_message = self._compose_params(self._extract_key(dialogue_vendor), self._extract_params(dialogue_vendor, dialogue_model_name))
             # 调用模型(相对应的模型工厂函数)
             self.dialogue_ai = self.call_model(dialogue_vendor, dialogue_ai_message)
-            
+            self._preload_tokenizer(self.dialogue_ai)
+
+        if knowledge_vendor and knowledge_model_name:
+            # 提取模型参数
+            knowledge_ai_message = self._compose_params(self._extract_key(knowledge_vendor), self._extract_params(knowledge_vendor, knowledge_model_name))
+            # 调用模型(相对应的模型工厂函数)
+            self.knowledge_ai = self.call_model(knowledge_vendor, knowledge_ai_message)
+            self._preload_tokenizer(self.knowledge_ai)
+
+        if dialogue_vendor and dialogue_model_name:
             # 获取对话模型的角色目录路径
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            dialogue_history_path = os.path.join(script_dir, "role", "role_A")
+            dialogue_history_path = os.path.join(self.role_dir, "role_A")
             
             # 创建模型客户端
             self.dialogue_ai_client = OPEN_AI(
@@ -163,14 +180,8 @@ class AIFactory:
 
 
         if knowledge_vendor and knowledge_model_name:
-            # 提取模型参数
-            knowledge_ai_message = self._compose_params(self._extract_key(knowledge_vendor), self._extract_params(knowledge_vendor, knowledge_model_name))
-            # 调用模型(相对应的模型工厂函数)
-            self.knowledge_ai = self.call_model(knowledge_vendor, knowledge_ai_message)
-            
             # 获取知识模型的角色目录路径
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            knowledge_history_path = os.path.join(script_dir, "role", "role_B")
+            knowledge_history_path = os.path.join(self.role_dir, "role_B")
             
             # 创建模型客户端
             self.knowledge_ai_client = OPEN_AI(
@@ -184,6 +195,22 @@ class AIFactory:
                 role_path=knowledge_history_path  # 指定知识模型专用角色目录
             )  # 知识模型
             # 注：HistoryManager初始化时已自动加载assistant.json作为第一条消息
+
+    @staticmethod
+    def _preload_tokenizer(model: Any) -> None:
+        """在后台线程中加载模型的分词器（延迟加载的分词器才有 load_async）"""
+        tokenizer = getattr(model, "tokenizer", None)
+        if hasattr(tokenizer, "load_async"):
+            tokenizer.load_async()
+
+    def tokenizers(self) -> list:
+        """当前两个模型使用的分词器（共用时只返回一个），用于启动耗时分析"""
+        result = []
+        for model in (self.dialogue_ai, self.knowledge_ai):
+            tokenizer = getattr(model, "tokenizer", None)
+            if tokenizer is not None and all(tokenizer is not t for t in result):
+                result.append(tokenizer)
+        return result
  
     def _extract_params(self, vendor: str, model_name: str) -> Dict[str, Any]:
         """
@@ -276,6 +303,8 @@ class AIFactory:
         返回:
             组合后的参数字典，格式为 {"key": "...", "params": {...}}
         """
+        if self.base_url is not None:
+            params = dict(params, base_url=self.base_url)
         return {
             "key": key,
             "params": params
@@ -1,7 +1,7 @@
 # Kimi大模型API封装类（月之暗面 Moonshot AI）
 import json
 import time
-from transformers import AutoTokenizer
+from ..Tool.LazyTokenizer import LazyTokenizer
 
 class Kimi:
     """
@@ -77,14 +77,18 @@ class Kimi:
         # 获取tokenizer路径，Kimi没有公开的tokenizer，使用Qwen作为近似
         tokenizer_path = tokenizer_map.get(self.model, "Qwen/Qwen-7B-Chat")
         
-        # 加载tokenizer
-        print(f"正在加载 Kimi tokenizer: {tokenizer_path}")
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            tokenizer_path, 
-            trust_remote_code=True,
-            resume_download=True
-        )
-        print(f"✓ Tokenizer 加载成功")
+        # 加载tokenizer（第一次计算token时才导入transformers并加载，同一路径的tokenizer进程内共用）
+        def load_tokenizer():
+            from transformers import AutoTokenizer
+            print(f"正在加载 Kimi tokenizer: {tokenizer_path}")
+            tokenizer = AutoTokenizer.from_pretrained(
+                tokenizer_path,
+                trust_remote_code=True,
+                resume_download=True
+            )
+            print(f"✓ Tokenizer 加载成功")
+            return tokenizer
+        self.tokenizer = LazyTokenizer.shared(tokenizer_path, load_tokenizer)
 
         
     def set_api_key(self, api_key: str):
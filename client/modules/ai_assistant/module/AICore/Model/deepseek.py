@@ -1,7 +1,7 @@
 # 深度求索大模型API封装类
 import json
 import os
-from transformers import AutoTokenizer
+from ..Tool.LazyTokenizer import LazyTokenizer
 
 class DeepSeek:
     def __init__(self, message: dict):
@@ -49,13 +49,17 @@ class DeepSeek:
         os.makedirs(cache_dir, exist_ok=True)
 
         # 加载tokenizer（只使用本地缓存，不联网下载，并指定缓存目录）
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            tokenizer_path,
-            trust_remote_code=True,
-            resume_download=True,
-            local_files_only=True,
-            cache_dir=cache_dir
-        )
+        # 第一次计算token时才导入transformers并加载，同一路径的tokenizer进程内共用
+        def load_tokenizer():
+            from transformers import AutoTokenizer
+            return AutoTokenizer.from_pretrained(
+                tokenizer_path,
+                trust_remote_code=True,
+                resume_download=True,
+                local_files_only=True,
+                cache_dir=cache_dir
+            )
+        self.tokenizer = LazyTokenizer.shared(tokenizer_path, load_tokenizer)
 
         
     def set_api_key(self, api_key: str):
@@ -1,6 +1,6 @@
 # 豆包大模型API封装类（字节跳动）
 import json
-import tiktoken
+from ..Tool.LazyTokenizer import LazyTokenizer
 
 class Doubao:
     def __init__(self, message: dict):
@@ -29,13 +29,18 @@ class Doubao:
 
         # 豆包模型兼容OpenAI接口，使用tiktoken进行token计算
         # 根据官方文档，豆包使用cl100k_base编码器（与OpenAI的GPT-3.5/4相同）
-        try:
-            print(f"正在加载 Doubao tokenizer (cl100k_base)...")
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
-            print(f"✓ Tokenizer 加载成功")
-        except Exception as e:
-            print(f"警告：无法加载tiktoken，将回退到字符计数估算。错误: {e}")
-            self.tokenizer = None
+        # 第一次计算token时才加载（cl100k_base词表首次使用需要下载），加载失败时为None
+        def load_tokenizer():
+            try:
+                import tiktoken
+                print(f"正在加载 Doubao tokenizer (cl100k_base)...")
+                tokenizer = tiktoken.get_encoding("cl100k_base")
+                print(f"✓ Tokenizer 加载成功")
+                return tokenizer
+            except Exception as e:
+                print(f"警告：无法加载tiktoken，将回退到字符计数估算。错误: {e}")
+                return None
+        self.tokenizer = LazyTokenizer.shared("tiktoken:cl100k_base", load_tokenizer)
         
     def set_api_key(self, api_key: str):
         self.api_key = api_key
@@ -204,9 +209,10 @@ class Doubao:
         if not content:
             return 0
         
-        if self.tokenizer:
+        tokenizer = self.tokenizer.load()
+        if tokenizer:
             # 使用tiktoken计算（精确）
-            return len(self.tokenizer.encode(content))
+            return len(tokenizer.encode(content))
         else:
             # 回退方案：简单估算
             # 统计中文字符和其他字符
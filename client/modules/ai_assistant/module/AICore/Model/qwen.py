@@ -1,6 +1,6 @@
 # 通义千问大模型API封装类
 import json
-from transformers import AutoTokenizer
+from ..Tool.LazyTokenizer import LazyTokenizer
 
 class Qwen:
     def __init__(self, message: dict):
@@ -24,7 +24,11 @@ class Qwen:
         }
         # 如果model在映射表中，使用映射的路径；否则假定model本身就是HuggingFace路径
         tokenizer_path = tokenizer_map.get(self.model, "Qwen/Qwen-7B-Chat")
-        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path, trust_remote_code=True)
+        # 第一次计算token时才导入transformers并加载，同一路径的tokenizer进程内共用
+        def load_tokenizer():
+            from transformers import AutoTokenizer
+            return AutoTokenizer.from_pretrained(tokenizer_path, trust_remote_code=True)
+        self.tokenizer = LazyTokenizer.shared(tokenizer_path, load_tokenizer)
 
 
 
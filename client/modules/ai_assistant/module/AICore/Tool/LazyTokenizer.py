@@ -0,0 +1,94 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyTokenizer:
+    """
+    延迟加载的分词器
+
+    第一次使用（encode 或 load）时才调用 loader 导入 transformers/tiktoken 并读取词表，
+    导入模型模块、创建模型对象时不再包含这部分耗时。load 线程安全，只加载一次；
+    load_async 在后台线程提前加载，之后的 encode 等待其完成。
+
+    同一 key 的分词器通过 shared 在进程内共用（对话模型和知识模型使用同一分词器时只加载一次）。
+
+    参数:
+        key: 分词器标识（如 HuggingFace 路径）
+        loader: 无参函数，返回分词器对象；返回 None 表示不可用（由调用方回退）
+
+    示例:
+        >>> tokenizer = LazyTokenizer.shared("Qwen/Qwen-7B-Chat", load)
+        >>> tokenizer.load_async()  # 后台加载
+        >>> len(tokenizer.encode("你好"))
+    """
+    _instances: Dict[str, "LazyTokenizer"] = {} # key -> 共用的实例
+    _instances_lock = threading.Lock()
+
+    def __init__(self, key: str, loader: Callable[[], Any]):
+        self.key = key # 分词器标识
+        self._loader = loader # 加载函数
+        self._lock = threading.Lock() # 加载锁
+        self._tokenizer = None # 加载后的分词器
+        self._error = None # 加载失败的异常，之后每次使用都重新抛出
+        self._loaded = False # 是否已加载（成功或失败）
+        self._thread = None # 后台加载线程
+        self.started = None # 加载开始时刻（time.perf_counter）
+        self.finished = None # 加载结束时刻
+        self.thread_name = None # 执行加载的线程名
+
+    @classmethod
+    def shared(cls, key: str, loader: Callable[[], Any]) -> "LazyTokenizer":
+        """返回 key 对应的共用实例，不存在时用 loader 创建"""
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls(key, loader)
+            return instance
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def load_time(self) -> Optional[float]:
+        """加载耗时（秒），未加载时为 None"""
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def load(self) -> Any:
+        """加载并返回分词器；已加载时直接返回，加载失败时抛出加载时的异常"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.started = time.perf_counter()
+                    self.thread_name = threading.current_thread().name
+                    try:
+                        self._tokenizer = self._loader()
+                    except Exception as e:
+                        self._error = e
+                    finally:
+                        self.finished = time.perf_counter()
+                        self._loaded = True
+        if self._error is not None:
+            raise self._error
+        return self._tokenizer
+
+    def load_async(self) -> "LazyTokenizer":
+        """在后台线程中加载（已加载或正在加载时不重复启动），失败在下次使用时抛出"""
+        with self._lock:
+            if self._loaded or self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._load_quietly, name=f"tokenizer-{self.key}", daemon=True)
+            self._thread.start()
+        return self
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            pass
+
+    def encode(self, *args, **kwargs):
+        return self.load().encode(*args, **kwargs)
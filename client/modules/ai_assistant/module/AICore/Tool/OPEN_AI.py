@@ -1,4 +1,3 @@
-from openai import OpenAI
 from typing import Callable
 import json
 import os
@@ -78,6 +77,7 @@ class OPEN_AI:
         
         self._get_upload_params_callback = get_upload_params_callback # 生成上传参数的回调函数
 
+        from openai import OpenAI # 在创建客户端时才导入（导入耗时约 0.5 秒），导入 AIManager 时不加载 openai
         self._client = OpenAI(**self._request_params) # 创建客户端
 
         self._history = HistoryManager(
@@ -350,6 +350,7 @@ class OPEN_AI:
         # 分离 content 和 thinking 的累积
         full_response = ""  # 普通回复内容
         full_thinking = ""  # 思考过程内容
+        stream = None  # 流式响应对象
 
         try:
             # 调用 chat.completions.create 获取流式响应
@@ -419,6 +420,10 @@ class OPEN_AI:
                 except:
                     pass
             raise RuntimeError(f"调用 OpenAI API 流式接口时发生错误: {e}")
+        finally:
+            # 生成器被提前关闭（如异步 Agent 取消本轮）时，同时关闭底层 HTTP 流
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
 
         # 保存完整的 AI 回答到历史（包括 reasoning_content）
         # 注意：只有当 full_response 不为空时才保存（content 字段不能为空）
@@ -8,9 +8,11 @@
 
 # 导入 OPEN_AI 客户端
 from .OPEN_AI import OPEN_AI
+from .LazyTokenizer import LazyTokenizer
 # 导出所有可用的类
 __all__ = [
     'OPEN_AI',
+    'LazyTokenizer',
 ]
 
 # 版本信息
@@ -5,12 +5,18 @@
 """
 import json
 import time
-from typing import Callable, Any
+from typing import Callable, Any, Optional
 import asyncio
 
 import logging
 from typing import List, Dict, Any, Generator, Tuple
 from enum import Enum
+
+from .ResultCompactor import ResultCompactor
+
+# 状态机解析其结果（json.loads）的分类/规划工具，结果不压缩
+STATE_TOOLS = {"exit_task", "plan_task", "generate_todo_list", "need_intervention", "no_intervention"}
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -45,10 +51,17 @@ Agent
         knowledge_callback: Callable[[str], Any],
 
         mcp_client_add_task_callback: Callable[[dict], Any],
-        mcp_client_execute_task_callback: Callable[[dict], Any]
+        mcp_client_execute_task_callback: Callable[[dict], Any],
+        result_compactor: Optional[ResultCompactor] = None,
+        mcp_client_add_batch_callback: Optional[Callable[[list], list]] = None
     ):
         """
         初始化简化对话处理器
+
+        参数:
+            result_compactor: 可选，工具结果压缩器；设置后工具结果在回传给模型前先压缩
+            mcp_client_add_batch_callback: 可选，批量添加任务的回调函数（如 MCPClient.add_batch），
+                                           多个工具调用同时就绪时合并为一次请求
         """
         self.dialogue_callback = dialogue_callback  # 对话模型回调函数
         self.knowledge_callback = knowledge_callback  # 知识模型回调函数
@@ -56,6 +69,11 @@ Agent
 
         self.mcp_client_add_task_callback = mcp_client_add_task_callback  # MCP 客户端添加任务回调函数
         self.mcp_client_execute_task_callback = mcp_client_execute_task_callback  # MCP 客户端获取结果回调函数
+        self.mcp_client_add_batch_callback = mcp_client_add_batch_callback  # MCP 客户端批量添加任务回调函数
+
+        self.result_compactor = result_compactor  # 工具结果压缩器
+        self.last_turn_stats = None  # 上一轮的结果压缩统计
+        self.last_turn_tools = []  # 上一轮按顺序执行的工具名（供快速路由记录训练数据）
 
 
     def run(self, user_input: str):
@@ -66,6 +84,14 @@ Agent
         - 对话模型会不断评估当前状态，决定下一步行动
         - 直到任务完成或用户结束对话
         """
+        self._begin_turn()
+        try:
+            self._run(user_input)
+        finally:
+            self._end_turn()
+
+    def _run(self, user_input: str):
+        """对话循环的状态流转"""
         state = State.IDLE #初始化状态为空闲状态
 
         buffer = None #初始化缓冲区为空
@@ -297,14 +323,21 @@ Agent
         """
         # 第一步：批量提交所有工具调用任务
         task_ids = [] #创建任务ID列表
-        for tool in merged_tools:#遍历合并后的工具调用列表
-            task_id = self.mcp_client_add_task_callback(tool)#添加任务
-            task_ids.append(task_id)#添加任务ID
-            print(f"[OK] 已添加任务: {tool['function']['name']}")#打印添加任务信息
+        if self.mcp_client_add_batch_callback is not None and len(merged_tools) > 1:
+            task_ids = list(self.mcp_client_add_batch_callback(merged_tools))#多个调用合并为一次批量请求
+            for tool in merged_tools:
+                self.last_turn_tools.append(tool['function']['name'])#记录工具名
+                print(f"[OK] 已添加任务: {tool['function']['name']}")#打印添加任务信息
+        else:
+            for tool in merged_tools:#遍历合并后的工具调用列表
+                self.last_turn_tools.append(tool['function']['name'])#记录工具名
+                task_id = self.mcp_client_add_task_callback(tool)#添加任务
+                task_ids.append(task_id)#添加任务ID
+                print(f"[OK] 已添加任务: {tool['function']['name']}")#打印添加任务信息
 
         # 第二步：批量获取所有任务的执行结果
         tool_results = []#创建工具执行结果列表
-        for task_id in task_ids:
+        for task_id, tool in zip(task_ids, merged_tools):
             result = self.mcp_client_execute_task_callback(task_id)#获取任务执行结果
 
             # 打印详细的执行结果信息（用于调试）
@@ -318,16 +351,75 @@ Agent
                 print(f"[WARNING] 工具执行出错: {result.content}")#打印工具执行出错信息
 
             # 提取工具结果的文本内容
-            if result.content:#如果内容不为空
-                # result.content 是一个列表，包含 TextContent 对象
-                # 需要提取第一个 TextContent 对象的 text 属性
-                if isinstance(result.content, list) and len(result.content) > 0:
-                    # 如果是 TextContent 对象，提取 text 属性
-                    if hasattr(result.content[0], 'text'):
-                        tool_results.append(result.content[0].text)
-                    else:
-                        tool_results.append(str(result.content[0]))
-                else:
-                    tool_results.append(str(result.content))#添加工具执行结果
+            text = self.result_text(result)
+            if text is not None:
+                tool_results.append(self.compact(text, tool['function']['name']))#添加工具执行结果（按需压缩）
+
+        return tool_results#返回工具执行结果列表
+
+    #  ================================================压缩工具结果================================================
+    def compact(self, text: str, tool_name: str = "") -> str:
+        """
+        工具结果回传给模型前的压缩阶段，未设置压缩器时原样返回
 
-        return tool_results#返回工具执行结果列表
\ No newline at end of file
+        参数:
+            text: 工具结果文本
+            tool_name: 工具名称
+
+        返回:
+            压缩后的文本
+        """
+        if self.result_compactor is None or self.is_state_tool(tool_name):
+            return text
+        return self.result_compactor.compact(text, tool_name)
+
+    @staticmethod
+    def is_state_tool(tool_name: str) -> bool:
+        """是否为状态机解析结果的工具（也匹配 MCPManager 带命名空间的名字，如 server__plan_task）"""
+        return tool_name in STATE_TOOLS or tool_name.rsplit("__", 1)[-1] in STATE_TOOLS
+
+    def get_full_result(self, handle: str) -> Optional[str]:
+        """根据压缩结果中的句柄取回完整的工具结果"""
+        if self.result_compactor is None:
+            return None
+        return self.result_compactor.get(handle)
+
+    def _begin_turn(self):
+        """开始一轮对话：重置压缩统计和工具记录"""
+        self.last_turn_tools = []
+        if self.result_compactor is not None:
+            self.result_compactor.begin_turn()
+
+    def _end_turn(self):
+        """结束一轮对话：记录本轮压缩节省的 token 数"""
+        if self.result_compactor is None:
+            return
+        self.last_turn_stats = self.result_compactor.turn_stats()
+        if self.last_turn_stats["compacted"]:
+            logger.info(
+                f"本轮压缩了 {self.last_turn_stats['compacted']}/{self.last_turn_stats['results']} 个工具结果，"
+                f"节省约 {self.last_turn_stats['saved_tokens']} tokens"
+            )
+
+    #  ================================================提取工具结果文本================================================
+    @staticmethod
+    def result_text(result) -> Any:
+        """
+        提取MCP工具调用结果（CallToolResult）中的文本内容
+
+        参数:
+            result: MCP客户端返回的工具调用结果
+
+        返回:
+            结果文本；如果结果没有内容则返回 None
+        """
+        if not result.content:#如果内容为空
+            return None
+        # result.content 是一个列表，包含 TextContent 对象
+        # 需要提取第一个 TextContent 对象的 text 属性
+        if isinstance(result.content, list) and len(result.content) > 0:
+            # 如果是 TextContent 对象，提取 text 属性
+            if hasattr(result.content[0], 'text'):
+                return result.content[0].text
+            return str(result.content[0])
+        return str(result.content)
\ No newline at end of file
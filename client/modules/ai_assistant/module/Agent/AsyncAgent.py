@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+"""
+异步对话处理器
+Agent 状态机的 asyncio 版本：
+- 通过异步迭代器产出类型化事件（内容增量、思考增量、工具开始/结束、状态切换）
+- 支持协作式取消：中断进行中的 LLM 流式输出和尚未返回的 MCP 调用
+- 支持单轮截止时间，便于一个进程同时驱动多个并发的 Agent
+"""
+import json
+import time
+import asyncio
+import threading
+import concurrent.futures
+import logging
+from enum import Enum
+from dataclasses import dataclass, field
+from typing import Callable, Any, Optional, List, Dict, AsyncIterator
+
+from .Agent import Agent, State
+from .ResultCompactor import ResultCompactor
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 流结束标记
+_STREAM_END = object()
+
+# 轮询 MCP 结果时每次阻塞等待的时长（秒）
+_RESULT_POLL_INTERVAL = 0.1
+
+
+class EventType(Enum):
+    """
+    事件类型枚举：定义异步状态机对外产出的所有事件
+    """
+    STATE_CHANGE = "state_change"        #状态切换，data 为 {"from": State, "to": State}
+    CONTENT_DELTA = "content_delta"      #模型输出的文本片段，data 为字符串
+    THINKING_DELTA = "thinking_delta"    #模型思考过程片段，data 为字符串
+    TOOL_START = "tool_start"            #工具开始执行，data 为 {"task_id", "name", "arguments"}
+    TOOL_END = "tool_end"                #工具执行结束，data 为 {"task_id", "name", "result", "is_error"}
+    TURN_END = "turn_end"                #本轮结束，data 为 {"reason": "done"/"cancelled"/"timeout"/"error", "compaction": 压缩统计, ...}
+
+
+@dataclass
+class AgentEvent:
+    """
+    异步状态机产出的事件
+
+    属性:
+        type: 事件类型
+        data: 事件数据，格式由事件类型决定
+        timestamp: 事件产生时间（time.monotonic）
+    """
+    type: EventType
+    data: Any = None
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+class TurnCancelledError(Exception):
+    """本轮对话被取消"""
+
+
+class TurnTimeoutError(TimeoutError):
+    """本轮对话超过截止时间"""
+
+
+class _Turn:
+    """
+    单轮对话的运行上下文：记录取消标记与截止时间
+
+    取消标记同时提供线程安全的 threading.Event（供桥接线程检查）
+    和 asyncio.Event（供事件循环等待），cancel() 可在任意线程调用。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, timeout: Optional[float]):
+        self.loop = loop
+        self.deadline = loop.time() + timeout if timeout else None
+        self.cancelled = threading.Event()
+        self._cancelled_async = asyncio.Event()
+
+    def cancel(self):
+        """标记取消（线程安全）"""
+        self.cancelled.set()
+        try:
+            self.loop.call_soon_threadsafe(self._cancelled_async.set)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    def remaining(self) -> Optional[float]:
+        """距离截止时间的剩余秒数，None 表示不限时"""
+        if self.deadline is None:
+            return None
+        return self.deadline - self.loop.time()
+
+    def check(self):
+        """检查是否已取消或超时，是则抛出对应异常"""
+        if self.cancelled.is_set():
+            raise TurnCancelledError("对话已取消")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise TurnTimeoutError("对话超过截止时间")
+
+    async def wait(self, awaitable):
+        """
+        等待一个可等待对象，期间响应取消与截止时间
+
+        参数:
+            awaitable: 协程或 Future
+
+        返回:
+            awaitable 的结果
+
+        异常:
+            TurnCancelledError: 等待期间被取消
+            TurnTimeoutError: 等待期间超过截止时间
+        """
+        self.check()
+        task = asyncio.ensure_future(awaitable)
+        cancel_waiter = asyncio.ensure_future(self._cancelled_async.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {task, cancel_waiter},
+                timeout=self.remaining(),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            cancel_waiter.cancel()
+        if task in done:
+            return task.result()
+        task.cancel()
+        self.check()
+        raise TurnTimeoutError("对话超过截止时间")
+
+
+class AsyncAgent(Agent):
+    """
+    异步对话处理器
+
+    与 Agent 使用相同的状态流转，区别在于：
+    1. stream() 是异步迭代器，边执行边产出 AgentEvent，不再直接打印到标准输出
+    2. cancel() 可随时中断当前轮次（LLM 流与未完成的 MCP 调用一并放弃）
+    3. turn_timeout 为每轮设置截止时间
+
+    模型回调既可以返回同步生成器（AIFactory 的回调），也可以返回异步生成器；
+    同步生成器会在后台线程中迭代，不会阻塞事件循环。
+
+    示例:
+        >>> agent = AsyncAgent(factory.dialogue_callback, factory.knowledge_callback,
+        ...                    mcp_client.add, mcp_client.get_result, turn_timeout=120)
+        >>> async for event in agent.stream("你好"):
+        ...     if event.type == EventType.CONTENT_DELTA:
+        ...         print(event.data, end="")
+    """
+
+    def __init__(
+        self,
+        dialogue_callback: Callable[[str], Any],
+        knowledge_callback: Callable[[str], Any],
+
+        mcp_client_add_task_callback: Callable[[dict], Any],
+        mcp_client_execute_task_callback: Callable[[dict], Any],
+        mcp_client_cancel_task_callback: Optional[Callable[[Any], Any]] = None,
+        turn_timeout: Optional[float] = None,
+        result_compactor: Optional[ResultCompactor] = None
+    ):
+        """
+        初始化异步对话处理器
+
+        参数:
+            mcp_client_cancel_task_callback: 可选，取消MCP任务的回调函数，取消本轮时对未完成任务调用
+            turn_timeout: 每轮对话的默认截止时间（秒），None 表示不限时
+        """
+        super().__init__(
+            dialogue_callback=dialogue_callback,
+            knowledge_callback=knowledge_callback,
+            mcp_client_add_task_callback=mcp_client_add_task_callback,
+            mcp_client_execute_task_callback=mcp_client_execute_task_callback,
+            result_compactor=result_compactor
+        )
+        self.mcp_client_cancel_task_callback = mcp_client_cancel_task_callback  # MCP 客户端取消任务回调函数
+        self.turn_timeout = turn_timeout  # 每轮对话的默认截止时间
+        self._turn: Optional[_Turn] = None  # 当前轮次上下文
+
+    # ==================== 取消 ====================
+    def cancel(self):
+        """取消当前轮次（线程安全，没有进行中的轮次时无操作）"""
+        turn = self._turn
+        if turn is not None:
+            turn.cancel()
+
+    # ==================== 运行（收集文本） ====================
+    async def run_async(self, user_input: str, timeout: Optional[float] = None) -> str:
+        """
+        运行一轮对话并返回模型输出的全部文本
+
+        参数:
+            user_input: 用户输入
+            timeout: 本轮截止时间（秒），默认使用 turn_timeout
+
+        返回:
+            本轮模型输出的文本内容
+
+        异常:
+            TurnCancelledError: 本轮被取消
+            TurnTimeoutError: 本轮超时
+        """
+        text = ""
+        async for event in self.stream(user_input, timeout=timeout):
+            if event.type == EventType.CONTENT_DELTA:
+                text += event.data
+            elif event.type == EventType.TURN_END:
+                reason = event.data.get("reason")
+                if reason == "cancelled":
+                    raise TurnCancelledError("对话已取消")
+                if reason == "timeout":
+                    raise TurnTimeoutError("对话超过截止时间")
+                if reason == "error":
+                    raise event.data["error"]
+        return text
+
+    # ==================== 运行（事件流） ====================
+    async def stream(self, user_input: str, timeout: Optional[float] = None) -> AsyncIterator[AgentEvent]:
+        """
+        运行一轮对话，以异步迭代器的形式产出事件
+
+        无论正常结束、取消、超时还是出错，最后一个事件总是 TURN_END。
+
+        参数:
+            user_input: 用户输入
+            timeout: 本轮截止时间（秒），默认使用 turn_timeout
+        """
+        if self._turn is not None:
+            raise RuntimeError("该 Agent 已有进行中的对话轮次")
+
+        turn = _Turn(asyncio.get_running_loop(), timeout if timeout is not None else self.turn_timeout)
+        self._turn = turn
+        pending = []  # 已提交但尚未取回结果的 MCP 任务
+        reason, error = "done", None
+        self._begin_turn()
+        try:
+            async for event in self._state_machine(user_input, turn, pending):
+                yield event
+        except TurnCancelledError:
+            reason = "cancelled"
+        except TurnTimeoutError:
+            reason = "timeout"
+        except Exception as e:
+            logger.exception("异步对话处理出错")
+            reason, error = "error", e
+        finally:
+            self._turn = None
+            if pending:
+                self._cancel_pending(pending)
+            self._end_turn()
+
+        data = {"reason": reason}
+        if self.last_turn_stats is not None:
+            data["compaction"] = self.last_turn_stats
+        if error is not None:
+            data["error"] = error
+        yield AgentEvent(EventType.TURN_END, data)
+
+    # ==================== 状态机 ====================
+    async def _state_machine(self, user_input: str, turn: _Turn, pending: list) -> AsyncIterator[AgentEvent]:
+        """与 Agent.run 相同的状态流转，每一步产出对应事件"""
+        state = State.IDLE #初始化状态为空闲状态
+        buffer = None #初始化缓冲区为空
+        yield AgentEvent(EventType.STATE_CHANGE, {"from": None, "to": state})
+
+        while True:
+            previous = state
+            match state:
+              case State.IDLE:
+                out = {}
+                async for event in self._gather_async(lambda: self.dialogue_callback(user_input), turn, out):
+                  yield event
+                response, tool_calls = out["response"], out["tool_calls"]
+
+                if len(response) > 0 :  #模型已经回答了问题，结束本轮对话
+                  state = State.ENDING
+                if len(tool_calls) > 0 :  #模型调用了工具
+                  results = []
+                  async for event in self._execute_async(self.merge(tool_calls), turn, pending, results):
+                    yield event
+
+                  if len(results) > 0:
+                    try:
+                      result_data = json.loads(results[0])
+                      task_type = result_data.get("task_type", "")
+                      if task_type == "PLAN":
+                        buffer = result_data.get("description", "")
+                        state = State.COMPLEX_TASK_PLANNING
+                      elif task_type == "EXIT":
+                        return
+                      else:
+                        async for event in self._gather_async(
+                            lambda: self.dialogue_callback(problem=str(results), role="system"), turn, {}):
+                          yield event
+                        return
+                    except json.JSONDecodeError:
+                      state = State.ENDING
+                  else:
+                    state = State.ENDING
+
+              case State.ENDING:
+                return
+
+              case State.COMPLEX_TASK_PLANNING:
+                message = f"""
+                请根据对话模型提供的规划，判断是否要介入,如果觉得需要介入，则强制调用工具generate_todo_list
+                数据：{buffer}
+                """
+                out = {}
+                async for event in self._gather_async(lambda: self.knowledge_callback(message), turn, out):
+                  yield event
+                if out["tool_calls"]:
+                  buffer = out["tool_calls"]
+                  state = State.MODEL_B_JUDGING
+                else:
+                  state = State.MODEL_A_SUMMARIZING
+
+              case State.MODEL_B_JUDGING:
+                tool_results = []
+                async for event in self._execute_async(self.merge(buffer), turn, pending, tool_results):
+                  yield event
+
+                if tool_results:
+                  try:
+                    todo_data = json.loads(tool_results[0])
+                    todo_list = todo_data.get("todo_list", [])
+
+                    all_results = []
+                    for todo_item in todo_list:
+                      message = f"请完成以下任务：{todo_item}"
+                      out = {}
+                      async for event in self._gather_async(lambda: self.knowledge_callback(message), turn, out):
+                        yield event
+
+                      if out["tool_calls"]:
+                        item_results = []
+                        async for event in self._execute_async(self.merge(out["tool_calls"]), turn, pending, item_results):
+                          yield event
+                        all_results.extend(item_results)
+
+                      if out["response"]:
+                        all_results.append(out["response"])
+
+                    buffer = "\n".join(all_results) if all_results else ""
+                  except json.JSONDecodeError:
+                    buffer = "\n".join(tool_results)
+                else:
+                  buffer = ""
+
+                state = State.MODEL_A_SUMMARIZING
+
+              case State.MODEL_A_SUMMARIZING:
+                message = f"""
+                用户问题：{user_input}
+                知识模型收集的数据：{buffer if buffer else "无"}
+
+                请基于以上信息，生成并执行TODO列表来完成用户的任务。
+                """
+                out = {}
+                async for event in self._gather_async(lambda: self.dialogue_callback(message), turn, out):
+                  yield event
+
+                if out["tool_calls"]:
+                  tool_results = []
+                  async for event in self._execute_async(self.merge(out["tool_calls"]), turn, pending, tool_results):
+                    yield event
+                  buffer = "\n".join(tool_results) if tool_results else ""
+
+                state = State.IDLE
+
+            if state != previous:
+              yield AgentEvent(EventType.STATE_CHANGE, {"from": previous, "to": state})
+
+    # ==================== 流式响应 ====================
+    async def _gather_async(self, stream_factory: Callable[[], Any], turn: _Turn, out: Dict[str, Any]) -> AsyncIterator[AgentEvent]:
+        """
+        gather 的异步版本：逐块产出内容/思考事件，并把完整文本和工具调用碎片写入 out
+
+        参数:
+            stream_factory: 无参函数，调用后返回模型的流式响应（同步或异步生成器）
+            turn: 当前轮次上下文
+            out: 输出字典，结束后包含 "response" 和 "tool_calls"
+        """
+        out["response"] = ""
+        out["tool_calls"] = []
+        async for chunk in self._iterate_stream(stream_factory(), turn):
+            chunk_type = list(chunk.keys())[0] if chunk else "None"
+            content = chunk.get(chunk_type)
+
+            if chunk_type == "content":
+                out["response"] += content
+                yield AgentEvent(EventType.CONTENT_DELTA, content)
+            elif chunk_type == "thinking":
+                yield AgentEvent(EventType.THINKING_DELTA, content)
+            elif chunk_type == "tool_calls":
+                out["tool_calls"].append(content[0])
+
+    async def _iterate_stream(self, response: Any, turn: _Turn) -> AsyncIterator[dict]:
+        """
+        把模型回调返回的流式响应桥接为异步迭代器
+
+        异步生成器直接迭代；同步生成器在后台线程中迭代，数据块通过
+        call_soon_threadsafe 投递回事件循环。取消或超时后不再等待后台线程，
+        后台线程在拿到下一个数据块时关闭生成器，从而中断底层的 HTTP 流。
+        """
+        if hasattr(response, "__anext__"):
+            try:
+                while True:
+                    try:
+                        chunk = await turn.wait(response.__anext__())
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+            finally:
+                await response.aclose()
+
+        loop = turn.loop
+        chunks: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()  # 调用方提前退出时通知后台线程停止
+
+        def post(item):
+            try:
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+
+        def producer():
+            try:
+                for chunk in response:
+                    if stop.is_set() or turn.cancelled.is_set():
+                        break
+                    post((chunk, None))
+            except Exception as e:
+                post((None, e))
+            finally:
+                if hasattr(response, "close"):
+                    response.close()
+                post((_STREAM_END, None))
+
+        threading.Thread(target=producer, daemon=True).start()
+        try:
+            while True:
+                chunk, error = await turn.wait(chunks.get())
+                if error is not None:
+                    raise error
+                if chunk is _STREAM_END:
+                    return
+                yield chunk
+        finally:
+            stop.set()
+
+    # ==================== 执行工具 ====================
+    async def _execute_async(self, merged_tools: List[Dict[str, Any]], turn: _Turn, pending: list, out: List[str]) -> AsyncIterator[AgentEvent]:
+        """
+        execute 的异步版本：先批量提交全部工具调用，再依次等待结果
+
+        参数:
+            merged_tools: 合并后的完整工具调用列表
+            turn: 当前轮次上下文
+            pending: 未完成任务列表，取消时据此放弃剩余任务
+            out: 输出列表，写入每个工具结果的文本
+        """
+        submitted = []
+        for tool in merged_tools:
+            turn.check()
+            self.last_turn_tools.append(tool["function"]["name"])
+            task_id = self.mcp_client_add_task_callback(tool)
+            pending.append(task_id)
+            submitted.append((task_id, tool))
+            yield AgentEvent(EventType.TOOL_START, {
+                "task_id": task_id,
+                "name": tool["function"]["name"],
+                "arguments": tool["function"].get("arguments", "")
+            })
+
+        for task_id, tool in submitted:
+            result = await self._await_result(task_id, turn)
+            pending.remove(task_id)
+            text = self.result_text(result)
+            if text is not None:
+                text = self.compact(text, tool["function"]["name"])
+                out.append(text)
+            yield AgentEvent(EventType.TOOL_END, {
+                "task_id": task_id,
+                "name": tool["function"]["name"],
+                "result": text,
+                "is_error": bool(getattr(result, "isError", False))
+            })
+
+    async def _await_result(self, task_id: Any, turn: _Turn) -> Any:
+        """
+        等待单个MCP任务的结果，期间响应取消与截止时间
+
+        add 返回 concurrent.futures.Future（如 MCPClient 的 TaskFuture）时直接在事件循环中等待它完成，
+        再以非阻塞方式取回结果；否则结果回调是阻塞接口，以较短的超时分片在线程中等待，
+        每个分片结束后重新检查取消标记与截止时间。
+        """
+        if isinstance(task_id, concurrent.futures.Future):
+            await turn.wait(asyncio.wrap_future(task_id))
+            return self.mcp_client_execute_task_callback(task_id, False)
+        while True:
+            remaining = turn.remaining()
+            interval = _RESULT_POLL_INTERVAL if remaining is None else max(0.0, min(_RESULT_POLL_INTERVAL, remaining))
+            try:
+                return await turn.wait(asyncio.to_thread(
+                    self.mcp_client_execute_task_callback, task_id, True, interval))
+            except TimeoutError as e:
+                if isinstance(e, TurnTimeoutError):
+                    raise
+
+    def _cancel_pending(self, pending: list):
+        """放弃本轮尚未完成的MCP任务"""
+        for task_id in list(pending):
+            try:
+                if self.mcp_client_cancel_task_callback is not None:
+                    self.mcp_client_cancel_task_callback(task_id)
+                elif hasattr(task_id, "cancel"):
+                    task_id.cancel()
+            except Exception as e:
+                logger.warning(f"取消MCP任务失败: {e}")
+        pending.clear()
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+"""
+本地快速路由
+在 Agent.run 之前对用户输入做一次本地判断，简单的轮次不再调用模型：
+- 退出指令（与 EXIT_WORDS 完全匹配："退出"、"exit"、"quit"）
+- 直接的四则运算（"1+2"、"3乘以4"、"根号16"）
+- 能从输入中直接提取参数的单工具意图（通过 register_extractor 注册）
+
+规则优先；规则未命中时可以用一个小型 TF-IDF + 线性（softmax 回归）分类器做门控，
+分类器从历史轮次日志训练，只在判定为注册了参数提取函数的工具时生效。其余输入全部交给原有的 Agent 流程。
+"""
+import os
+import re
+import ast
+import json
+import math
+import time
+import random
+import operator
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Any, Optional, List, Dict, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 意图标签
+INTENT_EXIT = "exit"   #退出
+INTENT_MATH = "math"   #四则运算
+INTENT_LLM = "llm"     #交给模型
+
+# 退出指令（只有完全匹配才退出，分类器不会判定退出）
+EXIT_WORDS = {"exit", "quit", "退出"}
+
+# 数学工具名 -> AST 运算符
+MATH_TOOLS = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+    ast.Pow: "power",
+}
+
+# 本地计算允许的运算
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+}
+
+# 中文运算词 -> 运算符（按长度排序，长词先替换，避免"开根号"被"根号"、"除以"被"除"先替换）
+_MATH_WORDS = sorted([
+    ("平方根", "sqrt("), ("开根号", "sqrt("), ("根号", "sqrt("),
+    ("乘以", "*"), ("除以", "/"), ("的次方", ""), ("次方", ""),
+    ("加上", "+"), ("减去", "-"), ("加", "+"), ("减", "-"), ("乘", "*"), ("除", "/"),
+    ("×", "*"), ("÷", "/"), ("＋", "+"), ("－", "-"), ("（", "("), ("）", ")"), ("^", "**"),
+], key=lambda item: -len(item[0]))
+# 运算式开头可忽略的请求词
+_MATH_PREFIX = re.compile(r"^(请|帮我|帮忙|麻烦)?(计算一下|计算|算一下|算算|算)\s*")
+# 运算式末尾可忽略的问句
+_MATH_SUFFIX = re.compile(r"(等于几|等于多少|是多少|是几|等于|=|\?|？|。)+$")
+# 规范化后的运算式只允许这些字符
+_MATH_PATTERN = re.compile(r"^[\d\s\.\+\-\*/%\(\)sqrt]+$")
+# 用连字符连接的多组数字（日期 2026-10-19、电话 138-1234-5678）不是运算式
+_DIGIT_GROUPS = re.compile(r"\d+(\s*-\s*\d+){2,}")
+# 本地计算结果保留的小数位数（0.1+0.2 -> 0.3）
+_RESULT_DIGITS = 10
+
+
+@dataclass
+class Route:
+    """
+    路由结果
+
+    属性:
+        intent: 意图标签（exit/math/llm/工具名）
+        source: 判断来源（rule/model/fallback）
+        confidence: 置信度
+        tool_call: 需要执行的工具调用（OpenAI 工具调用格式，与 Agent.merge 的输出一致）
+        answer: 本地直接得出的回答
+    """
+    intent: str
+    source: str = "fallback"
+    confidence: float = 1.0
+    tool_call: Optional[Dict[str, Any]] = None
+    answer: Optional[str] = None
+
+    @property
+    def handled(self) -> bool:
+        """是否已在本地处理（无需调用模型）"""
+        return self.intent != INTENT_LLM
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文/数字按单词，中文按单字和相邻双字，运算符单独成词
+    """
+    text = text.lower()
+    tokens = re.findall(r"[a-z_]+|\d+|[^\sa-z_\d]", text)
+    cjk = [t for t in tokens if "一" <= t <= "鿿"]
+    tokens += [a + b for a, b in zip(cjk, cjk[1:])]
+    # 数字本身不携带意图，统一替换为占位符
+    return ["<num>" if t.isdigit() else t for t in tokens]
+
+
+class TfidfLinearClassifier:
+    """
+    TF-IDF 特征 + softmax 线性分类器（纯 Python 实现，无第三方依赖）
+
+    示例:
+        >>> clf = TfidfLinearClassifier()
+        >>> clf.fit(["退出", "1+2", "帮我写个程序"], ["exit", "math", "llm"])
+        >>> clf.predict("再见")
+        ('exit', 0.83)
+    """
+
+    def __init__(self):
+        self.labels: List[str] = []               # 标签列表
+        self.idf: Dict[str, float] = {}           # 词 -> idf
+        self.weights: Dict[str, Dict[str, float]] = {}  # 标签 -> {词: 权重}
+        self.bias: Dict[str, float] = {}          # 标签 -> 偏置
+
+    # ==================== 特征 ====================
+    def features(self, text: str) -> Dict[str, float]:
+        """计算 L2 归一化的 TF-IDF 特征（亚线性 tf），未登录词忽略"""
+        counts = Counter(tokenize(text))
+        vector = {t: (1 + math.log(c)) * self.idf[t] for t, c in counts.items() if t in self.idf}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    # ==================== 训练 ====================
+    def fit(self, texts: List[str], labels: List[str], epochs: int = 30, lr: float = 0.5, l2: float = 1e-4, seed: int = 0):
+        """
+        训练分类器（随机梯度下降）
+
+        参数:
+            texts: 文本列表
+            labels: 标签列表
+            epochs: 训练轮数
+            lr: 学习率
+            l2: L2 正则系数
+            seed: 随机种子，保证结果可复现
+        """
+        if len(texts) != len(labels) or not texts:
+            raise ValueError("texts 和 labels 必须是等长的非空列表")
+
+        self.labels = sorted(set(labels))
+        document_frequency = Counter(t for text in texts for t in set(tokenize(text)))
+        total = len(texts)
+        self.idf = {t: math.log((1 + total) / (1 + df)) + 1 for t, df in document_frequency.items()}
+        self.weights = {label: {} for label in self.labels}
+        self.bias = {label: 0.0 for label in self.labels}
+
+        samples = [(self.features(text), label) for text, label in zip(texts, labels)]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            step = lr / (1 + epoch * 0.1)
+            for vector, label in samples:
+                probs = self._softmax(vector)
+                for candidate in self.labels:
+                    gradient = probs[candidate] - (1.0 if candidate == label else 0.0)
+                    weights = self.weights[candidate]
+                    for t, v in vector.items():
+                        w = weights.get(t, 0.0)
+                        weights[t] = w - step * (gradient * v + l2 * w)
+                    self.bias[candidate] -= step * gradient
+        return self
+
+    # ==================== 预测 ====================
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """返回每个标签的概率"""
+        if not self.labels:
+            return {}
+        return self._softmax(self.features(text))
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        """返回 (最可能的标签, 概率)，未训练时返回 (None, 0.0)"""
+        probs = self.predict_proba(text)
+        if not probs:
+            return None, 0.0
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+    def _softmax(self, vector: Dict[str, float]) -> Dict[str, float]:
+        scores = {
+            label: self.bias[label] + sum(self.weights[label].get(t, 0.0) * v for t, v in vector.items())
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: e / total for label, e in exps.items()}
+
+    # ==================== 保存/加载 ====================
+    def save(self, path: str):
+        """保存模型到 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"labels": self.labels, "idf": self.idf, "weights": self.weights, "bias": self.bias},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfLinearClassifier":
+        """从 JSON 文件加载模型"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        clf = cls()
+        clf.labels = data["labels"]
+        clf.idf = data["idf"]
+        clf.weights = data["weights"]
+        clf.bias = data["bias"]
+        return clf
+
+
+class FastRouter:
+    """
+    本地快速路由
+
+    参数:
+        classifier: 已训练的分类器，None 时只使用规则
+        threshold: 分类器置信度阈值，低于阈值一律交给模型
+        log_path: 轮次日志路径（JSONL），log_turn 写入，train_from_log 读取
+
+    示例:
+        >>> router = FastRouter()
+        >>> route = router.route("1+2")
+        >>> route.intent, route.tool_call["function"]["name"]
+        ('math', 'add')
+    """
+
+    def __init__(self, classifier: Optional[TfidfLinearClassifier] = None, threshold: float = 0.85, log_path: Optional[str] = None):
+        self.classifier = classifier  # 意图分类器
+        self.threshold = threshold    # 置信度阈值
+        self.log_path = log_path      # 轮次日志路径
+        self._extractors: Dict[str, Callable[[str], Optional[dict]]] = {}  # 工具名 -> 参数提取函数
+
+    # ==================== 注册单工具意图 ====================
+    def register_extractor(self, tool_name: str, extractor: Callable[[str], Optional[dict]]):
+        """
+        注册单工具意图的参数提取函数
+
+        参数:
+            tool_name: 工具名（同时也是分类器的标签）
+            extractor: 接受用户输入，返回工具参数字典；无法提取时返回 None（交给模型）
+        """
+        self._extractors[tool_name] = extractor
+
+    # ==================== 路由 ====================
+    def route(self, text: str) -> Route:
+        """
+        判断用户输入能否在本地处理
+
+        参数:
+            text: 用户输入
+
+        返回:
+            Route；route.handled 为 False 时应交给 Agent.run
+        """
+        text = (text or "").strip()
+        if not text:
+            return Route(INTENT_LLM)
+
+        # 规则：退出
+        if self._normalize(text) in EXIT_WORDS:
+            return Route(INTENT_EXIT, source="rule")
+
+        # 规则：四则运算
+        route = self._route_math(text)
+        if route is not None:
+            return route
+
+        # 分类器门控
+        if self.classifier is None:
+            return Route(INTENT_LLM)
+        label, confidence = self.classifier.predict(text)
+        if label is None or confidence < self.threshold:
+            return Route(INTENT_LLM, confidence=confidence)
+        # 退出只认 EXIT_WORDS 的完全匹配："不要退出"、"结束了吗" 之类交给模型
+        extractor = self._extractors.get(label)
+        if extractor is not None:
+            arguments = extractor(text)
+            if arguments is not None:
+                return Route(label, source="model", confidence=confidence, tool_call=self.tool_call(label, arguments))
+        return Route(INTENT_LLM, confidence=confidence)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r"[\s!！。.~～]+", "", text.lower())
+
+    def _route_math(self, text: str) -> Optional[Route]:
+        """运算式规则：单个二元运算映射到 mathematics 工具，复合表达式在本地计算"""
+        expression = _MATH_SUFFIX.sub("", _MATH_PREFIX.sub("", text.strip()))
+        if _DIGIT_GROUPS.search(expression):
+            return None
+        # "81的平方根" -> "sqrt(81)"
+        expression = re.sub(r"([\d\.]+)\s*的?平方根", r"sqrt(\1)", expression)
+        for word, symbol in _MATH_WORDS:
+            expression = expression.replace(word, symbol)
+        # "根号16" -> "sqrt(16"，补齐括号
+        expression += ")" * (expression.count("(") - expression.count(")"))
+        if not re.search(r"\d", expression) or not _MATH_PATTERN.match(expression):
+            return None
+        if not re.search(r"[\+\-\*/%]|sqrt", expression):
+            return None
+        try:
+            tree = ast.parse(expression, mode="eval").body
+        except SyntaxError:
+            return None
+        # 每个运算符左边都必须有数字："加1"（+1）、"-5-3" 之类交给模型
+        if any(isinstance(node, ast.UnaryOp) for node in ast.walk(tree)):
+            return None
+
+        # 单个整数二元运算 / 开方 -> 调用 mathematics 工具
+        if isinstance(tree, ast.BinOp) and type(tree.op) in MATH_TOOLS:
+            a, b = self._int_constant(tree.left), self._int_constant(tree.right)
+            invalid = (isinstance(tree.op, ast.Div) and b == 0) or (isinstance(tree.op, ast.Pow) and b is not None and abs(b) > 1000)
+            if a is not None and b is not None and not invalid:
+                name = MATH_TOOLS[type(tree.op)]
+                return Route(INTENT_MATH, source="rule", tool_call=self.tool_call(name, {"a": a, "b": b}))
+        if self._is_sqrt(tree):
+            a = self._int_constant(tree.args[0])
+            if a is not None and a >= 0:
+                return Route(INTENT_MATH, source="rule", tool_call=self.tool_call("sqrt", {"a": a}))
+
+        # 其他表达式本地计算
+        try:
+            value = self._evaluate(tree)
+        except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+            return None
+        if isinstance(value, float):
+            value = round(value, _RESULT_DIGITS)
+            if value.is_integer():
+                value = int(value)
+        return Route(INTENT_MATH, source="rule", answer=str(value))
+
+    @staticmethod
+    def _int_constant(node) -> Optional[int]:
+        """整数常量返回其值，否则返回 None"""
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        return None
+
+    @staticmethod
+    def _is_sqrt(node) -> bool:
+        return (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id == "sqrt" and len(node.args) == 1 and not node.keywords)
+
+    def _evaluate(self, node):
+        """安全计算运算式（只允许数字、四则运算、乘方和 sqrt）"""
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return node.value
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            left, right = self._evaluate(node.left), self._evaluate(node.right)
+            if isinstance(node.op, ast.Pow) and (abs(right) > 1000 or abs(left) > 10 ** 100):
+                raise ValueError("指数过大")
+            return _BINARY_OPS[type(node.op)](left, right)
+        if self._is_sqrt(node):
+            return math.sqrt(self._evaluate(node.args[0]))
+        raise ValueError("不支持的表达式")
+
+    @staticmethod
+    def tool_call(name: str, arguments: dict) -> Dict[str, Any]:
+        """构造与 Agent.merge 输出格式一致的工具调用"""
+        return {
+            "index": 0,
+            "id": f"local_{int(time.time() * 1000)}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)}
+        }
+
+    # ==================== 轮次日志与训练 ====================
+    def log_turn(self, text: str, tools: List[str]):
+        """
+        记录一轮由模型处理的对话，作为分类器的训练数据
+
+        参数:
+            text: 用户输入
+            tools: 本轮按顺序执行的工具名列表
+        """
+        if not self.log_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"text": text, "label": self.label_for(tools)}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"写入路由日志失败: {e}")
+
+    def label_for(self, tools: List[str]) -> str:
+        """根据本轮执行的工具推断意图标签"""
+        if not tools:
+            return INTENT_LLM
+        if tools[0] == "exit_task":
+            return INTENT_EXIT
+        if len(tools) == 1 and tools[0] in MATH_TOOLS.values() or tools == ["sqrt"]:
+            return INTENT_MATH
+        if len(tools) == 1 and tools[0] in self._extractors:
+            return tools[0]
+        return INTENT_LLM
+
+    @staticmethod
+    def load_samples(path: str) -> Tuple[List[str], List[str]]:
+        """读取 JSONL 样本文件，返回 (文本列表, 标签列表)"""
+        texts, labels = [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                texts.append(record["text"])
+                labels.append(record["label"])
+        return texts, labels
+
+    def train_from_log(self, *extra_paths: str) -> TfidfLinearClassifier:
+        """
+        用轮次日志（以及额外的样本文件）训练分类器并启用
+
+        参数:
+            extra_paths: 额外的 JSONL 样本文件，如种子数据
+        """
+        texts, labels = [], []
+        for path in (self.log_path, *extra_paths):
+            if path and os.path.isfile(path):
+                t, l = self.load_samples(path)
+                texts += t
+                labels += l
+        if len(set(labels)) < 2:
+            raise ValueError("训练数据至少需要两种标签")
+        self.classifier = TfidfLinearClassifier().fit(texts, labels)
+        return self.classifier
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+模型流与MCP结果的录制/回放
+- Recorder：包装 dialogue_callback/knowledge_callback 和 MCP 回调，
+  把 send_stream 的片段序列（含时间间隔）与 CallToolResult 写入 JSONL 文件
+- Replayer：读取录制文件，作为 Agent 的五个回调使用（含批量提交 add_batch），
+  支持按录制时的节奏回放（realtime）或尽快回放，用于离线、可复现地测试和测量 Agent 流程
+
+录制文件每行一条记录：
+    {"kind": "stream", "channel": "dialogue", "role": "user", "problem": "...", "chunks": [[间隔秒, 片段], ...]}
+    {"kind": "tool", "name": "add", "arguments": "{...}", "elapsed": 0.01, "result": {...}}
+"""
+import json
+import time
+import threading
+import logging
+from collections import deque
+from types import SimpleNamespace
+from typing import Callable, Any, Optional, Dict, Generator, Tuple
+
+try:
+    from mcp.types import CallToolResult
+except ImportError:  # 未安装 mcp 时回放为结构相同的 SimpleNamespace
+    CallToolResult = None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class ReplayMismatchError(Exception):
+    """严格模式下，回放时的请求与录制内容不一致"""
+    pass
+
+
+def dump_result(result) -> Dict[str, Any]:
+    """把 CallToolResult（或结构相同的对象）转为可 JSON 序列化的字典"""
+    if hasattr(result, "model_dump"):
+        return result.model_dump(mode="json", by_alias=True, exclude_none=True)
+    return {
+        "_meta": getattr(result, "meta", None),
+        "content": [{"type": "text", "text": getattr(item, "text", str(item))} for item in getattr(result, "content", [])],
+        "structuredContent": getattr(result, "structuredContent", None),
+        "isError": getattr(result, "isError", False),
+    }
+
+
+def load_result(data: Dict[str, Any]):
+    """把录制的字典还原为 CallToolResult"""
+    if CallToolResult is not None:
+        return CallToolResult.model_validate(data)
+    return SimpleNamespace(
+        meta=data.get("_meta"),
+        content=[SimpleNamespace(**item) for item in data.get("content", [])],
+        structuredContent=data.get("structuredContent"),
+        isError=data.get("isError", False),
+    )
+
+
+class Recorder:
+    """
+    录制器
+
+    参数:
+        path: 录制文件路径（JSONL，追加写入）
+
+    示例:
+        >>> recorder = Recorder("session.jsonl")
+        >>> add, get_result, add_batch = recorder.wrap_mcp(mcp_client.add, mcp_client.get_result, mcp_client.add_batch)
+        >>> agent = Agent(recorder.wrap_stream(factory.dialogue_callback, "dialogue"),
+        ...               recorder.wrap_stream(factory.knowledge_callback, "knowledge"),
+        ...               add, get_result, mcp_client_add_batch_callback=add_batch)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Tuple[dict, float]] = {}  # 任务ID -> (工具调用, 提交时间)
+
+    def _write(self, record: Dict[str, Any]):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    # ==================== 模型流 ====================
+    def wrap_stream(self, callback: Callable, channel: str = "dialogue") -> Callable:
+        """
+        包装模型流式回调，片段原样透传，同时记录片段和相邻片段的时间间隔
+
+        参数:
+            callback: dialogue_callback 或 knowledge_callback
+            channel: 通道名（dialogue/knowledge），回放时按通道匹配
+        """
+        def wrapper(problem: str, role: str = "user") -> Generator[dict, None, None]:
+            chunks = []
+            last = time.perf_counter()
+            try:
+                for chunk in callback(problem, role):
+                    now = time.perf_counter()
+                    chunks.append([round(now - last, 6), chunk])
+                    last = now
+                    yield chunk
+            finally:
+                # 生成器被提前关闭时也保存已收到的片段
+                self._write({"kind": "stream", "channel": channel, "role": role, "problem": problem, "chunks": chunks})
+        return wrapper
+
+    # ==================== MCP ====================
+    def wrap_mcp(self, add_callback: Callable, get_result_callback: Callable,
+                 add_batch_callback: Optional[Callable] = None) -> Tuple[Callable, ...]:
+        """
+        包装MCP客户端的 add / get_result 回调，以及可选的 add_batch 回调
+        批量提交的调用与单独提交的一样逐个记录为 tool 记录（耗时从批量提交时算起）
+
+        返回:
+            (add, get_result)，传入 add_batch_callback 时为 (add, get_result, add_batch)，可直接传给 Agent
+        """
+        def add(tool: dict):
+            task_id = add_callback(tool)
+            self._tasks[task_id] = (tool, time.perf_counter())
+            return task_id
+
+        def add_batch(tools: list):
+            task_ids = list(add_batch_callback(tools))
+            submitted = time.perf_counter()
+            for task_id, tool in zip(task_ids, tools):
+                self._tasks[task_id] = (tool, submitted)
+            return task_ids
+
+        def get_result(task_id, *args, **kwargs):
+            result = get_result_callback(task_id, *args, **kwargs)
+            tool, submitted = self._tasks.pop(task_id, ({}, time.perf_counter()))
+            function = tool.get("function", {})
+            self._write({
+                "kind": "tool",
+                "name": function.get("name"),
+                "arguments": function.get("arguments", ""),
+                "elapsed": round(time.perf_counter() - submitted, 6),
+                "result": dump_result(result),
+            })
+            return result
+
+        if add_batch_callback is not None:
+            return add, get_result, add_batch
+        return add, get_result
+
+
+class Replayer:
+    """
+    回放器
+
+    参数:
+        path: 录制文件路径
+        realtime: True 按录制时的时间间隔回放，False 尽快回放
+        speed: 实时回放的倍速（2.0 表示两倍速）
+        strict: True 时请求与录制不一致直接抛出 ReplayMismatchError，否则只记录警告
+
+    示例:
+        >>> replayer = Replayer("session.jsonl")
+        >>> agent = Agent(**replayer.agent_callbacks())
+        >>> agent.run("1+2")
+    """
+
+    def __init__(self, path: str, realtime: bool = False, speed: float = 1.0, strict: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.strict = strict
+        self._streams: Dict[str, deque] = {}  # 通道 -> 录制的流
+        self._tools: deque = deque()           # 录制的工具调用（按完成顺序）
+        self._tasks: Dict[str, Tuple[dict, float]] = {}  # 任务ID -> (录制记录, 提交时间)
+        self._counter = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """(重新)读取录制文件，回放位置回到开头"""
+        self._streams.clear()
+        self._tools.clear()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record["kind"] == "stream":
+                    self._streams.setdefault(record["channel"], deque()).append(record)
+                elif record["kind"] == "tool":
+                    self._tools.append(record)
+
+    def remaining(self) -> Dict[str, int]:
+        """尚未回放的记录数"""
+        counts = {channel: len(records) for channel, records in self._streams.items()}
+        counts["tool"] = len(self._tools)
+        return counts
+
+    def _mismatch(self, message: str):
+        if self.strict:
+            raise ReplayMismatchError(message)
+        logger.warning(message)
+
+    def _sleep(self, seconds: float):
+        if self.realtime and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    # ==================== 模型流 ====================
+    def stream(self, channel: str, problem: str, role: str = "user") -> Generator[dict, None, None]:
+        """按通道取出下一条录制的流并逐片段输出"""
+        with self._lock:
+            records = self._streams.get(channel)
+            if not records:
+                raise ReplayMismatchError(f"通道 {channel} 没有剩余的录制记录")
+            record = records.popleft()
+        if record["problem"] != problem or record["role"] != role:
+            self._mismatch(f"通道 {channel} 的请求与录制不一致: {problem[:50]!r} != {record['problem'][:50]!r}")
+        for delay, chunk in record["chunks"]:
+            self._sleep(delay)
+            yield chunk
+
+    def dialogue_callback(self, problem: str, role: str = "user") -> Generator[dict, None, None]:
+        """替代 AIFactory.dialogue_callback"""
+        return self.stream("dialogue", problem, role)
+
+    def knowledge_callback(self, problem: str, role: str = "user") -> Generator[dict, None, None]:
+        """替代 AIFactory.knowledge_callback"""
+        return self.stream("knowledge", problem, role)
+
+    # ==================== MCP ====================
+    def add(self, tool: dict) -> str:
+        """替代 MCPClient.add：优先匹配同名同参数的录制记录，其次同名记录，最后按顺序"""
+        function = tool.get("function", {})
+        name, arguments = function.get("name"), function.get("arguments", "")
+        with self._lock:
+            if not self._tools:
+                raise ReplayMismatchError(f"工具 {name} 没有剩余的录制记录")
+            record = next((r for r in self._tools if r["name"] == name and r["arguments"] == arguments), None)
+            if record is None:
+                record = next((r for r in self._tools if r["name"] == name), self._tools[0])
+                self._mismatch(f"工具调用与录制不一致: {name}({arguments}) -> {record['name']}({record['arguments']})")
+            self._tools.remove(record)
+            self._counter += 1
+            task_id = f"replay_{self._counter}"
+            self._tasks[task_id] = (record, time.perf_counter())
+        return task_id
+
+    def add_batch(self, tools: list) -> list:
+        """替代 MCPClient.add_batch：每个调用按 add 匹配录制记录"""
+        return [self.add(tool) for tool in tools]
+
+    def get_result(self, task_id: str, block: bool = True, timeout: Optional[float] = None):
+        """替代 MCPClient.get_result：实时模式下等到录制时的耗时再返回"""
+        record, submitted = self._tasks[task_id]
+        if self.realtime:
+            wait = record["elapsed"] / self.speed - (time.perf_counter() - submitted)
+            if not block and wait > 0:
+                raise KeyError(f"任务 {task_id} 的结果尚未准备好")
+            if timeout is not None and wait > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"等待任务 {task_id} 结果超时")
+            self._sleep(wait * self.speed)
+        del self._tasks[task_id]
+        return load_result(record["result"])
+
+    def cancel(self, task_id: str):
+        """替代取消回调：丢弃任务"""
+        self._tasks.pop(task_id, None)
+
+    def agent_callbacks(self) -> Dict[str, Any]:
+        """返回可直接展开传给 Agent 的回调参数"""
+        return {
+            "dialogue_callback": self.dialogue_callback,
+            "knowledge_callback": self.knowledge_callback,
+            "mcp_client_add_task_callback": self.add,
+            "mcp_client_execute_task_callback": self.get_result,
+            "mcp_client_add_batch_callback": self.add_batch,
+        }
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+工具结果压缩器
+工具结果在回传给模型之前先经过压缩，避免单个大结果（整表数据、整个文件）
+撑大后续每一次请求的上下文。
+
+压缩策略可插拔，内置：
+- 行列表：按结构（列名/字段）截断，去除重复行，保留首尾若干行
+- 长文本：保留首尾窗口
+- 抽取式摘要（可选）：在本地按词频挑选关键句，不调用任何模型
+
+被压缩的结果完整保存在本地，宿主程序可通过句柄（见 turn_stats）取回；
+模型没有取回完整结果的工具，句柄不写进回传给模型的文本。每轮统计节省的 token 数。
+"""
+import re
+import json
+import uuid
+import math
+import logging
+from collections import OrderedDict, Counter
+from typing import Callable, Any, Optional, List, Dict
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 句柄前缀
+HANDLE_PREFIX = "result://"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数（未提供 token_callback 时使用）
+    按 UTF-8 字节数估算：英文约4字节/token，中文约3字节/token
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text.encode("utf-8")) / 3.5)
+
+
+# ==================== 内置策略 ====================
+def compact_rows(text: str, budget: int, compactor: "ResultCompactor") -> Optional[str]:
+    """
+    行列表策略：适用于 database_table_content / list_all_data 等返回的行列表
+
+    支持的结构：
+    - [[id, content], ...] / [{"id": ..., "content": ...}, ...]
+    - {"表名": [[...], ...], ...}（database_content_fuzzy 的结果）
+    - {"rows": [...], ...} 等包含行列表的字典
+
+    处理方式：去重 → 提取列名 → 在预算内保留首尾行 → 注明省略的行数
+    """
+    try:
+        data = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+    tables = _find_row_lists(data)
+    if not tables:
+        return None
+
+    # 多张表平分预算
+    per_table = max(1, budget // len(tables))
+    compacted = {}
+    for key, rows in tables.items():
+        compacted[key] = _compact_row_list(rows, per_table, compactor)
+
+    if list(compacted.keys()) == [None]:
+        return json.dumps(compacted[None], ensure_ascii=False)
+    if isinstance(data, dict):
+        result = dict(data)
+        result.update(compacted)
+        return json.dumps(result, ensure_ascii=False)
+    return None
+
+
+def compact_text(text: str, budget: int, compactor: "ResultCompactor") -> Optional[str]:
+    """长文本策略：保留首尾窗口（首部占三分之二），中间注明省略的字符数"""
+    total = compactor.count_tokens(text)
+    if total <= budget:
+        return text
+    # 按 token 比例换算字符数
+    keep_chars = max(1, int(len(text) * budget / total))
+    head = keep_chars * 2 // 3
+    tail = keep_chars - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n...[省略 {omitted} 个字符]...\n{text[len(text) - tail:] if tail else ''}"
+
+
+def extractive_summary(text: str, budget: int, compactor: "ResultCompactor") -> Optional[str]:
+    """
+    抽取式摘要策略：按词频为句子打分，在预算内按原顺序保留得分最高的句子
+    只适用于自然语言文本，结构化数据（JSON）交给其他策略
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("{", "["):
+        return None
+    sentences = [s for s in re.split(r"(?<=[。！？.!?\n])", text) if s.strip()]
+    if len(sentences) < 3:
+        return None
+
+    # 统计词频（英文按单词，中文按单字）
+    def terms(sentence: str) -> List[str]:
+        return re.findall(r"[A-Za-z0-9_]+|[一-鿿]", sentence.lower())
+
+    frequency = Counter(term for sentence in sentences for term in terms(sentence))
+    scored = []
+    for index, sentence in enumerate(sentences):
+        words = terms(sentence)
+        score = sum(frequency[w] for w in words) / (len(words) + 1)
+        scored.append((score, index))
+
+    chosen, used = [], 0
+    for score, index in sorted(scored, reverse=True):
+        cost = compactor.count_tokens(sentences[index])
+        if used + cost > budget:
+            continue
+        chosen.append(index)
+        used += cost
+    if not chosen:
+        return None
+    summary = "".join(sentences[i].strip() + " " for i in sorted(chosen)).strip()
+    return f"[摘要，保留 {len(chosen)}/{len(sentences)} 句]\n{summary}"
+
+
+def _find_row_lists(data: Any) -> Dict[Any, list]:
+    """找出数据中的行列表，返回 {键: 行列表}，顶层列表的键为 None"""
+    if _is_row_list(data):
+        return {None: data}
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if _is_row_list(v)}
+    return {}
+
+
+def _is_row_list(value: Any) -> bool:
+    """判断是否为行列表：非空列表且元素都是列表或字典"""
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and all(isinstance(row, (list, dict)) for row in value)
+    )
+
+
+def _compact_row_list(rows: list, budget: int, compactor: "ResultCompactor") -> Any:
+    """在预算内压缩一个行列表"""
+    # 去重（保持原顺序）
+    seen, unique = set(), []
+    for row in rows:
+        key = json.dumps(row, ensure_ascii=False, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+    duplicates = len(rows) - len(unique)
+
+    # 字典行：提取列名，行只保留值，列名只出现一次
+    columns = None
+    if all(isinstance(row, dict) for row in unique):
+        columns = list(OrderedDict.fromkeys(k for row in unique for k in row))
+        unique = [[row.get(c) for c in columns] for row in unique]
+
+    # 单个单元格过长时截断
+    cell_limit = max(32, budget // 4)
+    unique = [[_truncate_cell(cell, cell_limit, compactor) for cell in row] for row in unique]
+
+    # 首尾交替加入，直到超出预算
+    head, tail, used = [], [], 0
+    left, right = 0, len(unique) - 1
+    take_head = True
+    while left <= right:
+        row = unique[left] if take_head else unique[right]
+        cost = compactor.count_tokens(json.dumps(row, ensure_ascii=False))
+        if used + cost > budget and (head or tail):
+            break
+        used += cost
+        if take_head:
+            head.append(row)
+            left += 1
+        else:
+            tail.insert(0, row)
+            right -= 1
+        take_head = not take_head
+
+    omitted = right - left + 1
+    if omitted <= 0 and duplicates == 0 and columns is None:
+        return head + tail
+
+    result = {"total_rows": len(rows)}
+    if columns is not None:
+        result["columns"] = columns
+    if duplicates:
+        result["duplicates_removed"] = duplicates
+    result["rows"] = head
+    if omitted > 0:
+        result["omitted_rows"] = omitted
+        result["tail_rows"] = tail
+    else:
+        result["rows"] = head + tail
+    return result
+
+
+def _truncate_cell(cell: Any, limit: int, compactor: "ResultCompactor") -> Any:
+    """截断过长的字符串单元格"""
+    if isinstance(cell, str) and compactor.count_tokens(cell) > limit:
+        return compact_text(cell, limit, compactor)
+    return cell
+
+
+class ResultCompactor:
+    """
+    工具结果压缩器
+
+    参数:
+        max_tokens: 单个结果回传给模型的 token 上限，未超过时原样返回
+        token_callback: 计算 token 数的回调函数，默认使用 estimate_tokens 粗略估算
+        strategies: 压缩策略列表，按顺序尝试，第一个返回结果且不超预算的策略生效；
+            每个策略签名为 (text, budget, compactor) -> Optional[str]
+        summarize: 是否启用本地抽取式摘要（在长文本策略之前尝试）
+        store_size: 最多保存多少个完整结果，超出后淘汰最早的
+
+    示例:
+        >>> compactor = ResultCompactor(max_tokens=1500, token_callback=factory.dialogue_ai.token_callback)
+        >>> agent = Agent(..., result_compactor=compactor)
+        >>> compactor.get(compactor.turn_stats()["handles"][-1])  # 取回完整结果
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        token_callback: Optional[Callable[[str], int]] = None,
+        strategies: Optional[List[Callable[[str, int, "ResultCompactor"], Optional[str]]]] = None,
+        summarize: bool = False,
+        store_size: int = 256
+    ):
+        if not isinstance(max_tokens, int) or max_tokens <= 0:
+            raise ValueError("max_tokens 必须是正整数")
+        if token_callback is not None and not callable(token_callback):
+            raise ValueError("token_callback 必须是可调用对象")
+
+        self.max_tokens = max_tokens  # 单个结果的 token 上限
+        self._token_callback = token_callback or estimate_tokens  # 计算 token 的回调函数
+        if strategies is None:
+            strategies = [compact_rows]
+            if summarize:
+                strategies.append(extractive_summary)
+            strategies.append(compact_text)
+        self.strategies = strategies  # 压缩策略列表
+        self._store_size = store_size  # 完整结果保存上限
+        self._store: "OrderedDict[str, str]" = OrderedDict()  # 句柄 -> 完整结果
+        self._turn = self._empty_stats()  # 本轮统计
+
+    # ==================== token 计数 ====================
+    def count_tokens(self, text: str) -> int:
+        """计算文本的 token 数"""
+        return self._token_callback(text) if text else 0
+
+    # ==================== 压缩 ====================
+    def compact(self, text: str, tool_name: str = "") -> str:
+        """
+        压缩单个工具结果
+
+        参数:
+            text: 工具结果文本
+            tool_name: 工具名称（仅用于日志与统计）
+
+        返回:
+            不超过 max_tokens 时返回原文，否则返回压缩后的文本（末尾注明原始大小，句柄记入本轮统计）
+        """
+        if not isinstance(text, str):
+            return text
+        original = self.count_tokens(text)
+        if original <= self.max_tokens:
+            self._record(tool_name, original, original, None)
+            return text
+
+        handle = self._save(text)
+        footer = f"\n[结果已压缩：原始约 {original} tokens]"
+        budget = max(1, self.max_tokens - self.count_tokens(footer))
+
+        compacted = None
+        for strategy in self.strategies:
+            compacted = self._apply(strategy, text, budget)
+            if compacted is not None:
+                break
+        if compacted is None:
+            compacted = self._apply(compact_text, text, budget) or text[:budget]
+
+        compacted += footer
+        self._record(tool_name, original, self.count_tokens(compacted), handle)
+        return compacted
+
+    def _apply(self, strategy: Callable, text: str, budget: int, attempts: int = 4) -> Optional[str]:
+        """
+        执行单个压缩策略；策略自身的格式开销（标记、列名等）可能让结果略超预算，
+        此时按超出比例缩小预算重试
+        """
+        target = budget
+        for _ in range(attempts):
+            try:
+                candidate = strategy(text, target, self)
+            except Exception as e:
+                logger.warning(f"压缩策略 {getattr(strategy, '__name__', strategy)} 执行失败: {e}")
+                return None
+            if candidate is None:
+                return None
+            used = self.count_tokens(candidate)
+            if used <= budget:
+                return candidate
+            target = int(target * budget / used * 0.9)
+            if target <= 0:
+                return None
+        return None
+
+    # ==================== 取回完整结果 ====================
+    def get(self, handle: str) -> Optional[str]:
+        """根据句柄取回完整结果，句柄不存在（或已被淘汰）时返回 None"""
+        return self._store.get(handle)
+
+    def _save(self, text: str) -> str:
+        """保存完整结果并返回句柄"""
+        handle = f"{HANDLE_PREFIX}{uuid.uuid4().hex[:8]}"
+        self._store[handle] = text
+        while len(self._store) > self._store_size:
+            self._store.popitem(last=False)
+        return handle
+
+    # ==================== 每轮统计 ====================
+    def begin_turn(self):
+        """开始新一轮统计"""
+        self._turn = self._empty_stats()
+
+    def turn_stats(self) -> Dict[str, Any]:
+        """
+        返回本轮统计：
+            results: 处理的结果数
+            compacted: 被压缩的结果数
+            original_tokens / compacted_tokens / saved_tokens: token 数
+            handles: 本轮产生的完整结果句柄
+        """
+        stats = dict(self._turn)
+        stats["handles"] = list(self._turn["handles"])
+        stats["saved_tokens"] = stats["original_tokens"] - stats["compacted_tokens"]
+        return stats
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {"results": 0, "compacted": 0, "original_tokens": 0, "compacted_tokens": 0, "handles": []}
+
+    def _record(self, tool_name: str, original: int, compacted: int, handle: Optional[str]):
+        """记录一次压缩"""
+        self._turn["results"] += 1
+        self._turn["original_tokens"] += original
+        self._turn["compacted_tokens"] += compacted
+        if handle is not None:
+            self._turn["compacted"] += 1
+            self._turn["handles"].append(handle)
+            logger.info(f"工具 {tool_name} 的结果已压缩: {original} -> {compacted} tokens ({handle})")
@@ -6,15 +6,35 @@ Agent 模块
 主要类：
     - AIFactory: AI 工厂类，用于创建和管理 AI 客户端
     - StateMachine: 状态机类，负责完整的对话流程
+    - AsyncAgent: 异步状态机，以事件流输出，支持取消与截止时间
+    - ResultCompactor: 工具结果压缩器，结果回传给模型前按预算压缩
+    - FastRouter: 本地快速路由，简单的轮次（退出、四则运算）不调用模型
+    - Recorder / Replayer: 模型流与MCP结果的录制和离线回放
     - _Search: 知识模型处理类（私有）
     - _Dialogue: 对话模型处理类（私有）
 """
 
 from .Agent import Agent
+from .AsyncAgent import AsyncAgent, AgentEvent, EventType, TurnCancelledError, TurnTimeoutError
+from .ResultCompactor import ResultCompactor
+from .FastRouter import FastRouter, Route, TfidfLinearClassifier
+from .Replay import Recorder, Replayer, ReplayMismatchError
 
 # 定义模块导出的公共接口
 __all__ = [
     'Agent',
+    'AsyncAgent',
+    'AgentEvent',
+    'EventType',
+    'TurnCancelledError',
+    'TurnTimeoutError',
+    'ResultCompactor',
+    'FastRouter',
+    'Route',
+    'TfidfLinearClassifier',
+    'Recorder',
+    'Replayer',
+    'ReplayMismatchError',
 ]
 
 # 模块版本
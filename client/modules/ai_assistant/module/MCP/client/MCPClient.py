@@ -1,40 +1,177 @@
 import threading
 import time
 import asyncio
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-import queue
+import concurrent.futures
+from mcp import StdioServerParameters, types
 import uuid
 import os
 import ast
 import json
 import re
+import sys
+import zlib
+from typing import Callable, Dict, Optional, Iterable
+
+try:
+    from module.MCP.client.MCPWorker import MCPWorker
+    from module.MCP.client.ResultStore import ResultStore
+    from module.MCP.client import MCPDaemon
+    from module.MCP.client.ToolSchema import ToolArgumentError, parse_arguments, compile_validators
+except ImportError:  # 直接运行本文件时
+    from MCPWorker import MCPWorker
+    from ResultStore import ResultStore
+    import MCPDaemon
+    from ToolSchema import ToolArgumentError, parse_arguments, compile_validators
+
+# 会修改文件/数据库的工具：同一资源（同一个数据库文件或文件路径）上的调用按提交顺序串行执行
+DEFAULT_SERIALIZED_TOOLS = {
+    # DatabaseEditor
+    "connect", "delete", "insert_data", "update_data", "delete_data",
+    "create_table", "delete_table", "write",
+    "write_many", "insert_many", "delete_many",
+    # FileEditor
+    "update_line", "delete_line", "insert_line", "append_line",
+    "clear_file", "write_JSON", "append_JSON",
+}
+# 标识资源的参数名
+RESOURCE_ARGUMENTS = ("db_name", "filepath", "file_path")
+# 服务端的批量调用工具（不提供给模型）
+BATCH_TOOL = "call_batch"
+# 传输方式：stdio 启动子进程（进程隔离），memory 在本进程内运行服务端（无序列化到管道、无进程启动开销），
+# http 连接指定地址的 streamable-HTTP 服务，daemon 连接本机常驻服务（没有时自动启动，多个进程共用）
+TRANSPORTS = ("stdio", "memory", "http", "daemon")
+# 内置服务端所在目录
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server")
+
+
+def unknown_tool_result(name: str) -> types.CallToolResult:
+    """没有服务端提供该工具时的结果，与服务端对未知工具的返回一致"""
+    return types.CallToolResult(content=[types.TextContent(type="text", text=f"Unknown tool: {name}")], isError=True)
+
+
+def builtin_server():
+    """在本进程内创建内置 MCPServer，返回其 FastMCP 实例（内存模式的默认服务端）"""
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR) # MCPServer.py 按 Tools.X 导入工具
+    from MCPServer import MCPServer
+    return MCPServer().mcp
+
+
+def next_request_id(session) -> int:
+    """
+    call_tool 将使用的 JSON-RPC 请求ID（取消时据此发送 notifications/cancelled）
+
+    mcp 的 ClientSession 不支持由调用方指定请求ID，send_request 在第一次挂起前按 _request_id 递增分配；
+    依赖的是 mcp 的内部实现，README 中固定了 mcp 的版本，test_result_store.py 检查这一行为
+    """
+    return session._request_id
+
+
+class TaskFuture(concurrent.futures.Future):
+    """工具调用任务的 Future，附带任务 ID"""
+    def __init__(self, task_id: str):
+        super().__init__()
+        self.task_id = task_id # 任务 ID
+        self.worker = None # 执行该任务的 worker 编号
+        self.batched = False # 是否合并在批量请求中执行
+
+    def __repr__(self):
+        return f"<TaskFuture {self.task_id} {self._state}>"
+
+
 class MCPClient:
-    """简单的线程类"""
-    def __init__(self):
+    """
+    简单的线程类
+
+    参数:
+        max_in_flight: 同时在执行中的工具调用上限（同一会话上按 JSON-RPC 请求ID并发）
+        tool_limits: 单个工具的并发上限，如 {"scan_workspace": 2}
+        serialized_tools: 需要按资源串行执行的工具，默认为 DEFAULT_SERIALIZED_TOOLS；
+                          参数中含 db_name/filepath/file_path 时按该值串行，否则按工具名串行
+        workers: 启动的 MCPServer 进程数。参数中含 db_name/filepath/file_path 的调用按资源
+                 固定路由到同一个 worker，其余调用路由到未完成调用最少的 worker
+        health_interval: 健康检查间隔（秒），None 表示不检查；ping 失败或进程退出的 worker 自动重启
+        health_timeout: 健康检查 ping 的超时时间（秒）
+        transport: "stdio"（默认）、"memory"、"http" 或 "daemon"。memory 模式下服务端与客户端共用后台线程的事件循环，
+                   同步工具会阻塞该循环，I/O 工具需以 offload 注册；daemon 模式使用状态文件中缓存的工具列表
+        server_factory: memory 模式下创建 FastMCP 实例的函数，默认为 builtin_server
+        server_url: http 模式的服务地址，如 "http://127.0.0.1:8765/mcp"
+        daemon_state: daemon 模式的状态文件，默认为 MCPDaemon.DEFAULT_STATE_FILE
+        max_results: 结果存储的容量上限，超出时淘汰最早完成且未取走的结果
+        result_ttl: 已完成结果未被取走时的保存时间（秒），None 表示不过期
+        validate_arguments: 提交前按工具的 inputSchema 校验参数，不合法的调用不发给服务端，
+                            直接得到带结构化错误的 isError 结果（见 ToolSchema.ToolArgumentError）；
+                            校验前按服务端 pydantic 宽松模式转换参数（如 "3" -> 3，见 ToolSchema.coerce），发送转换后的参数
+    """
+    def __init__(self, max_in_flight: int = 8, tool_limits: Optional[Dict[str, int]] = None,
+                 serialized_tools: Optional[Iterable[str]] = None, workers: int = 1,
+                 health_interval: Optional[float] = 10.0, health_timeout: float = 5.0,
+                 transport: str = "stdio", server_factory: Optional[Callable] = None,
+                 max_results: int = 1024, result_ttl: Optional[float] = 600.0,
+                 server_url: Optional[str] = None, daemon_state: Optional[str] = None,
+                 validate_arguments: bool = True):
         self.thread = None#线程对象
         self.running = False#运行状态
         self.paused = False#暂停状态
         self.pause_lock = threading.Lock()#暂停锁
 
-        # 获取当前文件所在目录
-        # 获取当前文件所在目录的父目录（MCP目录）
-        current_dir = os.path.dirname(os.path.abspath(__file__))  # client目录
-        parent_dir = os.path.dirname(current_dir)  # MCP目录
-        server_path = os.path.join(parent_dir, "server", "MCPServer.py")
+        # 内置服务端脚本路径
+        server_path = os.path.join(SERVER_DIR, "MCPServer.py")
 
         self.server_params = StdioServerParameters(
             command="python",
             args=[server_path]
         )#服务器参数
+        if transport not in TRANSPORTS:
+            raise ValueError(f"不支持的传输方式: {transport}，可选 {TRANSPORTS}")
+        self.transport = transport # 传输方式
+        self.server_factory = (server_factory or builtin_server) if transport == "memory" else None # 内存模式的服务端工厂
+        if transport == "http" and not server_url:
+            raise ValueError("http 模式需要 server_url")
+        self.daemon_state = daemon_state or MCPDaemon.DEFAULT_STATE_FILE # 常驻服务的状态文件
+        if transport == "http":
+            self.server_url = server_url
+        elif transport == "daemon":
+            # 每次连接（含重启）时确认常驻服务在运行
+            self.server_url = lambda: MCPDaemon.ensure_daemon(self.daemon_state)["url"]
+        else:
+            self.server_url = None # HTTP 服务地址
 
-        self.context = None # 上下文
-        self.session = None # 会话
+        self.session = None # 会话（第一个 worker 的会话）
         self.tools = [] # 工具列表
+        self.validate_arguments = validate_arguments # 是否在本地校验参数
+        self._validators = {} # 工具名 -> 编译好的参数校验函数
+        self._openai_tools = None # list_tools 的转换结果缓存，工具列表变化时清空
+        self.tools_version = 0 # 工具列表版本，每次更新加一
         self.initialized = False # 初始化状态
 
-        self.message_queue = queue.Queue() # 消息队列
-        self.results = {} # 结果字典，key 为 uuid，value 为结果
+        self.loop = None # 后台线程的事件循环
+        self.task_queue = None # 任务队列（asyncio.Queue，只在事件循环内访问）
+        self._resumed = None # 未暂停时置位（asyncio.Event）
+        self._backlog = [] # 事件循环就绪前提交的任务
+        self._loop_lock = threading.Lock() # 保护 loop/_backlog 的切换
+        self.results = ResultStore(max_results, result_ttl) # 任务ID -> TaskFuture，有容量上限和过期时间
+        self._jobs = {} # 任务ID -> 执行该任务的 asyncio 任务
+        self._cancelling = set() # 被 cancel() 取消的任务ID
+
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight 必须大于0")
+        self.max_in_flight = max_in_flight # 并发上限
+        self.tool_limits = dict(tool_limits or {}) # 单个工具的并发上限
+        self.serialized_tools = set(DEFAULT_SERIALIZED_TOOLS if serialized_tools is None else serialized_tools) # 按资源串行的工具
+        self._slots = None # 全局并发信号量
+        self._tool_slots = {} # 工具名 -> 信号量
+        self._resource_locks = {} # 资源 -> 锁
+        self._inflight = set() # 正在执行的 asyncio 任务
+        self.in_flight = 0 # 当前在执行的调用数
+        self.peak_in_flight = 0 # 峰值并发数
+
+        if workers < 1:
+            raise ValueError("workers 必须大于0")
+        self.worker_count = workers # worker 数
+        self.workers = [] # MCPWorker 列表
+        self.health_interval = health_interval # 健康检查间隔
+        self.health_timeout = health_timeout # 健康检查超时
     # ==================== 启动 ==================== 
     def start(self):
         """启动MCP客户端"""
@@ -49,18 +186,42 @@ class MCPClient:
         """关闭MCP客户端"""
         self.running = False#设置运行状态为False
         self.paused = False#设置暂停状态为False
+        self._call_in_loop(lambda: self._resumed.set())#解除暂停等待
+        self._post(None)#唤醒调度循环使其退出
         if self.thread is not None:
             self.thread.join()#等待线程结束
             self.thread = None#设置线程为None
         
     # ==================== 暂停====================
     def pause(self):
-        """暂停MCP客户端"""
+        """暂停MCP客户端（已在执行的调用不受影响，后续任务等待恢复）"""
         self.paused = True
+        self._call_in_loop(lambda: self._resumed.clear())
     # ==================== 恢复====================  
     def resume(self):
         """恢复MCP客户端"""
         self.paused = False
+        self._call_in_loop(lambda: self._resumed.set())
+
+    def _call_in_loop(self, callback):
+        """在后台事件循环中执行回调（线程安全），事件循环未就绪时忽略"""
+        with self._loop_lock:
+            if self.loop is not None:
+                try:
+                    self.loop.call_soon_threadsafe(callback)
+                except RuntimeError:
+                    pass  # 事件循环已关闭
+
+    def _post(self, task):
+        """把任务投递到事件循环的队列；事件循环就绪前先暂存"""
+        with self._loop_lock:
+            if self.loop is None:
+                self._backlog.append(task)
+                return
+            try:
+                self.loop.call_soon_threadsafe(self.task_queue.put_nowait, task)
+            except RuntimeError:
+                pass  # 事件循环已关闭
 
     # ==================== 同步运行包装 ====================
     def _run_sync(self):
@@ -72,62 +233,341 @@ class MCPClient:
             import traceback
             traceback.print_exc()
             self.running = False
+        finally:
+            with self._loop_lock:
+                self.loop = None
+                self._backlog.clear()
+            # 客户端停止后，未完成的任务全部以异常结束，避免调用方永久等待
+            for future in self.results.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("MCP客户端已关闭"))
 
     # ==================== 异步运行====================
     async def _run_async(self):
         try:
-            # 创建客户端
-            # 参数：服务器参数
-            # 返回：一个上下文管理器
-            self.context = stdio_client(self.server_params)
-            # 创建通信管道
-            # read  管道：用来接收服务器发来的消息
-            # write 管道：用来发送消息给服务器
-            read, write = await self.context.__aenter__()
-
-            # 创建会话
-            self.session = ClientSession(read, write)
-            # 启动后台监听任务
-            await self.session.__aenter__()
-
-            # 初始化（握手）
-            await self.session.initialize()
+            # 并发启动全部 worker（每个 worker 一个服务进程和一个会话）
+            self.workers = self._create_workers()
+            await self._start_workers()
+            self.session = self.workers[0].session
 
             # 获取工具列表
-            result = await self.session.list_tools()
-            self.tools = result.tools if hasattr(result, 'tools') else result
+            self._set_tools(await self._load_tools())
+
+            # 事件循环就绪：创建队列并接收之前暂存的任务
+            self.task_queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._resumed = asyncio.Event()
+            if not self.paused:
+                self._resumed.set()
+            with self._loop_lock:
+                self.loop = asyncio.get_running_loop()
+                for task in self._backlog:
+                    self.task_queue.put_nowait(task)
+                self._backlog.clear()
             self.initialized = True
+            health = asyncio.create_task(self._health_loop()) if self.health_interval else None
 
             while self.running:
-                if self.paused:
-                    time.sleep(0.1)
-                    continue
+                # 没有任务时挂起等待，不占用 CPU
+                task = await self.task_queue.get()
+                if task is None:
+                    continue # 关闭信号，回到 while 判断
+                # 暂停时等待恢复
+                await self._resumed.wait()
+                if not self.running:
+                    break
+
+                # 每个调用作为独立的 asyncio 任务执行，多个请求在同一会话上并发
+                job = asyncio.create_task(self._execute_batch(task) if "batch" in task else self._execute(task))
+                self._inflight.add(job)
+                self._jobs[task["id"]] = job
+                job.add_done_callback(lambda j, task_id=task["id"]: (self._inflight.discard(j), self._jobs.pop(task_id, None)))
+
+            if health is not None:
+                health.cancel()
+                await asyncio.gather(health, return_exceptions=True)
 
-                #如果队列为空
-                if self.message_queue.empty():
-                    continue
-                # 取出顶部元素
-                task = self.message_queue.get()
-                # 移除顶部元素
-                self.message_queue.task_done()
-
-                task_id = task["id"]
-                result = await self.session.call_tool(
-                    task["name"],
-                    task.get("arguments", {})
-                )
-                # 将结果存入字典
-                self.results[task_id] = result
+        finally:
+            # 取消仍在执行的调用
+            for job in list(self._inflight):
+                job.cancel()
+            if self._inflight:
+                await asyncio.gather(*self._inflight, return_exceptions=True)
+            # 关闭全部 worker
+            await asyncio.gather(*(worker.stop() for worker in self.workers), return_exceptions=True)
+            self.session = None
+
+    def _create_workers(self) -> list:
+        """创建 worker：worker_count 个相同的服务端"""
+        return [MCPWorker(i, self.server_params, self.server_factory, server_url=self.server_url,
+                          on_tools_changed=self._on_tools_changed) for i in range(self.worker_count)]
+
+    async def _start_workers(self):
+        """并发启动全部 worker，任一失败即报错"""
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+
+    async def _load_tools(self, use_cache: bool = True) -> list:
+        """获取工具列表（各 worker 相同，取第一个）；daemon 模式优先使用状态文件中缓存的工具列表"""
+        if self.transport == "daemon" and use_cache:
+            state = MCPDaemon.read_state(self.daemon_state)
+            if state and state.get("url") == self.workers[0].url and state.get("tools"):
+                return [types.Tool.model_validate(tool) for tool in state["tools"]]
+        result = await self.session.list_tools()
+        return result.tools if hasattr(result, 'tools') else result
+
+    def _set_tools(self, tools: list):
+        """更新工具列表：重新编译参数校验函数，清空转换缓存"""
+        self._validators = compile_validators(tools) if self.validate_arguments else {}
+        self._openai_tools = None
+        self.tools = tools
+        self.tools_version += 1
+
+    async def _on_tools_changed(self, worker: MCPWorker):
+        """服务端通知工具列表变化：重新获取（不使用缓存）"""
+        try:
+            self._set_tools(await self._load_tools(use_cache=False))
+        except Exception as e:
+            print(f"[MCPClient] 刷新工具列表失败: {e}")
+
+    # ==================== 健康检查 ====================
+    async def _health_loop(self):
+        """定期检查每个 worker，进程退出或 ping 失败时重启"""
+        while self.running:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self._check_worker(worker) for worker in self.workers))
+
+    async def _check_worker(self, worker: MCPWorker):
+        """检查单个 worker，不健康时重启"""
+        if not worker.exited() and await worker.ping(self.health_timeout):
+            return
+        if not self.running:
+            return
+        print(f"[MCPClient] worker {worker.name} 不可用，正在重启")
+        try:
+            await worker.restart()
+        except Exception as e:
+            print(f"[MCPClient] worker {worker.name} 重启失败: {e}")
+        if worker.index == 0:
+            self.session = worker.session
+
+    # ==================== 路由 ====================
+    def _pick_worker(self, name: str, arguments: dict) -> MCPWorker:
+        """
+        选择执行调用的 worker
+
+        带 db_name/filepath/file_path 的调用按资源哈希固定到同一个 worker（会话内的状态和文件句柄留在同一进程），
+        其余调用选择未完成调用最少的可用 worker
+        """
+        if len(self.workers) == 1:
+            return self.workers[0]
+        index = self._sticky_worker(arguments)
+        if index is not None:
+            return self.workers[index]
+        candidates = [worker for worker in self.workers if worker.alive] or self.workers
+        return min(candidates, key=lambda worker: worker.outstanding)
+
+    def _sticky_worker(self, arguments: dict) -> Optional[int]:
+        """带 db_name/filepath/file_path 的调用固定到的 worker 序号，没有资源参数或只有一个 worker 时为 None"""
+        if len(self.workers) <= 1 or not isinstance(arguments, dict):
+            return None
+        for key in RESOURCE_ARGUMENTS:
+            value = arguments.get(key)
+            if value:
+                resource = os.path.abspath(str(value))
+                return zlib.crc32(resource.encode("utf-8")) % len(self.workers)
+        return None
+
+    def _route(self, name: str, arguments: dict):
+        """返回执行调用的 worker 和发给服务端的工具名；worker 为 None 表示没有服务端提供该工具"""
+        return self._pick_worker(name, arguments), name
+
+    # ==================== 执行单个调用 ====================
+    def _resource_key(self, name: str, arguments: dict) -> Optional[str]:
+        """需要串行执行的调用返回其资源标识，否则返回 None"""
+        if name not in self.serialized_tools:
+            return None
+        for key in RESOURCE_ARGUMENTS:
+            value = arguments.get(key) if isinstance(arguments, dict) else None
+            if value:
+                return os.path.abspath(str(value))
+        return f"tool:{name}"
+
+    async def _execute(self, task: dict):
+        """
+        依次取得资源锁、工具并发名额和全局并发名额后执行调用
+
+        获取顺序固定（资源 -> 工具 -> 全局），等待资源锁的调用不占用全局名额；
+        asyncio 的锁和信号量按等待顺序唤醒，因此同一资源上的调用保持提交顺序。
+        """
+        name, arguments, future = task["name"], task.get("arguments", {}), task["future"]
+        resource = self._resource_key(name, arguments)
+        lock = self._resource_locks.setdefault(resource, asyncio.Lock()) if resource else None
+        limit = self.tool_limits.get(name)
+        tool_slots = self._tool_slots.setdefault(name, asyncio.Semaphore(limit)) if limit else None
 
+        try:
+            if lock is not None:
+                await lock.acquire()
+            try:
+                if tool_slots is not None:
+                    await tool_slots.acquire()
+                try:
+                    async with self._slots:
+                        # 等待期间被取消的任务直接跳过
+                        if not future.set_running_or_notify_cancel():
+                            return
+                        worker, tool_name = self._route(name, arguments)
+                        if worker is None:
+                            future.set_result(unknown_tool_result(name))
+                            return
+                        self.in_flight += 1
+                        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                        worker.outstanding += 1
+                        future.worker = worker.index
+                        session, request_id = None, None
+                        try:
+                            await worker.wait_ready()
+                            worker.calls += 1
+                            session = worker.session
+                            request_id = next_request_id(session)
+                            result = await session.call_tool(tool_name, arguments)
+                            future.set_result(result)
+                        except asyncio.CancelledError:
+                            if task["id"] in self._cancelling and request_id is not None:
+                                await self._notify_cancelled(session, request_id)
+                            raise
+                        except Exception as e:
+                            future.set_exception(e)
+                            # 传输层出错（工具自身的错误以 isError 结果返回）时立即检查该 worker
+                            if self.running:
+                                asyncio.create_task(self._check_worker(worker))
+                        finally:
+                            worker.outstanding -= 1
+                            self.in_flight -= 1
+                finally:
+                    if tool_slots is not None:
+                        tool_slots.release()
+            finally:
+                if lock is not None:
+                    lock.release()
+        except asyncio.CancelledError:
+            if task["id"] in self._cancelling:
+                # 被 cancel() 取消
+                self._cancelling.discard(task["id"])
+                if not future.done() and not future.cancel():
+                    future.set_exception(concurrent.futures.CancelledError(f"任务 {task['id']} 已取消"))
+                return
+            # 客户端关闭：尚未开始的任务直接取消，已开始的以异常结束
+            if not future.done() and not future.cancel():
+                future.set_exception(RuntimeError("MCP客户端已关闭"))
+            raise
+
+    async def _execute_batch(self, task: dict):
+        """
+        把多个调用合并为一次批量请求执行，结果分发给各自的 Future
+
+        持有所涉及的全部资源锁（按资源名排序获取，避免与其它批量请求互相等待），
+        占用一个全局并发名额，不受单个工具的并发上限约束。
+        """
+        calls = task["batch"]
+        resources = sorted({key for key in (self._resource_key(c["name"], c["arguments"]) for c in calls) if key})
+        locks = [self._resource_locks.setdefault(resource, asyncio.Lock()) for resource in resources]
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            async with self._slots:
+                # 等待期间被取消的调用不再发送
+                live = [c for c in calls if c["future"].set_running_or_notify_cancel()]
+                if not live:
+                    return
+                # 同一批的调用固定到同一个 worker（见 add_batch 的分组），按其中任一调用的参数路由
+                worker, tool_name = self._route(task["name"], live[0]["arguments"])
+                if worker is None:
+                    for c in live:
+                        c["future"].set_result(unknown_tool_result(c["name"]))
+                    return
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                worker.outstanding += 1
+                for c in live:
+                    c["future"].worker = worker.index
+                try:
+                    await worker.wait_ready()
+                    worker.calls += 1
+                    result = await worker.session.call_tool(tool_name, {
+                        "calls": [{"name": c["tool"], "arguments": c["arguments"]} for c in live],
+                        "transactional": task.get("transactional", False),
+                    })
+                    items = (result.structuredContent or {}).get("results") if not result.isError else None
+                    if items is None or len(items) != len(live):
+                        # 批量请求本身失败（如参数校验），每个调用都得到同样的错误结果
+                        for c in live:
+                            c["future"].set_result(result)
+                    else:
+                        for c, item in zip(live, items):
+                            c["future"].set_result(types.CallToolResult.model_validate(item))
+                except Exception as e:
+                    for c in live:
+                        if not c["future"].done():
+                            c["future"].set_exception(e)
+                    if self.running:
+                        asyncio.create_task(self._check_worker(worker))
+                finally:
+                    worker.outstanding -= 1
+                    self.in_flight -= 1
+        except asyncio.CancelledError:
+            for c in calls:
+                future = c["future"]
+                if not future.done() and not future.cancel():
+                    future.set_exception(RuntimeError("MCP客户端已关闭"))
+            raise
         finally:
-            # 在异步环境中正确关闭资源
-            if self.session:
-                await self.session.__aexit__(None, None, None)
-            if self.context:
-                await self.context.__aexit__(None, None, None)
+            for lock in reversed(acquired):
+                lock.release()
+
+    async def _notify_cancelled(self, session, request_id: int):
+        """通知服务端取消请求（notifications/cancelled），服务端据此中止工具的执行"""
+        notification = types.CancelledNotification(
+            params=types.CancelledNotificationParams(requestId=request_id, reason="客户端取消"))
+        try:
+            await session.send_notification(types.ClientNotification(notification))
+        except Exception:
+            pass # 连接已断开时无需通知
+
+    # ==================== 取消任务 ====================
+    def cancel(self, task_id) -> bool:
+        """
+        取消任务：未开始的直接取消，执行中的取消调用并通知服务端；任务随即从结果存储中移除
+
+        参数:
+            task_id: add 返回的 TaskFuture，或任务的 UUID
+
+        返回:
+            任务尚未完成并已取消返回 True；任务不存在、已完成，或是已在执行的批量请求中的调用
+            （无法单独取消，照常完成并保留在结果存储中）返回 False
+        """
+        key = task_id.task_id if isinstance(task_id, TaskFuture) else task_id
+        future = self.results.get(key)
+        if future is None or future.done():
+            return False
+        if not future.cancel():
+            if getattr(future, "batched", False):
+                return False
+            self._call_in_loop(lambda: self._cancel_job(key))
+        self.results.discard(key)
+        return True
+
+    def _cancel_job(self, task_id: str):
+        """在事件循环中取消执行该任务的 asyncio 任务"""
+        job = self._jobs.get(task_id)
+        if job is not None and not job.done():
+            self._cancelling.add(task_id)
+            job.cancel()
 
     # ==================== 添加任务 ====================
-    def add(self, _data: dict) -> str:
+    def add(self, _data: dict) -> TaskFuture:
         """
         添加任务到队列
 
@@ -135,30 +575,117 @@ class MCPClient:
             data: 任务数据，包含 name 和 arguments
 
         返回:
-            任务的 UUID
+            任务的 TaskFuture（task_id 属性为任务的 UUID），可直接传给 get_result，
+            也可以用 result()/add_done_callback() 或 asyncio.wrap_future 等待
         """
         if _data is None:
             raise ValueError("数据不能为空")
         if self.running is False:
             raise ValueError("MCP客户端未启动")
-        data = self.OpenAI_to_MCP(_data) # 将OpenAI工具转换为MCP工具
         # 生成 UUID
         task_id = str(uuid.uuid4())
+        future = TaskFuture(task_id)
+        data = self._prepare(_data, future)
+        if data is None:
+            return future # 参数不合法，future 已带有错误结果
         task = {
             "id": task_id,
             "name": data["name"],
-            "arguments": data.get("arguments", {})
+            "arguments": data.get("arguments", {}),
+            "future": future
         }
-        self.message_queue.put(task)
-        return task_id
+        self.results.put(task_id, future)
+        self._post(task)
+        return future
+
+    # ==================== 批量添加任务 ====================
+    def _batch_target(self, name: str):
+        """返回可以合并该调用的批量工具名和服务端上的工具名，服务端不支持批量调用时返回 None"""
+        if any(tool.name == BATCH_TOOL for tool in self.tools):
+            return BATCH_TOOL, name
+        return None
+
+    def add_batch(self, calls: list, transactional: bool = False) -> list:
+        """
+        添加多个任务：同一服务端上的多个调用合并为一次 call_batch 请求，减少往返；
+        有多个 worker 时按资源所在的 worker 分组，不同数据库/文件上的调用不会被发到同一个 worker
+
+        参数:
+            calls: 任务数据列表，格式同 add
+            transactional: 同一数据库上的调用是否作为一组（任一失败则整体回滚）
+
+        返回:
+            与 calls 一一对应的 TaskFuture 列表，用法同 add 的返回值；
+            合并发送的调用只能在请求发出前取消
+        """
+        if self.running is False:
+            raise ValueError("MCP客户端未启动")
+        groups, futures = {}, []
+        for _data in calls:
+            if _data is None:
+                raise ValueError("数据不能为空")
+            target = None
+            if self.initialized:
+                future = TaskFuture(str(uuid.uuid4()))
+                data = self._prepare(_data, future)
+                if data is None:
+                    futures.append(future)
+                    continue
+                target = self._batch_target(data["name"])
+            if target is None:
+                futures.append(self.add(_data))
+                continue
+            self.results.put(future.task_id, future)
+            futures.append(future)
+            groups.setdefault((target[0], self._sticky_worker(data.get("arguments", {}))), []).append({
+                "name": data["name"], "tool": target[1],
+                "arguments": data.get("arguments", {}), "future": future,
+            })
+        for (batch_tool, _), group in groups.items():
+            if len(group) == 1:
+                # 只有一个调用时按普通任务发送
+                call = group[0]
+                self._post({"id": call["future"].task_id, "name": call["name"], "arguments": call["arguments"], "future": call["future"]})
+            else:
+                for call in group:
+                    call["future"].batched = True
+                self._post({"id": str(uuid.uuid4()), "name": batch_tool, "batch": group, "transactional": transactional})
+        return futures
+
+    def _prepare(self, _data: dict, future: TaskFuture) -> Optional[dict]:
+        """
+        转换为 MCP 格式并校验参数
+
+        参数不合法时把结构化错误作为 isError 结果写入 future 并存入结果存储，返回 None
+        """
+        try:
+            data = self.OpenAI_to_MCP(_data) # 将OpenAI工具转换为MCP工具
+            data["arguments"] = self.check_arguments(data["name"], data.get("arguments", {}))
+            return data
+        except ToolArgumentError as e:
+            future.set_running_or_notify_cancel()
+            future.set_result(e.to_result())
+            self.results.put(future.task_id, future)
+            return None
+
+    def check_arguments(self, name: str, arguments: dict) -> dict:
+        """按工具的 inputSchema 转换并校验参数，返回转换后的参数，不合法时抛出 ToolArgumentError；未知工具不校验"""
+        validate = self._validators.get(self._schema_name(name))
+        if validate is not None:
+            return validate(name, arguments)
+        return arguments
+
+    def _schema_name(self, name: str) -> str:
+        """调用名对应的工具列表中的名字"""
+        return name
 
     # ==================== 获取结果 ====================
-    def get_result(self, task_id: str, block=True, timeout=None):
+    def get_result(self, task_id, block=True, timeout=None):
         """
         根据任务 ID 获取工具调用结果
 
         参数:
-            task_id: 任务的 UUID
+            task_id: add 返回的 TaskFuture，或任务的 UUID
             block: 是否阻塞等待，默认 True
             timeout: 超时时间（秒），None 表示无限等待
 
@@ -168,26 +695,30 @@ class MCPClient:
         if self.running is False:
             raise ValueError("MCP客户端未启动")
 
-        if block:
-            # 阻塞等待结果
-            start_time = time.time()
-            while True:
-                if task_id in self.results:
-                    result = self.results.pop(task_id)
-                    return result
-
-                # 检查超时
-                if timeout is not None:
-                    if time.time() - start_time > timeout:
-                        raise TimeoutError(f"等待任务 {task_id} 结果超时")
+        key = task_id.task_id if isinstance(task_id, TaskFuture) else task_id
+        future = self.results.get(key)
+        if future is None:
+            raise KeyError(f"任务 {key} 不存在、已过期或结果已被取走")
 
-                time.sleep(0.01)
-        else:
+        if not block and not future.done():
             # 非阻塞，直接返回
-            if task_id in self.results:
-                return self.results.pop(task_id)
-            else:
-                raise KeyError(f"任务 {task_id} 的结果尚未准备好")
+            raise KeyError(f"任务 {key} 的结果尚未准备好")
+
+        try:
+            # 阻塞等待结果
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            if not future.done():
+                raise TimeoutError(f"等待任务 {key} 结果超时") # 任务保留，可再次等待或 cancel()
+            raise
+        finally:
+            # 结果（含异常）取走后移出存储
+            if future.done():
+                self.results.pop(key)
+
+    def result_metrics(self) -> dict:
+        """结果存储的统计信息（含过期/淘汰的孤儿结果数），见 ResultStore.metrics"""
+        return self.results.metrics()
 
     # ==================== 获得工具 ====================
     def list_tools(self) -> list:
@@ -197,7 +728,16 @@ class MCPClient:
             raise ValueError("工具列表为空")
         if len(self.tools) == 0:
             raise ValueError("工具列表为空")
-        return [self.MCP_to_OpenAI(tool) for tool in self.tools] # 将MCP工具转换为OpenAI工具
+        # 转换结果按工具列表缓存，tools/list_changed 时清空
+        converted = self._openai_tools
+        if converted is None:
+            converted = [self.MCP_to_OpenAI(tool) for tool in self.tools if not self._is_batch_tool(tool.name)] # 将MCP工具转换为OpenAI工具
+            self._openai_tools = converted
+        return list(converted)
+
+    def _is_batch_tool(self, name: str) -> bool:
+        """批量调用工具只供客户端使用，不提供给模型"""
+        return name == BATCH_TOOL
 
     def get_initialized(self) -> bool:
         return self.initialized
@@ -219,19 +759,17 @@ class MCPClient:
         1. 工具定义格式（tool definition）：包含 description 和 parameters
         2. 工具调用格式（tool call）：包含 name 和 arguments
         """
+        # 已是MCP格式（{"name": ..., "arguments": ...}）时直接使用
+        if "function" not in tool and "name" in tool:
+            return {"name": tool["name"], "arguments": parse_arguments(tool["name"], tool.get("arguments", {}))}
+
         function = tool.get("function", {})
 
         # 判断是工具调用格式还是工具定义格式
         if "arguments" in function:
             # 工具调用格式：只需要 name 和 arguments
-            arguments = function["arguments"]
-            # 如果 arguments 是字符串，需要解析为字典
-            if isinstance(arguments, str):
-                # 处理空字符串的情况
-                if arguments.strip() == "":
-                    arguments = {}
-                else:
-                    arguments = json.loads(arguments)
+            # 字符串按 JSON 解析（空字符串视为无参数），无法解析时抛出 ToolArgumentError
+            arguments = parse_arguments(function["name"], function["arguments"])
 
             return {
                 "name": function["name"],
@@ -439,47 +977,62 @@ if __name__ == "__main__":
         print("批量任务压力测试")
         print("=" * 80)
 
-        print("\n[21] 批量添加50个任务...")
-        task_ids = []
-        start_time = time.time()
-
-        for i in range(50):
-            task_id = client.add({
-                "name": "write",
-                "arguments": {
-                    "db_name": test_db,
-                    "table_name": test_table,
-                    "data_id": f"batch_{i:03d}",
-                    "content": f"批量测试数据 {i}"
-                }
-            })
-            task_ids.append(task_id)
-
-        print(f"✓ 已添加 {len(task_ids)} 个任务")
-
-        print("\n[22] 等待所有任务完成...")
-        success_count = 0
-        fail_count = 0
-
-        for i, task_id in enumerate(task_ids):
-            try:
-                result = client.get_result(task_id, timeout=10)
-                success_count += 1
-                if i % 10 == 0:
-                    print(f"  进度: {i+1}/{len(task_ids)}")
-            except Exception as e:
-                fail_count += 1
-                print(f"  任务 {i} 失败: {e}")
-
-        end_time = time.time()
-        elapsed = end_time - start_time
+        def run_batch(_client, tasks):
+            """批量提交后统一等待，返回 (成功数, 失败数, 耗时)"""
+            start_time = time.time()
+            futures = [_client.add(task) for task in tasks]
+            success_count = fail_count = 0
+            for i, future in enumerate(futures):
+                try:
+                    result = _client.get_result(future, timeout=10)
+                    success_count += 0 if result.isError else 1
+                    fail_count += 1 if result.isError else 0
+                except Exception as e:
+                    fail_count += 1
+                    print(f"  任务 {i} 失败: {e}")
+            return success_count, fail_count, time.time() - start_time
+
+        # 50 个互不依赖的调用：顺序执行 vs 并发执行
+        math_tasks = [{"name": ["add", "multiply", "power"][i % 3], "arguments": {"a": i, "b": 2}} for i in range(50)]
+
+        print("\n[21] 50个任务顺序执行（max_in_flight=1）...")
+        sequential_client = MCPClient(max_in_flight=1)
+        sequential_client.start()
+        while not sequential_client.get_initialized():
+            time.sleep(0.1)
+        try:
+            run_batch(sequential_client, math_tasks[:5])  # 预热
+            success_count, fail_count, sequential_elapsed = run_batch(sequential_client, math_tasks)
+        finally:
+            sequential_client.close()
+        print(f"  成功: {success_count}, 失败: {fail_count}, 总耗时: {sequential_elapsed:.3f} 秒")
+
+        print(f"\n[22] 50个任务并发执行（max_in_flight={client.max_in_flight}）...")
+        run_batch(client, math_tasks[:5])  # 预热
+        client.peak_in_flight = 0
+        success_count, fail_count, elapsed = run_batch(client, math_tasks)
+        print(f"  成功: {success_count}, 失败: {fail_count}, 总耗时: {elapsed:.3f} 秒, 峰值并发: {client.peak_in_flight}")
+        print(f"  加速比: {sequential_elapsed / elapsed:.1f}x")
+
+        # 同一数据库的写入按提交顺序串行执行
+        print("\n[22b] 同一数据库批量写入50条（按数据库串行）...")
+        write_tasks = [{
+            "name": "write",
+            "arguments": {
+                "db_name": test_db,
+                "table_name": test_table,
+                "data_id": f"batch_{i:03d}",
+                "content": f"批量测试数据 {i}"
+            }
+        } for i in range(50)]
+        success_count, fail_count, elapsed = run_batch(client, write_tasks)
 
         print(f"\n✓ 压力测试完成:")
-        print(f"  总任务数: {len(task_ids)}")
+        print(f"  总任务数: {len(write_tasks)}")
         print(f"  成功: {success_count}")
         print(f"  失败: {fail_count}")
         print(f"  总耗时: {elapsed:.2f} 秒")
-        print(f"  平均每任务: {elapsed/len(task_ids):.3f} 秒")
+        print(f"  平均每任务: {elapsed/len(write_tasks):.3f} 秒")
 
         # ==================== 多路径文件操作测试 ====================
         print("\n" + "=" * 80)
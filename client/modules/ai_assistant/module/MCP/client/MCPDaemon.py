@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+from typing import Optional
+from urllib.parse import urlparse
+
+
+def _state_dir() -> str:
+    """
+    当前用户的运行时目录：$XDG_RUNTIME_DIR，没有时为 ~/.cache（Windows 为 %LOCALAPPDATA%）
+    状态文件决定客户端连接哪个地址、stop_daemon 结束哪个进程，不能放在所有用户可写的系统临时目录中
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ai_assistant")
+
+
+# 默认状态文件：同一用户的所有助手进程共用一个常驻服务
+DEFAULT_STATE_FILE = os.path.join(_state_dir(), "mcp_daemon.json")
+# 内置服务端脚本
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server", "MCPServer.py")
+# 常驻服务只监听本机地址
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+def _load(state_file: str) -> Optional[dict]:
+    """读取状态文件；文件不属于当前用户或其它用户可读写时视为不存在"""
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            if hasattr(os, "getuid"):
+                info = os.fstat(f.fileno())
+                if info.st_uid != os.getuid() or info.st_mode & 0o077:
+                    return None
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def _command_line(pid: int) -> Optional[str]:
+    """进程的命令行，无法获取时返回 None"""
+    try:
+        if os.path.exists(f"/proc/{pid}/cmdline"):
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                return f.read().replace(b"\0", b" ").decode("utf-8", "replace")
+        if sys.platform == "win32":
+            command = ["powershell", "-NoProfile", "-Command",
+                       f"(Get-CimInstance Win32_Process -Filter 'ProcessId={pid}').CommandLine"]
+        else:
+            command = ["ps", "-p", str(pid), "-o", "command="]
+        output = subprocess.run(command, capture_output=True, text=True, timeout=5).stdout.strip()
+        return output or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def is_daemon(state: Optional[dict], state_file: str) -> bool:
+    """状态中的进程是否为使用该状态文件的常驻服务（防止状态文件指向无关进程），地址是否为本机地址"""
+    if not state or not isinstance(state.get("pid"), int) or not isinstance(state.get("url"), str):
+        return False
+    if urlparse(state["url"]).hostname not in LOCAL_HOSTS:
+        return False
+    command = _command_line(state["pid"])
+    return bool(command) and SERVER_SCRIPT in command and "--daemon" in command \
+        and os.path.abspath(state_file) in command
+
+
+def read_state(state_file: str = DEFAULT_STATE_FILE) -> Optional[dict]:
+    """
+    读取常驻服务的状态文件
+    不存在、无法解析、不属于当前用户，或其中的进程不是该状态文件的常驻服务时返回 None
+    """
+    state = _load(state_file)
+    return state if is_daemon(state, state_file) else None
+
+
+def is_alive(state: Optional[dict], timeout: float = 0.5) -> bool:
+    """常驻服务的端口能否连接（state 应来自 read_state）"""
+    if not state or not state.get("url"):
+        return False
+    address = urlparse(state["url"])
+    try:
+        with socket.create_connection((address.hostname, address.port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def ensure_daemon(state_file: str = DEFAULT_STATE_FILE, timeout: float = 30.0) -> dict:
+    """
+    返回正在运行的常驻服务的状态，没有时启动一个
+
+    多个进程同时调用时只有取得启动锁的进程启动服务，其它进程等待状态文件出现。
+    常驻服务与启动它的进程分离，进程退出后继续运行，直到 stop_daemon。
+
+    参数:
+        state_file: 状态文件路径
+        timeout: 等待服务就绪的超时时间（秒）
+
+    返回:
+        状态字典，含 pid、url、started、tools
+    """
+    state = read_state(state_file)
+    if is_alive(state):
+        return state
+
+    os.makedirs(os.path.dirname(os.path.abspath(state_file)), mode=0o700, exist_ok=True)
+    lock_file = f"{state_file}.lock"
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            # 其它进程正在启动，等待其完成；锁文件超时未释放视为残留
+            state = read_state(state_file)
+            if is_alive(state):
+                return state
+            try:
+                if time.time() - os.path.getmtime(lock_file) > timeout:
+                    os.remove(lock_file)
+            except OSError:
+                pass
+            if time.time() > deadline:
+                raise TimeoutError("等待其它进程启动 MCP 常驻服务超时")
+            time.sleep(0.1)
+
+    try:
+        os.close(fd)
+        state = read_state(state_file)
+        if is_alive(state):
+            return state
+        _spawn(state_file)
+        while time.time() < deadline:
+            state = read_state(state_file)
+            if is_alive(state):
+                return state
+            time.sleep(0.05)
+        raise TimeoutError("MCP 常驻服务启动超时")
+    finally:
+        try:
+            os.remove(lock_file)
+        except OSError:
+            pass
+
+
+def _spawn(state_file: str):
+    """启动与当前进程分离的常驻服务，输出写入状态文件旁的日志"""
+    if os.path.exists(state_file):
+        os.remove(state_file) # 残留的状态文件
+    log = os.fdopen(os.open(f"{state_file}.log", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600), "ab")
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(
+            [sys.executable, SERVER_SCRIPT, "--daemon", "--state-file", os.path.abspath(state_file)],
+            cwd=os.path.dirname(SERVER_SCRIPT),
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+            **kwargs,
+        )
+    finally:
+        log.close()
+
+
+def stop_daemon(state_file: str = DEFAULT_STATE_FILE, timeout: float = 10.0) -> bool:
+    """
+    停止常驻服务；只结束状态文件中确认是常驻服务的进程（见 read_state）
+
+    返回:
+        有正在运行的服务并已停止返回 True
+    """
+    state = read_state(state_file)
+    if not state:
+        return False
+    alive = is_alive(state)
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/PID", str(state["pid"]), "/T", "/F"], capture_output=True)
+        else:
+            import signal
+            os.kill(state["pid"], signal.SIGTERM)
+    except (OSError, KeyError):
+        pass
+    deadline = time.time() + timeout
+    while is_alive(state) and time.time() < deadline:
+        time.sleep(0.05)
+    if os.path.exists(state_file) and _load(state_file) == state:
+        os.remove(state_file)
+    return alive
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import asyncio
+from typing import Dict, Optional, Tuple
+from mcp import StdioServerParameters
+
+try:
+    from module.MCP.client.MCPClient import MCPClient, SERVER_DIR, BATCH_TOOL
+    from module.MCP.client.MCPWorker import MCPWorker
+except ImportError:  # 直接运行本文件时
+    from MCPClient import MCPClient, SERVER_DIR, BATCH_TOOL
+    from MCPWorker import MCPWorker
+
+# OpenAI 工具名只允许字母、数字、下划线和连字符
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+class MCPManager(MCPClient):
+    """
+    多个 MCP 服务端的管理器
+
+    所有服务端并发启动（总启动耗时取决于最慢的一个），工具合并为带命名空间的列表
+    （"服务端名__工具名"），每个调用路由到所属服务端的会话上，各会话的调用互不阻塞。
+    调度、暂停、取消、结果存储、健康检查与 MCPClient 相同，可直接替换 MCPClient 交给 Agent 使用。
+    启动失败的服务端记录在 failed 中并被跳过，全部失败时报错。
+
+    参数:
+        servers: 服务端名 -> 配置，配置可以是
+                 "builtin"（内置 MCPServer）、启动命令列表、StdioServerParameters、
+                 {"command": ..., "args": [...], "env": {...}, "cwd": ...}，
+                 或返回 FastMCP 实例的函数（在本进程内运行）
+        separator: 服务端名与工具名之间的分隔符
+        其余参数同 MCPClient（workers/transport/server_factory 除外）
+
+    示例:
+        >>> manager = MCPManager({"builtin": "builtin", "fs": ["npx", "-y", "@modelcontextprotocol/server-filesystem", "."]})
+        >>> manager.start()
+        >>> manager.add({"name": "fs__list_directory", "arguments": {"path": "."}})
+    """
+    def __init__(self, servers: Dict[str, object], separator: str = "__", **kwargs):
+        if not servers:
+            raise ValueError("servers 不能为空")
+        for key in ("workers", "transport", "server_factory"):
+            kwargs.pop(key, None)
+        super().__init__(workers=len(servers), **kwargs)
+        self.separator = separator # 命名空间分隔符
+        self.servers = {self._namespace(name): spec for name, spec in servers.items()} # 服务端名 -> 配置
+        if len(self.servers) != len(servers):
+            raise ValueError("服务端名规范化后重复")
+        self.failed = {} # 启动失败的服务端名 -> 异常
+        self.tool_index = {} # 带命名空间的工具名 -> (服务端名, 工具名)
+        self._unique_tools = {} # 只有一个服务端提供的工具名 -> 带命名空间的工具名
+        self._server_workers = {} # 服务端名 -> MCPWorker
+
+    # ==================== 配置 ====================
+    @classmethod
+    def from_config(cls, path: str, **kwargs) -> "MCPManager":
+        """
+        从 JSON 配置文件创建，格式与常见 MCP 客户端一致：
+        {"mcpServers": {"fs": {"command": "npx", "args": [...], "env": {...}}}}
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config.get("mcpServers", config), **kwargs)
+
+    def _namespace(self, name: str) -> str:
+        """把服务端名规范为合法的工具名前缀"""
+        return _INVALID_NAME.sub("_", str(name))
+
+    @staticmethod
+    def _server_params(spec) -> Tuple[Optional[StdioServerParameters], Optional[object]]:
+        """把配置转换为 (stdio 参数, 内存模式工厂)"""
+        if spec == "builtin":
+            return StdioServerParameters(command="python", args=[os.path.join(SERVER_DIR, "MCPServer.py")]), None
+        if isinstance(spec, StdioServerParameters):
+            return spec, None
+        if callable(spec):
+            return None, spec
+        if isinstance(spec, (list, tuple)) and spec:
+            return StdioServerParameters(command=spec[0], args=list(spec[1:])), None
+        if isinstance(spec, dict) and spec.get("command"):
+            command = spec["command"]
+            if isinstance(command, (list, tuple)):
+                command, args = command[0], list(command[1:]) + list(spec.get("args", []))
+            else:
+                args = list(spec.get("args", []))
+            return StdioServerParameters(command=command, args=args, env=spec.get("env"), cwd=spec.get("cwd")), None
+        raise ValueError(f"无法识别的服务端配置: {spec!r}")
+
+    # ==================== 启动 ====================
+    def _create_workers(self) -> list:
+        """每个服务端一个 worker"""
+        workers = []
+        for index, (name, spec) in enumerate(self.servers.items()):
+            params, factory = self._server_params(spec)
+            workers.append(MCPWorker(index, params, factory, name=name, on_tools_changed=self._on_tools_changed))
+        return workers
+
+    async def _start_workers(self):
+        """并发启动全部服务端，失败的记录后跳过"""
+        results = await asyncio.gather(*(worker.start() for worker in self.workers), return_exceptions=True)
+        started = []
+        for worker, result in zip(self.workers, results):
+            if isinstance(result, BaseException):
+                self.failed[worker.name] = result
+                print(f"[MCPManager] 服务端 {worker.name} 启动失败: {result}")
+            else:
+                started.append(worker)
+        if not started:
+            raise RuntimeError(f"全部 MCP 服务端启动失败: {list(self.failed)}")
+        self.workers = started
+        self._server_workers = {worker.name: worker for worker in started}
+
+    async def _load_tools(self, use_cache: bool = True) -> list:
+        """并发获取各服务端的工具列表，合并为带命名空间的工具索引"""
+        results = await asyncio.gather(*(worker.session.list_tools() for worker in self.workers))
+        tools, owners = [], {}
+        self.tool_index = {}
+        for worker, result in zip(self.workers, results):
+            for tool in result.tools:
+                name = f"{worker.name}{self.separator}{tool.name}"
+                self.tool_index[name] = (worker.name, tool.name)
+                owners.setdefault(tool.name, []).append(name)
+                tools.append(tool.model_copy(update={"name": name}))
+        self._unique_tools = {tool: names[0] for tool, names in owners.items() if len(names) == 1}
+        return tools
+
+    # ==================== 路由 ====================
+    def _resolve(self, name: str) -> Optional[Tuple[str, str]]:
+        """带命名空间的工具名 -> (服务端名, 工具名)；只有一个服务端提供的工具也可以不带命名空间"""
+        if name in self.tool_index:
+            return self.tool_index[name]
+        if name in self._unique_tools:
+            return self.tool_index[self._unique_tools[name]]
+        return None
+
+    def _route(self, name: str, arguments: dict):
+        """路由到工具所属服务端的会话"""
+        resolved = self._resolve(name)
+        if resolved is None:
+            return None, name
+        server, tool = resolved
+        return self._server_workers[server], tool
+
+    def _sticky_worker(self, arguments: dict):
+        """每个服务端只有一个会话，按服务端路由，不按资源分组"""
+        return None
+
+    def _schema_name(self, name: str) -> str:
+        """不带命名空间的唯一工具名按其带命名空间的名字校验"""
+        return self._unique_tools.get(name, name)
+
+    def _resource_key(self, name: str, arguments: dict) -> Optional[str]:
+        """按服务端上的工具名判断是否需要串行"""
+        resolved = self._resolve(name)
+        if resolved is None:
+            return None
+        key = super()._resource_key(resolved[1], arguments)
+        if key is not None and key.startswith("tool:"):
+            return f"tool:{resolved[0]}{self.separator}{resolved[1]}"
+        return key
+
+    # ==================== 批量调用 ====================
+    def _batch_target(self, name: str):
+        """同一服务端上的调用合并到该服务端的 call_batch"""
+        resolved = self._resolve(name)
+        if resolved is None:
+            return None
+        batch_tool = f"{resolved[0]}{self.separator}{BATCH_TOOL}"
+        return (batch_tool, resolved[1]) if batch_tool in self.tool_index else None
+
+    def _is_batch_tool(self, name: str) -> bool:
+        return name.endswith(f"{self.separator}{BATCH_TOOL}")
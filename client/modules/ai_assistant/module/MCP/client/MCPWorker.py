@@ -0,0 +1,162 @@
+import asyncio
+import contextlib
+from typing import Callable, Optional, Union
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.stdio import stdio_client
+
+
+class MCPWorker:
+    """
+    一个 MCP 服务及其会话
+
+    stdio_client/ClientSession 内部使用 anyio 任务组，进入和退出必须在同一个任务里，
+    因此每个 worker 由一个独立的宿主任务持有连接，stop() 通知宿主任务退出。
+    必须在事件循环内使用。
+
+    参数:
+        index: worker 编号
+        server_params: 服务器参数（stdio 模式，启动子进程）
+        server_factory: 返回 FastMCP 实例的函数（内存模式，服务端运行在本进程的事件循环中，
+                        不经过子进程和管道）；给出时忽略 server_params
+        name: 服务端名称，默认为编号
+        server_url: streamable-HTTP 服务地址，或返回地址的函数（每次连接时调用，可在其中确保服务在运行）；
+                    给出时忽略 server_params
+        on_tools_changed: 收到服务端 tools/list_changed 通知时调用的函数，参数为本 worker
+    """
+    def __init__(self, index: int, server_params: Optional[StdioServerParameters] = None,
+                 server_factory: Optional[Callable] = None, name: Optional[str] = None,
+                 server_url: Union[str, Callable[[], str], None] = None,
+                 on_tools_changed: Optional[Callable] = None):
+        if server_params is None and server_factory is None and server_url is None:
+            raise ValueError("server_params、server_factory 和 server_url 必须给出一个")
+        self.index = index # 编号
+        self.name = name or str(index) # 服务端名称
+        self.server_params = server_params # 服务器参数
+        self.server_factory = server_factory # 内存模式的服务端工厂
+        self.server_url = server_url # HTTP 模式的服务地址
+        self.url = None # 当前连接的 HTTP 地址
+        self.on_tools_changed = on_tools_changed # 工具列表变化回调
+        self.session: Optional[ClientSession] = None # 会话
+        self.outstanding = 0 # 已分配到本 worker、尚未完成的调用数
+        self.calls = 0 # 累计调用数
+        self.restarts = 0 # 重启次数
+        self.alive = False # 会话可用
+        self._task = None # 宿主任务
+        self._ready = None # 初始化完成（asyncio.Future）
+        self._closing = None # 退出信号（asyncio.Event）
+        self._restart_lock = asyncio.Lock() # 防止同时重启
+
+    # ==================== 启动 ====================
+    async def start(self):
+        """启动服务进程并完成握手"""
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._serve())
+        await asyncio.shield(self._ready)
+
+    @contextlib.asynccontextmanager
+    async def _connect(self):
+        """建立会话：内存模式直接连接本进程内的 FastMCP 实例，HTTP 模式连接已在运行的服务，否则启动子进程走 stdio"""
+        if self.server_factory is not None:
+            from fastmcp.client.transports import FastMCPTransport
+            async with FastMCPTransport(self.server_factory()).connect_session(message_handler=self._handle_message) as session:
+                yield session
+        elif self.server_url is not None:
+            from mcp.client.streamable_http import streamablehttp_client
+            url = self.server_url
+            if callable(url):
+                url = await asyncio.to_thread(url)
+            self.url = url
+            async with streamablehttp_client(url) as (read, write, _):
+                async with ClientSession(read, write, message_handler=self._handle_message) as session:
+                    yield session
+        else:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write, message_handler=self._handle_message) as session:
+                    yield session
+
+    async def _handle_message(self, message):
+        """
+        处理服务端主动发来的消息：tools/list_changed 时通知回调
+
+        该函数在会话的接收循环中执行，回调里需要等待服务端响应（如重新 list_tools），
+        因此放到独立任务中执行，避免阻塞接收循环
+        """
+        if self.on_tools_changed is None or not isinstance(message, types.ServerNotification):
+            return
+        if isinstance(message.root, types.ToolListChangedNotification):
+            asyncio.create_task(self.on_tools_changed(self))
+
+    async def _serve(self):
+        """宿主任务：持有连接直到收到退出信号或连接断开"""
+        try:
+            async with self._connect() as session:
+                await session.initialize()
+                self.session = session
+                self.alive = True
+                self._ready.set_result(True)
+                await self._closing.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e if isinstance(e, Exception) else RuntimeError(f"worker {self.index} 启动被取消"))
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.alive = False
+            self.session = None
+
+    # ==================== 关闭 ====================
+    async def stop(self, timeout: float = 5.0):
+        """关闭会话和服务进程，超时后强制取消"""
+        self.alive = False
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        except Exception:
+            pass # 连接已经出错，退出即可
+        if not self._task.done():
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    # ==================== 重启 ====================
+    async def restart(self):
+        """关闭后重新启动；已有其它调用在重启时直接等待其完成"""
+        if self._restart_lock.locked():
+            async with self._restart_lock:
+                return
+        async with self._restart_lock:
+            await self.stop()
+            self.restarts += 1
+            await self.start()
+
+    # ==================== 健康检查 ====================
+    def exited(self) -> bool:
+        """宿主任务已退出（服务进程崩溃或管道断开）"""
+        return self._task is not None and self._task.done()
+
+    async def ping(self, timeout: float) -> bool:
+        """发送 ping，超时或出错返回 False"""
+        session = self.session
+        if session is None or not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def wait_ready(self):
+        """等待 worker 可用（重启期间的调用在此等待）"""
+        if self._restart_lock.locked():
+            async with self._restart_lock:
+                pass
+        if not self.alive:
+            raise RuntimeError(f"MCP worker {self.index} 不可用")
+
+    def __repr__(self):
+        return f"<MCPWorker {self.name} alive={self.alive} outstanding={self.outstanding} restarts={self.restarts}>"
@@ -0,0 +1,116 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class ResultStore:
+    """
+    工具调用结果的存储：有容量上限，已完成的结果超过 TTL 未取走即丢弃
+
+    未完成的任务不会过期也不会被淘汰（它们的数量受调用方提交速度限制），
+    只有已完成、未被 get_result 取走的结果（孤儿结果）会按完成顺序过期或淘汰。
+    清理在每次写入/读取时顺带进行，不需要后台线程。线程安全。
+
+    参数:
+        max_size: 最多保存的条目数，超出时淘汰最早完成的结果
+        ttl: 已完成结果的保存时间（秒），None 表示不过期
+        clock: 时钟函数，默认 time.monotonic
+    """
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 600.0, clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size 必须大于0")
+        self.max_size = max_size # 容量上限
+        self.ttl = ttl # 过期时间
+        self.clock = clock # 时钟
+        self._lock = threading.Lock()
+        self._entries = {} # 任务ID -> Future
+        self._completed = OrderedDict() # 已完成任务ID -> 完成时间（按完成顺序）
+        self._stats = {"added": 0, "collected": 0, "expired": 0, "evicted": 0, "cancelled": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, task_id):
+        return task_id in self._entries
+
+    # ==================== 写入 ====================
+    def put(self, task_id: str, future):
+        """保存任务的 Future，完成时开始计算 TTL"""
+        with self._lock:
+            self._entries[task_id] = future
+            self._stats["added"] += 1
+            self._purge()
+        future.add_done_callback(lambda _f: self._mark_done(task_id))
+
+    def _mark_done(self, task_id: str):
+        with self._lock:
+            if task_id in self._entries:
+                self._completed[task_id] = self.clock()
+                self._purge()
+
+    # ==================== 读取 ====================
+    def get(self, task_id: str):
+        """返回任务的 Future，不存在或已过期返回 None"""
+        with self._lock:
+            self._purge()
+            return self._entries.get(task_id)
+
+    def pop(self, task_id: str):
+        """取走任务的 Future，不存在返回 None"""
+        with self._lock:
+            future = self._entries.pop(task_id, None)
+            self._completed.pop(task_id, None)
+            if future is not None:
+                self._stats["collected"] += 1
+            return future
+
+    def discard(self, task_id: str):
+        """丢弃任务（取消时使用），返回其 Future"""
+        with self._lock:
+            future = self._entries.pop(task_id, None)
+            self._completed.pop(task_id, None)
+            if future is not None:
+                self._stats["cancelled"] += 1
+            return future
+
+    def values(self) -> list:
+        with self._lock:
+            return list(self._entries.values())
+
+    # ==================== 清理 ====================
+    def _purge(self):
+        """丢弃过期的结果，超出容量时淘汰最早完成的结果（调用方持有锁）"""
+        if self.ttl is not None:
+            deadline = self.clock() - self.ttl
+            while self._completed:
+                task_id, done_at = next(iter(self._completed.items()))
+                if done_at > deadline:
+                    break
+                self._completed.popitem(last=False)
+                self._entries.pop(task_id, None)
+                self._stats["expired"] += 1
+        while len(self._entries) > self.max_size and self._completed:
+            task_id, _ = self._completed.popitem(last=False)
+            self._entries.pop(task_id, None)
+            self._stats["evicted"] += 1
+
+    # ==================== 统计 ====================
+    def metrics(self) -> dict:
+        """
+        返回统计信息
+
+        返回:
+            size/pending/completed: 当前条目数、未完成数、已完成未取走数
+            added/collected/cancelled: 累计写入、被取走、被取消的条目数
+            expired/evicted: 累计因过期、因容量被丢弃的孤儿结果数
+            orphaned: expired + evicted
+        """
+        with self._lock:
+            self._purge()
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["completed"] = len(self._completed)
+            stats["pending"] = len(self._entries) - len(self._completed)
+            stats["orphaned"] = stats["expired"] + stats["evicted"]
+            return stats
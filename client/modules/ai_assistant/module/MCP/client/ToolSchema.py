@@ -0,0 +1,166 @@
+import re
+import json
+from typing import Callable, Dict, List, Optional
+from jsonschema.validators import validator_for
+from mcp import types
+
+# 一次最多报告的参数错误数
+MAX_ERRORS = 10
+
+# pydantic 宽松模式接受的布尔字符串
+TRUE_STRINGS = {"true", "1", "yes", "y", "on", "t"}
+FALSE_STRINGS = {"false", "0", "no", "n", "off", "f"}
+INTEGER_STRING = re.compile(r"^\s*[+-]?\d+\s*$")
+
+
+class ToolArgumentError(ValueError):
+    """
+    工具参数不合法（JSON 无法解析或不符合工具的 inputSchema）
+
+    参数:
+        tool: 工具名
+        errors: 错误列表，每项为 {"path": 参数路径, "message": 说明, "validator": 未通过的 schema 关键字}
+    """
+    def __init__(self, tool: str, errors: List[dict]):
+        self.tool = tool # 工具名
+        self.errors = errors # 错误列表
+        details = "; ".join(f"{e['path'] or '(参数)'}: {e['message']}" for e in errors)
+        super().__init__(f"工具 {tool} 的参数不合法: {details}")
+
+    def to_dict(self) -> dict:
+        return {"error": "invalid_arguments", "tool": self.tool, "errors": self.errors}
+
+    def to_result(self) -> types.CallToolResult:
+        """转换为错误的工具结果，可以像服务端返回的错误一样回传给模型"""
+        payload = self.to_dict()
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=json.dumps(payload, ensure_ascii=False))],
+            structuredContent=payload,
+            isError=True,
+        )
+
+
+def parse_arguments(tool: str, arguments) -> dict:
+    """解析模型输出的参数：字符串按 JSON 解析，空字符串视为无参数，结果必须是对象"""
+    if arguments is None:
+        return {}
+    if isinstance(arguments, str):
+        if not arguments.strip():
+            return {}
+        try:
+            arguments = json.loads(arguments)
+        except json.JSONDecodeError as e:
+            raise ToolArgumentError(tool, [{"path": "", "message": f"参数不是合法的 JSON: {e.msg}（第 {e.pos} 个字符）", "validator": "json"}])
+    if not isinstance(arguments, dict):
+        raise ToolArgumentError(tool, [{"path": "", "message": f"参数必须是 JSON 对象，实际为 {type(arguments).__name__}", "validator": "type"}])
+    return arguments
+
+
+def coerce(schema: dict, value):
+    """
+    按 schema 转换参数值，与服务端 pydantic 宽松模式的转换一致：
+    "3"/"3.0"/3.0/True -> 3/3/3/1、"1.5" -> 1.5、"true"/"0" 等 -> 布尔值、0/1 -> 布尔值；
+    递归处理对象属性和数组元素（含 anyOf/oneOf 的各个分支），无法转换的值原样返回，交给校验报告错误
+    """
+    if not isinstance(schema, dict):
+        return value
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            branches = [branch for branch in schema[key] if isinstance(branch, dict)]
+            # 值已经符合某个分支的类型时不转换（如 Optional[int] 的 None）
+            if any(_matches_type(branch, value) for branch in branches):
+                return value
+            for branch in branches:
+                converted = coerce(branch, value)
+                if converted is not value:
+                    return converted
+            return value
+    kind = schema.get("type")
+    if kind == "object" and isinstance(value, dict):
+        properties = schema.get("properties") or {}
+        return {key: coerce(properties[key], item) if key in properties else item for key, item in value.items()}
+    if kind == "array" and isinstance(value, list) and isinstance(schema.get("items"), dict):
+        return [coerce(schema["items"], item) for item in value]
+    if kind == "integer":
+        if isinstance(value, bool):
+            return int(value)
+        number = value
+        if isinstance(value, str):
+            if INTEGER_STRING.match(value):
+                return int(value)
+            try:
+                number = float(value)
+            except ValueError:
+                return value
+        if isinstance(number, float) and number.is_integer():
+            return int(number)
+    elif isinstance(value, bool):
+        return value
+    elif kind == "number" and isinstance(value, str):
+        try:
+            return int(value) if INTEGER_STRING.match(value) else float(value)
+        except ValueError:
+            return value
+    elif kind == "boolean":
+        if isinstance(value, str) and value.strip().lower() in TRUE_STRINGS | FALSE_STRINGS:
+            return value.strip().lower() in TRUE_STRINGS
+        if isinstance(value, (int, float)) and value in (0, 1):
+            return value == 1
+    return value
+
+
+def _matches_type(schema: dict, value) -> bool:
+    """值是否已经是 schema 声明的类型（只看 type 关键字）"""
+    kind = schema.get("type")
+    if kind == "null":
+        return value is None
+    if kind == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if kind == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind == "boolean":
+        return isinstance(value, bool)
+    if kind == "string":
+        return isinstance(value, str)
+    if kind == "array":
+        return isinstance(value, list)
+    if kind == "object":
+        return isinstance(value, dict)
+    return False
+
+
+def compile_validator(schema: Optional[dict]) -> Optional[Callable[[str, dict], dict]]:
+    """
+    把工具的 inputSchema 编译为校验函数，schema 为空时返回 None
+
+    返回的函数接收 (工具名, 参数)，先按 coerce 转换参数再校验，返回转换后的参数；不合法时抛出 ToolArgumentError
+    """
+    if not schema:
+        return None
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+
+    def validate(tool: str, arguments: dict) -> dict:
+        arguments = coerce(schema, arguments)
+        if validator.is_valid(arguments):
+            return arguments
+        errors = sorted(validator.iter_errors(arguments), key=lambda e: [str(p) for p in e.absolute_path])
+        raise ToolArgumentError(tool, [
+            {"path": ".".join(str(p) for p in e.absolute_path), "message": e.message, "validator": e.validator}
+            for e in errors[:MAX_ERRORS]
+        ])
+    return validate
+
+
+def compile_validators(tools: list) -> Dict[str, Callable[[str, dict], dict]]:
+    """为工具列表中的每个工具编译校验函数；schema 本身无效的工具跳过（交给服务端校验）"""
+    validators = {}
+    for tool in tools:
+        try:
+            validate = compile_validator(tool.inputSchema)
+        except Exception:
+            continue
+        if validate is not None:
+            validators[tool.name] = validate
+    return validators
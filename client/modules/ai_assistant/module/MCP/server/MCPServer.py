@@ -1,26 +1,80 @@
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Client
 from fastmcp.tools import Tool
+from fastmcp.exceptions import NotFoundError
 import os
+import sys
 import json
+import time
+import socket
+import asyncio
+import inspect
+import argparse
+import functools
+import contextlib
+import anyio
+from typing import Any, Dict, List
 
-from Tools.DatabaseEditor import DatabaseEditor
+from Tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from Tools.SQLiteConnection import remove_database
+from Tools.MetadataCache import MetadataCache
 from Tools.DataInquire import DataInquire
+from Tools.DatabaseExecutor import DatabaseExecutor
+from Tools.DatabaseBackup import DatabaseBackup
 from Tools.FileEditor import FileEditor
 from Tools.WorkspaceManager import WorkspaceManager
 from Tools.TaskManager import TaskManager
 from Tools.mathematics import mathematics
 
+def offload(fn):
+    """
+    把同步工具包装为在工作线程中执行的异步工具
+
+    FastMCP 会在事件循环中直接调用同步函数，一个慢的文件/数据库操作会阻塞同一会话上并发的其他请求；
+    包装后函数签名和文档保持不变（工具的参数结构照常生成）。
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+    return wrapper
+
+# 标识资源的参数名：批量调用中同一资源上的调用按顺序执行，不同资源并行
+RESOURCE_ARGUMENTS = ("db_name", "filepath", "file_path")
+
+def tool_failed(result) -> bool:
+    """工具以 (False, 信息) 表示失败，FastMCP 把元组包装在 structured_content["result"] 中"""
+    structured = result.structured_content
+    if not isinstance(structured, dict):
+        return False
+    value = structured.get("result")
+    return isinstance(value, list) and len(value) > 0 and value[0] is False
+
+def batch_item(result=None, error: str = None) -> dict:
+    """单个调用的批量结果，字段与 CallToolResult 一致"""
+    if error is not None:
+        return {"content": [{"type": "text", "text": error}], "structuredContent": None, "isError": True}
+    return {
+        "content": [block.model_dump(mode="json", exclude_none=True) for block in result.content],
+        "structuredContent": result.structured_content,
+        "isError": False,
+    }
+
+class _Rollback(Exception):
+    """事务组中的调用失败，回滚整组"""
+
 class MCPServer:
     def __init__(self):
         # 创建MCP服务器节点
         self.mcp = FastMCP("测试服务器")
 
         self.database_editor = DatabaseEditor()
+        self.database_executor = DatabaseExecutor() # 数据库工具的写线程/扫描/查找线程池
         self.data_inquire = DataInquire()
+        self.database_backup = DatabaseBackup()
         self.file_editor = FileEditor()
         self.workspace_manager = WorkspaceManager()
         self.task_manager = TaskManager()
         self.mathematics = mathematics()
+        self._sync_tools = {} # 工具名 -> 同步版本的工具（事务组在写线程中直接执行）
         self.add_tool()
 
     # ==================== 启动服务器 ====================
@@ -28,6 +82,46 @@ class MCPServer:
         """启动服务器"""
         self.mcp.run()
 
+    # ==================== 常驻服务 ====================
+    def serve_daemon(self, state_file: str, host: str = "127.0.0.1", port: int = 0):
+        """
+        以 streamable-HTTP 在本机端口上常驻运行，多个客户端进程可同时连接
+        启动前把地址、进程号和工具列表写入状态文件，客户端据此连接并直接使用缓存的工具列表；退出时删除状态文件
+        :param state_file: 状态文件路径
+        :param host: 监听地址，只应使用本机地址
+        :param port: 端口，0 表示自动选择空闲端口
+        """
+        if not port:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind((host, 0))
+                port = sock.getsockname()[1]
+        tools = asyncio.run(self._list_tools())
+        state = {
+            "pid": os.getpid(),
+            "url": f"http://{host}:{port}/mcp",
+            "started": time.time(),
+            "tools": [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools],
+        }
+        # 先写临时文件再替换，客户端不会读到写了一半的状态；只有当前用户可读写（客户端拒绝其它权限的状态文件）
+        temp_file = f"{state_file}.{os.getpid()}.tmp"
+        with os.fdopen(os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temp_file, state_file)
+        try:
+            self.mcp.run(transport="http", host=host, port=port, path="/mcp", show_banner=False)
+        finally:
+            try:
+                with open(state_file, "r", encoding="utf-8") as f:
+                    if json.load(f).get("pid") == os.getpid():
+                        os.remove(state_file)
+            except (OSError, ValueError):
+                pass
+
+    async def _list_tools(self) -> list:
+        """通过内存客户端获取工具列表（与远程客户端看到的一致）"""
+        async with Client(self.mcp) as client:
+            return await client.list_tools()
+
     # ==================== 停止服务器 ====================
     def stop(self):
         """停止服务器"""
@@ -39,54 +133,183 @@ class MCPServer:
         self.stop()
         self.start()
 
+    # ==================== 批量调用 ====================
+    async def call_batch(self, calls: List[Dict[str, Any]], transactional: bool = False) -> Dict[str, Any]:
+        """
+        一次执行多个工具调用，减少请求往返
+        :param calls: 调用列表，每项为 {"name": 工具名, "arguments": 参数}
+        :param transactional: 为 True 时，同一数据库（db_name）上的调用作为一个事务组，任一失败则整组回滚，剩余调用不再执行（见 _run_transaction）
+        :return: {"results": [...]}，与 calls 一一对应，每项含 content/structuredContent/isError
+        """
+        # 同一资源上的调用按顺序组成一条链，不同链并行执行
+        chains = {}
+        for index, call in enumerate(calls):
+            arguments = call.get("arguments") or {}
+            resource = next((os.path.abspath(str(arguments[key])) for key in RESOURCE_ARGUMENTS if arguments.get(key)), None)
+            key = resource if resource is not None else f"call:{index}"
+            chains.setdefault(key, []).append(index)
+
+        results: List[Dict[str, Any]] = [None] * len(calls)
+
+        async def run_chain(indexes: List[int]):
+            arguments = calls[indexes[0]].get("arguments") or {}
+            db_name = arguments.get("db_name")
+            if transactional and db_name:
+                for index, item in zip(indexes, await self._run_transaction(db_name, [calls[i] for i in indexes])):
+                    results[index] = item
+                return
+            for index in indexes:
+                call = calls[index]
+                name = call.get("name")
+                if name == "call_batch":
+                    results[index] = batch_item(error="call_batch 不能嵌套调用")
+                    continue
+                try:
+                    # 直接执行已注册的工具（公开的 get_tool/Tool.run：参数校验和结果转换与工具调用一致，不经过会话）
+                    tool = await self.mcp.get_tool(name)
+                    result = await tool.run(call.get("arguments") or {})
+                except NotFoundError:
+                    results[index] = batch_item(error=f"Unknown tool: {name}")
+                except Exception as e:
+                    results[index] = batch_item(error=str(e))
+                else:
+                    results[index] = batch_item(result)
+
+        await asyncio.gather(*(run_chain(indexes) for indexes in chains.values()))
+        return {"results": results}
+
+    async def _run_transaction(self, db_name: str, chain: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        在数据库的写线程中依次执行一个事务组，返回与 chain 对应的批量结果
+
+        数据库已存在时整组在一个事务中执行（DatabaseHandle.transaction：BEGIN IMMEDIATE 持有写锁，
+        每个写入是其中的 SAVEPOINT），失败时只回滚本组的修改，不影响其它连接、worker 或进程的写入；
+        执行前不存在的数据库失败时删除。工具的同步函数在写线程中直接执行，
+        同一进程中该数据库的其它写入排在事务组之后（DataInquire 的查询读不到组内尚未提交的写入）
+        """
+        tools = []
+        for call in chain:
+            try:
+                tools.append(self._sync_tool(await self.mcp.get_tool(call.get("name"))))
+            except NotFoundError:
+                tools.append(None)
+        return await self.database_executor.run("write", self._run_transaction_sync, db_name=db_name, chain=chain, tools=tools)
+
+    def _run_transaction_sync(self, db_name: str, chain: List[Dict[str, Any]], tools: list) -> List[Dict[str, Any]]:
+        """_run_transaction 在写线程中执行的部分"""
+        results: List[Dict[str, Any]] = [None] * len(chain)
+        existed = os.path.exists(db_name)
+        failed = None
+        try:
+            with contextlib.ExitStack() as stack:
+                if existed:
+                    stack.enter_context(DatabaseRegistry.get(db_name).transaction())
+                for position, (call, tool) in enumerate(zip(chain, tools)):
+                    results[position], ok = self._run_sync_tool(call, tool)
+                    if not ok:
+                        failed = position
+                        raise _Rollback()
+        except _Rollback:
+            pass
+        if failed is None:
+            return results
+
+        # 事务组中任一调用失败：已执行的调用标记为已回滚，剩余调用不执行
+        MetadataCache.release(db_name) # 元数据缓存已记入回滚掉的行数变化
+        DatabaseRegistry.invalidate(db_name) # 回滚可能撤销了建表、删表
+        if not existed and os.path.exists(db_name):
+            DatabaseRegistry.release(db_name) # 先关闭连接池中的连接
+            remove_database(db_name)
+        for done in range(failed):
+            results[done]["rolledBack"] = True
+        for skipped in range(failed + 1, len(chain)):
+            results[skipped] = batch_item(error="未执行：同一事务组中的调用失败，已回滚")
+        return results
+
+    def _sync_tool(self, tool: Tool) -> Tool:
+        """工具的同步版本：去掉 offload/DatabaseExecutor 的异步包装，直接在当前线程执行原函数"""
+        fn = getattr(tool, "fn", None)
+        if fn is None:
+            return tool
+        sync_tool = self._sync_tools.get(tool.name)
+        if sync_tool is None:
+            sync_tool = self._sync_tools[tool.name] = Tool.from_function(inspect.unwrap(fn), name=tool.name)
+        return sync_tool
+
+    @staticmethod
+    def _run_sync_tool(call: Dict[str, Any], tool) -> tuple:
+        """在当前线程执行一个调用，返回 (批量结果, 是否成功)"""
+        name = call.get("name")
+        if name == "call_batch":
+            return batch_item(error="call_batch 不能嵌套调用"), True
+        if tool is None:
+            return batch_item(error=f"Unknown tool: {name}"), False
+        try:
+            result = asyncio.run(tool.run(call.get("arguments") or {}))
+        except Exception as e:
+            return batch_item(error=str(e)), False
+        return batch_item(result), not tool_failed(result)
+
     # ==================== 添加工具 ====================
     def add_tool(self):
         """注册所有工具到MCP服务器"""
-        # DatabaseEditor 工具 —— 数据库操作工具
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.connect))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.delete))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.insert_data))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.update_data))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.delete_data))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.create_table))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.delete_table))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.write))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.read))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.list_tables))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.list_all_data))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.count_records))
-        # self.mcp.add_tool(Tool.from_function(self.database_editor.data_exists))
+        # DatabaseEditor 工具 —— 数据库操作工具（由 database_executor 按写入/扫描/查找分线程执行）
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.connect)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.delete)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.insert_data)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.update_data)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.delete_data)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.create_table)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.delete_table)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.write)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.write_many)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.insert_many)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.delete_many)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.read)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.list_tables)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.list_all_data)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.count_records)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_editor.data_exists)))
 
         # # DataInquire 工具 —— 文件操作工具
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.file_directory))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.file_content))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.file_line_count))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.file_content_fuzzy))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_all_table))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_table_content))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_table_data_exists))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_content_fuzzy))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_table_data_count))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_table_data_batch))
-        # self.mcp.add_tool(Tool.from_function(self.data_inquire.database_table_data_filter))
+        # self.mcp.add_tool(Tool.from_function(offload(self.data_inquire.file_directory)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.data_inquire.file_content)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.data_inquire.file_line_count)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.data_inquire.file_content_fuzzy)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_all_table)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_content)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_data_exists)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_content_fuzzy)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_data_count)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_data_batch)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_data_filter)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_aggregate)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.data_inquire.database_table_data_query)))
+
+        # # DatabaseBackup 工具 —— 在线备份和只读快照（快照路径可作为 db_name 传给 DataInquire）
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_backup.backup)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_backup.backup_progress)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_backup.snapshot)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_backup.list_snapshots)))
+        # self.mcp.add_tool(Tool.from_function(self.database_executor.wrap(self.database_backup.delete_snapshot)))
 
         # # FileEditor 工具 —— 文件操作工具
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.read_line))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.read_all))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.update_line))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.delete_line))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.insert_line))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.append_line))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.clear_file))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.read_JSON))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.write_JSON))
-        # self.mcp.add_tool(Tool.from_function(self.file_editor.append_JSON))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.read_line)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.read_all)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.update_line)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.delete_line)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.insert_line)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.append_line)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.clear_file)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.read_JSON)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.write_JSON)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.file_editor.append_JSON)))
 
         # WorkspaceManager 工具 —— 工作空间管理工具
-        # self.mcp.add_tool(Tool.from_function(self.workspace_manager.scan_workspace))
-        # self.mcp.add_tool(Tool.from_function(self.workspace_manager.search_files))
-        # self.mcp.add_tool(Tool.from_function(self.workspace_manager.get_file_metadata))
-        # self.mcp.add_tool(Tool.from_function(self.workspace_manager.list_files_simple))
+        # self.mcp.add_tool(Tool.from_function(offload(self.workspace_manager.scan_workspace)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.workspace_manager.search_files)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.workspace_manager.get_file_metadata)))
+        # self.mcp.add_tool(Tool.from_function(offload(self.workspace_manager.list_files_simple)))
 
         # # TaskManager 工具
         self.mcp.add_tool(Tool.from_function(self.task_manager.exit_task)) #退出任务
@@ -101,6 +324,21 @@ class MCPServer:
         self.mcp.add_tool(Tool.from_function(self.mathematics.divide))
         self.mcp.add_tool(Tool.from_function(self.mathematics.power))
         self.mcp.add_tool(Tool.from_function(self.mathematics.sqrt))
+
+        # 批量调用（客户端在多个调用同时就绪时使用，不提供给模型）
+        self.mcp.add_tool(Tool.from_function(self.call_batch))
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP 服务器")
+    parser.add_argument("--daemon", action="store_true", help="以本机 HTTP 常驻服务运行")
+    parser.add_argument("--state-file", help="常驻服务的状态文件")
+    parser.add_argument("--host", default="127.0.0.1", help="常驻服务监听地址")
+    parser.add_argument("--port", type=int, default=0, help="常驻服务端口，0 表示自动选择")
+    args = parser.parse_args()
+
     _MCPServer = MCPServer()
-    _MCPServer.start()
\ No newline at end of file
+    if args.daemon:
+        if not args.state_file:
+            sys.exit("--daemon 需要 --state-file")
+        _MCPServer.serve_daemon(args.state_file, args.host, args.port)
+    else:
+        _MCPServer.start()
\ No newline at end of file
@@ -0,0 +1,236 @@
+# ================ 聚合查询 ================
+# 把结构化的查询描述编译为参数化 SQL，在 SQLite 中完成过滤、分组和聚合，只把聚合结果返回给模型
+# 描述中只能使用白名单内的字段、函数和运算符；值、JSON 路径都作为参数绑定，表名加引号，不拼接任何用户输入
+#
+# 查询描述（各项都可省略）：
+# {
+#     "filter": [{"field": "content", "op": "contains", "value": "天气"}, ...],   # 条件之间为 AND
+#     "group_by": [{"field": "id", "fn": "prefix", "arg": 3, "as": "前缀"}, ...],
+#     "aggregates": [{"fn": "count"}, {"fn": "max", "field": "$.score", "as": "最高分"}, ...],
+#     "order_by": [{"by": "count", "desc": true}, ...],                          # by 为输出列名
+#     "limit": 100
+# }
+# 字段：id、content，或以 "$" 开头的 JSON 路径（取 content 中的 JSON 字段，content 不是 JSON 时为 NULL）；
+# JSON 数据表中声明过的字段直接使用对应的生成列（见 JsonFields），过滤和分组可以命中索引
+import re
+from .FullTextIndex import quote
+
+# 分组函数：名称 -> (SQL 模板, 是否需要 arg)
+GROUP_FUNCTIONS = {
+    "value": ("{}", False),
+    "prefix": ("substr({}, 1, ?)", True),
+    "length": ("length({})", False),
+    "lower": ("lower({})", False),
+}
+# 聚合函数
+AGGREGATE_FUNCTIONS = ("count", "min", "max")
+# 过滤运算符：名称 -> SQL 模板（contains/startswith 的值会转义 LIKE 通配符）
+FILTER_OPERATORS = {
+    "eq": "{} = ?",
+    "ne": "{} != ?",
+    "lt": "{} < ?",
+    "le": "{} <= ?",
+    "gt": "{} > ?",
+    "ge": "{} >= ?",
+    "contains": "{} LIKE ? ESCAPE '\\'",
+    "startswith": "{} LIKE ? ESCAPE '\\'",
+    "in": "{} IN ({})",
+    "is_null": "{} IS NULL",
+    "not_null": "{} IS NOT NULL",
+}
+# 默认返回的最大行数
+DEFAULT_LIMIT = 100
+# 返回行数上限
+MAX_LIMIT = 1000
+# 各部分的条目数上限
+MAX_ITEMS = 8
+# in 运算符的值个数上限
+MAX_IN_VALUES = 500
+# JSON 路径：$.a.b、$.a[0]
+JSON_PATH = re.compile(r"^\$(\.[A-Za-z_][A-Za-z0-9_]*|\[\d+\])+$")
+# 输出列名
+OUTPUT_NAME = re.compile(r"^[^\W\d]\w{0,31}$")
+
+
+def field_sql(field, columns: dict = None) -> tuple:
+    """
+    字段的 SQL 表达式
+    :param columns: JSON 路径 -> 生成列名，有对应的生成列时直接使用该列
+    :return: (SQL, 参数列表)
+    """
+    if field in ("id", "content"):
+        return field, []
+    if isinstance(field, str) and JSON_PATH.match(field):
+        if columns and field in columns:
+            return quote(columns[field]), []
+        return "(CASE WHEN json_valid(content) THEN json_extract(content, ?) END)", [field]
+    raise ValueError(f"不支持的字段: {field!r}（可用 id、content 或 $.JSON路径）")
+
+
+def _items(spec: dict, key: str) -> list:
+    items = spec.get(key) or []
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError(f"{key} 必须是对象列表")
+    if len(items) > MAX_ITEMS:
+        raise ValueError(f"{key} 最多 {MAX_ITEMS} 项")
+    return items
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filter_sql(item: dict, columns: dict) -> tuple:
+    """一个过滤条件的 SQL 和参数"""
+    op = item.get("op", "eq")
+    if op not in FILTER_OPERATORS:
+        raise ValueError(f"不支持的运算符: {op!r}（可用 {', '.join(FILTER_OPERATORS)}）")
+    sql, params = field_sql(item.get("field"), columns)
+    template = FILTER_OPERATORS[op]
+    if op in ("is_null", "not_null"):
+        return template.format(sql), params
+    value = item.get("value")
+    if op == "in":
+        if not isinstance(value, list) or not 0 < len(value) <= MAX_IN_VALUES:
+            raise ValueError(f"in 的值必须是 1 到 {MAX_IN_VALUES} 个元素的列表")
+        if not all(isinstance(v, (str, int, float)) for v in value):
+            raise ValueError("in 的值必须是字符串或数字")
+        return template.format(sql, ",".join("?" * len(value))), params + value
+    if isinstance(value, (list, dict)) or value is None:
+        raise ValueError(f"运算符 {op} 的值必须是字符串或数字")
+    if op == "contains":
+        value = f"%{_escape_like(str(value))}%"
+    elif op == "startswith":
+        value = f"{_escape_like(str(value))}%"
+    return template.format(sql), params + [value]
+
+
+def _output_name(item: dict, default: str, used: set) -> str:
+    name = item.get("as", default)
+    if not isinstance(name, str) or not OUTPUT_NAME.match(name):
+        raise ValueError(f"输出列名无效: {name!r}")
+    if name in used:
+        raise ValueError(f"输出列名重复: {name!r}")
+    used.add(name)
+    return name
+
+
+def _where_sql(filters, columns: dict) -> tuple:
+    """过滤条件列表的 WHERE 子句（没有条件时为空字符串）和参数"""
+    where, params = [], []
+    for item in _items({"filter": filters}, "filter"):
+        sql, item_params = _filter_sql(item, columns)
+        where.append(sql)
+        params += item_params
+    return (f" WHERE {' AND '.join(where)}" if where else ""), params
+
+
+def _limit(limit) -> int:
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        raise ValueError("limit 必须是正整数")
+    return min(limit, MAX_LIMIT)
+
+
+def build_query(table_name: str, spec: dict, columns: dict = None) -> tuple:
+    """
+    把查询描述编译为 SQL
+    :param table_name: 数据表名称
+    :param spec: 查询描述，见模块说明
+    :param columns: JSON 路径 -> 生成列名，见 field_sql
+    :return: (SQL, 参数列表, 输出列名列表, 返回行数上限)；SQL 多取一行用于判断结果是否被截断
+    :raises ValueError: 查询描述无效
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("查询描述必须是对象")
+    unknown = set(spec) - {"filter", "group_by", "aggregates", "order_by", "limit"}
+    if unknown:
+        raise ValueError(f"未知的查询项: {', '.join(sorted(unknown))}")
+
+    groups = _items(spec, "group_by")
+    aggregates = _items(spec, "aggregates") or [{"fn": "count"}]
+    select, select_params, names, used = [], [], [], set()
+
+    for i, item in enumerate(groups):
+        fn = item.get("fn", "value")
+        if fn not in GROUP_FUNCTIONS:
+            raise ValueError(f"不支持的分组函数: {fn!r}（可用 {', '.join(GROUP_FUNCTIONS)}）")
+        template, needs_arg = GROUP_FUNCTIONS[fn]
+        sql, params = field_sql(item.get("field"), columns)
+        if needs_arg:
+            arg = item.get("arg")
+            if isinstance(arg, bool) or not isinstance(arg, int) or arg < 1:
+                raise ValueError(f"分组函数 {fn} 的 arg 必须是正整数")
+            params = params + [arg]
+        select.append(template.format(sql))
+        select_params += params
+        names.append(_output_name(item, "key" if len(groups) == 1 else f"key{i}", used))
+
+    fn_counts = {}
+    for item in aggregates:
+        fn_counts[item.get("fn")] = fn_counts.get(item.get("fn"), 0) + 1
+    for i, item in enumerate(aggregates):
+        fn = item.get("fn")
+        if fn not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"不支持的聚合函数: {fn!r}（可用 {', '.join(AGGREGATE_FUNCTIONS)}）")
+        if fn == "count" and item.get("field") is None:
+            sql, params = "count(*)", []
+        else:
+            sql, params = field_sql(item.get("field"), columns)
+            sql = f"{fn}({sql})"
+        select.append(sql)
+        select_params += params
+        names.append(_output_name(item, fn if fn_counts[fn] == 1 else f"{fn}{i}", used))
+
+    where, where_params = _where_sql(spec.get("filter"), columns)
+
+    # 分组和排序都用输出列序号，避免输出列名与表中的列名冲突
+    order = []
+    for item in _items(spec, "order_by"):
+        by = item.get("by")
+        if by not in names:
+            raise ValueError(f"order_by 只能使用输出列: {by!r}（可用 {', '.join(names)}）")
+        order.append(f"{names.index(by) + 1} {'DESC' if item.get('desc') else 'ASC'}")
+
+    limit = _limit(spec.get("limit", DEFAULT_LIMIT))
+
+    sql = f"SELECT {', '.join(select)} FROM {quote(table_name)}{where}"
+    if groups:
+        sql += f" GROUP BY {', '.join(str(i + 1) for i in range(len(groups)))}"
+    if order:
+        sql += f" ORDER BY {', '.join(order)}"
+    sql += " LIMIT ?"
+    return sql, select_params + where_params + [limit + 1], names, limit
+
+
+def run_query(conn, table_name: str, spec: dict, columns: dict = None) -> dict:
+    """
+    执行查询描述
+    :param conn: sqlite3 连接
+    :return: {"columns": 输出列名, "rows": [[...], ...], "truncated": 是否还有更多行}
+    """
+    sql, params, names, limit = build_query(table_name, spec, columns)
+    rows = conn.execute(sql, params).fetchall()
+    return {"columns": names, "rows": [list(row) for row in rows[:limit]], "truncated": len(rows) > limit}
+
+
+def build_select(table_name: str, filters: list, limit: int = DEFAULT_LIMIT, columns: dict = None) -> tuple:
+    """
+    按过滤条件查询行的 SQL（条件格式与查询描述中的 filter 相同），按 id 排序
+    :return: (SQL, 参数列表, 返回行数上限)；SQL 多取一行用于判断结果是否被截断
+    :raises ValueError: 过滤条件无效
+    """
+    where, params = _where_sql(filters, columns)
+    limit = _limit(limit)
+    # ORDER BY +id：不让优化器为了按 id 排序改走主键扫描（范围条件时会放弃字段索引），先用索引过滤再对结果排序
+    return f"SELECT id, content FROM {quote(table_name)}{where} ORDER BY +id LIMIT ?", params + [limit + 1], limit
+
+
+def run_select(conn, table_name: str, filters: list, limit: int = DEFAULT_LIMIT, columns: dict = None) -> dict:
+    """
+    按过滤条件查询行
+    :param conn: sqlite3 连接
+    :return: {"rows": [[数据ID, 内容], ...], "truncated": 是否还有更多行}
+    """
+    sql, params, limit = build_select(table_name, filters, limit, columns)
+    rows = conn.execute(sql, params).fetchall()
+    return {"rows": [list(row) for row in rows[:limit]], "truncated": len(rows) > limit}
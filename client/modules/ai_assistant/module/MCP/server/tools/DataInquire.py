@@ -1,5 +1,12 @@
 import os
-import sqlite3
+from .SQLiteConnection import connect
+from .MetadataCache import MetadataCache
+from . import FullTextIndex
+from . import Pagination
+from . import Aggregation
+
+# 模糊查询默认返回的最大行数（每张表）
+SEARCH_LIMIT = 20
 
 # ================ 数据查询类 ================
 class DataInquire:
@@ -94,25 +101,25 @@ class DataInquire:
             return "数据库文件不存在"
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            return tables
+            return MetadataCache.get(db_name).tables() # 不含全文索引表
         except Exception as e:
-            if 'conn' in locals():
-                conn.close()
             return f"查询表列表失败: {e}"
-    #  -------------- 查询表中所有数据 --------------
+    #  -------------- 分页查询表中数据 --------------
     # * db_name 数据库名称
     # * table_name 数据表名称
-    def database_table_content(self, db_name: str, table_name: str):
+    # * after_id 从该数据ID之后开始
+    # * limit 每页行数
+    # * page_token 上一页返回的续页标记
+    def database_table_content(self, db_name: str, table_name: str, after_id: str = None,
+                               limit: int = Pagination.PAGE_SIZE, page_token: str = None):
         """
-        查询数据表所有数据
+        分页查询数据表数据（按数据ID排序），翻页时传入上一页返回的 next
         :param db_name: 数据库名称
         :param table_name: 数据表名称
-        :return: 数据表数据
+        :param after_id: 从该数据ID之后开始（有 page_token 时忽略）
+        :param limit: 每页行数，最多 1000
+        :param page_token: 上一页返回的续页标记
+        :return: {"rows": [[数据ID, 内容], ...], "next": 续页标记（没有下一页时为 None）, "total": 总行数提示}
         :error: 数据库名称不能为空
         :error: 表名不能为空
         """
@@ -125,19 +132,23 @@ class DataInquire:
             return "数据库文件不存在"
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # 检查表是否存在
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-            if not cursor.fetchone():
-                conn.close()
+            # 检查表是否存在（元数据缓存）
+            metadata = MetadataCache.get(db_name)
+            if not metadata.has_table(table_name):
                 return f"表 '{table_name}' 不存在"
             
-            cursor.execute(f"SELECT id, content FROM {table_name}")
-            data = cursor.fetchall()
+            conn = connect(db_name)
+            table = FullTextIndex.quote(table_name)
+
+            def fetch(start, size):
+                if start is None:
+                    return conn.execute(f"SELECT id, content FROM {table} ORDER BY id LIMIT ?", (size,)).fetchall()
+                return conn.execute(f"SELECT id, content FROM {table} WHERE id > ? ORDER BY id LIMIT ?", (start, size)).fetchall()
+
+            page = Pagination.read_page(fetch, lambda: metadata.count(table_name), table_name, after_id, limit, page_token)
+            page["rows"] = [list(row) for row in page["rows"]]
             conn.close()
-            return data
+            return page
         except Exception as e:
             if 'conn' in locals():
                 conn.close()
@@ -168,16 +179,14 @@ class DataInquire:
             return False
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # 检查表是否存在
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-            if not cursor.fetchone():
-                conn.close()
+            # 检查表是否存在（元数据缓存）
+            if not MetadataCache.get(db_name).has_table(table_name):
                 return False
             
-            cursor.execute(f"SELECT 1 FROM {table_name} WHERE id=?", (data_id,))
+            conn = connect(db_name)
+            cursor = conn.cursor()
+            
+            cursor.execute(f"SELECT 1 FROM {FullTextIndex.quote(table_name)} WHERE id=?", (data_id,))
             result = cursor.fetchone() is not None
             conn.close()
             return result
@@ -188,12 +197,14 @@ class DataInquire:
     #  -------------- 模糊查询数据库内容 --------------
     # * db_name 数据库名称
     # * content 查询内容
-    def database_content_fuzzy(self, db_name: str, content: str):
+    # * limit 每张表最多返回的行数
+    def database_content_fuzzy(self, db_name: str, content: str, limit: int = SEARCH_LIMIT):
         """
-        模糊查询数据库内容（在所有表中搜索）
+        模糊查询数据库内容（在所有表中搜索，使用全文索引，按相关度排序）
         :param db_name: 数据库名称
         :param content: 查询内容
-        :return: 查询结果
+        :param limit: 每张表最多返回的行数
+        :return: 查询结果 {表名: [{"id": 数据ID, "snippet": 命中片段}, ...]}，只包含有命中的表
         :error: 数据库名称不能为空
         :error: 查询内容不能为空
         """
@@ -206,18 +217,15 @@ class DataInquire:
             return "数据库文件不存在"
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # 获取所有表
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
+            metadata = MetadataCache.get(db_name)
+            conn = connect(db_name)
             
-            # 在所有表中搜索
+            # 在所有表中搜索（没有索引的旧表第一次搜索时补建索引）
             results = {}
-            for table in tables:
-                cursor.execute(f"SELECT id, content FROM {table} WHERE content LIKE ?", (f'%{content}%',))
-                data = cursor.fetchall()
+            for table in metadata.tables():
+                if not {"id", "content"} <= set(metadata.columns(table) or ()): # 跳过没有 id/content 列的表
+                    continue
+                data = FullTextIndex.search(conn, table, content, limit)
                 if data:
                     results[table] = data
             
@@ -232,7 +240,7 @@ class DataInquire:
     # * table_name 数据表名称
     def database_table_data_count(self, db_name: str, table_name: str):
         """
-        统计数据表数据数量
+        统计数据表数据数量（由元数据缓存给出，不扫描整张表）
         :param db_name: 数据库名称
         :param table_name: 数据表名称
         :return: 数据数量
@@ -248,22 +256,12 @@ class DataInquire:
             return "数据库文件不存在"
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # 检查表是否存在
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-            if not cursor.fetchone():
-                conn.close()
+            # 元数据缓存中的行数，不扫描整张表（其它进程修改过数据库时重新计数一次）
+            count = MetadataCache.get(db_name).count(table_name)
+            if count is None:
                 return f"表 '{table_name}' 不存在"
-            
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cursor.fetchone()[0]
-            conn.close()
             return count
         except Exception as e:
-            if 'conn' in locals():
-                conn.close()
             return f"统计数据失败: {e}"
     #  -------------- 批量查询 - 一次查询多个ID--------------
     # * db_name 数据库名称
@@ -291,18 +289,17 @@ class DataInquire:
             return "数据库文件不存在"
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # 检查表是否存在
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-            if not cursor.fetchone():
-                conn.close()
+            # 检查表是否存在（元数据缓存）
+            metadata = MetadataCache.get(db_name)
+            if not metadata.has_table(table_name):
                 return f"表 '{table_name}' 不存在"
             
+            conn = connect(db_name)
+            cursor = conn.cursor()
+            
             # 批量查询
             placeholders = ','.join('?' * len(data_ids))
-            cursor.execute(f"SELECT id, content FROM {table_name} WHERE id IN ({placeholders})", data_ids)
+            cursor.execute(f"SELECT id, content FROM {FullTextIndex.quote(table_name)} WHERE id IN ({placeholders})", data_ids)
             result = {row[0]: row[1] for row in cursor.fetchall()}
             conn.close()
             return result
@@ -314,13 +311,15 @@ class DataInquire:
     # * db_name 数据库名称
     # * table_name 数据表名称
     # * content 查询内容
-    def database_table_data_filter(self, db_name: str, table_name: str, content: str):
+    # * limit 最多返回的行数
+    def database_table_data_filter(self, db_name: str, table_name: str, content: str, limit: int = SEARCH_LIMIT):
         """
-        按条件筛选数据表数据（在指定表中模糊搜索）
+        按条件筛选数据表数据（在指定表中模糊搜索，使用全文索引，按相关度排序）
         :param db_name: 数据库名称
         :param table_name: 数据表名称
         :param content: 查询内容
-        :return: 查询结果
+        :param limit: 最多返回的行数
+        :return: 查询结果 [{"id": 数据ID, "snippet": 命中片段}, ...]
         :error: 数据库名称不能为空
         :error: 表名不能为空
         :error: 查询内容不能为空
@@ -336,21 +335,105 @@ class DataInquire:
             return "数据库文件不存在"
         
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # 检查表是否存在
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-            if not cursor.fetchone():
-                conn.close()
+            # 检查表是否存在（元数据缓存）
+            metadata = MetadataCache.get(db_name)
+            if not metadata.has_table(table_name):
                 return f"表 '{table_name}' 不存在"
             
+            conn = connect(db_name)
+            
             # 模糊查询
-            cursor.execute(f"SELECT id, content FROM {table_name} WHERE content LIKE ?", (f'%{content}%',))
-            data = cursor.fetchall()
+            data = FullTextIndex.search(conn, table_name, content, limit)
             conn.close()
             return data
         except Exception as e:
             if 'conn' in locals():
                 conn.close()
-            return f"按条件筛选失败: {e}"
\ No newline at end of file
+            return f"按条件筛选失败: {e}"
+    #  -------------- 聚合查询 - 在数据库中统计，只返回聚合结果--------------
+    # * db_name 数据库名称
+    # * table_name 数据表名称
+    # * spec 查询描述
+    def database_table_aggregate(self, db_name: str, table_name: str, spec: dict):
+        """
+        聚合查询数据表（过滤、分组、计数/最小/最大值在数据库中完成，只返回统计结果）
+        :param db_name: 数据库名称
+        :param table_name: 数据表名称
+        :param spec: 查询描述，各项都可省略：
+            filter: 条件列表（AND），如 [{"field": "content", "op": "contains", "value": "天气"}]，
+                    op 可用 eq/ne/lt/le/gt/ge/contains/startswith/in/is_null/not_null
+            group_by: 分组列表，如 [{"field": "id", "fn": "prefix", "arg": 3}]，fn 可用 value/prefix/length/lower
+            aggregates: 聚合列表，如 [{"fn": "count"}, {"fn": "max", "field": "$.score"}]，fn 可用 count/min/max，默认 count
+            order_by: 排序列表，如 [{"by": "count", "desc": true}]，by 为输出列名
+            limit: 最多返回的行数，默认 100，最多 1000
+            field 可用 id、content 或 JSON 路径（如 "$.author.name"，取 content 中的 JSON 字段，
+            JSON 数据表中建过索引的字段会使用索引）；
+            输出列名默认为 key（分组）和聚合函数名，可用 "as" 指定
+        :return: {"columns": 输出列名, "rows": [[...], ...], "truncated": 是否还有更多行}
+        :error: 数据库名称不能为空
+        :error: 表名不能为空
+        """
+        if db_name is None or db_name == "":
+            return "数据库名称不能为空"
+        if table_name is None or table_name == "":
+            return "表名不能为空"
+        
+        if not os.path.exists(db_name):
+            return "数据库文件不存在"
+        
+        try:
+            # 检查表是否存在（元数据缓存）
+            metadata = MetadataCache.get(db_name)
+            if not metadata.has_table(table_name):
+                return f"表 '{table_name}' 不存在"
+            
+            conn = connect(db_name)
+            columns = metadata.indexed_fields(table_name) # 有索引的 JSON 字段
+            result = Aggregation.run_query(conn, table_name, spec or {}, columns)
+            conn.close()
+            return result
+        except Exception as e:
+            if 'conn' in locals():
+                conn.close()
+            return f"聚合查询失败: {e}"
+    #  -------------- 按字段查询 - 按 id/content/JSON 字段的条件查询数据--------------
+    # * db_name 数据库名称
+    # * table_name 数据表名称
+    # * filter 条件列表
+    # * limit 最多返回的行数
+    def database_table_data_query(self, db_name: str, table_name: str, filter: list, limit: int = Aggregation.DEFAULT_LIMIT):
+        """
+        按条件查询数据表数据（按数据ID排序）
+        :param db_name: 数据库名称
+        :param table_name: 数据表名称
+        :param filter: 条件列表（AND），如 [{"field": "$.type", "op": "eq", "value": "note"}]，
+                       field 可用 id、content 或 JSON 路径（JSON 数据表中建过索引的字段会使用索引），
+                       op 可用 eq/ne/lt/le/gt/ge/contains/startswith/in/is_null/not_null
+        :param limit: 最多返回的行数，默认 100，最多 1000
+        :return: {"rows": [[数据ID, 内容], ...], "truncated": 是否还有更多行}
+        :error: 数据库名称不能为空
+        :error: 表名不能为空
+        """
+        if db_name is None or db_name == "":
+            return "数据库名称不能为空"
+        if table_name is None or table_name == "":
+            return "表名不能为空"
+        
+        if not os.path.exists(db_name):
+            return "数据库文件不存在"
+        
+        try:
+            # 检查表是否存在（元数据缓存）
+            metadata = MetadataCache.get(db_name)
+            if not metadata.has_table(table_name):
+                return f"表 '{table_name}' 不存在"
+            
+            conn = connect(db_name)
+            columns = metadata.indexed_fields(table_name) # 有索引的 JSON 字段
+            result = Aggregation.run_select(conn, table_name, filter or [], limit, columns)
+            conn.close()
+            return result
+        except Exception as e:
+            if 'conn' in locals():
+                conn.close()
+            return f"按字段查询失败: {e}"
\ No newline at end of file
@@ -0,0 +1,215 @@
+# ================ 数据库备份类 ================
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from .SQLiteConnection import connect, remove_database, is_snapshot, SNAPSHOT_SUFFIX
+from .DatabaseEditor import DatabaseRegistry
+
+# 每步复制的页数
+STEP_PAGES = 256
+# 两步之间的暂停（秒），期间不持有源数据库的锁，其它连接的读写可以进行
+STEP_PAUSE = 0.005
+# 源数据库在复制期间被其它连接修改时备份会从头开始；重新开始超过该次数后改为一步复制完（WAL 模式下一步复制只持有读事务，不阻塞写入）
+MAX_RESTARTS = 3
+# 快照目录（数据库所在目录下）
+SNAPSHOT_DIR = ".snapshots"
+
+
+class _Restarted(Exception):
+    """分步复制重新开始的次数过多"""
+
+
+class DatabaseBackup:
+    """
+    工具类：基于 SQLite 在线备份 API 的备份和只读快照，无成员变量。
+    分批复制页面，每步之间暂停，复制期间数据库照常读写；得到的副本是某一时刻的一致状态。
+    快照保存在数据库所在目录的 .snapshots 下（文件名以 .snapshot.db 结尾），
+    以只读方式打开（见 SQLiteConnection.READONLY_PRAGMAS），DataInquire 可以直接查询快照，与原数据库的写入互不影响。
+    """
+    _progress = {} # 目标文件绝对路径 -> 进度
+    _lock = threading.Lock()
+
+    # ================ 备份数据库 ================
+    def backup(self, db_name: str, target: str, pages: int = STEP_PAGES, pause: float = STEP_PAUSE) -> tuple[bool, dict]:
+        """
+        在线备份数据库到目标文件（复制期间数据库照常读写，完成后替换目标文件）
+        :param db_name: 数据库名称
+        :param target: 目标文件路径
+        :param pages: 每步复制的页数
+        :param pause: 两步之间暂停的秒数
+        :return: 是否成功，以及 {"target": 目标文件, "pages": 总页数, "steps": 步数, "seconds": 耗时}
+        :error: 数据库名称和目标文件不能为空
+        """
+        if not all([db_name, target]):
+            return False, "数据库名称和目标文件不能为空"
+
+        if not os.path.exists(db_name):
+            return False, "数据库文件不存在"
+
+        if os.path.abspath(db_name) == os.path.abspath(target):
+            return False, "目标文件不能是数据库本身"
+
+        target_dir = os.path.dirname(target)
+        if target_dir and not os.path.isdir(target_dir):
+            return False, "目标目录不存在"
+
+        if isinstance(pages, bool) or not isinstance(pages, int) or pages < 1:
+            return False, "每步页数必须是正整数"
+
+        try:
+            return True, DatabaseBackup._copy(db_name, target, pages, max(0.0, float(pause)))
+        except Exception as e:
+            return False, f"备份失败: {e}"
+
+    # ================ 查询备份进度 ================
+    def backup_progress(self, target: str) -> tuple[bool, dict]:
+        """
+        查询备份或快照的进度
+        :param target: 目标文件路径（快照为 snapshot 返回的路径）
+        :return: 是否存在该备份，以及 {"total": 总页数, "remaining": 剩余页数, "percent": 完成百分比, "steps": 已执行步数, "done": 是否结束}
+        """
+        progress = DatabaseBackup._progress.get(os.path.abspath(target)) if target else None
+        if progress is None:
+            return False, "没有该目标文件的备份记录"
+        return True, dict(progress)
+
+    # ================ 创建快照 ================
+    def snapshot(self, db_name: str) -> tuple[bool, dict]:
+        """
+        创建数据库当前状态的只读快照，返回的快照路径可作为 db_name 传给 DataInquire 的查询工具
+        :param db_name: 数据库名称
+        :return: 是否成功，以及 {"snapshot": 快照路径, "created": 创建时间, "pages": 总页数, "steps": 步数, "seconds": 耗时}
+        :error: 数据库名称不能为空
+        """
+        if not db_name:
+            return False, "数据库名称不能为空"
+
+        if not os.path.exists(db_name):
+            return False, "数据库文件不存在"
+
+        try:
+            directory = DatabaseBackup._snapshot_dir(db_name)
+            os.makedirs(directory, exist_ok=True)
+            created = datetime.now()
+            path = os.path.join(directory, f"{DatabaseBackup._stem(db_name)}.{created:%Y%m%d-%H%M%S-%f}{SNAPSHOT_SUFFIX}")
+            result = DatabaseBackup._copy(db_name, path, STEP_PAGES, STEP_PAUSE)
+            os.chmod(path, 0o444) # 防止被其它程序修改
+            result.pop("target")
+            return True, {"snapshot": path, "created": created.isoformat(timespec="seconds"), **result}
+        except Exception as e:
+            return False, f"创建快照失败: {e}"
+
+    # ================ 列出快照 ================
+    def list_snapshots(self, db_name: str) -> tuple[bool, list]:
+        """
+        列出数据库的快照（按创建时间排序）
+        :param db_name: 数据库名称
+        :return: 是否成功，以及 [{"snapshot": 快照路径, "size": 字节数}, ...]
+        :error: 数据库名称不能为空
+        """
+        if not db_name:
+            return False, []
+
+        directory = DatabaseBackup._snapshot_dir(db_name)
+        if not os.path.isdir(directory):
+            return True, []
+
+        prefix = f"{DatabaseBackup._stem(db_name)}."
+        names = sorted(n for n in os.listdir(directory) if n.startswith(prefix) and n.endswith(SNAPSHOT_SUFFIX))
+        return True, [
+            {"snapshot": os.path.join(directory, n), "size": os.path.getsize(os.path.join(directory, n))}
+            for n in names
+        ]
+
+    # ================ 删除快照 ================
+    def delete_snapshot(self, snapshot: str) -> tuple[bool, str]:
+        """
+        删除快照
+        :param snapshot: 快照路径
+        :return: 是否成功
+        :error: 快照路径不能为空
+        """
+        if not snapshot:
+            return False, "快照路径不能为空"
+
+        if not is_snapshot(snapshot):
+            return False, "只能删除快照文件"
+
+        if not os.path.exists(snapshot):
+            return False, "快照不存在"
+
+        try:
+            DatabaseRegistry.release(snapshot)
+            os.chmod(snapshot, 0o644)
+            remove_database(snapshot)
+            with DatabaseBackup._lock:
+                DatabaseBackup._progress.pop(os.path.abspath(snapshot), None)
+            return True, "快照删除成功"
+        except Exception as e:
+            return False, f"删除快照失败: {e}"
+
+    @staticmethod
+    def _stem(db_name: str) -> str:
+        return os.path.splitext(os.path.basename(db_name))[0]
+
+    @staticmethod
+    def _snapshot_dir(db_name: str) -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(db_name)), SNAPSHOT_DIR)
+
+    @staticmethod
+    def _copy(db_name: str, target: str, pages: int, pause: float) -> dict:
+        """
+        分步复制到临时文件，完成后替换目标文件；进度记录在 _progress 中
+        """
+        key = os.path.abspath(target)
+        temp = f"{key}.part"
+        progress = {"total": 0, "remaining": 0, "percent": 0.0, "steps": 0, "restarts": 0, "done": False}
+        step = {"pages": pages} # 当前每步页数，-1 表示一步复制完
+        with DatabaseBackup._lock:
+            DatabaseBackup._progress[key] = progress
+
+        def on_step(status, remaining, total):
+            if progress["steps"] and remaining > progress["remaining"]:
+                progress["restarts"] += 1 # 源数据库被修改，从头开始
+                if progress["restarts"] > MAX_RESTARTS and step["pages"] > 0:
+                    raise _Restarted()
+            progress.update(
+                total=total, remaining=remaining, steps=progress["steps"] + 1,
+                percent=round(100.0 * (total - remaining) / total, 1) if total else 100.0,
+            )
+            if remaining and pause:
+                time.sleep(pause)
+
+        start = time.perf_counter()
+        source = connect(db_name)
+        try:
+            for step_pages in (pages, -1):
+                step["pages"] = step_pages
+                if os.path.exists(temp):
+                    os.remove(temp)
+                copy = sqlite3.connect(temp)
+                try:
+                    source.backup(copy, pages=step_pages, progress=on_step)
+                    copy.execute("PRAGMA journal_mode=DELETE") # 副本是单独的文件，不需要 WAL 附属文件
+                    break
+                except _Restarted:
+                    pass # 分步复制总被写入打断：改为一步复制完
+                finally:
+                    copy.close()
+            os.replace(temp, key)
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        finally:
+            source.close()
+            progress["done"] = True
+
+        return {
+            "target": key,
+            "pages": progress["total"],
+            "steps": progress["steps"],
+            "seconds": round(time.perf_counter() - start, 3),
+        }
@@ -1,44 +1,284 @@
 # ================ 数据库修改类 ================
 import os
-from sqlalchemy import create_engine, Table, Column, String, MetaData, select, update, delete, inspect, func
+import threading
+import contextlib
+import contextvars
+from sqlalchemy import Table, Column, String, MetaData, select, update, delete, func, bindparam
 from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from .SQLiteConnection import create_sqlite_engine, remove_database
+from . import FullTextIndex
+from . import Pagination
+from . import JsonFields
+from .MetadataCache import MetadataCache
 
-# ================ 数据库编辑类 ================
-class DatabaseEditor:
+# 批量操作中 IN (...) 一次绑定的参数个数上限（SQLite 3.32 之前默认最多 999 个变量）
+MAX_VARIABLES = 500
+# 批量写入时每次 executemany 的行数
+CHUNK_SIZE = 500
+
+# 当前上下文中进行中的事务组：数据库文件路径 -> 事务组的连接（见 DatabaseHandle.transaction）
+_transactions = contextvars.ContextVar("database_transactions", default={})
+
+# ================ 数据库句柄 ================
+class DatabaseHandle:
     """
-    工具类：数据库编辑，无需初始化和成员变量。全部为静态方法。
-    使用 SQLAlchemy 提供安全的数据库操作，自动防止 SQL 注入。
+    一个数据库文件的引擎、表对象、预构建语句和表名缓存
+
+    引擎使用默认的连接池，连接在调用之间保持打开；表对象和语句按表名构建一次后复用
+    （SQLAlchemy 的编译缓存和 sqlite3 的语句缓存都能命中）。
+    表名集合在第一次查询时读取，之后用 PRAGMA schema_version 判断是否需要重新读取
+    （其它连接或进程修改了表结构时也能发现），create_table/delete_table 后显式失效。
+    新建的数据表同时创建全文索引（见 FullTextIndex），表名集合不包含索引表。
+    create_table 可以声明 JSON 字段，建为 JSON 数据表（见 JsonFields）。
+    DatabaseEditor 通过 begin()/connect() 取得连接；在 transaction() 中时它们使用事务组的连接。
     """
+    def __init__(self, path: str):
+        self.path = path # 数据库文件路径
+        self.file_id = DatabaseHandle.file_id(path) # 创建时的文件标识，文件被删除重建后不再一致
+        self.engine = create_sqlite_engine(path) # 引擎（连接池），每个连接使用 WAL 等设置
+        self.metadata = MetaData()
+        self._tables = {} # 表名 -> Table
+        self._statements = {} # (表名, 语句名) -> 语句
+        self._table_names = None # 已存在的表名集合
+        self._json_tables = set() # 其中的 JSON 数据表
+        self._schema_version = None # 读取表名集合时的 schema_version
+        self._lock = threading.Lock()
 
     @staticmethod
-    def _get_engine_and_table(db_name: str, table_name: str):
+    def file_id(path: str):
+        """(设备号, inode) 标识，文件不存在时为 None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    # ================ 连接与事务 ================
+    @contextlib.contextmanager
+    def begin(self):
+        """写事务：提交或回滚；在事务组中时为事务组连接上的 SAVEPOINT，随事务组一起提交或回滚"""
+        conn = _transactions.get().get(self.path)
+        if conn is None:
+            with self.engine.begin() as conn:
+                yield conn
+        else:
+            with conn.begin_nested():
+                yield conn
+
+    @contextlib.contextmanager
+    def connect(self):
+        """读连接；在事务组中时为事务组的连接（能读到组内尚未提交的写入）"""
+        conn = _transactions.get().get(self.path)
+        if conn is None:
+            with self.engine.connect() as conn:
+                yield conn
+        else:
+            yield conn
+
+    @contextlib.contextmanager
+    def transaction(self):
         """
-        内部辅助方法：获取数据库引擎和表对象
-        SQLAlchemy 会自动验证和转义表名，防止 SQL 注入
-        :param db_name: 数据库名称
-        :param table_name: 数据表名称
-        :return: 数据库引擎和表对象
-        :error: 数据库名称不能为空
-        :error: 表名不能为空
+        事务组：块中当前上下文对该数据库的读写（begin/connect）都在同一个连接上执行，
+        开始时 BEGIN IMMEDIATE 取得写锁并保持到结束（其它连接、进程的写入等待而不是被覆盖），
+        块正常结束时提交，抛出异常时回滚
         """
-        engine = create_engine(f'sqlite:///{db_name}', echo=False)
-        metadata = MetaData()
-        
-        table_obj = Table(
-            table_name,
-            metadata,
-            Column('id', String, primary_key=True),
-            Column('content', String),
-            extend_existing=True
-        )
-        
-        return engine, table_obj, metadata
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            token = _transactions.set({**_transactions.get(), self.path: conn})
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                _transactions.reset(token)
+
+    def table(self, table_name: str) -> Table:
+        """表对象（id/content 两列），SQLAlchemy 会自动验证和转义表名，防止 SQL 注入"""
+        table_obj = self._tables.get(table_name)
+        if table_obj is None:
+            with self._lock:
+                table_obj = self._tables.get(table_name)
+                if table_obj is None:
+                    table_obj = Table(
+                        table_name,
+                        self.metadata,
+                        Column('id', String, primary_key=True),
+                        Column('content', String),
+                        extend_existing=True
+                    )
+                    self._tables[table_name] = table_obj
+        return table_obj
+
+    def statement(self, table_name: str, kind: str):
+        """
+        按表名缓存的语句，参数通过 bindparam 传入
+        :param kind: insert/insert_ignore/upsert（参数 id、content），update（data_id、new_content），
+                     delete/read/exists（data_id），existing（ids，列表），count，
+                     first_page/page（按 id 排序的一块，参数 size，page 另有 after_id）
+        """
+        key = (table_name, kind)
+        stmt = self._statements.get(key)
+        if stmt is None:
+            t = self.table(table_name)
+            if kind == "insert":
+                stmt = insert(t).values(id=bindparam("id"), content=bindparam("content"))
+            elif kind == "insert_ignore":
+                stmt = insert(t).values(id=bindparam("id"), content=bindparam("content")).on_conflict_do_nothing(index_elements=['id'])
+            elif kind == "upsert":
+                # SQLite 3.24+ 支持 ON CONFLICT
+                stmt = insert(t).values(id=bindparam("id"), content=bindparam("content"))
+                stmt = stmt.on_conflict_do_update(index_elements=['id'], set_={'content': stmt.excluded.content})
+            elif kind == "update":
+                stmt = update(t).where(t.c.id == bindparam("data_id")).values(content=bindparam("new_content"))
+            elif kind == "delete":
+                stmt = delete(t).where(t.c.id == bindparam("data_id"))
+            elif kind == "read":
+                stmt = select(t.c.content).where(t.c.id == bindparam("data_id"))
+            elif kind == "exists":
+                stmt = select(t.c.id).where(t.c.id == bindparam("data_id"))
+            elif kind == "existing":
+                stmt = select(t.c.id).where(t.c.id.in_(bindparam("ids", expanding=True)))
+            elif kind == "count":
+                stmt = select(func.count()).select_from(t)
+            elif kind == "first_page":
+                stmt = select(t).order_by(t.c.id).limit(bindparam("size"))
+            elif kind == "page":
+                stmt = select(t).where(t.c.id > bindparam("after_id")).order_by(t.c.id).limit(bindparam("size"))
+            else:
+                raise ValueError(f"未知的语句: {kind}")
+            self._statements[key] = stmt
+        return stmt
+
+    def existing_ids(self, conn, table_name: str, ids: list) -> set:
+        """ids 中已存在的 ID，按 MAX_VARIABLES 分批查询"""
+        stmt = self.statement(table_name, "existing")
+        found = set()
+        for start in range(0, len(ids), MAX_VARIABLES):
+            found.update(row[0] for row in conn.execute(stmt, {"ids": ids[start:start + MAX_VARIABLES]}))
+        return found
 
-    def _table_exists(self,engine, table_name: str) -> bool:
+    def table_names(self, conn) -> set:
+        """已存在的表名集合，schema_version 未变化时使用缓存"""
+        version = conn.exec_driver_sql("PRAGMA schema_version").scalar()
+        names = self._table_names
+        if names is None or version != self._schema_version:
+            rows = conn.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+            names = set(FullTextIndex.user_tables(rows))
+            self._json_tables = {name for name, sql in rows if JsonFields.is_json_table(sql)}
+            self._table_names, self._schema_version = names, version
+        return names
+
+    def table_exists(self, conn, table_name: str) -> bool:
         """检查表是否存在"""
-        inspector = inspect(engine)
-        return table_name in inspector.get_table_names()
+        return table_name in self.table_names(conn)
+
+    def is_json_table(self, conn, table_name: str) -> bool:
+        """是否为 JSON 数据表（content 必须是有效的 JSON）"""
+        self.table_names(conn)
+        return table_name in self._json_tables
+
+    def ensure_table(self, conn, table_name: str) -> Table:
+        """表不存在时创建，返回表对象"""
+        table_obj = self.table(table_name)
+        if not self.table_exists(conn, table_name):
+            self.create_table(conn, table_name)
+        return table_obj
+
+    def create_table(self, conn, table_name: str, json_fields: list = None):
+        """
+        创建数据表及其全文索引
+        :param json_fields: 不为 None 时创建 JSON 数据表，列表中的 JSON 路径建为带索引的生成列
+        """
+        if json_fields is None:
+            self.table(table_name).create(conn, checkfirst=True)
+        else:
+            JsonFields.create_table(conn.connection.driver_connection, table_name, json_fields)
+        FullTextIndex.create(conn.connection.driver_connection, table_name)
+        self.invalidate()
+
+    def drop_table(self, conn, table_name: str):
+        """删除数据表及其全文索引"""
+        self.table(table_name).drop(conn)
+        FullTextIndex.drop(conn.connection.driver_connection, table_name)
+        self.invalidate()
+
+    def invalidate(self):
+        """表名缓存失效"""
+        self._table_names = None
+
+    def dispose(self):
+        """关闭连接池中的全部连接"""
+        self.engine.dispose()
+
+
+# ================ 数据库注册表 ================
+class DatabaseRegistry:
+    """
+    进程内的数据库注册表：按数据库文件的绝对路径缓存 DatabaseHandle
+
+    同一进程中的所有 DatabaseEditor 共用，不再每次调用都创建和销毁引擎。
+    数据库文件被删除或替换（inode 变化）后，下次获取时重新创建句柄，避免连接池中的旧连接写到已删除的文件。
+    """
+    _handles = {} # 绝对路径 -> DatabaseHandle
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(db_name: str) -> str:
+        return os.path.normcase(os.path.abspath(db_name))
+
+    @classmethod
+    def get(cls, db_name: str) -> DatabaseHandle:
+        """获取数据库句柄，不存在或文件已被替换时创建"""
+        key = cls._key(db_name)
+        handle = cls._handles.get(key)
+        if handle is not None and handle.file_id == DatabaseHandle.file_id(key):
+            return handle
+        with cls._lock:
+            handle = cls._handles.get(key)
+            if handle is None or handle.file_id != DatabaseHandle.file_id(key):
+                if handle is not None:
+                    handle.dispose()
+                handle = cls._handles[key] = DatabaseHandle(key)
+            return handle
+
+    @classmethod
+    def release(cls, db_name: str):
+        """关闭并移除数据库句柄（删除或整体替换数据库文件前调用）"""
+        with cls._lock:
+            handle = cls._handles.pop(cls._key(db_name), None)
+        if handle is not None:
+            handle.dispose()
+        MetadataCache.release(db_name)
+
+    @classmethod
+    def invalidate(cls, db_name: str):
+        """数据库的表名缓存失效"""
+        handle = cls._handles.get(cls._key(db_name))
+        if handle is not None:
+            handle.invalidate()
+
+    @classmethod
+    def clear(cls):
+        """关闭并移除全部数据库句柄"""
+        with cls._lock:
+            handles, cls._handles = list(cls._handles.values()), {}
+        for handle in handles:
+            handle.dispose()
+        MetadataCache.clear()
+
+
+# ================ 数据库编辑类 ================
+class DatabaseEditor:
+    """
+    工具类：数据库编辑，无成员变量。
+    使用 SQLAlchemy 提供安全的数据库操作，自动防止 SQL 注入。
+    引擎、表对象和语句由进程内的 DatabaseRegistry 缓存，连接在调用之间保持打开。
+    写入在 MetadataCache.writing 中执行，提交后更新元数据缓存中的行数。
+    """
 
     # ================ 创建数据库 ================
     def connect(self, db_name: str) -> tuple[bool, str]:
@@ -60,11 +300,10 @@ class DatabaseEditor:
 
         try:
             # 使用 SQLAlchemy 创建数据库
-            engine = create_engine(f'sqlite:///{db_name}')
+            handle = DatabaseRegistry.get(db_name)
             # 创建一个空连接来初始化数据库文件
-            with engine.connect() as conn:
+            with handle.connect() as conn:
                 conn.execute(select(1))  # 简单查询以触发文件创建
-            engine.dispose()
             return True, "数据库创建成功"
         except Exception as e:
             return False, f"数据库创建失败: {e}"
@@ -83,7 +322,8 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
 
         try:
-            os.remove(db_name)
+            DatabaseRegistry.release(db_name) # 先关闭连接池中的连接
+            remove_database(db_name)
             return True, "数据库文件删除成功"
         except Exception as e:
             return False, f"数据库文件删除失败: {e}"
@@ -108,18 +348,15 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
         
         try:
-            engine, table_obj, metadata = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 创建表（如果不存在）
-            metadata.create_all(engine)
-            
-            # 插入数据
-            with engine.connect() as conn:
-                stmt = insert(table_obj).values(id=data_id, content=content)
-                conn.execute(stmt)
-                conn.commit()
-            
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name) as changes, handle.begin() as conn:
+                # 创建表（如果不存在）
+                handle.ensure_table(conn, table_name)
+                if handle.is_json_table(conn, table_name) and not JsonFields.valid_json(content):
+                    return False, "内容不是有效的 JSON"
+                # 插入数据
+                conn.execute(handle.statement(table_name, "insert"), {"id": data_id, "content": content})
+                changes.add(table_name, 1)
             return True, "插入数据成功"
             
         except IntegrityError:
@@ -149,24 +386,19 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
         
         try:
-            engine, table_obj, _ = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 检查表是否存在
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return False, f"表 '{table_name}' 不存在"
-            
-            # 更新数据
-            with engine.connect() as conn:
-                stmt = update(table_obj).where(table_obj.c.id == data_id).values(content=content)
-                result = conn.execute(stmt)
-                conn.commit()
-                
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name), handle.begin() as conn:
+                # 检查表是否存在
+                if not handle.table_exists(conn, table_name):
+                    return False, f"表 '{table_name}' 不存在"
+                if handle.is_json_table(conn, table_name) and not JsonFields.valid_json(content):
+                    return False, "内容不是有效的 JSON"
+
+                # 更新数据
+                result = conn.execute(handle.statement(table_name, "update"), {"data_id": data_id, "new_content": content})
                 if result.rowcount == 0:
-                    engine.dispose()
                     return False, f"数据ID '{data_id}' 不存在"
-            
-            engine.dispose()
+
             return True, "更新数据成功"
             
         except SQLAlchemyError as e:
@@ -193,24 +425,18 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
         
         try:
-            engine, table_obj, _ = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 检查表是否存在
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return False, f"表 '{table_name}' 不存在"
-            
-            # 删除数据
-            with engine.connect() as conn:
-                stmt = delete(table_obj).where(table_obj.c.id == data_id)
-                result = conn.execute(stmt)
-                conn.commit()
-                
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name) as changes, handle.begin() as conn:
+                # 检查表是否存在
+                if not handle.table_exists(conn, table_name):
+                    return False, f"表 '{table_name}' 不存在"
+
+                # 删除数据
+                result = conn.execute(handle.statement(table_name, "delete"), {"data_id": data_id})
                 if result.rowcount == 0:
-                    engine.dispose()
                     return False, f"数据ID '{data_id}' 不存在"
-            
-            engine.dispose()
+                changes.add(table_name, -1)
+
             return True, "删除数据成功"
             
         except SQLAlchemyError as e:
@@ -219,32 +445,39 @@ class DatabaseEditor:
             return False, f"删除数据失败: {e}"
     
     # ================ 创建数据表 ================
-    def create_table(self, db_name: str, table_name: str) -> tuple[bool, str]:
+    def create_table(self, db_name: str, table_name: str, json_fields: list[str] = None) -> tuple[bool, str]:
         """
         在指定数据库中创建数据表
         :param db_name: 数据库名称
         :param table_name: 数据表名称
+        :param json_fields: 传入时创建 JSON 数据表：content 必须是有效的 JSON，
+                            列出的字段（JSON 路径，如 ["$.type", "$.author.name"]）建立索引，按这些字段过滤和分组更快
         :return: 是否成功
         :error: 数据库名称不能为空
         :error: 表名不能为空
         """
         if not all([db_name, table_name]):
             return False, "数据库名称和表名不能为空"
+
+        if json_fields is not None:
+            try:
+                JsonFields.validate_fields(json_fields)
+            except ValueError as e:
+                return False, str(e)
         
         if not os.path.exists(db_name):
             return False, "数据库文件不存在"
         
         try:
-            engine, table_obj, metadata = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 检查表是否已存在
-            if DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return True, f"表 '{table_name}' 已存在"
-            
-            # 创建表
-            metadata.create_all(engine)
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name), handle.begin() as conn:
+                # 检查表是否已存在
+                if handle.table_exists(conn, table_name):
+                    return True, f"表 '{table_name}' 已存在"
+
+                # 创建表
+                handle.create_table(conn, table_name, json_fields)
+            handle.invalidate()
             return True, "创建数据表成功"
             
         except SQLAlchemyError as e:
@@ -269,16 +502,15 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
         
         try:
-            engine, table_obj, metadata = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 检查表是否存在
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return False, f"表 '{table_name}' 不存在"
-            
-            # 删除表
-            table_obj.drop(engine)
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name), handle.begin() as conn:
+                # 检查表是否存在
+                if not handle.table_exists(conn, table_name):
+                    return False, f"表 '{table_name}' 不存在"
+
+                # 删除表
+                handle.drop_table(conn, table_name)
+            handle.invalidate()
             return True, "删除数据表成功"
             
         except SQLAlchemyError as e:
@@ -310,23 +542,16 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
 
         try:
-            engine, table_obj, metadata = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 创建表（如果不存在）
-            metadata.create_all(engine)
-            
-            # 插入或更新数据（UPSERT）
-            with engine.connect() as conn:
-                stmt = insert(table_obj).values(id=data_id, content=content)
-                # SQLite 3.24+ 支持 ON CONFLICT
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=['id'],  # 冲突检测列
-                    set_={'content': content}  # 更新的值
-                )
-                conn.execute(stmt)
-                conn.commit()
-            
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name) as changes, handle.begin() as conn:
+                # 创建表（如果不存在）
+                handle.ensure_table(conn, table_name)
+                if handle.is_json_table(conn, table_name) and not JsonFields.valid_json(content):
+                    return False, "内容不是有效的 JSON"
+                # 插入或更新数据（UPSERT），新插入的行计入元数据缓存的行数
+                existed = conn.execute(handle.statement(table_name, "exists"), {"data_id": data_id}).fetchone() is not None
+                conn.execute(handle.statement(table_name, "upsert"), {"id": data_id, "content": content})
+                changes.add(table_name, 0 if existed else 1)
             return True, "写入数据库成功"
             
         except SQLAlchemyError as e:
@@ -334,6 +559,166 @@ class DatabaseEditor:
         except Exception as e:
             return False, f"写入数据库失败: {e}"
 
+    # ================ 批量写入 ================
+    def write_many(self, db_name: str, table_name: str, rows: list[dict]) -> tuple[bool, dict]:
+        """
+        批量写入数据，ID已存在则更新内容（UPSERT），全部行在一个事务中执行
+        :param db_name: 数据库名称
+        :param table_name: 数据表名称
+        :param rows: 数据列表，每项为 {"data_id": 数据ID, "content": 内容}
+        :return: 是否成功，以及 {"inserted": 新增行数, "updated": 更新行数, "failed": 无效行数, "rows": 每行的状态}
+        :error: 数据库名称不能为空
+        :error: 表名不能为空
+        :error: 数据列表不能为空
+        """
+        return DatabaseEditor._write_rows(db_name, table_name, rows, upsert=True)
+
+    # ================ 批量插入 ================
+    def insert_many(self, db_name: str, table_name: str, rows: list[dict]) -> tuple[bool, dict]:
+        """
+        批量插入数据，ID已存在的行跳过（状态为 exists），全部行在一个事务中执行
+        :param db_name: 数据库名称
+        :param table_name: 数据表名称
+        :param rows: 数据列表，每项为 {"data_id": 数据ID, "content": 内容}
+        :return: 是否成功，以及 {"inserted": 插入行数, "failed": 跳过和无效的行数, "rows": 每行的状态}
+        :error: 数据库名称不能为空
+        :error: 表名不能为空
+        :error: 数据列表不能为空
+        """
+        return DatabaseEditor._write_rows(db_name, table_name, rows, upsert=False)
+
+    # ================ 批量删除 ================
+    def delete_many(self, db_name: str, table_name: str, data_ids: list[str]) -> tuple[bool, dict]:
+        """
+        批量删除数据，全部ID在一个事务中删除
+        :param db_name: 数据库名称
+        :param table_name: 数据表名称
+        :param data_ids: 数据ID列表
+        :return: 是否成功，以及 {"deleted": 删除行数, "failed": 不存在和无效的ID数, "rows": 每个ID的状态}
+        :error: 数据库名称不能为空
+        :error: 表名不能为空
+        :error: 数据ID列表不能为空
+        """
+        if not all([db_name, table_name]):
+            return False, "数据库名称和表名不能为空"
+
+        if not isinstance(data_ids, list) or not data_ids:
+            return False, "数据ID列表不能为空"
+
+        if not os.path.exists(db_name):
+            return False, "数据库文件不存在"
+
+        statuses = [{"data_id": data_id} for data_id in data_ids]
+        valid = []
+        for status, data_id in zip(statuses, data_ids):
+            if not isinstance(data_id, str) or not data_id:
+                status.update(status="invalid", message="数据ID不能为空")
+            else:
+                valid.append(status)
+
+        try:
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name) as changes, handle.begin() as conn:
+                # 检查表是否存在
+                if not handle.table_exists(conn, table_name):
+                    return False, f"表 '{table_name}' 不存在"
+
+                existing = handle.existing_ids(conn, table_name, list({s["data_id"] for s in valid}))
+                params = []
+                for status in valid:
+                    if status["data_id"] in existing:
+                        existing.discard(status["data_id"]) # 重复的ID只删除一次
+                        status["status"] = "deleted"
+                        params.append({"data_id": status["data_id"]})
+                    else:
+                        status.update(status="not_found", message=f"数据ID '{status['data_id']}' 不存在")
+
+                stmt = handle.statement(table_name, "delete")
+                for start in range(0, len(params), CHUNK_SIZE):
+                    conn.execute(stmt, params[start:start + CHUNK_SIZE])
+                changes.add(table_name, -len(params))
+
+            deleted = len(params)
+            return True, {"deleted": deleted, "failed": len(statuses) - deleted, "rows": statuses}
+
+        except SQLAlchemyError as e:
+            return False, f"批量删除失败: {e}"
+        except Exception as e:
+            return False, f"批量删除失败: {e}"
+
+    @staticmethod
+    def _write_rows(db_name: str, table_name: str, rows: list, upsert: bool) -> tuple[bool, dict]:
+        """
+        write_many/insert_many 的实现：先按 ID 分批查出已存在的行确定每行的状态，
+        再在同一个事务中按 CHUNK_SIZE 分批 executemany
+        """
+        if not all([db_name, table_name]):
+            return False, "数据库名称和表名不能为空"
+
+        if not isinstance(rows, list) or not rows:
+            return False, "数据列表不能为空"
+
+        if not os.path.exists(db_name):
+            return False, "数据库文件不存在"
+
+        # 逐行校验，无效的行不写入
+        statuses, valid = [], []
+        for row in rows:
+            data_id = row.get("data_id") if isinstance(row, dict) else None
+            content = row.get("content") if isinstance(row, dict) else None
+            status = {"data_id": data_id}
+            statuses.append(status)
+            if not isinstance(data_id, str) or not data_id:
+                status.update(status="invalid", message="数据ID不能为空")
+            elif content is None:
+                status.update(status="invalid", message="内容不能为 None")
+            else:
+                valid.append((status, content))
+
+        try:
+            handle = DatabaseRegistry.get(db_name)
+            with MetadataCache.writing(db_name) as changes, handle.begin() as conn:
+                # 创建表（如果不存在）
+                handle.ensure_table(conn, table_name)
+                if handle.is_json_table(conn, table_name):
+                    for status, content in valid:
+                        if not JsonFields.valid_json(content):
+                            status.update(status="invalid", message="内容不是有效的 JSON")
+                    valid = [(status, content) for status, content in valid if "status" not in status]
+
+                existing = handle.existing_ids(conn, table_name, list({status["data_id"] for status, _ in valid}))
+                params = []
+                for status, content in valid:
+                    data_id = status["data_id"]
+                    if data_id not in existing:
+                        existing.add(data_id) # 同一批中重复的ID按已存在处理
+                        status["status"] = "inserted"
+                    elif upsert:
+                        status["status"] = "updated"
+                    else:
+                        status.update(status="exists", message=f"数据ID '{data_id}' 已存在")
+                        continue
+                    params.append({"id": data_id, "content": content})
+
+                # 插入时忽略冲突：查询之后其它连接写入的相同ID不会让整批回滚
+                stmt = handle.statement(table_name, "upsert" if upsert else "insert_ignore")
+                for start in range(0, len(params), CHUNK_SIZE):
+                    conn.execute(stmt, params[start:start + CHUNK_SIZE])
+                inserted = sum(1 for s in statuses if s.get("status") == "inserted")
+                changes.add(table_name, inserted)
+
+            summary = {"inserted": inserted}
+            if upsert:
+                summary["updated"] = sum(1 for s in statuses if s.get("status") == "updated")
+            summary["failed"] = len(statuses) - len(params)
+            summary["rows"] = statuses
+            return True, summary
+
+        except SQLAlchemyError as e:
+            return False, f"批量写入失败: {e}"
+        except Exception as e:
+            return False, f"批量写入失败: {e}"
+
     # ================ 读取数据库 ================
     def read(self, db_name: str, table_name: str, data_id: str) -> tuple[bool, str]:
         """
@@ -353,26 +738,19 @@ class DatabaseEditor:
             return False, "数据库文件不存在"
 
         try:
-            engine, table_obj, _ = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            # 检查表是否存在
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return False, f"表 '{table_name}' 不存在"
-            
-            # 查询数据
-            with engine.connect() as conn:
-                stmt = select(table_obj.c.content).where(table_obj.c.id == data_id)
-                result = conn.execute(stmt).fetchone()
-                
-                if result:
-                    content = result[0]
-                    engine.dispose()
-                    return True, content
-                else:
-                    engine.dispose()
-                    return False, f"数据ID '{data_id}' 不存在"
-                    
+            handle = DatabaseRegistry.get(db_name)
+            with handle.connect() as conn:
+                # 检查表是否存在
+                if not handle.table_exists(conn, table_name):
+                    return False, f"表 '{table_name}' 不存在"
+
+                # 查询数据
+                result = conn.execute(handle.statement(table_name, "read"), {"data_id": data_id}).fetchone()
+
+            if result:
+                return True, result[0]
+            return False, f"数据ID '{data_id}' 不存在"
+
         except SQLAlchemyError as e:
             return False, f"读取数据库失败: {e}"
         except Exception as e:
@@ -393,21 +771,24 @@ class DatabaseEditor:
             return False, []
         
         try:
-            engine = create_engine(f'sqlite:///{db_name}')
-            inspector = inspect(engine)
-            tables = inspector.get_table_names()
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with handle.connect() as conn:
+                tables = sorted(handle.table_names(conn))
             return True, tables
         except Exception as e:
             return False, []
 
-    # ================ 列出表中所有数据 ================
-    def list_all_data(self, db_name: str, table_name: str) -> tuple[bool, list]:
+    # ================ 分页列出表中数据 ================
+    def list_all_data(self, db_name: str, table_name: str, after_id: str = None,
+                      limit: int = Pagination.PAGE_SIZE, page_token: str = None) -> tuple[bool, dict]:
         """
-        列出表中的所有数据
+        分页列出表中的数据（按数据ID排序），翻页时传入上一页返回的 next
         :param db_name: 数据库名称
         :param table_name: 数据表名称
-        :return: 数据列表
+        :param after_id: 从该数据ID之后开始（有 page_token 时忽略）
+        :param limit: 每页行数，最多 1000
+        :param page_token: 上一页返回的续页标记
+        :return: {"rows": [{"id": 数据ID, "content": 内容}, ...], "next": 续页标记（没有下一页时为 None）, "total": 总行数提示}
         :error: 数据库名称不能为空
         :error: 表名不能为空
         """
@@ -418,20 +799,26 @@ class DatabaseEditor:
             return False, []
         
         try:
-            engine, table_obj, _ = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return False, []
-            
-            with engine.connect() as conn:
-                stmt = select(table_obj)
-                results = conn.execute(stmt).fetchall()
-                data = [{'id': row[0], 'content': row[1]} for row in results]
-            
-            engine.dispose()
-            return True, data
-            
+            handle = DatabaseRegistry.get(db_name)
+            with handle.connect() as conn:
+                if not handle.table_exists(conn, table_name):
+                    return False, []
+
+                def fetch(start, size):
+                    if start is None:
+                        return conn.execute(handle.statement(table_name, "first_page"), {"size": size}).fetchall()
+                    return conn.execute(handle.statement(table_name, "page"), {"after_id": start, "size": size}).fetchall()
+
+                def count():
+                    return MetadataCache.get(db_name).count(table_name)
+
+                page = Pagination.read_page(fetch, count, table_name, after_id, limit, page_token)
+                page["rows"] = [{'id': row[0], 'content': row[1]} for row in page["rows"]]
+
+            return True, page
+
+        except ValueError as e:
+            return False, str(e)
         except Exception as e:
             return False, []
 
@@ -452,17 +839,12 @@ class DatabaseEditor:
             return False, 0
         
         try:
-            engine, table_obj, _ = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return False, 0
-            
-            with engine.connect() as conn:
-                stmt = select(func.count()).select_from(table_obj)
-                count = conn.scalar(stmt)
-            
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with handle.connect() as conn:
+                if not handle.table_exists(conn, table_name):
+                    return False, 0
+
+            count = MetadataCache.get(db_name).count(table_name) # 元数据缓存中的行数，不扫描整张表
             return True, count if count else 0
             
         except Exception as e:
@@ -487,17 +869,13 @@ class DatabaseEditor:
             return False, False
         
         try:
-            engine, table_obj, _ = DatabaseEditor._get_engine_and_table(db_name, table_name)
-            
-            if not DatabaseEditor._table_exists(engine, table_name):
-                engine.dispose()
-                return True, False
-            
-            with engine.connect() as conn:
-                stmt = select(table_obj.c.id).where(table_obj.c.id == data_id)
-                result = conn.execute(stmt).fetchone()
-            
-            engine.dispose()
+            handle = DatabaseRegistry.get(db_name)
+            with handle.connect() as conn:
+                if not handle.table_exists(conn, table_name):
+                    return True, False
+
+                result = conn.execute(handle.statement(table_name, "exists"), {"data_id": data_id}).fetchone()
+
             return True, result is not None
             
         except Exception as e:
@@ -0,0 +1,143 @@
+# ================ 数据库工具执行器 ================
+# DatabaseEditor/DataInquire 的方法都是同步阻塞的 SQLite 调用，直接在事件循环中执行会让一个慢操作卡住所有其它调用。
+# 执行器把它们包装为异步函数，按操作类型放到不同的线程中执行：
+# - 写操作：每个数据库文件一个写线程，同一数据库上的写入依次执行（不在锁等待上占用多个线程），不同数据库互不影响
+# - 扫描：整表读取、模糊查询、聚合等可能很慢的读操作，在有上限的扫描线程池中执行
+# - 查找：按 ID 读取、计数、表列表等短查询，在独立的查找线程池中执行，不会排在长扫描后面
+# WAL 模式下读不阻塞写、写不阻塞读（见 SQLiteConnection），三类操作可以同时进行
+import os
+import asyncio
+import inspect
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 写操作
+WRITE_TOOLS = {
+    "connect", "delete", "insert_data", "update_data", "delete_data",
+    "create_table", "delete_table", "write", "write_many", "insert_many", "delete_many",
+}
+# 可能很慢的读操作
+SCAN_TOOLS = {
+    "list_all_data", "database_table_content", "database_content_fuzzy",
+    "database_table_data_filter", "database_table_aggregate", "database_table_data_query",
+    "backup", "snapshot",
+}
+# 查找线程数
+LOOKUP_WORKERS = 4
+# 扫描线程数
+SCAN_WORKERS = 2
+
+
+def lane_of(name: str) -> str:
+    """工具所属的执行队列：write、scan 或 lookup"""
+    if name in WRITE_TOOLS:
+        return "write"
+    if name in SCAN_TOOLS:
+        return "scan"
+    return "lookup"
+
+
+class DatabaseExecutor:
+    """
+    数据库工具的执行器
+
+    参数:
+        lookup_workers: 查找线程数
+        scan_workers: 扫描线程数
+    """
+    def __init__(self, lookup_workers: int = LOOKUP_WORKERS, scan_workers: int = SCAN_WORKERS):
+        self._lookup = ThreadPoolExecutor(max_workers=lookup_workers, thread_name_prefix="db-lookup")
+        self._scan = ThreadPoolExecutor(max_workers=scan_workers, thread_name_prefix="db-scan")
+        self._writers = {} # 数据库绝对路径 -> 单线程执行器
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(db_name: str) -> str:
+        return os.path.normcase(os.path.abspath(db_name))
+
+    def writer(self, db_name: str) -> ThreadPoolExecutor:
+        """数据库的写线程（第一次写入时创建）"""
+        key = DatabaseExecutor._key(db_name)
+        executor = self._writers.get(key)
+        if executor is None:
+            with self._lock:
+                executor = self._writers.get(key)
+                if executor is None:
+                    name = os.path.basename(key)
+                    executor = self._writers[key] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"db-writer-{name}")
+        return executor
+
+    def executor(self, lane: str, db_name: str = None) -> ThreadPoolExecutor:
+        """执行队列对应的线程池；没有数据库名的写操作在查找线程池中执行（参数校验失败，立即返回）"""
+        if lane == "write" and db_name:
+            return self.writer(db_name)
+        if lane == "scan":
+            return self._scan
+        return self._lookup
+
+    async def run(self, lane: str, fn, *args, **kwargs):
+        """
+        在执行队列中执行同步函数
+        :param lane: write、scan 或 lookup
+        :param fn: 同步函数，写操作按参数 db_name 选择写线程
+        """
+        db_name = kwargs.get("db_name")
+        if db_name is None and lane == "write":
+            bound = inspect.signature(fn).bind_partial(*args, **kwargs)
+            db_name = bound.arguments.get("db_name")
+        executor = self.executor(lane, db_name if isinstance(db_name, str) else None)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    def wrap(self, fn, lane: str = None):
+        """
+        把同步的数据库工具包装为异步函数，函数签名和文档保持不变（可直接注册为 MCP 工具）
+        :param lane: 执行队列，默认按函数名判断（见 lane_of）
+        """
+        lane = lane or lane_of(fn.__name__)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await self.run(lane, fn, *args, **kwargs)
+        wrapper.lane = lane
+        return wrapper
+
+    def release(self, db_name: str):
+        """关闭数据库的写线程（已提交的写入执行完后退出）"""
+        with self._lock:
+            executor = self._writers.pop(DatabaseExecutor._key(db_name), None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True):
+        """关闭全部线程"""
+        with self._lock:
+            writers, self._writers = list(self._writers.values()), {}
+        for executor in writers + [self._lookup, self._scan]:
+            executor.shutdown(wait=wait)
+
+
+class AsyncTools:
+    """
+    数据库工具对象的异步版本：AsyncTools(DatabaseEditor(), executor).write(...) 返回协程
+
+    参数:
+        tools: DatabaseEditor 或 DataInquire 实例
+        executor: DatabaseExecutor
+    """
+    def __init__(self, tools, executor: DatabaseExecutor):
+        self._tools = tools
+        self._executor = executor
+        self._wrapped = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            fn = getattr(self._tools, name)
+            if not callable(fn):
+                raise AttributeError(name)
+            wrapped = self._wrapped[name] = self._executor.wrap(fn)
+        return wrapped
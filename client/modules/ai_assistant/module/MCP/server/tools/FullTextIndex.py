@@ -0,0 +1,159 @@
+# ================ 全文索引 ================
+# DatabaseEditor 创建的 (id, content) 数据表的 FTS5 影子索引：
+# - 索引表名为 "<表名>__fts"，外部内容表（不重复保存 content），trigram 分词（中文无需分词，按三字切分）
+# - 数据表上的插入/更新/删除触发器同步维护索引
+# - 在此功能之前创建的表第一次搜索时补建索引（rebuild）
+# 函数接收 sqlite3 连接（SQLAlchemy 连接传 conn.connection.driver_connection）
+
+# 索引表名后缀
+SUFFIX = "__fts"
+# trigram 分词最少需要 3 个字符，更短的查询回退到 LIKE 扫描
+MIN_QUERY_LENGTH = 3
+# 片段前后的标记和省略号
+SNIPPET_MARKS = ("[", "]", "…")
+# 片段包含的词元数
+SNIPPET_TOKENS = 16
+
+
+def quote(name: str) -> str:
+    """SQL 标识符加引号"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def literal(value: str) -> str:
+    """SQL 字符串字面量"""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def index_name(table_name: str) -> str:
+    return f"{table_name}{SUFFIX}"
+
+
+def user_tables(rows) -> list:
+    """
+    从 sqlite_master 的 (name, sql) 行中去掉 FTS5 虚拟表及其影子表（<虚拟表>_data 等）
+    :param rows: (name, sql) 行
+    :return: 数据表名列表
+    """
+    rows = list(rows)
+    virtual = {name for name, sql in rows if sql and sql.upper().startswith("CREATE VIRTUAL TABLE")}
+    return [
+        name for name, _ in rows
+        if name not in virtual and not any(name.startswith(f"{v}_") for v in virtual)
+    ]
+
+
+def list_tables(conn) -> list:
+    """数据库中的数据表（不含全文索引表）"""
+    return user_tables(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'"))
+
+
+def exists(conn, table_name: str) -> bool:
+    """数据表的全文索引是否存在"""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (index_name(table_name),)).fetchone()
+    return row is not None
+
+
+def indexable(conn, table_name: str) -> bool:
+    """是否为 DatabaseEditor 创建的 (id, content) 数据表"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({quote(table_name)})")}
+    return {"id", "content"} <= columns
+
+
+def create(conn, table_name: str, rebuild: bool = False):
+    """
+    创建全文索引和维护索引的触发器（在调用方的事务中执行）
+    :param rebuild: 从数据表中已有的行重建索引（为已有数据的表补建时使用）
+    """
+    table, fts = quote(table_name), quote(index_name(table_name))
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"id UNINDEXED, content, content={literal(table_name)}, content_rowid='rowid', tokenize='trigram')"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {quote(index_name(table_name) + '_ai')} AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, id, content) VALUES (new.rowid, new.id, new.content); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {quote(index_name(table_name) + '_ad')} AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, id, content) VALUES ('delete', old.rowid, old.id, old.content); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {quote(index_name(table_name) + '_au')} AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, id, content) VALUES ('delete', old.rowid, old.id, old.content); "
+        f"INSERT INTO {fts}(rowid, id, content) VALUES (new.rowid, new.id, new.content); END"
+    )
+    if rebuild:
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop(conn, table_name: str):
+    """删除全文索引（触发器随数据表一起删除）"""
+    conn.execute(f"DROP TABLE IF EXISTS {quote(index_name(table_name))}")
+
+
+def ensure(conn, table_name: str) -> bool:
+    """
+    确保数据表有全文索引，没有时在独立的写事务中补建
+    :param conn: sqlite3 连接（不能处于事务中）
+    :return: 是否有可用的索引（不是 (id, content) 结构的表、只读连接上没有索引的表返回 False）
+    """
+    if exists(conn, table_name):
+        return True
+    if not indexable(conn, table_name):
+        return False
+    if conn.execute("PRAGMA query_only").fetchone()[0]: # 只读连接（快照）不能补建
+        return False
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not exists(conn, table_name): # 其它连接可能已经补建
+            create(conn, table_name, rebuild=True)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return True
+
+
+def search(conn, table_name: str, text: str, limit: int) -> list:
+    """
+    在数据表中搜索包含 text 的行，按相关度排序
+    :param text: 查询内容（按原样作为短语匹配）
+    :param limit: 最多返回的行数
+    :return: [{"id": 数据ID, "snippet": 命中位置附近的片段}]
+    """
+    if len(text) < MIN_QUERY_LENGTH or not ensure(conn, table_name):
+        return scan(conn, table_name, text, limit)
+    fts = quote(index_name(table_name))
+    start, end, ellipsis = SNIPPET_MARKS
+    phrase = '"' + text.replace('"', '""') + '"'
+    rows = conn.execute(
+        f"SELECT id, snippet({fts}, 1, ?, ?, ?, ?) FROM {fts} WHERE {fts} MATCH ? ORDER BY rank LIMIT ?",
+        (start, end, ellipsis, SNIPPET_TOKENS, phrase, limit),
+    )
+    return [{"id": row[0], "snippet": row[1]} for row in rows]
+
+
+def scan(conn, table_name: str, text: str, limit: int) -> list:
+    """没有索引可用时逐行 LIKE 匹配，片段格式与 search 一致"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    rows = conn.execute(
+        f"SELECT id, content FROM {quote(table_name)} WHERE content LIKE ? ESCAPE '\\' LIMIT ?",
+        (f"%{escaped}%", limit),
+    )
+    return [{"id": row[0], "snippet": make_snippet(row[1], text)} for row in rows]
+
+
+def make_snippet(content: str, text: str) -> str:
+    """截取 content 中 text 第一次出现位置附近的片段，并用 SNIPPET_MARKS 标出"""
+    start, end, ellipsis = SNIPPET_MARKS
+    position = content.find(text)
+    if position < 0:
+        return content[:SNIPPET_TOKENS * 2]
+    left = max(0, position - SNIPPET_TOKENS)
+    right = position + len(text) + SNIPPET_TOKENS
+    return (
+        (ellipsis if left > 0 else "")
+        + content[left:position] + start + text + end + content[position + len(text):right]
+        + (ellipsis if right < len(content) else "")
+    )
@@ -0,0 +1,82 @@
+# ================ JSON 数据表 ================
+# content 保存 JSON 的数据表：
+# - content 有 CHECK (json_valid(content)) 约束；DatabaseEditor 写入前先校验，给出明确的提示
+# - 声明的字段（JSON 路径，如 "$.author.name"）建为虚拟生成列，列名就是 JSON 路径本身，并建 B-tree 索引
+# - 查询时按 PRAGMA table_xinfo 找出这些生成列，对字段的过滤/分组直接使用生成列（见 Aggregation.field_sql），可以命中索引
+import json
+from .FullTextIndex import quote, literal
+from .Aggregation import JSON_PATH
+
+# JSON 数据表的 content 约束（也用于从建表语句识别 JSON 数据表）
+CONTENT_CHECK = "CHECK (json_valid(content))"
+# 每张表最多声明的字段数
+MAX_FIELDS = 16
+
+
+def validate_fields(fields) -> list:
+    """
+    校验声明的字段
+    :return: 字段列表
+    :raises ValueError: 字段无效
+    """
+    if not isinstance(fields, list):
+        raise ValueError("字段必须是 JSON 路径列表")
+    if len(fields) > MAX_FIELDS:
+        raise ValueError(f"最多声明 {MAX_FIELDS} 个字段")
+    for field in fields:
+        if not isinstance(field, str) or not JSON_PATH.match(field):
+            raise ValueError(f"字段必须是 JSON 路径（如 $.name）: {field!r}")
+    if len(set(fields)) != len(fields):
+        raise ValueError("字段重复")
+    return fields
+
+
+def index_name(table_name: str, field: str) -> str:
+    return f"{table_name}__idx__{field}"
+
+
+def create_table(conn, table_name: str, fields: list):
+    """
+    创建 JSON 数据表及字段索引（在调用方的事务中执行）
+    :param conn: sqlite3 连接
+    :param fields: 已校验的 JSON 路径列表
+    """
+    table = quote(table_name)
+    columns = ["id TEXT PRIMARY KEY", f"content TEXT {CONTENT_CHECK}"]
+    columns += [f"{quote(field)} GENERATED ALWAYS AS (json_extract(content, {literal(field)})) VIRTUAL" for field in fields]
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+    for field in fields:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name(table_name, field))} ON {table} ({quote(field)})")
+
+
+def is_json_table(sql: str) -> bool:
+    """根据 sqlite_master 中的建表语句判断是否为 JSON 数据表"""
+    return bool(sql) and CONTENT_CHECK in sql
+
+
+def indexed_fields(conn, table_name: str) -> dict:
+    """
+    数据表中声明的字段
+    :return: JSON 路径 -> 生成列名
+    """
+    # table_xinfo 的 hidden：2 为虚拟生成列，3 为存储生成列
+    return {
+        row[1]: row[1]
+        for row in conn.execute(f"PRAGMA table_xinfo({quote(table_name)})")
+        if row[6] in (2, 3) and JSON_PATH.match(row[1])
+    }
+
+
+def valid_json(content) -> bool:
+    """content 能否通过 json_valid 约束（不接受 NaN/Infinity 等 SQLite 不支持的写法）"""
+    if not isinstance(content, str):
+        return False
+    try:
+        json.loads(content, parse_constant=_reject)
+    except ValueError:
+        return False
+    return True
+
+
+def _reject(value):
+    raise ValueError(value)
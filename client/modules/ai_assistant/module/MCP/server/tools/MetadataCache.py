@@ -0,0 +1,236 @@
+# ================ 数据库元数据缓存 ================
+# 每个数据库文件缓存表名列表、各表的列和 JSON 字段、行数，DataInquire 检查表是否存在和统计行数时不再查询 sqlite_master 或 COUNT(*)
+# - 每个数据库保持一个只用于检查的连接：PRAGMA data_version 变化说明其它连接提交过修改，
+#   PRAGMA schema_version 变化说明表结构变了；文件被删除或替换（inode 变化）后重新创建缓存
+# - DatabaseEditor 的写入在 writing() 中执行，提交后把行数变化记入缓存，不需要重新计数
+# - 不是 DatabaseEditor 做的修改（其它进程等）让行数失效，下次统计时 COUNT(*) 一次后重新缓存
+# 行数是近似值：与 DatabaseEditor 的写入同时发生的外部修改可能没有计入
+import os
+import sqlite3
+import threading
+import contextlib
+from .SQLiteConnection import connect, configure, settings_for
+from . import FullTextIndex
+from . import JsonFields
+
+
+def _file_id(path: str):
+    """(设备号, inode) 标识，文件不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _scalar(conn, sql: str):
+    # fetchall 让语句执行完毕，不在检查连接上留下读事务（否则会阻止 WAL 检查点）
+    return conn.execute(sql).fetchall()[0][0]
+
+
+# ================ 一个数据库的元数据 ================
+class DatabaseMetadata:
+    """
+    一个数据库文件的元数据：表名、列、JSON 字段和行数
+
+    每次读取前用检查连接上的 PRAGMA data_version 判断是否有其它连接提交过修改。
+    DatabaseEditor 的写入进行中（pending > 0）时不处理版本变化，由写入结束时记入行数变化并同步版本；
+    没有进行中的写入时版本变化都来自外部，行数全部失效。
+    """
+    def __init__(self, path: str):
+        self.path = path # 数据库文件路径
+        self.file_id = _file_id(path) # 创建时的文件标识
+        settings = settings_for(path)
+        self._conn = sqlite3.connect(path, timeout=settings.get("busy_timeout", 5000) / 1000, check_same_thread=False)
+        self._tables = {} # 表名 -> {"sql": 建表语句, "columns": 列名列表, "fields": JSON 字段, "count": 行数或 None}
+        self._data_version = None
+        self._schema_version = None
+        self._pending = 0 # 进行中的 DatabaseEditor 写入数
+        self._generation = 0 # 开始过的写入数，计数期间有写入开始时不缓存结果
+        self._lock = threading.Lock()
+        try:
+            configure(self._conn, settings)
+            with self._lock:
+                self._data_version = _scalar(self._conn, "PRAGMA data_version")
+                self._load_schema()
+        except Exception:
+            self._conn.close()
+            raise
+
+    def _load_schema(self):
+        """schema_version 变化时重新读取表结构，建表语句未变的表保留行数（调用方持有 _lock）"""
+        version = _scalar(self._conn, "PRAGMA schema_version")
+        if version == self._schema_version:
+            return
+        rows = self._conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'").fetchall()
+        sqls = dict(rows)
+        tables = {}
+        for name in FullTextIndex.user_tables(rows):
+            old = self._tables.get(name)
+            if old is not None and old["sql"] == sqls[name]:
+                tables[name] = old
+                continue
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({FullTextIndex.quote(name)})").fetchall()]
+            tables[name] = {
+                "sql": sqls[name],
+                "columns": columns,
+                "fields": JsonFields.indexed_fields(self._conn, name),
+                "count": None,
+            }
+        self._tables, self._schema_version = tables, version
+
+    def _refresh(self):
+        """检查其它连接的修改（调用方持有 _lock）"""
+        version = _scalar(self._conn, "PRAGMA data_version")
+        if version != self._data_version and self._pending == 0:
+            self._data_version = version
+            self._load_schema()
+            for table in self._tables.values():
+                table["count"] = None
+
+    def tables(self) -> list:
+        """数据表名列表（不含全文索引表）"""
+        with self._lock:
+            self._refresh()
+            return list(self._tables)
+
+    def has_table(self, table_name: str) -> bool:
+        """表是否存在"""
+        with self._lock:
+            self._refresh()
+            return table_name in self._tables
+
+    def columns(self, table_name: str) -> list:
+        """表的列名，表不存在时为 None"""
+        with self._lock:
+            self._refresh()
+            table = self._tables.get(table_name)
+            return None if table is None else list(table["columns"])
+
+    def indexed_fields(self, table_name: str) -> dict:
+        """JSON 数据表中有索引的字段（见 JsonFields.indexed_fields），表不存在时为 None"""
+        with self._lock:
+            self._refresh()
+            table = self._tables.get(table_name)
+            return None if table is None else dict(table["fields"])
+
+    def count(self, table_name: str):
+        """
+        表的行数，表不存在时为 None
+        缓存失效时用单独的连接 COUNT(*)（不占用检查连接），期间没有写入开始才缓存结果
+        """
+        with self._lock:
+            self._refresh()
+            table = self._tables.get(table_name)
+            if table is None or table["count"] is not None:
+                return None if table is None else table["count"]
+            generation = self._generation
+        with contextlib.closing(connect(self.path)) as conn:
+            count = _scalar(conn, f"SELECT COUNT(*) FROM {FullTextIndex.quote(table_name)}")
+        with self._lock:
+            if self._generation == generation and self._pending == 0 and self._tables.get(table_name) is table:
+                table["count"] = count
+        return count
+
+    def begin_write(self):
+        """DatabaseEditor 开始写入"""
+        with self._lock:
+            if self._pending == 0 and self._conn is not None:
+                self._refresh() # 先处理写入开始前的外部修改，避免被这次写入的版本同步掩盖
+            self._pending += 1
+            self._generation += 1
+
+    def end_write(self, deltas: dict = None):
+        """
+        DatabaseEditor 的写入结束（已提交或已回滚）
+        :param deltas: 表名 -> 行数变化，写入失败时为 None
+        """
+        with self._lock:
+            self._pending -= 1
+            if self._conn is None: # 已被 release，写入本身不受影响
+                return
+            self._load_schema() # 写入可能创建或删除了表
+            for table_name, delta in (deltas or {}).items():
+                table = self._tables.get(table_name)
+                if table is not None and table["count"] is not None:
+                    table["count"] += delta
+            if self._pending == 0:
+                self._data_version = _scalar(self._conn, "PRAGMA data_version")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _Changes(dict):
+    """writing() 中记录的行数变化：表名 -> 变化量"""
+    def add(self, table_name: str, delta: int):
+        self[table_name] = self.get(table_name, 0) + delta
+
+
+# ================ 元数据缓存 ================
+class MetadataCache:
+    """
+    进程内的元数据缓存：按数据库文件的绝对路径缓存 DatabaseMetadata
+    数据库文件被删除或替换（inode 变化）后，下次获取时重新创建
+    """
+    _entries = {} # 绝对路径 -> DatabaseMetadata
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(db_name: str) -> str:
+        return os.path.normcase(os.path.abspath(db_name))
+
+    @classmethod
+    def get(cls, db_name: str) -> DatabaseMetadata:
+        """获取数据库的元数据（数据库文件必须存在），不存在或文件已被替换时创建"""
+        key = cls._key(db_name)
+        entry = cls._entries.get(key)
+        if entry is not None and entry.file_id == _file_id(key):
+            return entry
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None or entry.file_id != _file_id(key):
+                if entry is not None:
+                    entry.close()
+                entry = cls._entries[key] = DatabaseMetadata(key)
+            return entry
+
+    @classmethod
+    @contextlib.contextmanager
+    def writing(cls, db_name: str):
+        """
+        DatabaseEditor 的写入在其中执行：with MetadataCache.writing(db) as changes: ... changes.add(表名, 行数变化)
+        事务必须在 with 块结束前提交；块中抛出异常时不记入变化。还没有缓存的数据库不做任何事。
+        在事务组中（DatabaseHandle.transaction）块结束时只释放了 SAVEPOINT，事务组回滚后由调用方 release
+        """
+        changes = _Changes()
+        entry = cls._entries.get(cls._key(db_name))
+        if entry is None:
+            yield changes
+            return
+        entry.begin_write()
+        try:
+            yield changes
+        except BaseException:
+            entry.end_write(None)
+            raise
+        entry.end_write(changes)
+
+    @classmethod
+    def release(cls, db_name: str):
+        """关闭并移除数据库的元数据（删除或整体替换数据库文件前调用）"""
+        with cls._lock:
+            entry = cls._entries.pop(cls._key(db_name), None)
+        if entry is not None:
+            entry.close()
+
+    @classmethod
+    def clear(cls):
+        """关闭并移除全部元数据"""
+        with cls._lock:
+            entries, cls._entries = list(cls._entries.values()), {}
+        for entry in entries:
+            entry.close()
@@ -0,0 +1,87 @@
+# ================ 键集分页 ================
+# 按 id 排序、用 "id > 上一页最后一个 id" 定位下一页（不用 OFFSET，翻到后面的页也不需要跳过前面的行）
+# - 每页由若干次小查询分块读取，每块最多 FETCH_SIZE 行，内存占用与表大小无关
+# - 续页标记是不透明的字符串，包含表名、上一页最后一个 id 和总行数提示
+# - 总行数只在第一页统计一次，之后随续页标记传递（是提示值，翻页期间表可能被修改）
+import json
+import base64
+from itertools import islice
+
+# 默认每页行数
+PAGE_SIZE = 100
+# 每页最大行数
+MAX_PAGE_SIZE = 1000
+# 每次查询读取的行数
+FETCH_SIZE = 200
+
+
+def encode_token(table_name: str, after_id: str, total: int) -> str:
+    """生成续页标记"""
+    payload = json.dumps({"t": table_name, "a": after_id, "n": total}, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str, table_name: str) -> tuple:
+    """
+    解析续页标记
+    :return: (上一页最后一个 id, 总行数提示)
+    :raises ValueError: 标记无效或不属于该表
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        after_id, total = payload["a"], payload["n"]
+        owner = payload["t"]
+    except Exception:
+        raise ValueError("续页标记无效")
+    if owner != table_name:
+        raise ValueError(f"续页标记不属于表 '{table_name}'")
+    return after_id, total
+
+
+def page_size(limit) -> int:
+    """校验每页行数，超过 MAX_PAGE_SIZE 时截断"""
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        raise ValueError("每页行数必须是正整数")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def iter_rows(fetch, after_id: str = None, chunk_size: int = FETCH_SIZE):
+    """
+    按 id 顺序逐块读取行
+    :param fetch: fetch(after_id, size) -> 按 id 排序、id 大于 after_id（None 表示从头开始）的至多 size 行，每行第一列为 id
+    :param after_id: 从该 id 之后开始
+    :param chunk_size: 每块行数
+    """
+    while True:
+        rows = fetch(after_id, chunk_size)
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1][0]
+
+
+def read_page(fetch, count, table_name: str, after_id: str = None, limit: int = PAGE_SIZE, page_token: str = None) -> dict:
+    """
+    读取一页
+    :param fetch: 见 iter_rows
+    :param count: count() -> 总行数，只在没有续页标记时调用
+    :param after_id: 从该 id 之后开始（有 page_token 时忽略）
+    :param page_token: 上一页返回的续页标记
+    :return: {"rows": 行列表, "next": 续页标记（没有下一页时为 None）, "total": 总行数提示}
+    :raises ValueError: 参数无效
+    """
+    limit = page_size(limit)
+    if page_token:
+        after_id, total = decode_token(page_token, table_name)
+    else:
+        total = count()
+    # 多读一行判断是否还有下一页
+    rows = list(islice(iter_rows(fetch, after_id, min(limit + 1, FETCH_SIZE)), limit + 1))
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "rows": rows,
+        "next": encode_token(table_name, rows[-1][0], total) if more else None,
+        "total": total,
+    }
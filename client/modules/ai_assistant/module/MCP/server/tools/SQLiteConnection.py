@@ -0,0 +1,99 @@
+# ================ SQLite 连接工厂 ================
+import os
+import sqlite3
+from sqlalchemy import create_engine, event
+
+# 所有工具打开 SQLite 数据库时使用的设置
+# - journal_mode=WAL：读不阻塞写、写不阻塞读（设置保存在数据库文件中）
+# - synchronous=NORMAL：WAL 模式下只在检查点时 fsync，断电最多丢失最近的事务，不会损坏数据库
+# - cache_size：页缓存，负数表示 KiB
+# - mmap_size：内存映射读取的大小（字节）
+# - busy_timeout：遇到锁时等待的毫秒数，而不是立即报 database is locked
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16384,
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+# 只读快照（见 DatabaseBackup）使用的设置：不修改日志模式，query_only 拒绝一切写入
+READONLY_PRAGMAS = {
+    "query_only": 1,
+    "cache_size": -16384,
+    "mmap_size": 64 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
+# 只读快照文件的后缀
+SNAPSHOT_SUFFIX = ".snapshot.db"
+# WAL 模式的附属文件后缀
+SIDE_FILES = ("-wal", "-shm")
+
+
+def is_snapshot(db_name: str) -> bool:
+    """是否为只读快照"""
+    return str(db_name).endswith(SNAPSHOT_SUFFIX)
+
+
+def settings_for(db_name: str, pragmas: dict = None) -> dict:
+    """数据库使用的设置：显式传入的 pragmas，否则只读快照用 READONLY_PRAGMAS，其它用 PRAGMAS"""
+    if pragmas is not None:
+        return pragmas
+    return READONLY_PRAGMAS if is_snapshot(db_name) else PRAGMAS
+
+
+def configure(conn, pragmas: dict = None):
+    """
+    对一个 sqlite3 连接应用 PRAGMAS
+    :param conn: sqlite3 连接（SQLAlchemy 的 DBAPI 连接也可以）
+    :param pragmas: 覆盖默认设置，默认为模块的 PRAGMAS
+    """
+    cursor = conn.cursor()
+    try:
+        for name, value in (PRAGMAS if pragmas is None else pragmas).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def connect(db_name: str, pragmas: dict = None) -> sqlite3.Connection:
+    """
+    打开 sqlite3 连接并应用 PRAGMAS
+    :param db_name: 数据库名称
+    :param pragmas: 覆盖默认设置
+    :return: sqlite3 连接
+    """
+    settings = settings_for(db_name, pragmas)
+    conn = sqlite3.connect(db_name, timeout=settings.get("busy_timeout", 5000) / 1000)
+    try:
+        configure(conn, settings)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def create_sqlite_engine(db_name: str, pragmas: dict = None, **kwargs):
+    """
+    创建 SQLAlchemy 引擎，连接池中的每个新连接都应用 PRAGMAS
+    :param db_name: 数据库名称
+    :param pragmas: 覆盖默认设置
+    :return: 引擎
+    """
+    settings = dict(settings_for(db_name, pragmas))
+    engine = create_engine(f'sqlite:///{db_name}', echo=False, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        configure(dbapi_connection, settings)
+
+    return engine
+
+
+def remove_database(db_name: str):
+    """删除数据库文件以及 WAL 模式留下的 -wal/-shm 文件"""
+    os.remove(db_name)
+    for suffix in SIDE_FILES:
+        try:
+            os.remove(db_name + suffix)
+        except FileNotFoundError:
+            pass
@@ -1,9 +1,14 @@
 from .FileEditor import FileEditor
-from .DatabaseEditor import DatabaseEditor
+from .DatabaseEditor import DatabaseEditor, DatabaseRegistry
 from .DataInquire import DataInquire
+from .DatabaseBackup import DatabaseBackup
+from .MetadataCache import MetadataCache
 
 __all__ = [
     'FileEditor',
     'DatabaseEditor',
+    'DatabaseRegistry',
     'DataInquire',
+    'DatabaseBackup',
+    'MetadataCache',
 ]
\ No newline at end of file
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试聚合查询：DataInquire.database_table_aggregate 的过滤、分组、聚合、排序、截断，
+JSON 字段，以及查询描述的白名单校验（不能注入 SQL）
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools import Aggregation
+
+
+def prepare(tmp: str) -> str:
+    """日志表：id 为 "<模块>-<序号>"，content 为 JSON 或普通文本"""
+    db = os.path.join(tmp, "agg.db")
+    editor = DatabaseEditor()
+    editor.connect(db)
+    rows = []
+    for i in range(30):
+        module = ["net", "db", "ui"][i % 3]
+        rows.append({"data_id": f"{module}-{i:02d}", "content": json.dumps({"level": "error" if i % 5 == 0 else "info", "cost": i})})
+    rows.append({"data_id": "misc-99", "content": "不是 JSON 的 100% 文本"})
+    editor.write_many(db, "logs", rows)
+    return db
+
+
+def test_aggregate():
+    """测试计数、分组、JSON 字段、排序和截断"""
+    print("\n测试1: 聚合查询")
+    print("-" * 60)
+
+    inquire = DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = prepare(tmp)
+
+        assert inquire.database_table_aggregate(db, "logs", {}) == {"columns": ["count"], "rows": [[31]], "truncated": False}
+        result = inquire.database_table_aggregate(db, "logs", {"filter": [{"field": "content", "op": "contains", "value": "100%"}]})
+        assert result["rows"] == [[1]], "LIKE 通配符应被转义"
+
+        result = inquire.database_table_aggregate(db, "logs", {
+            "filter": [{"field": "id", "op": "ne", "value": "misc-99"}],
+            "group_by": [{"field": "id", "fn": "prefix", "arg": 2, "as": "module"}],
+            "aggregates": [{"fn": "count"}, {"fn": "max", "field": "$.cost"}, {"fn": "min", "field": "$.cost"}],
+            "order_by": [{"by": "max", "desc": True}],
+        })
+        print(f"按前缀分组: {result}")
+        assert result["columns"] == ["module", "count", "max", "min"]
+        assert result["rows"] == [["ui", 10, 29, 2], ["db", 10, 28, 1], ["ne", 10, 27, 0]]
+
+        result = inquire.database_table_aggregate(db, "logs", {
+            "group_by": [{"field": "$.level"}],
+            "order_by": [{"by": "count", "desc": True}],
+            "limit": 2,
+        })
+        print(f"按 JSON 字段分组: {result}")
+        assert result == {"columns": ["key", "count"], "rows": [["info", 24], ["error", 6]], "truncated": True}, "非 JSON 内容的分组键应为 NULL"
+
+        result = inquire.database_table_aggregate(db, "logs", {
+            "filter": [{"field": "$.cost", "op": "ge", "value": 25}, {"field": "$.level", "op": "in", "value": ["error"]}],
+        })
+        assert result["rows"] == [[1]]
+        DatabaseRegistry.release(db)
+
+    print("✓ 聚合查询正确")
+    return True
+
+
+def test_validation():
+    """测试查询描述只能使用白名单内的字段、函数和运算符"""
+    print("\n测试2: 查询描述校验")
+    print("-" * 60)
+
+    inquire = DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = prepare(tmp)
+        invalid = [
+            ({"group_by": [{"field": "id; DROP TABLE logs"}]}, "不支持的字段"),
+            ({"group_by": [{"field": "$.a') --"}]}, "不支持的字段"),
+            ({"aggregates": [{"fn": "sum", "field": "id"}]}, "不支持的聚合函数"),
+            ({"filter": [{"field": "id", "op": "glob", "value": "*"}]}, "不支持的运算符"),
+            ({"filter": [{"field": "id", "op": "eq", "value": ["a"]}]}, "必须是字符串或数字"),
+            ({"order_by": [{"by": "id"}]}, "order_by 只能使用输出列"),
+            ({"aggregates": [{"fn": "count", "as": "a b"}]}, "输出列名无效"),
+            ({"group_by": [{"field": "id", "fn": "prefix"}]}, "arg 必须是正整数"),
+            ({"limit": 0}, "limit 必须是正整数"),
+            ({"having": []}, "未知的查询项"),
+        ]
+        for spec, message in invalid:
+            result = inquire.database_table_aggregate(db, "logs", spec)
+            assert isinstance(result, str) and message in result, (spec, result)
+        assert inquire.database_table_aggregate(db, "missing", {}) == "表 'missing' 不存在"
+        assert inquire.database_table_aggregate(db, "logs", {})["rows"] == [[31]], "非法查询不应修改数据"
+        DatabaseRegistry.release(db)
+
+    # 值和 JSON 路径都作为参数绑定
+    sql, params, names, limit = Aggregation.build_query("logs", {
+        "filter": [{"field": "$.level", "op": "eq", "value": "' OR 1=1 --"}],
+        "limit": 5000,
+    })
+    print(f"SQL: {sql}  参数: {params}")
+    assert "OR 1=1" not in sql and params == ["$.level", "' OR 1=1 --", Aggregation.MAX_LIMIT + 1]
+    assert limit == Aggregation.MAX_LIMIT
+
+    print("✓ 查询描述校验正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("聚合查询测试")
+    print("=" * 60)
+
+    test_aggregate()
+    test_validation()
+
+    print("\n✓ 所有测试通过！")
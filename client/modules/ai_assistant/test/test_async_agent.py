@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 AsyncAgent 的事件流、取消与截止时间（不依赖真实模型和MCP服务）
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from module.Agent.AsyncAgent import AsyncAgent, EventType, TurnTimeoutError
+
+
+def make_result(payload) -> SimpleNamespace:
+    """构造与 CallToolResult 结构一致的假结果"""
+    text = json.dumps(payload, ensure_ascii=False)
+    return SimpleNamespace(meta=None, content=[SimpleNamespace(text=text)], structuredContent=payload, isError=False)
+
+
+class FakeMCP:
+    """假的MCP客户端：立即返回 add 工具的计算结果"""
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.tasks = {}
+        self.cancelled = []
+
+    def add(self, tool: dict) -> str:
+        task_id = f"task_{len(self.tasks)}"
+        self.tasks[task_id] = tool
+        return task_id
+
+    def get_result(self, task_id, block=True, timeout=None):
+        if self.delay:
+            wait = self.delay if timeout is None else min(self.delay, timeout)
+            time.sleep(wait)
+            if wait < self.delay:
+                raise TimeoutError(f"等待任务 {task_id} 结果超时")
+        args = json.loads(self.tasks[task_id]["function"]["arguments"])
+        return make_result({"task_type": "add", "message": args["a"] + args["b"]})
+
+    def cancel(self, task_id):
+        self.cancelled.append(task_id)
+
+
+def tool_call_stream(problem: str, role: str = "user"):
+    """第一次调用返回工具调用碎片，第二次调用（工具结果回传）返回文本"""
+    if role == "system":
+        yield {"thinking": "整理结果"}
+        yield {"content": "结果是3"}
+        return
+    yield {"tool_calls": [{"index": 0, "id": "call_1", "type": "function", "function": {"name": "add", "arguments": ""}}]}
+    yield {"tool_calls": [{"index": 0, "id": None, "type": None, "function": {"name": None, "arguments": '{"a": 1, "b": 2}'}}]}
+
+
+def slow_stream(problem: str, role: str = "user"):
+    """每0.05秒输出一个片段，共输出100个"""
+    for i in range(100):
+        time.sleep(0.05)
+        yield {"content": str(i)}
+
+
+def test_event_stream():
+    """测试工具调用流程的事件顺序"""
+    print("\n测试1: 事件流")
+    print("-" * 60)
+
+    mcp = FakeMCP()
+    agent = AsyncAgent(tool_call_stream, tool_call_stream, mcp.add, mcp.get_result)
+
+    async def collect():
+        return [event async for event in agent.stream("1+2")]
+
+    events = asyncio.run(collect())
+    types = [event.type for event in events]
+    print(f"事件: {[t.value for t in types]}")
+
+    assert types[0] == EventType.STATE_CHANGE, "第一个事件应为状态切换"
+    assert EventType.TOOL_START in types and EventType.TOOL_END in types, "缺少工具事件"
+    assert EventType.THINKING_DELTA in types, "缺少思考事件"
+    tool_end = next(e for e in events if e.type == EventType.TOOL_END)
+    assert json.loads(tool_end.data["result"])["message"] == 3, "工具结果不正确"
+    content = "".join(e.data for e in events if e.type == EventType.CONTENT_DELTA)
+    assert content == "结果是3", "文本内容不正确"
+    assert events[-1].type == EventType.TURN_END and events[-1].data["reason"] == "done", "最后一个事件应为正常结束"
+
+    print("✓ 事件流正确")
+    return True
+
+
+def test_cancel():
+    """测试取消进行中的流式输出"""
+    print("\n测试2: 取消")
+    print("-" * 60)
+
+    mcp = FakeMCP()
+    agent = AsyncAgent(slow_stream, slow_stream, mcp.add, mcp.get_result)
+
+    async def run():
+        events = []
+        async for event in agent.stream("hello"):
+            events.append(event)
+            if event.type == EventType.CONTENT_DELTA and event.data == "2":
+                agent.cancel()
+        return events
+
+    start = time.time()
+    events = asyncio.run(run())
+    elapsed = time.time() - start
+    print(f"耗时: {elapsed:.2f} 秒, 事件数: {len(events)}")
+
+    assert events[-1].data["reason"] == "cancelled", "应以取消结束"
+    assert elapsed < 1.0, "取消后不应继续等待整个流"
+
+    print("✓ 取消生效")
+    return True
+
+
+def test_deadline():
+    """测试单轮截止时间同时作用于MCP调用"""
+    print("\n测试3: 截止时间")
+    print("-" * 60)
+
+    mcp = FakeMCP(delay=5.0)
+    agent = AsyncAgent(tool_call_stream, tool_call_stream, mcp.add, mcp.get_result,
+                       mcp_client_cancel_task_callback=mcp.cancel, turn_timeout=0.3)
+
+    start = time.time()
+    try:
+        asyncio.run(agent.run_async("1+2"))
+        raise AssertionError("应当超时")
+    except TurnTimeoutError:
+        pass
+    elapsed = time.time() - start
+    print(f"耗时: {elapsed:.2f} 秒, 已取消任务: {mcp.cancelled}")
+
+    assert elapsed < 1.0, "超时后不应继续等待MCP结果"
+    assert mcp.cancelled == ["task_0"], "超时后应取消未完成的MCP任务"
+
+    print("✓ 截止时间生效")
+    return True
+
+
+def test_concurrent_agents():
+    """测试一个事件循环同时驱动多个 Agent"""
+    print("\n测试4: 并发 Agent")
+    print("-" * 60)
+
+    def stream(problem: str, role: str = "user"):
+        time.sleep(0.2)
+        yield {"content": problem}
+
+    agents = [AsyncAgent(stream, stream, None, None) for _ in range(10)]
+
+    async def run_all():
+        return await asyncio.gather(*(agent.run_async(f"agent_{i}") for i, agent in enumerate(agents)))
+
+    start = time.time()
+    results = asyncio.run(run_all())
+    elapsed = time.time() - start
+    print(f"10 个 Agent 耗时: {elapsed:.2f} 秒")
+
+    assert results == [f"agent_{i}" for i in range(10)], "结果不正确"
+    assert elapsed < 1.0, "多个 Agent 应当并发执行"
+
+    print("✓ 并发执行正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("AsyncAgent 测试")
+    print("=" * 60)
+
+    test_event_stream()
+    test_cancel()
+    test_deadline()
+    test_concurrent_agents()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量调用：服务端 call_batch（并行、按资源顺序、事务组回滚）、MCPClient.add_batch、Agent.execute 自动合并
+（服务端以内存模式在本进程内运行）
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.client.MCPClient import MCPClient, SERVER_DIR, BATCH_TOOL
+from module.Agent.Agent import Agent
+
+
+def server_with_db_tools():
+    """内置服务端，另外注册数据库写入工具"""
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+    from fastmcp.tools import Tool
+    from MCPServer import MCPServer, offload
+    server = MCPServer()
+    for tool in (server.database_editor.connect, server.database_editor.write, server.database_editor.read):
+        server.mcp.add_tool(Tool.from_function(offload(tool)))
+
+    def fail_after(db_name: str, seconds: float) -> tuple:
+        """等待一段时间后失败（用于在事务组执行期间从其它连接写入）"""
+        time.sleep(seconds)
+        return False, "失败"
+
+    server.mcp.add_tool(Tool.from_function(offload(fail_after)))
+    return server.mcp
+
+
+def start_client(**kwargs) -> MCPClient:
+    client = MCPClient(transport="memory", server_factory=server_with_db_tools, **kwargs)
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.01)
+    return client
+
+
+def text(result) -> str:
+    return result.content[0].text
+
+
+def test_add_batch():
+    """测试多个调用合并为一次请求，结果与逐个调用一致，批量工具不提供给模型"""
+    print("\n测试1: add_batch")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        names = [tool["function"]["name"] for tool in client.list_tools()]
+        assert BATCH_TOOL not in names, "批量工具不应提供给模型"
+
+        calls = [{"type": "function", "function": {"name": "add", "arguments": json.dumps({"a": i, "b": 1})}} for i in range(5)]
+        calls.append({"name": "missing", "arguments": {}})
+        futures = client.add_batch(calls)
+        results = [client.get_result(future, timeout=10) for future in futures]
+        print(f"结果: {[text(r) for r in results]}")
+        assert [json.loads(text(r))["message"] for r in results[:5]] == [1, 2, 3, 4, 5], "结果顺序应与调用一致"
+        assert results[5].isError and "Unknown tool" in text(results[5]), "未知工具应返回错误结果"
+        assert client.peak_in_flight == 1, "多个调用应合并为一次请求"
+        assert client.result_metrics()["size"] == 0, "结果取走后应移出存储"
+    finally:
+        client.close()
+
+    print("✓ add_batch 正确")
+    return True
+
+
+def test_transactional_rollback():
+    """测试事务组：同一数据库上任一调用失败则回滚，其它数据库不受影响"""
+    print("\n测试2: 事务组回滚")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bad, good = os.path.join(tmp, "bad.db"), os.path.join(tmp, "good.db")
+        client = start_client()
+        try:
+            for db in (bad, good):
+                client.get_result(client.add({"name": "connect", "arguments": {"db_name": db}}), timeout=10)
+            client.get_result(client.add({"name": "write", "arguments": {"db_name": bad, "table_name": "t", "data_id": "0", "content": "原始"}}), timeout=10)
+
+            calls = [
+                {"name": "write", "arguments": {"db_name": bad, "table_name": "t", "data_id": "0", "content": "修改"}},
+                {"name": "write", "arguments": {"db_name": bad, "table_name": "t", "data_id": "", "content": "失败"}},
+                {"name": "write", "arguments": {"db_name": bad, "table_name": "t", "data_id": "2", "content": "跳过"}},
+                {"name": "write", "arguments": {"db_name": good, "table_name": "t", "data_id": "1", "content": "保留"}},
+            ]
+            results = [client.get_result(f, timeout=10) for f in client.add_batch(calls, transactional=True)]
+            print(f"结果: {[text(r) for r in results]}")
+            assert getattr(results[0], "rolledBack", False), "失败前已执行的调用应标记为已回滚"
+            assert results[2].isError and "回滚" in text(results[2]), "失败后的调用不应执行"
+            assert not results[3].isError, "其它数据库上的调用应正常执行"
+        finally:
+            client.close()
+
+        with contextlib.closing(sqlite3.connect(bad)) as conn:
+            rows = conn.execute("SELECT id, content FROM t ORDER BY id").fetchall()
+        with contextlib.closing(sqlite3.connect(good)) as conn:
+            kept = conn.execute("SELECT content FROM t").fetchall()
+        print(f"bad.db: {rows}, good.db: {kept}")
+        assert rows == [("0", "原始")], "事务组应整体回滚"
+        assert kept == [("保留",)], "其它数据库的写入应保留"
+
+    print("✓ 事务组回滚正确")
+    return True
+
+
+def test_agent_execute_uses_batch():
+    """测试 Agent.execute 在多个工具调用同时就绪时使用批量回调"""
+    print("\n测试3: Agent.execute")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        agent = Agent(
+            dialogue_callback=None,
+            knowledge_callback=None,
+            mcp_client_add_task_callback=client.add,
+            mcp_client_execute_task_callback=client.get_result,
+            mcp_client_add_batch_callback=client.add_batch,
+        )
+        merged = [{"type": "function", "function": {"name": "multiply", "arguments": json.dumps({"a": i, "b": 2})}} for i in range(4)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = agent.execute(merged)
+        print(f"结果: {results}")
+        assert [json.loads(r)["message"] for r in results] == [0, 2, 4, 6], "结果不正确"
+        assert client.peak_in_flight == 1 and agent.last_turn_tools == ["multiply"] * 4, "应合并为一次请求"
+    finally:
+        client.close()
+
+    print("✓ Agent.execute 正确")
+    return True
+
+def test_batch_sticky_workers():
+    """测试多个 worker 时，批量中不同数据库上的调用各自发到该数据库固定的 worker"""
+    print("\n测试4: 批量调用与固定路由")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = start_client(workers=2, health_interval=None)
+        try:
+            # 取两个固定到不同 worker 的数据库
+            paths = [os.path.join(tmp, f"db{i}.db") for i in range(20)]
+            first = paths[0]
+            second = next(p for p in paths if client._pick_worker("write", {"db_name": p}) is not client._pick_worker("write", {"db_name": first}))
+            expected = {db: client._pick_worker("write", {"db_name": db}).index for db in (first, second)}
+            for db in (first, second):
+                client.get_result(client.add({"name": "connect", "arguments": {"db_name": db}}), timeout=10)
+
+            calls = [
+                {"name": "write", "arguments": {"db_name": db, "table_name": "t", "data_id": str(i), "content": f"内容{i}"}}
+                for i in range(3) for db in (first, second)
+            ]
+            futures = client.add_batch(calls)
+            results = [client.get_result(future, timeout=10) for future in futures]
+            workers = [future.worker for future in futures]
+            print(f"固定的 worker: {expected}，实际: {workers}")
+            assert not any(r.isError for r in results), [text(r) for r in results]
+            assert workers == [expected[c["arguments"]["db_name"]] for c in calls], "每个调用应发到其数据库固定的 worker"
+        finally:
+            client.close()
+
+        for db in (first, second):
+            with contextlib.closing(sqlite3.connect(db)) as conn:
+                assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 3
+
+    print("✓ 批量调用与固定路由正确")
+    return True
+
+def test_rollback_keeps_other_writes():
+    """测试事务组回滚只撤销本组的修改：执行期间其它连接的写入等待写锁，回滚后保留"""
+    print("\n测试5: 回滚不覆盖其它写入")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "shared.db")
+        client = start_client()
+        try:
+            client.get_result(client.add({"name": "connect", "arguments": {"db_name": db}}), timeout=10)
+            client.get_result(client.add({"name": "write", "arguments": {"db_name": db, "table_name": "t", "data_id": "0", "content": "原始"}}), timeout=10)
+
+            def external_write():
+                time.sleep(0.1)
+                with contextlib.closing(sqlite3.connect(db, timeout=10)) as conn:
+                    conn.execute("INSERT INTO t (id, content) VALUES ('外部', '其它连接的写入')")
+                    conn.commit()
+
+            writer = threading.Thread(target=external_write)
+            writer.start()
+            calls = [
+                {"name": "write", "arguments": {"db_name": db, "table_name": "t", "data_id": "0", "content": "修改"}},
+                {"name": "read", "arguments": {"db_name": db, "table_name": "t", "data_id": "0"}},
+                {"name": "fail_after", "arguments": {"db_name": db, "seconds": 0.5}},
+            ]
+            results = [client.get_result(f, timeout=10) for f in client.add_batch(calls, transactional=True)]
+            writer.join()
+            print(f"结果: {[text(r) for r in results]}")
+            assert "修改" in text(results[1]), "组内的读取应能读到组内的写入"
+            assert getattr(results[0], "rolledBack", False), "失败前已执行的调用应标记为已回滚"
+            read = client.get_result(client.add({"name": "read", "arguments": {"db_name": db, "table_name": "t", "data_id": "0"}}), timeout=10)
+            assert "原始" in text(read), "回滚后应读到原始内容"
+        finally:
+            client.close()
+
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            rows = conn.execute("SELECT id, content FROM t ORDER BY id").fetchall()
+        print(f"shared.db: {rows}")
+        assert rows == [("0", "原始"), ("外部", "其它连接的写入")], "回滚应保留其它连接的写入"
+
+    print("✓ 回滚不覆盖其它写入")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("批量调用 测试")
+    print("=" * 60)
+
+    test_add_batch()
+    test_transactional_rollback()
+    test_agent_execute_uses_batch()
+    test_batch_sticky_workers()
+    test_rollback_keeps_other_writes()
+
+    print("\n✓ 所有测试通过！")
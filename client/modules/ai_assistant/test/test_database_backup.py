@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 DatabaseBackup：在线备份分步进行、写入同时进行、进度可查询，
+只读快照可以被 DataInquire 查询，原数据库继续写入不影响快照，快照拒绝写入
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.DatabaseBackup import DatabaseBackup
+from module.MCP.server.tools.SQLiteConnection import connect, is_snapshot
+
+
+def fill(editor: DatabaseEditor, db: str, rows: int):
+    editor.connect(db)
+    editor.write_many(db, "t", [{"data_id": f"{i:05d}", "content": f"第{i}条内容" + "x" * 200} for i in range(rows)])
+
+
+def test_backup_during_writes():
+    """测试备份分多步完成，期间其它线程的写入不被阻塞，备份结果完整"""
+    print("\n测试1: 写入同时在线备份")
+    print("-" * 60)
+
+    editor, backup = DatabaseEditor(), DatabaseBackup()
+    with tempfile.TemporaryDirectory() as tmp:
+        db, target = os.path.join(tmp, "live.db"), os.path.join(tmp, "copy.db")
+        fill(editor, db, 2000)
+
+        stop, writes = threading.Event(), []
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                ok, message = editor.write(db, "w", str(i % 50), f"写入{i}")
+                assert ok, message
+                writes.append(i)
+                i += 1
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        ok, result = backup.backup(db, target, pages=8, pause=0.002)
+        stop.set()
+        thread.join()
+
+        print(f"备份: {result}，备份期间写入 {len(writes)} 次")
+        assert ok, result
+        assert result["steps"] > 1 and result["pages"] > 0
+        assert writes, "备份期间写入不应被阻塞"
+        assert not os.path.exists(target + ".part"), "临时文件应已替换为目标文件"
+
+        with contextlib.closing(sqlite3.connect(target)) as conn:
+            assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+            assert conn.execute('SELECT COUNT(*) FROM "t"').fetchone()[0] == 2000
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+        ok, progress = backup.backup_progress(target)
+        print(f"进度: {progress}")
+        assert ok and progress["done"] and progress["remaining"] == 0 and progress["percent"] == 100.0
+
+        assert backup.backup(db, db)[0] is False, "目标文件不能是数据库本身"
+        assert backup.backup(db, target, pages=0)[0] is False
+        assert backup.backup_progress(os.path.join(tmp, "none.db"))[0] is False
+        DatabaseRegistry.release(db)
+
+    print("✓ 在线备份正确")
+    return True
+
+
+def test_snapshot_queries():
+    """测试快照是创建时刻的数据，DataInquire 可查询快照，原数据库继续写入"""
+    print("\n测试2: 只读快照")
+    print("-" * 60)
+
+    editor, inquire, backup = DatabaseEditor(), DataInquire(), DatabaseBackup()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "live.db")
+        fill(editor, db, 500)
+        editor.write(db, "t", "weather", "今天天气很好")
+
+        ok, result = backup.snapshot(db)
+        print(f"快照: {result}")
+        assert ok, result
+        snapshot = result["snapshot"]
+        assert is_snapshot(snapshot) and os.path.dirname(snapshot) == os.path.join(tmp, ".snapshots")
+
+        # 快照之后原数据库继续写入
+        editor.write(db, "t", "later", "快照之后写入的天气很好")
+        editor.delete_data(db, "t", "00000")
+
+        assert inquire.database_table_data_count(db, "t") == 501
+        assert inquire.database_table_data_count(snapshot, "t") == 501
+        assert inquire.database_table_data_exists(snapshot, "t", "00000") is True
+        assert inquire.database_table_data_exists(snapshot, "t", "later") is False
+
+        page = inquire.database_table_content(snapshot, "t", limit=10)
+        assert len(page["rows"]) == 10 and page["rows"][0][0] == "00000"
+
+        hits = inquire.database_table_data_filter(snapshot, "t", "天气很好")
+        print(f"快照上的搜索: {hits}")
+        assert [hit["id"] for hit in hits] == ["weather"]
+
+        counts = inquire.database_table_aggregate(snapshot, "t", {"group_by": [{"field": "id", "fn": "prefix", "arg": 1}]})
+        assert dict(map(tuple, counts["rows"]))["0"] == 500
+
+        ok, snapshots = backup.list_snapshots(db)
+        assert ok and [s["snapshot"] for s in snapshots] == [snapshot]
+
+        # 快照拒绝写入
+        with contextlib.closing(connect(snapshot)) as conn:
+            try:
+                conn.execute("DELETE FROM \"t\"")
+                assert False, "快照应拒绝写入"
+            except sqlite3.OperationalError as e:
+                print(f"写入快照: {e}")
+        ok, message = editor.write(snapshot, "t", "x", "写入快照")
+        assert not ok, message
+        assert inquire.database_table_data_count(snapshot, "t") == 501
+
+        assert backup.delete_snapshot(db)[0] is False, "只能删除快照"
+        ok, message = backup.delete_snapshot(snapshot)
+        assert ok, message
+        assert not os.path.exists(snapshot) and backup.list_snapshots(db) == (True, [])
+        DatabaseRegistry.release(db)
+
+    print("✓ 只读快照正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("DatabaseBackup 测试")
+    print("=" * 60)
+
+    test_backup_during_writes()
+    test_snapshot_queries()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 DatabaseEditor：基本增删改查、DatabaseRegistry 的引擎复用、表名缓存失效、数据库文件删除重建、批量写入/插入/删除、
+SQLiteConnection 的 WAL 等设置
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools import SQLiteConnection
+
+
+def test_crud():
+    """测试增删改查（表存在检查）"""
+    print("\n测试1: 增删改查")
+    print("-" * 60)
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "crud.db")
+        assert editor.connect(db)[0]
+        assert editor.read(db, "t", "1") == (False, "表 't' 不存在")
+        assert editor.insert_data(db, "t", "1", "一")[0]
+        assert editor.insert_data(db, "t", "1", "重复") == (False, "数据ID '1' 已存在")
+        assert editor.write(db, "t", "2", "二")[0] and editor.write(db, "t", "2", "贰")[0]
+        assert editor.update_data(db, "t", "1", "壹")[0]
+        assert editor.update_data(db, "t", "9", "x") == (False, "数据ID '9' 不存在")
+        assert editor.read(db, "t", "1") == (True, "壹") and editor.read(db, "t", "2") == (True, "贰")
+        assert editor.count_records(db, "t") == (True, 2)
+        assert editor.data_exists(db, "t", "2") == (True, True)
+        assert editor.delete_data(db, "t", "2")[0] and editor.data_exists(db, "t", "2") == (True, False)
+        assert editor.list_all_data(db, "t") == (True, {"rows": [{"id": "1", "content": "壹"}], "next": None, "total": 1})
+        print(f"表: {editor.list_tables(db)}")
+        DatabaseRegistry.release(db)
+
+    print("✓ 增删改查正确")
+    return True
+
+
+def test_registry_and_table_cache():
+    """测试引擎复用，表名缓存随 create_table/delete_table 和其它连接的修改失效"""
+    print("\n测试2: 注册表与表名缓存")
+    print("-" * 60)
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "cache.db")
+        editor.connect(db)
+        handle = DatabaseRegistry.get(db)
+        assert DatabaseRegistry.get(os.path.join(tmp, ".", "cache.db")) is handle, "同一文件应共用一个句柄"
+
+        assert editor.create_table(db, "a") == (True, "创建数据表成功")
+        assert editor.create_table(db, "a") == (True, "表 'a' 已存在")
+        assert editor.list_tables(db) == (True, ["a"])
+
+        # 其它连接（或进程）创建和删除的表也能发现
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            conn.execute("CREATE TABLE b (id TEXT PRIMARY KEY, content TEXT)")
+            conn.commit()
+        assert editor.list_tables(db) == (True, ["a", "b"]), "schema_version 变化后应重新读取表名"
+
+        assert editor.delete_table(db, "a")[0]
+        assert editor.read(db, "a", "1") == (False, "表 'a' 不存在"), "删除表后缓存应失效"
+        assert editor.write(db, "a", "1", "x")[0] and editor.read(db, "a", "1") == (True, "x"), "write 应重新建表"
+        assert DatabaseRegistry.get(db) is handle, "调用之间应复用同一个引擎"
+        DatabaseRegistry.release(db)
+
+    print("✓ 注册表与表名缓存正确")
+    return True
+
+
+def test_recreated_file():
+    """测试数据库文件删除并重建后不会写到旧文件"""
+    print("\n测试3: 数据库文件重建")
+    print("-" * 60)
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "recreate.db")
+        editor.connect(db)
+        editor.write(db, "t", "1", "旧")
+        assert editor.delete(db)[0]
+        editor.connect(db)
+        assert editor.read(db, "t", "1") == (False, "表 't' 不存在"), "删除后重建的数据库应为空"
+
+        # 绕过 DatabaseEditor 直接替换文件
+        editor.write(db, "t", "1", "新")
+        os.remove(db)
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            conn.execute("CREATE TABLE t (id TEXT PRIMARY KEY, content TEXT)")
+            conn.execute("INSERT INTO t VALUES ('1', '外部')")
+            conn.commit()
+        assert editor.read(db, "t", "1") == (True, "外部"), "文件被替换后应重新打开"
+        DatabaseRegistry.release(db)
+
+    print("✓ 数据库文件重建正确")
+    return True
+
+
+def test_bulk():
+    """测试批量写入、插入、删除的逐行状态，以及超过分批大小的批次"""
+    print("\n测试4: 批量操作")
+    print("-" * 60)
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bulk.db")
+        editor.connect(db)
+        editor.write(db, "t", "a", "旧")
+
+        ok, result = editor.write_many(db, "t", [
+            {"data_id": "a", "content": "新"},
+            {"data_id": "b", "content": "乙"},
+            {"data_id": "b", "content": "乙2"},
+            {"data_id": "", "content": "x"},
+            {"data_id": "c"},
+        ])
+        print(f"write_many: {result}")
+        assert ok and [r["status"] for r in result["rows"]] == ["updated", "inserted", "updated", "invalid", "invalid"]
+        assert (result["inserted"], result["updated"], result["failed"]) == (1, 2, 2)
+        assert editor.read(db, "t", "a") == (True, "新") and editor.read(db, "t", "b") == (True, "乙2"), "同一批中后面的行覆盖前面的"
+
+        ok, result = editor.insert_many(db, "t", [{"data_id": "a", "content": "不覆盖"}, {"data_id": "d", "content": "丁"}])
+        assert ok and [r["status"] for r in result["rows"]] == ["exists", "inserted"] and result["failed"] == 1
+        assert editor.read(db, "t", "a") == (True, "新"), "insert_many 不应覆盖已存在的行"
+
+        ok, result = editor.delete_many(db, "t", ["a", "missing", "a"])
+        assert ok and [r["status"] for r in result["rows"]] == ["deleted", "not_found", "not_found"]
+        assert editor.delete_many(db, "none", ["a"]) == (False, "表 'none' 不存在")
+
+        # 超过 IN 参数上限和分批大小的批次
+        count = 1234
+        ok, result = editor.write_many(db, "big", [{"data_id": str(i), "content": f"内容{i}"} for i in range(count)])
+        assert ok and result["inserted"] == count
+        ok, result = editor.write_many(db, "big", [{"data_id": str(i), "content": "改"} for i in range(count)])
+        assert ok and result["updated"] == count
+        assert editor.count_records(db, "big") == (True, count) and editor.read(db, "big", "1000") == (True, "改")
+        ok, result = editor.delete_many(db, "big", [str(i) for i in range(count)])
+        assert ok and result["deleted"] == count and editor.count_records(db, "big") == (True, 0)
+        DatabaseRegistry.release(db)
+
+    print("✓ 批量操作正确")
+    return True
+
+
+def test_connection_settings():
+    """测试 DatabaseEditor 和 DataInquire 的连接都使用 WAL 等设置，写事务未提交时读取不被阻塞"""
+    print("\n测试5: 连接设置")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "wal.db")
+        editor.connect(db)
+        editor.write(db, "t", "1", "已提交")
+
+        handle = DatabaseRegistry.get(db)
+        with handle.engine.connect() as conn:
+            settings = [conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in ("journal_mode", "synchronous", "busy_timeout")]
+        with contextlib.closing(SQLiteConnection.connect(db)) as conn:
+            raw = [conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("journal_mode", "synchronous", "busy_timeout")]
+        print(f"DatabaseEditor: {settings}, DataInquire: {raw}")
+        assert settings == raw == ["wal", 1, SQLiteConnection.PRAGMAS["busy_timeout"]], "两种连接都应使用 WAL、synchronous=NORMAL"
+
+        # 写事务持有锁期间读取已提交的数据
+        with handle.engine.begin() as conn:
+            conn.execute(handle.statement("t", "upsert"), {"id": "1", "content": "未提交"})
+            start = time.perf_counter()
+            assert inquire.database_table_data_batch(db, "t", ["1"]) == {"1": "已提交"}, "应读到已提交的数据"
+            assert time.perf_counter() - start < 1, "读取不应等待写事务"
+        assert editor.read(db, "t", "1") == (True, "未提交")
+
+        assert editor.delete(db)[0]
+        assert os.listdir(tmp) == [], "删除数据库时应一并删除 -wal/-shm 文件"
+
+    print("✓ 连接设置正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("DatabaseEditor 测试")
+    print("=" * 60)
+
+    test_crud()
+    test_registry_and_table_cache()
+    test_recreated_file()
+    test_bulk()
+    test_connection_settings()
+
+    print("\n✓ 所有测试通过！")
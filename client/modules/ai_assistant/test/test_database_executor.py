@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 DatabaseExecutor：数据库工具按写入/扫描/查找分线程执行，长扫描不阻塞短查找，
+同一数据库的写入在同一个写线程中依次执行，包装后的函数可注册为 MCP 工具
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.DatabaseExecutor import DatabaseExecutor, AsyncTools, lane_of
+
+
+def test_lanes():
+    """测试工具按名称分到对应的线程"""
+    print("\n测试1: 执行队列")
+    print("-" * 60)
+
+    assert lane_of("write_many") == "write" and lane_of("database_content_fuzzy") == "scan"
+    assert lane_of("database_table_data_exists") == "lookup" and lane_of("read") == "lookup"
+
+    executor = DatabaseExecutor()
+
+    def thread_name(db_name: str = None):
+        return threading.current_thread().name
+
+    async def main():
+        return await asyncio.gather(
+            executor.wrap(thread_name, "write")("a.db"),
+            executor.wrap(thread_name, "write")(db_name="b.db"),
+            executor.wrap(thread_name, "scan")("a.db"),
+            executor.wrap(thread_name, "lookup")("a.db"),
+        )
+
+    names = asyncio.run(main())
+    print(f"线程: {names}")
+    assert names[0].startswith("db-writer-a.db") and names[1].startswith("db-writer-b.db")
+    assert names[2].startswith("db-scan") and names[3].startswith("db-lookup")
+    assert executor.writer("a.db") is executor.writer(os.path.join(".", "a.db")), "同一文件共用一个写线程"
+    executor.shutdown()
+
+    print("✓ 执行队列正确")
+    return True
+
+
+def test_scan_does_not_block_lookup():
+    """测试扫描线程全部占满时，查找仍能立即执行"""
+    print("\n测试2: 长扫描不阻塞查找")
+    print("-" * 60)
+
+    executor = DatabaseExecutor(lookup_workers=2, scan_workers=2)
+    slow_scan = executor.wrap(lambda: time.sleep(1.0), "scan")
+    lookup = executor.wrap(lambda: time.perf_counter(), "lookup")
+
+    async def main():
+        start = time.perf_counter()
+        scans = [asyncio.ensure_future(slow_scan()) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        finished = await lookup()
+        await asyncio.gather(*scans)
+        return finished - start, time.perf_counter() - start
+
+    lookup_latency, total = asyncio.run(main())
+    print(f"查找完成: {lookup_latency * 1000:.0f} ms，扫描全部完成: {total:.1f} s")
+    assert lookup_latency < 0.5, "查找不应排在扫描后面"
+    assert total >= 1.9, "扫描线程数有上限"
+    executor.shutdown()
+
+    print("✓ 长扫描不阻塞查找")
+    return True
+
+
+def test_async_tools():
+    """测试异步版本的数据库工具：并发写入同一数据库、读写同时进行"""
+    print("\n测试3: 异步数据库工具")
+    print("-" * 60)
+
+    executor = DatabaseExecutor()
+    editor, inquire = AsyncTools(DatabaseEditor(), executor), AsyncTools(DataInquire(), executor)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "async.db")
+
+        async def main():
+            assert (await editor.connect(db))[0]
+            results = await asyncio.gather(*(editor.write(db, "t", str(i), f"内容{i}") for i in range(50)))
+            assert all(ok for ok, _ in results), results
+            counts = await asyncio.gather(inquire.database_table_data_count(db, "t"), editor.count_records(db, "t"))
+            page = await inquire.database_table_content(db_name=db, table_name="t", limit=10)
+            return counts, page
+
+        counts, page = asyncio.run(main())
+        print(f"计数: {counts}")
+        assert counts == [50, (True, 50)] and len(page["rows"]) == 10
+        assert editor.write.lane == "write" and inquire.database_table_content.lane == "scan"
+        assert editor.write.__doc__ == DatabaseEditor.write.__doc__, "包装后文档不变"
+        DatabaseRegistry.release(db)
+    executor.shutdown()
+
+    # 包装后的函数可以注册为 MCP 工具，参数结构与同步版本一致
+    from fastmcp.tools import Tool
+    tool = Tool.from_function(DatabaseExecutor().wrap(DatabaseEditor().write))
+    assert tool.name == "write" and set(tool.parameters["properties"]) == {"db_name", "table_name", "data_id", "content"}
+
+    print("✓ 异步数据库工具正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("DatabaseExecutor 测试")
+    print("=" * 60)
+
+    test_lanes()
+    test_scan_does_not_block_lookup()
+    test_async_tools()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试压测用的模拟服务器，以及 AIFactory 的 role_dir/base_url 参数
+"""
+
+import os
+import io
+import sys
+import json
+import shutil
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+sys.path.append(os.path.join(parent_dir, "benchmark"))
+
+from openai import OpenAI
+from fake_openai_server import FakeOpenAIServer, ServerConfig
+
+
+def test_deepseek_shape():
+    """测试 deepseek 格式：先思考后回答，最后是 choices 为空的 usage 块"""
+    print("\n测试1: deepseek 格式")
+    print("-" * 60)
+
+    with FakeOpenAIServer(ServerConfig(shape="deepseek", ttft=0, rate=0, tokens=5, thinking_tokens=3, tool_call_rate=0)) as server:
+        client = OpenAI(api_key="test", base_url=server.base_url)
+        chunks = [c.model_dump() for c in client.chat.completions.create(
+            model="deepseek-chat", messages=[{"role": "user", "content": "你好"}], stream=True)]
+
+    deltas = [c["choices"][0]["delta"] for c in chunks if c["choices"]]
+    thinking = [d for d in deltas if d.get("reasoning_content")]
+    content = "".join(d.get("content") or "" for d in deltas)
+    print(f"片段数: {len(chunks)}, 思考片段: {len(thinking)}, 内容: {content}")
+
+    assert len(thinking) == 3, "思考片段数不正确"
+    assert content == "词0词1词2词3词4", "内容不正确"
+    assert chunks[-1]["choices"] == [] and chunks[-1]["usage"]["completion_tokens"] == 8, "最后应为 usage 块"
+
+    print("✓ deepseek 格式正确")
+    return True
+
+
+def test_tool_call_injection():
+    """测试工具调用注入：参数分多个片段输出"""
+    print("\n测试2: 工具调用注入")
+    print("-" * 60)
+
+    with FakeOpenAIServer(ServerConfig(shape="doubao", ttft=0, rate=0, tool_call_rate=1.0)) as server:
+        client = OpenAI(api_key="test", base_url=server.base_url)
+        chunks = [c.model_dump() for c in client.chat.completions.create(
+            model="doubao", messages=[{"role": "user", "content": "1+2"}], stream=True)]
+
+    calls = [tc for c in chunks if c["choices"] for tc in (c["choices"][0]["delta"].get("tool_calls") or [])]
+    arguments = "".join(tc["function"]["arguments"] or "" for tc in calls)
+    print(f"工具: {calls[0]['function']['name']}, 参数: {arguments}")
+
+    assert calls[0]["function"]["name"] == "add", "工具名不正确"
+    assert set(json.loads(arguments)) == {"a", "b"}, "参数不完整"
+
+    print("✓ 工具调用注入正确")
+    return True
+
+
+def test_factory_against_server():
+    """测试 AIFactory 指定 role_dir 和 base_url 后连接模拟服务器"""
+    print("\n测试3: AIFactory 连接模拟服务器")
+    print("-" * 60)
+
+    from module.AICore.AIManager import AIFactory
+
+    role_source = os.path.join(parent_dir, "module", "AICore", "role")
+    with tempfile.TemporaryDirectory() as role_dir:
+        for role in ("role_A", "role_B"):
+            os.makedirs(os.path.join(role_dir, role))
+            shutil.copy(os.path.join(role_source, role, "assistant.json"), os.path.join(role_dir, role))
+
+        with FakeOpenAIServer(ServerConfig(shape="doubao", ttft=0, rate=0, tokens=3, tool_call_rate=0)) as server:
+            with contextlib.redirect_stdout(io.StringIO()):
+                factory = AIFactory(role_dir=role_dir, base_url=server.base_url)
+                model = "doubao-seed-1-6-lite-251015"
+                factory.connect("doubao", model, "doubao", model)
+                chunks = list(factory.dialogue_callback("你好"))
+
+        print(f"片段: {chunks}")
+        assert chunks == [{"content": "词0"}, {"content": "词1"}, {"content": "词2"}], "回复不正确"
+        assert os.path.isfile(os.path.join(role_dir, "role_A", "history.json")), "历史应写入指定的角色目录"
+
+    print("✓ AIFactory 连接正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("模拟服务器 测试")
+    print("=" * 60)
+
+    test_deepseek_shape()
+    test_tool_call_injection()
+    test_factory_against_server()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 FastRouter 的规则、分类器门控与轮次日志
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from module.Agent.FastRouter import FastRouter, TfidfLinearClassifier
+
+SEED_PATH = os.path.join(parent_dir, "Data", "router", "seed_turns.jsonl")
+
+
+def test_exit_rule():
+    """测试退出指令"""
+    print("\n测试1: 退出规则")
+    print("-" * 60)
+
+    router = FastRouter()
+    for text in ["exit", "QUIT", "退出", "退出！"]:
+        assert router.route(text).intent == "exit", f"{text} 应判定为退出"
+    for text in ["再见", "结束", "不要退出"]:
+        assert router.route(text).intent != "exit", f"{text} 不是退出指令"
+    assert not router.route("怎么退出 vim").handled, "包含退出的问题应交给模型"
+
+    print("✓ 退出规则正确")
+    return True
+
+
+def test_math_rule():
+    """测试四则运算：单个运算映射到工具，复合表达式本地计算"""
+    print("\n测试2: 运算规则")
+    print("-" * 60)
+
+    router = FastRouter()
+    cases = {
+        "1+2": ("add", {"a": 1, "b": 2}),
+        "3乘以4等于几": ("multiply", {"a": 3, "b": 4}),
+        "2^10": ("power", {"a": 2, "b": 10}),
+        "根号16": ("sqrt", {"a": 16}),
+        "开根号16": ("sqrt", {"a": 16}),
+        "5 - 3": ("subtract", {"a": 5, "b": 3}),
+    }
+    for text, (name, arguments) in cases.items():
+        route = router.route(text)
+        assert route.intent == "math" and route.tool_call is not None, f"{text} 应映射到工具"
+        assert route.tool_call["function"]["name"] == name, f"{text} 工具名不正确"
+        assert json.loads(route.tool_call["function"]["arguments"]) == arguments, f"{text} 参数不正确"
+
+    assert router.route("(3+4)*5").answer == "35", "复合表达式应本地计算"
+    assert router.route("1.5+2.5").answer == "4", "小数应本地计算"
+    assert router.route("0.1+0.2").answer == "0.3", "小数结果应四舍五入"
+    for text in ["2026-10-19", "138-1234-5678", "加1", "-5 - 3", "3*-2"]:
+        assert not router.route(text).handled, f"{text} 不是运算式，应交给模型"
+    assert not router.route("1/0").handled, "除零应交给模型"
+    assert not router.route("2**99999").handled, "过大的指数应交给模型"
+    assert not router.route("__import__('os')").handled, "非运算式应交给模型"
+    assert not router.route("帮我写一个加法器").handled, "普通文本应交给模型"
+
+    print("✓ 运算规则正确")
+    return True
+
+
+def test_classifier_gate():
+    """测试分类器门控：未知意图或低置信度一律交给模型"""
+    print("\n测试3: 分类器门控")
+    print("-" * 60)
+
+    router = FastRouter()
+    router.train_from_log(SEED_PATH)
+
+    # 分类器不判定退出：否定、疑问和不完全匹配的告别语都交给模型
+    for text in ["不要退出", "别退出", "先别结束", "结束了吗", "再见吧", "我要走了再见"]:
+        route = router.route(text)
+        assert route.intent != "exit" and not route.handled, f"{text} 不应退出"
+    assert not router.route("帮我读取 config.json").handled, "普通请求应交给模型"
+
+    # 单工具意图：分类器判定 + 参数提取
+    clf = TfidfLinearClassifier().fit(
+        ["列出工作区文件", "工作区有哪些文件", "看看工作区", "写个程序", "你好", "解释代码"],
+        ["scan_workspace", "scan_workspace", "scan_workspace", "llm", "llm", "llm"]
+    )
+    router = FastRouter(classifier=clf, threshold=0.5)
+    assert not router.route("列出工作区的文件").handled, "未注册参数提取的工具应交给模型"
+    router.register_extractor("scan_workspace", lambda text: {})
+    route = router.route("列出工作区的文件")
+    assert route.intent == "scan_workspace" and route.source == "model", "应路由到单工具"
+
+    print("✓ 分类器门控正确")
+    return True
+
+
+def test_log_and_train():
+    """测试轮次日志写入与训练，以及模型保存加载"""
+    print("\n测试4: 日志与训练")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        router = FastRouter(log_path=os.path.join(tmp, "turns.jsonl"))
+        router.log_turn("算一下 3 加 5", ["add"])
+        router.log_turn("结束吧", ["exit_task"])
+        router.log_turn("读文件", ["read_all", "add"])
+
+        texts, labels = FastRouter.load_samples(router.log_path)
+        assert labels == ["math", "exit", "llm"], f"标签不正确: {labels}"
+
+        clf = router.train_from_log(SEED_PATH)
+        model_path = os.path.join(tmp, "model.json")
+        clf.save(model_path)
+        loaded = TfidfLinearClassifier.load(model_path)
+        assert loaded.predict("拜拜") == clf.predict("拜拜"), "加载后的预测应一致"
+
+    print("✓ 日志与训练正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("FastRouter 测试")
+    print("=" * 60)
+
+    test_exit_rule()
+    test_math_rule()
+    test_classifier_gate()
+    test_log_and_train()
+
+    print("\n✓ 所有测试通过！")
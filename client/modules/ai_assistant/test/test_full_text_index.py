@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 FullTextIndex：DatabaseEditor 建表时创建全文索引、触发器同步维护、
+DataInquire 的模糊查询（排序、片段、数量限制、短查询回退）、旧表补建索引
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools import FullTextIndex
+
+
+def test_search():
+    """测试按相关度排序、片段标记、数量限制和表列表过滤"""
+    print("\n测试1: 全文搜索")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "fts.db")
+        editor.connect(db)
+        editor.write_many(db, "notes", [
+            {"data_id": "1", "content": "今天天气很好，适合出门散步" + "填充" * 50},
+            {"data_id": "2", "content": "天气预报说明天天气很好，天气变化很大"},
+            {"data_id": "3", "content": "天气很好，天气很好"},
+            {"data_id": "4", "content": "完全不相关"},
+        ])
+        editor.write(db, "other", "x", "晚饭吃面条")
+
+        assert editor.list_tables(db) == (True, ["notes", "other"]), "表列表不应包含索引表"
+        assert inquire.database_all_table(db) == ["notes", "other"], "表列表不应包含索引表"
+
+        result = inquire.database_table_data_filter(db, "notes", "天气变化")
+        print(f"filter: {result}")
+        assert result == [{"id": "2", "snippet": "天气预报说明天天气很好，[天气变化]很大"}]
+
+        result = inquire.database_table_data_filter(db, "notes", "天气很好", limit=2)
+        print(f"limit=2: {result}")
+        assert [r["id"] for r in result] == ["3", "2"], "命中多、内容短的行应排在前面，并按 limit 截断"
+
+        result = inquire.database_content_fuzzy(db, "面条")
+        assert result == {"other": [{"id": "x", "snippet": "晚饭吃[面条]"}]}, "短查询应回退到 LIKE 且片段格式一致"
+        assert inquire.database_content_fuzzy(db, "不存在的内容") == {}
+        DatabaseRegistry.release(db)
+
+    print("✓ 全文搜索正确")
+    return True
+
+
+def test_triggers():
+    """测试更新、删除、删表后索引同步"""
+    print("\n测试2: 索引同步")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "sync.db")
+        editor.connect(db)
+        editor.insert_data(db, "t", "1", "红色的苹果")
+        editor.write(db, "t", "2", "黄色的香蕉")
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "t", "色的苹")] == ["1"]
+
+        editor.update_data(db, "t", "1", "绿色的苹果")
+        assert inquire.database_table_data_filter(db, "t", "红色的") == [], "更新后旧内容应从索引中移除"
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "t", "绿色的")] == ["1"]
+
+        editor.write(db, "t", "2", "紫色的葡萄") # UPSERT 走更新触发器
+        editor.delete_many(db, "t", ["1"])
+        assert inquire.database_table_data_filter(db, "t", "色的苹") == [], "删除后应从索引中移除"
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "t", "色的葡")] == ["2"]
+
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            conn.execute("INSERT INTO t__fts(t__fts) VALUES ('integrity-check')") # 索引与数据表不一致时报错
+        assert editor.delete_table(db, "t")[0]
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            assert not FullTextIndex.exists(conn, "t"), "删表时应一并删除索引"
+            assert conn.execute("SELECT count(*) FROM sqlite_master").fetchone()[0] == 0
+        DatabaseRegistry.release(db)
+
+    print("✓ 索引同步正确")
+    return True
+
+
+def test_lazy_rebuild():
+    """测试此功能之前创建的表在第一次搜索时补建索引，非 (id, content) 表回退到扫描"""
+    print("\n测试3: 旧表补建索引")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "old.db")
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            conn.execute("CREATE TABLE legacy (id TEXT PRIMARY KEY, content TEXT)")
+            conn.executemany("INSERT INTO legacy VALUES (?, ?)", [(str(i), f"旧数据第{i}条记录") for i in range(100)])
+            conn.execute("CREATE TABLE 'odd''name' (id TEXT PRIMARY KEY, content TEXT)")
+            conn.execute("INSERT INTO 'odd''name' VALUES ('a', '名字带引号的表')")
+            conn.execute("CREATE TABLE other (key TEXT, value TEXT)")
+            conn.commit()
+            assert not FullTextIndex.exists(conn, "legacy")
+
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "legacy", "第42条")] == ["42"]
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "odd'name", "带引号")] == ["a"]
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            assert FullTextIndex.exists(conn, "legacy"), "第一次搜索后应补建索引"
+            assert not FullTextIndex.exists(conn, "other"), "非 (id, content) 表不建索引"
+
+        # 补建后 DatabaseEditor 的写入同样由触发器同步
+        editor.write(db, "legacy", "new", "补建之后写入的记录")
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "legacy", "之后写入")] == ["new"]
+        result = inquire.database_content_fuzzy(db, "记录")
+        assert isinstance(result, dict) and sorted(result) == ["legacy"], "应跳过没有 id/content 列的表"
+        assert editor.list_tables(db) == (True, ["legacy", "odd'name", "other"])
+        DatabaseRegistry.release(db)
+
+    print("✓ 旧表补建索引正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("FullTextIndex 测试")
+    print("=" * 60)
+
+    test_search()
+    test_triggers()
+    test_lazy_rebuild()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 JSON 数据表：create_table 声明的字段建为带索引的生成列、content 的 JSON 校验、
+DataInquire 按字段过滤/分组时命中索引（EXPLAIN QUERY PLAN）
+"""
+
+import os
+import sys
+import json
+import tempfile
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.SQLiteConnection import connect
+from module.MCP.server.tools import Aggregation, JsonFields
+
+
+def query_plan(db: str, sql: str, params: list) -> str:
+    with contextlib.closing(connect(db)) as conn:
+        return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_json_table():
+    """测试建表、JSON 校验和字段查询"""
+    print("\n测试1: JSON 数据表")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "json.db")
+        editor.connect(db)
+        assert editor.create_table(db, "docs", ["$.type", "$.meta.score"]) == (True, "创建数据表成功")
+        assert editor.create_table(db, "bad", ["type"])[0] is False, "字段必须是 JSON 路径"
+        assert editor.create_table(db, "bad", ["$.a", "$.a"]) == (False, "字段重复")
+        assert editor.list_tables(db) == (True, ["docs"])
+
+        assert editor.insert_data(db, "docs", "1", json.dumps({"type": "note", "meta": {"score": 3}}))[0]
+        assert editor.insert_data(db, "docs", "2", "不是 JSON") == (False, "内容不是有效的 JSON")
+        assert editor.insert_data(db, "docs", "1", "{}") == (False, "数据ID '1' 已存在")
+        assert editor.write(db, "docs", "1", "{") == (False, "内容不是有效的 JSON")
+        assert editor.update_data(db, "docs", "1", "[1, NaN]") == (False, "内容不是有效的 JSON")
+
+        ok, result = editor.write_many(db, "docs", [
+            {"data_id": "2", "content": json.dumps({"type": "task", "meta": {"score": 8}})},
+            {"data_id": "3", "content": "无效"},
+            {"data_id": "4", "content": json.dumps({"type": "note", "meta": {"score": 5}})},
+        ])
+        assert ok and [r["status"] for r in result["rows"]] == ["inserted", "invalid", "inserted"], "无效的行不应让整批失败"
+
+        # 普通表不校验 JSON
+        assert editor.write(db, "plain", "1", "不是 JSON")[0]
+
+        with contextlib.closing(connect(db)) as conn:
+            assert JsonFields.indexed_fields(conn, "docs") == {"$.type": "$.type", "$.meta.score": "$.meta.score"}
+            assert JsonFields.indexed_fields(conn, "plain") == {}
+
+        result = inquire.database_table_data_query(db, "docs", [{"field": "$.type", "op": "eq", "value": "note"}])
+        print(f"按字段查询: {result}")
+        assert [r[0] for r in result["rows"]] == ["1", "4"] and result["truncated"] is False
+        result = inquire.database_table_data_query(db, "docs", [{"field": "$.meta.score", "op": "gt", "value": 4}], limit=1)
+        assert [r[0] for r in result["rows"]] == ["2"] and result["truncated"] is True
+
+        result = inquire.database_table_aggregate(db, "docs", {"group_by": [{"field": "$.type"}], "aggregates": [{"fn": "count"}, {"fn": "max", "field": "$.meta.score"}]})
+        assert result["rows"] == [["note", 2, 5], ["task", 1, 8]]
+        # 全文索引同样可用
+        assert [r["id"] for r in inquire.database_table_data_filter(db, "docs", "task")] == ["2"]
+        DatabaseRegistry.release(db)
+
+    print("✓ JSON 数据表正确")
+    return True
+
+
+def test_index_usage():
+    """测试按声明的字段过滤和分组时使用索引，未声明的字段回退到 json_extract"""
+    print("\n测试2: 索引使用")
+    print("-" * 60)
+
+    editor = DatabaseEditor()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "plan.db")
+        editor.connect(db)
+        editor.create_table(db, "docs", ["$.type", "$.meta.score"])
+        with contextlib.closing(connect(db)) as conn:
+            columns = JsonFields.indexed_fields(conn, "docs")
+
+        sql, params, _ = Aggregation.build_select("docs", [{"field": "$.type", "op": "eq", "value": "note"}], columns=columns)
+        plan = query_plan(db, sql, params)
+        print(f"过滤: {plan}")
+        assert 'USING INDEX docs__idx__$.type' in plan
+
+        sql, params, _ = Aggregation.build_select("docs", [{"field": "$.meta.score", "op": "ge", "value": 3}], columns=columns)
+        assert 'USING INDEX docs__idx__$.meta.score' in query_plan(db, sql, params)
+
+        sql, params, _, _ = Aggregation.build_query("docs", {"group_by": [{"field": "$.type"}]}, columns)
+        plan = query_plan(db, sql, params)
+        print(f"分组: {plan}")
+        assert "USING INDEX docs__idx__$.type" in plan and "TEMP B-TREE" not in plan, "分组应按索引顺序读取，不需要临时排序"
+
+        sql, params, _ = Aggregation.build_select("docs", [{"field": "$.other", "op": "eq", "value": 1}], columns=columns)
+        plan = query_plan(db, sql, params)
+        print(f"未声明的字段: {plan}")
+        assert "INDEX docs__idx" not in plan
+        DatabaseRegistry.release(db)
+
+    print("✓ 索引使用正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("JSON 数据表测试")
+    print("=" * 60)
+
+    test_json_table()
+    test_index_usage()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MCPClient 的并发调用：同一会话上多个请求同时执行、按资源串行、单个工具并发上限
+（使用临时的慢速 MCP 服务，每次调用耗时固定）
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from mcp import StdioServerParameters
+from module.MCP.client.MCPClient import MCPClient
+
+# 慢速服务：slow 可并发，slow_write 由客户端按 db_name 串行
+SLOW_SERVER = '''
+import asyncio
+from fastmcp import FastMCP
+
+mcp = FastMCP("slow")
+
+@mcp.tool
+async def slow(seconds: float) -> dict:
+    await asyncio.sleep(seconds)
+    return {"message": seconds}
+
+@mcp.tool
+async def slow_write(seconds: float, db_name: str) -> dict:
+    await asyncio.sleep(seconds)
+    return {"message": db_name}
+
+mcp.run(show_banner=False)
+'''
+
+
+def start_client(script: str, **kwargs) -> MCPClient:
+    client = MCPClient(**kwargs)
+    client.server_params = StdioServerParameters(command=sys.executable, args=[script])
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.05)
+    return client
+
+
+def run_batch(client: MCPClient, tasks) -> float:
+    """批量提交并等待全部完成，返回耗时"""
+    start = time.time()
+    futures = [client.add({"name": name, "arguments": arguments}) for name, arguments in tasks]
+    for future in futures:
+        assert not client.get_result(future, timeout=10).isError, "调用失败"
+    return time.time() - start
+
+
+def test_concurrency_limits():
+    """测试并发执行、按资源串行和单个工具并发上限"""
+    print("\n测试1: 并发调用")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "slow_server.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(SLOW_SERVER)
+
+        client = start_client(script, max_in_flight=8, serialized_tools={"slow_write"})
+        try:
+            elapsed = run_batch(client, [("slow", {"seconds": 0.2})] * 8)
+            print(f"8 个 0.2 秒调用并发: {elapsed:.2f} 秒, 峰值并发 {client.peak_in_flight}")
+            assert elapsed < 0.8 and client.peak_in_flight == 8, "应并发执行"
+
+            elapsed = run_batch(client, [("slow_write", {"seconds": 0.1, "db_name": "a.db"})] * 4)
+            print(f"同一数据库 4 次写入: {elapsed:.2f} 秒")
+            assert elapsed >= 0.4, "同一数据库的写入应串行"
+
+            elapsed = run_batch(client, [("slow_write", {"seconds": 0.2, "db_name": f"{i}.db"}) for i in range(4)])
+            print(f"不同数据库 4 次写入: {elapsed:.2f} 秒")
+            assert elapsed < 0.6, "不同数据库的写入应并发"
+        finally:
+            client.close()
+
+        client = start_client(script, max_in_flight=8, tool_limits={"slow": 2})
+        try:
+            elapsed = run_batch(client, [("slow", {"seconds": 0.1})] * 6)
+            print(f"slow 并发上限 2，6 次调用: {elapsed:.2f} 秒, 峰值并发 {client.peak_in_flight}")
+            assert elapsed >= 0.3 and client.peak_in_flight == 2, "应遵守单个工具的并发上限"
+        finally:
+            client.close()
+
+    print("✓ 并发调用正确")
+    return True
+
+
+def test_order_preserved():
+    """测试同一资源上的写入保持提交顺序"""
+    print("\n测试2: 串行写入保持顺序")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "slow_server.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(SLOW_SERVER)
+
+        client = start_client(script, serialized_tools={"slow_write"})
+        finished = []
+        try:
+            futures = []
+            for i in range(5):
+                future = client.add({"name": "slow_write", "arguments": {"seconds": 0.05 * (5 - i), "db_name": "same.db"}})
+                future.add_done_callback(lambda f, i=i: finished.append(i))
+                futures.append(future)
+            for future in futures:
+                client.get_result(future, timeout=10)
+        finally:
+            client.close()
+
+        print(f"完成顺序: {finished}")
+        assert finished == [0, 1, 2, 3, 4], "同一资源上的调用应按提交顺序完成"
+
+    print("✓ 顺序正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MCPClient 并发测试")
+    print("=" * 60)
+
+    test_concurrency_limits()
+    test_order_preserved()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MCPClient 的事件驱动调度：add 返回 Future、空闲不占 CPU、暂停/恢复
+（需要能启动本地 MCP 服务）
+"""
+
+import os
+import sys
+import json
+import time
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.client.MCPClient import MCPClient, TaskFuture
+
+
+def tool_call(name: str, **arguments) -> dict:
+    """构造 OpenAI 工具调用格式"""
+    return {"type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def start_client() -> MCPClient:
+    client = MCPClient()
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.05)
+    return client
+
+
+def test_future_results():
+    """测试 add 返回 Future，get_result 支持 Future 和任务ID"""
+    print("\n测试1: Future 结果")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        future = client.add(tool_call("add", a=1, b=2))
+        assert isinstance(future, TaskFuture), "add 应返回 TaskFuture"
+        result = client.get_result(future, timeout=10)
+        assert json.loads(result.content[0].text)["message"] == 3, "结果不正确"
+
+        future = client.add(tool_call("multiply", a=3, b=4))
+        future.result(timeout=10)
+        result = client.get_result(future.task_id, block=False)
+        assert json.loads(result.content[0].text)["message"] == 12, "按任务ID取结果不正确"
+
+        try:
+            client.get_result(future.task_id, block=False)
+            raise AssertionError("结果取走后不应再存在")
+        except KeyError:
+            pass
+    finally:
+        client.close()
+
+    print("✓ Future 结果正确")
+    return True
+
+
+def test_idle_cpu():
+    """测试空闲时几乎不占用 CPU"""
+    print("\n测试2: 空闲 CPU")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        time.sleep(0.2)
+        before = os.times()
+        time.sleep(1.0)
+        after = os.times()
+        cpu = (after.user - before.user) + (after.system - before.system)
+        print(f"空闲 1 秒的 CPU 时间: {cpu:.3f} 秒")
+        assert cpu < 0.1, "空闲时不应占用 CPU"
+    finally:
+        client.close()
+
+    print("✓ 空闲不占用 CPU")
+    return True
+
+
+def test_pause_resume_close():
+    """测试暂停期间任务不执行，恢复后继续；关闭时未完成的任务以异常结束"""
+    print("\n测试3: 暂停/恢复/关闭")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        client.pause()
+        future = client.add(tool_call("add", a=5, b=6))
+        time.sleep(0.3)
+        assert not future.done(), "暂停期间不应执行任务"
+        client.resume()
+        assert json.loads(client.get_result(future, timeout=10).content[0].text)["message"] == 11, "恢复后结果不正确"
+
+        client.pause()
+        pending = client.add(tool_call("add", a=1, b=1))
+    finally:
+        client.close()
+
+    assert pending.done() and isinstance(pending.exception(), RuntimeError), "关闭后未完成的任务应以异常结束"
+
+    print("✓ 暂停/恢复/关闭正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MCPClient 调度测试")
+    print("=" * 60)
+
+    test_future_results()
+    test_idle_cpu()
+    test_pause_resume_close()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MCP 常驻服务：自动启动、客户端关闭后继续运行、多个客户端共用、使用缓存的工具列表
+"""
+
+import os
+import sys
+import json
+import time
+import stat
+import socket
+import tempfile
+import subprocess
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.client.MCPClient import MCPClient
+from module.MCP.client import MCPDaemon
+
+
+def start_client(state_file: str) -> MCPClient:
+    client = MCPClient(transport="daemon", daemon_state=state_file)
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.01)
+    return client
+
+
+def add(client: MCPClient, a: int, b: int) -> int:
+    result = client.get_result(client.add({"name": "add", "arguments": {"a": a, "b": b}}), timeout=10)
+    return json.loads(result.content[0].text)["message"]
+
+
+def test_daemon_shared():
+    """测试常驻服务自动启动并被多个客户端复用"""
+    print("\n测试1: 常驻服务")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = os.path.join(tmp, "daemon.json")
+        try:
+            start = time.perf_counter()
+            first = start_client(state_file)
+            cold = time.perf_counter() - start
+            try:
+                assert add(first, 1, 2) == 3, "结果不正确"
+                pid = MCPDaemon.read_state(state_file)["pid"]
+                assert stat.S_IMODE(os.stat(state_file).st_mode) == 0o600, "状态文件应只有当前用户可读写"
+            finally:
+                first.close()
+            assert MCPDaemon.is_alive(MCPDaemon.read_state(state_file)), "客户端关闭后常驻服务应继续运行"
+
+            start = time.perf_counter()
+            clients = [start_client(state_file) for _ in range(2)]
+            warm = (time.perf_counter() - start) / 2
+            try:
+                assert [add(c, i, 10) for i, c in enumerate(clients)] == [10, 11], "结果不正确"
+                names = [tool["function"]["name"] for tool in clients[0].list_tools()]
+                assert "add" in names and "call_batch" not in names, "应使用缓存的工具列表"
+                assert MCPDaemon.read_state(state_file)["pid"] == pid, "应复用同一个常驻服务"
+            finally:
+                for c in clients:
+                    c.close()
+
+            print(f"首次启动(含常驻服务): {cold:.2f} 秒, 连接已有服务: {warm * 1000:.0f} 毫秒")
+            assert warm < cold / 2, "连接已有服务应明显快于启动服务"
+        finally:
+            assert MCPDaemon.stop_daemon(state_file), "应停止常驻服务"
+        assert not os.path.exists(state_file), "停止后应删除状态文件"
+
+    print("✓ 常驻服务正确")
+    return True
+
+
+def write_state(state_file: str, state: dict, mode: int = 0o600):
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.chmod(state_file, mode)
+
+
+def test_untrusted_state():
+    """测试状态文件的位置和校验：不连接、不结束状态文件指向的无关进程"""
+    print("\n测试2: 状态文件校验")
+    print("-" * 60)
+
+    assert os.path.dirname(MCPDaemon.DEFAULT_STATE_FILE) != tempfile.gettempdir(), "默认状态文件不应在系统临时目录"
+
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = os.path.join(tmp, "daemon.json")
+            state = {"pid": other.pid, "url": f"http://127.0.0.1:{listener.getsockname()[1]}/mcp", "tools": []}
+
+            # 进程不是常驻服务
+            write_state(state_file, state)
+            assert MCPDaemon.read_state(state_file) is None, "进程不是常驻服务时应忽略状态文件"
+            assert not MCPDaemon.stop_daemon(state_file, timeout=0.5), "不应停止无关进程"
+            assert other.poll() is None, "无关进程不应被结束"
+
+            # 其它用户可写的状态文件
+            write_state(state_file, state, 0o666)
+            assert MCPDaemon._load(state_file) is None, "其它用户可写的状态文件应被忽略"
+
+            # 非本机地址
+            assert not MCPDaemon.is_daemon(dict(state, url="http://example.com:80/mcp"), state_file), "应拒绝非本机地址"
+    finally:
+        listener.close()
+        other.kill()
+        other.wait()
+
+    print("✓ 状态文件校验正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MCP 常驻服务 测试")
+    print("=" * 60)
+
+    test_daemon_shared()
+    test_untrusted_state()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MCPManager：多个服务端并发启动、合并的命名空间工具列表、按工具路由、启动失败的服务端被跳过
+（使用临时的 MCP 服务，启动前固定延迟）
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.client.MCPManager import MCPManager
+
+# 服务端模板：启动前延迟 3 秒，name 工具返回服务端名
+SERVER = '''
+import sys
+import time
+from fastmcp import FastMCP
+
+time.sleep(3.0)
+mcp = FastMCP(sys.argv[1])
+
+@mcp.tool
+def name() -> dict:
+    return {"message": sys.argv[1]}
+
+@mcp.tool
+def only_{server}() -> dict:
+    return {"message": "only"}
+
+mcp.run(show_banner=False)
+'''
+
+
+def write_server(tmp: str, server: str) -> str:
+    script = os.path.join(tmp, f"{server}.py")
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(SERVER.replace("{server}", server))
+    return script
+
+
+def call(manager: MCPManager, name: str) -> dict:
+    result = manager.get_result(manager.add({"type": "function", "function": {"name": name, "arguments": "{}"}}), timeout=10)
+    return {"error": result.content[0].text} if result.isError else json.loads(result.content[0].text)
+
+
+def test_parallel_start_and_routing():
+    """测试并发启动、命名空间工具列表和路由"""
+    print("\n测试1: 并发启动与路由")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        servers = {name: {"command": sys.executable, "args": [write_server(tmp, name), name]} for name in ("alpha", "beta", "gamma")}
+        servers["broken"] = ["/nonexistent/mcp-server"]
+        manager = MCPManager(servers, health_interval=None)
+        start = time.time()
+        manager.start()
+        while not manager.get_initialized():
+            time.sleep(0.02)
+        elapsed = time.time() - start
+        try:
+            names = sorted(tool["function"]["name"] for tool in manager.list_tools())
+            print(f"启动耗时: {elapsed:.2f} 秒, 工具: {names}, 失败: {list(manager.failed)}")
+            # 串行启动至少 9 秒；并发时为 3 秒加上导入 fastmcp 的耗时（单核机器上导入无法重叠）
+            assert elapsed < 8, "三个各需 3 秒的服务端应并发启动"
+            assert list(manager.failed) == ["broken"], "启动失败的服务端应被记录并跳过"
+            assert "alpha__name" in names and "gamma__only_gamma" in names and len(names) == 6, "工具列表应带命名空间"
+
+            assert call(manager, "beta__name") == {"message": "beta"}, "应路由到所属服务端"
+            assert call(manager, "only_gamma") == {"message": "only"}, "唯一的工具名可以不带命名空间"
+            assert "Unknown tool" in call(manager, "name")["error"], "多个服务端都有的工具名必须带命名空间"
+            assert "Unknown tool" in call(manager, "delta__name")["error"], "未知工具应返回错误结果"
+        finally:
+            manager.close()
+
+    print("✓ 并发启动与路由正确")
+    return True
+
+
+def test_from_config():
+    """测试从 mcpServers 格式的配置文件创建"""
+    print("\n测试2: 配置文件")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mcp.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"mcpServers": {"my.server": {"command": sys.executable, "args": [write_server(tmp, "one"), "one"]}}}, f)
+
+        manager = MCPManager.from_config(path)
+        manager.start()
+        while not manager.get_initialized():
+            time.sleep(0.02)
+        try:
+            assert call(manager, "my_server__name") == {"message": "one"}, "服务端名应规范为合法的工具名前缀"
+        finally:
+            manager.close()
+
+    print("✓ 配置文件正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MCPManager 测试")
+    print("=" * 60)
+
+    test_parallel_start_and_routing()
+    test_from_config()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MCPClient 的内存传输模式：服务端在本进程内运行，工具列表与 stdio 模式一致
+"""
+
+import os
+import sys
+import json
+import time
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.client.MCPClient import MCPClient
+
+
+def start_client(**kwargs) -> MCPClient:
+    client = MCPClient(**kwargs)
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.01)
+    return client
+
+
+def test_builtin_server_in_memory():
+    """测试内存模式加载内置服务端，工具列表和调用结果与 stdio 模式一致"""
+    print("\n测试1: 内置服务端")
+    print("-" * 60)
+
+    memory = start_client(transport="memory")
+    try:
+        memory_tools = sorted(tool["function"]["name"] for tool in memory.list_tools())
+        result = memory.get_result(memory.add({"name": "multiply", "arguments": {"a": 6, "b": 7}}), timeout=10)
+        assert json.loads(result.content[0].text)["message"] == 42, "结果不正确"
+    finally:
+        memory.close()
+
+    stdio = start_client()
+    try:
+        stdio_tools = sorted(tool["function"]["name"] for tool in stdio.list_tools())
+    finally:
+        stdio.close()
+
+    print(f"工具: {memory_tools}")
+    assert memory_tools == stdio_tools, "两种模式的工具列表应一致"
+
+    print("✓ 内置服务端正确")
+    return True
+
+
+def test_custom_factory():
+    """测试自定义服务端工厂，并拒绝未知的传输方式"""
+    print("\n测试2: 自定义服务端")
+    print("-" * 60)
+
+    from fastmcp import FastMCP
+
+    def factory():
+        mcp = FastMCP("echo")
+
+        @mcp.tool
+        def echo(text: str) -> dict:
+            return {"message": text, "pid": os.getpid()}
+        return mcp
+
+    client = start_client(transport="memory", server_factory=factory)
+    try:
+        result = json.loads(client.get_result(client.add({"name": "echo", "arguments": {"text": "你好"}}), timeout=10).content[0].text)
+        print(f"结果: {result}")
+        assert result == {"message": "你好", "pid": os.getpid()}, "服务端应运行在本进程内"
+    finally:
+        client.close()
+
+    try:
+        MCPClient(transport="http")
+        raise AssertionError("未知的传输方式应报错")
+    except ValueError:
+        pass
+
+    print("✓ 自定义服务端正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MCPClient 内存传输测试")
+    print("=" * 60)
+
+    test_builtin_server_in_memory()
+    test_custom_factory()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MCPClient 的多进程 worker：阻塞工具在多个进程间并行、按资源固定路由、崩溃后自动重启
+（使用临时的 MCP 服务，block 为阻塞事件循环的同步工具，crash 直接退出进程）
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from mcp import StdioServerParameters
+from module.MCP.client.MCPClient import MCPClient
+
+WORKER_SERVER = '''
+import os
+import time
+from fastmcp import FastMCP
+
+mcp = FastMCP("worker")
+
+@mcp.tool
+def block(seconds: float) -> dict:
+    time.sleep(seconds)
+    return {"message": os.getpid()}
+
+@mcp.tool
+def read(db_name: str) -> dict:
+    return {"message": os.getpid()}
+
+@mcp.tool
+def crash() -> dict:
+    os._exit(1)
+
+mcp.run(show_banner=False)
+'''
+
+
+def start_client(script: str, **kwargs) -> MCPClient:
+    client = MCPClient(**kwargs)
+    client.server_params = StdioServerParameters(command=sys.executable, args=[script])
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.05)
+    return client
+
+
+def pid_of(result) -> int:
+    return json.loads(result.content[0].text)["message"]
+
+
+def write_server(tmp: str) -> str:
+    script = os.path.join(tmp, "worker_server.py")
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(WORKER_SERVER)
+    return script
+
+
+def test_parallel_and_sticky():
+    """测试阻塞工具在多个 worker 间并行，同一资源固定到同一个 worker"""
+    print("\n测试1: 并行与固定路由")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = start_client(write_server(tmp), workers=3, health_interval=None)
+        try:
+            assert len(client.workers) == 3, "应启动 3 个 worker"
+
+            start = time.time()
+            futures = [client.add({"name": "block", "arguments": {"seconds": 0.3}}) for _ in range(3)]
+            pids = {pid_of(client.get_result(future, timeout=10)) for future in futures}
+            elapsed = time.time() - start
+            print(f"3 个 0.3 秒阻塞调用: {elapsed:.2f} 秒, 进程数 {len(pids)}")
+            assert len(pids) == 3 and elapsed < 0.8, "阻塞调用应分散到不同进程并行执行"
+
+            for db_name in ("a.db", "b.db", "c.db"):
+                futures = [client.add({"name": "read", "arguments": {"db_name": db_name}}) for _ in range(5)]
+                workers = {future.worker for future in futures if client.get_result(future, timeout=10)}
+                print(f"{db_name} -> worker {workers}")
+                assert len(workers) == 1, "同一资源应固定到同一个 worker"
+        finally:
+            client.close()
+
+    print("✓ 路由正确")
+    return True
+
+
+def test_restart_crashed_worker():
+    """测试 worker 进程崩溃后被健康检查重启，后续调用正常"""
+    print("\n测试2: 崩溃重启")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = start_client(write_server(tmp), workers=2, health_interval=0.2, health_timeout=1.0)
+        try:
+            future = client.add({"name": "crash", "arguments": {}})
+            try:
+                result = client.get_result(future, timeout=10)
+                assert result.isError, "崩溃的调用不应成功"
+            except Exception as e:
+                print(f"崩溃调用: {type(e).__name__}: {e}")
+            crashed = client.workers[future.worker]
+
+            deadline = time.time() + 10
+            while not (crashed.restarts == 1 and crashed.alive) and time.time() < deadline:
+                time.sleep(0.05)
+            print(f"worker 状态: {client.workers}")
+            assert crashed.restarts == 1 and crashed.alive, "崩溃的 worker 应被重启"
+
+            futures = [client.add({"name": "block", "arguments": {"seconds": 0.1}}) for _ in range(4)]
+            for future in futures:
+                assert not client.get_result(future, timeout=10).isError, "重启后调用应成功"
+        finally:
+            client.close()
+
+    print("✓ 崩溃重启正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MCPClient worker 测试")
+    print("=" * 60)
+
+    test_parallel_and_sticky()
+    test_restart_crashed_worker()
+
+    print("\n✓ 所有测试通过！")
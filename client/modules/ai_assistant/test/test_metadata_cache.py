@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 MetadataCache：DataInquire 的表存在检查和行数统计由元数据缓存给出，
+DatabaseEditor 的写入直接更新行数（不重新计数），其它连接的修改、表结构变化和文件替换都能发现
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import threading
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools.MetadataCache import MetadataCache
+
+cache_module = sys.modules[MetadataCache.__module__] # 包中同名的类遮住了模块
+
+
+@contextlib.contextmanager
+def count_scans():
+    """记录 MetadataCache 重新计数（COUNT(*)）的次数"""
+    scans = []
+    original = cache_module.connect
+
+    def connect(db_name, *args, **kwargs):
+        scans.append(db_name)
+        return original(db_name, *args, **kwargs)
+
+    cache_module.connect = connect
+    try:
+        yield scans
+    finally:
+        cache_module.connect = original
+
+
+def test_editor_writes():
+    """测试 DatabaseEditor 写入后行数直接更新，不重新计数"""
+    print("\n测试1: 写入更新行数")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "cache.db")
+        editor.connect(db)
+        editor.write_many(db, "t", [{"data_id": str(i), "content": f"内容{i}"} for i in range(100)])
+
+        with count_scans() as scans:
+            assert inquire.database_table_data_count(db, "t") == 100
+            assert len(scans) == 1, "第一次统计计数一次"
+
+            editor.write(db, "t", "new", "新增")
+            editor.write(db, "t", "new", "更新") # 已存在的ID不改变行数
+            editor.insert_data(db, "t", "new2", "新增")
+            editor.insert_data(db, "t", "new2", "重复") # 失败
+            editor.update_data(db, "t", "0", "更新")
+            editor.delete_data(db, "t", "1")
+            editor.delete_data(db, "t", "不存在")
+            editor.write_many(db, "t", [{"data_id": "2", "content": "更新"}, {"data_id": "w", "content": "新增"}])
+            editor.insert_many(db, "t", [{"data_id": "3", "content": "已存在"}, {"data_id": "i", "content": "新增"}])
+            editor.delete_many(db, "t", ["4", "5", "不存在"])
+
+            count = inquire.database_table_data_count(db, "t")
+            print(f"行数: {count}，重新计数 {len(scans)} 次")
+            assert count == 100 + 2 - 1 + 2 - 2
+            assert editor.count_records(db, "t") == (True, count)
+            assert inquire.database_table_content(db, "t", limit=10)["total"] == count
+            assert len(scans) == 1, "编辑器的写入不应触发重新计数"
+
+            # 新建、删除表
+            editor.create_table(db, "empty")
+            assert inquire.database_all_table(db) == ["t", "empty"]
+            assert inquire.database_table_data_count(db, "empty") == 0
+            editor.delete_table(db, "empty")
+            assert inquire.database_all_table(db) == ["t"]
+            assert inquire.database_table_data_count(db, "empty") == "表 'empty' 不存在"
+            assert inquire.database_table_data_exists(db, "empty", "1") is False
+        DatabaseRegistry.release(db)
+
+    print("✓ 写入更新行数正确")
+    return True
+
+
+def test_external_changes():
+    """测试其它连接的修改：行数重新计数一次，表结构变化立即可见，文件替换后重新读取"""
+    print("\n测试2: 外部修改")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "cache.db")
+        editor.connect(db)
+        editor.write_many(db, "t", [{"data_id": str(i), "content": f"内容{i}"} for i in range(50)])
+        assert inquire.database_table_data_count(db, "t") == 50
+
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            conn.execute('INSERT INTO "t" (id, content) VALUES (?, ?)', ("外部", "外部写入"))
+            conn.execute('CREATE TABLE "other" (id TEXT PRIMARY KEY, content TEXT)')
+            conn.commit()
+
+        with count_scans() as scans:
+            assert inquire.database_table_data_count(db, "t") == 51
+            assert inquire.database_table_data_count(db, "t") == 51
+            assert len(scans) == 1, "外部修改后只重新计数一次"
+        assert "other" in inquire.database_all_table(db)
+        assert inquire.database_table_data_exists(db, "t", "外部") is True
+
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            conn.execute('DROP TABLE "other"')
+            conn.commit()
+        assert inquire.database_table_data_exists(db, "other", "1") is False
+
+        # 删除后重建同名数据库
+        editor.delete(db)
+        editor.connect(db)
+        editor.write(db, "t", "1", "重建")
+        assert inquire.database_table_data_count(db, "t") == 1
+        DatabaseRegistry.release(db)
+
+    print("✓ 外部修改正确")
+    return True
+
+
+def test_concurrent_writes():
+    """测试多个线程同时写入、统计，最终行数准确"""
+    print("\n测试3: 并发写入和统计")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "cache.db")
+        editor.connect(db)
+        editor.create_table(db, "t")
+        assert inquire.database_table_data_count(db, "t") == 0
+        stop, errors = threading.Event(), []
+
+        def writer(index: int):
+            for i in range(100):
+                ok, message = editor.write(db, "t", f"{index}-{i}", "内容")
+                if not ok:
+                    errors.append(message)
+
+        def reader():
+            while not stop.is_set():
+                count = inquire.database_table_data_count(db, "t")
+                if not isinstance(count, int):
+                    errors.append(count)
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        writers = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        count = inquire.database_table_data_count(db, "t")
+        print(f"行数: {count}")
+        assert not errors, errors[:3]
+        assert count == 400
+        with contextlib.closing(sqlite3.connect(db)) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM "t"').fetchone()[0] == 400
+        DatabaseRegistry.release(db)
+        assert MetadataCache._entries.get(MetadataCache._key(db)) is None, "release 同时关闭元数据缓存"
+
+    print("✓ 并发写入和统计正确")
+    return True
+
+
+def test_quoted_table_name():
+    """测试需要引号的表名：存在检查和批量查询与分页查询一样给表名加引号"""
+    print("\n测试4: 表名引号")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "cache.db")
+        editor.connect(db)
+        editor.write_many(db, "my table", [{"data_id": "1", "content": "一"}, {"data_id": "2", "content": "二"}])
+
+        assert inquire.database_table_data_exists(db, "my table", "1") is True, "带空格的表名应能检查存在"
+        assert inquire.database_table_data_exists(db, "my table", "3") is False
+        assert inquire.database_table_data_batch(db, "my table", ["1", "2", "3"]) == {"1": "一", "2": "二"}, "带空格的表名应能批量查询"
+        assert inquire.database_table_content(db, "my table")["total"] == 2
+        DatabaseRegistry.release(db)
+
+    print("✓ 表名引号正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MetadataCache 测试")
+    print("=" * 60)
+
+    test_editor_writes()
+    test_external_changes()
+    test_concurrent_writes()
+    test_quoted_table_name()
+
+    print("\n✓ 所有测试通过！")
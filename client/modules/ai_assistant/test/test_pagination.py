@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试键集分页：DataInquire.database_table_content 和 DatabaseEditor.list_all_data 的
+续页标记、after_id、总行数提示、翻页期间的修改、分块读取和参数校验
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.MCP.server.tools.DatabaseEditor import DatabaseEditor, DatabaseRegistry
+from module.MCP.server.tools.DataInquire import DataInquire
+from module.MCP.server.tools import Pagination
+
+
+def walk(read_page):
+    """用续页标记翻完所有页，返回 (全部行, 页数, 第一页的总行数提示)"""
+    rows, pages, token, total = [], 0, None, None
+    while True:
+        page = read_page(token)
+        rows.extend(page["rows"])
+        pages += 1
+        total = page["total"] if total is None else total
+        token = page["next"]
+        if token is None:
+            return rows, pages, total
+
+
+def test_walk():
+    """测试两个工具都能按 id 顺序不重不漏地翻完整张表"""
+    print("\n测试1: 翻页")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "page.db")
+        editor.connect(db)
+        ids = sorted(f"{i:04d}" for i in range(1050))
+        editor.write_many(db, "t", [{"data_id": i, "content": f"内容{i}"} for i in ids])
+
+        rows, pages, total = walk(lambda token: inquire.database_table_content(db, "t", limit=100, page_token=token))
+        print(f"DataInquire: {pages} 页, 总数提示 {total}")
+        assert [r[0] for r in rows] == ids and pages == 11 and total == 1050
+        assert rows[0] == ["0000", "内容0000"]
+
+        rows, pages, total = walk(lambda token: editor.list_all_data(db, "t", limit=500, page_token=token)[1])
+        print(f"DatabaseEditor: {pages} 页, 总数提示 {total}")
+        assert [r["id"] for r in rows] == ids and pages == 3 and total == 1050
+
+        # 恰好整页时最后一页没有续页标记
+        page = inquire.database_table_content(db, "t", after_id="0949", limit=100)
+        assert len(page["rows"]) == 100 and page["next"] is None
+
+        # 默认每页行数，超过上限时截断
+        assert len(editor.list_all_data(db, "t")[1]["rows"]) == Pagination.PAGE_SIZE
+        assert len(inquire.database_table_content(db, "t", limit=5000)["rows"]) == Pagination.MAX_PAGE_SIZE
+        DatabaseRegistry.release(db)
+
+    print("✓ 翻页正确")
+    return True
+
+
+def test_concurrent_changes():
+    """测试翻页期间插入和删除行：已翻过的位置不受影响，后面的新行能读到"""
+    print("\n测试2: 翻页期间修改")
+    print("-" * 60)
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "change.db")
+        editor.connect(db)
+        editor.write_many(db, "t", [{"data_id": f"{i:02d}", "content": "x"} for i in range(0, 20, 2)])
+
+        first = inquire.database_table_content(db, "t", limit=3)
+        assert [r[0] for r in first["rows"]] == ["00", "02", "04"]
+        editor.delete_data(db, "t", "04") # 删除上一页的最后一行
+        editor.write(db, "t", "01", "x") # 插入到已翻过的位置
+        editor.write(db, "t", "05", "x") # 插入到还没翻到的位置
+        second = inquire.database_table_content(db, "t", limit=3, page_token=first["next"])
+        assert [r[0] for r in second["rows"]] == ["05", "06", "08"], "应从上一页最后一个 id 之后继续"
+        assert second["total"] == 10, "总行数提示随续页标记传递，不重新统计"
+        DatabaseRegistry.release(db)
+
+    print("✓ 翻页期间修改正确")
+    return True
+
+
+def test_chunks_and_errors():
+    """测试一页由多次小查询读取，以及无效参数"""
+    print("\n测试3: 分块读取与参数校验")
+    print("-" * 60)
+
+    calls = []
+    data = [(f"{i:03d}", "x") for i in range(1000)]
+
+    def fetch(after_id, size):
+        calls.append(size)
+        rows = [row for row in data if after_id is None or row[0] > after_id]
+        return rows[:size]
+
+    page = Pagination.read_page(fetch, lambda: len(data), "t", limit=Pagination.MAX_PAGE_SIZE)
+    print(f"每次查询的行数: {calls}")
+    assert len(page["rows"]) == 1000 and page["next"] is None
+    assert max(calls) == Pagination.FETCH_SIZE, "每次查询最多 FETCH_SIZE 行"
+
+    editor, inquire = DatabaseEditor(), DataInquire()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "error.db")
+        editor.connect(db)
+        editor.write_many(db, "a", [{"data_id": str(i), "content": "x"} for i in range(5)])
+        editor.write(db, "b", "1", "x")
+        token = inquire.database_table_content(db, "a", limit=2)["next"]
+
+        assert editor.list_all_data(db, "b", page_token=token) == (False, "续页标记不属于表 'b'")
+        assert editor.list_all_data(db, "a", page_token="不是标记") == (False, "续页标记无效")
+        assert editor.list_all_data(db, "a", limit=0) == (False, "每页行数必须是正整数")
+        assert inquire.database_table_content(db, "a", limit="10") == "查询数据失败: 每页行数必须是正整数"
+        assert inquire.database_table_content(db, "none") == "表 'none' 不存在"
+        DatabaseRegistry.release(db)
+
+    print("✓ 分块读取与参数校验正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("键集分页测试")
+    print("=" * 60)
+
+    test_walk()
+    test_concurrent_changes()
+    test_chunks_and_errors()
+
+    print("\n✓ 所有测试通过！")
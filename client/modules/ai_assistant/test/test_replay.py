@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试录制/回放：录制一轮带工具调用的对话，再离线回放并比对结果
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+from types import SimpleNamespace
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from module.Agent.Agent import Agent
+from module.Agent.Replay import Recorder, Replayer, ReplayMismatchError
+
+
+class FakeMCP:
+    """假的MCP客户端：计算 add 工具，耗时 0.1 秒"""
+    def __init__(self):
+        self.tasks = {}
+        self.batches = 0
+
+    def add(self, tool: dict) -> str:
+        task_id = f"task_{len(self.tasks)}"
+        self.tasks[task_id] = tool
+        return task_id
+
+    def add_batch(self, tools: list) -> list:
+        self.batches += 1
+        return [self.add(tool) for tool in tools]
+
+    def get_result(self, task_id, block=True, timeout=None):
+        time.sleep(0.1)
+        args = json.loads(self.tasks[task_id]["function"]["arguments"])
+        payload = {"task_type": "add", "message": args["a"] + args["b"]}
+        text = json.dumps(payload, ensure_ascii=False)
+        return SimpleNamespace(meta=None, content=[SimpleNamespace(type="text", text=text)], structuredContent=payload, isError=False)
+
+
+def live_stream(problem: str, role: str = "user"):
+    """模拟模型：第一次返回工具调用，工具结果回传后返回文本，片段间隔 0.05 秒"""
+    time.sleep(0.05)
+    if role == "system":
+        yield {"content": "结果是"}
+        time.sleep(0.05)
+        yield {"content": "3"}
+        return
+    yield {"tool_calls": [{"index": 0, "id": "call_1", "type": "function", "function": {"name": "add", "arguments": '{"a": 1, "b": 2}'}}]}
+
+
+def batch_stream(problem: str, role: str = "user"):
+    """模拟模型：一次返回两个工具调用（Agent 批量提交），工具结果回传后返回文本"""
+    if role == "system":
+        yield {"content": "结果是 3 和 7"}
+        return
+    yield {"tool_calls": [{"index": 0, "id": "call_1", "type": "function", "function": {"name": "add", "arguments": '{"a": 1, "b": 2}'}}]}
+    yield {"tool_calls": [{"index": 1, "id": "call_2", "type": "function", "function": {"name": "add", "arguments": '{"a": 3, "b": 4}'}}]}
+
+
+def record(path: str) -> str:
+    """录制一轮对话，返回 Agent 最终回复"""
+    mcp = FakeMCP()
+    recorder = Recorder(path)
+    add, get_result = recorder.wrap_mcp(mcp.add, mcp.get_result)
+    agent = Agent(recorder.wrap_stream(live_stream, "dialogue"), recorder.wrap_stream(live_stream, "knowledge"), add, get_result)
+    agent.run("1+2")
+    return agent.last_turn_tools
+
+
+def test_record_and_replay():
+    """测试录制后尽快回放：工具结果一致，且不再等待"""
+    print("\n测试1: 录制与尽快回放")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.jsonl")
+        tools = record(path)
+        kinds = [json.loads(line)["kind"] for line in open(path, encoding="utf-8")]
+        print(f"录制记录: {kinds}")
+        assert kinds == ["stream", "tool", "stream"], "录制记录不正确"
+
+        replayer = Replayer(path)
+        agent = Agent(**replayer.agent_callbacks())
+        start = time.time()
+        agent.run("1+2")
+        elapsed = time.time() - start
+        print(f"回放耗时: {elapsed:.3f} 秒")
+
+        assert agent.last_turn_tools == tools, "回放的工具调用应与录制一致"
+        assert replayer.remaining() == {"dialogue": 0, "tool": 0}, "所有记录都应被回放"
+        assert elapsed < 0.1, "尽快回放不应等待"
+
+    print("✓ 回放结果一致")
+    return True
+
+
+def test_realtime_replay():
+    """测试实时回放保持录制时的节奏"""
+    print("\n测试2: 实时回放")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.jsonl")
+        record(path)
+
+        replayer = Replayer(path, realtime=True)
+        start = time.time()
+        Agent(**replayer.agent_callbacks()).run("1+2")
+        elapsed = time.time() - start
+        print(f"实时回放耗时: {elapsed:.3f} 秒")
+        assert 0.2 <= elapsed < 0.5, "实时回放应接近录制耗时（约0.25秒）"
+
+        replayer = Replayer(path, realtime=True, speed=5.0)
+        start = time.time()
+        Agent(**replayer.agent_callbacks()).run("1+2")
+        assert time.time() - start < 0.15, "5倍速回放应更快"
+
+    print("✓ 实时回放节奏正确")
+    return True
+
+
+def test_strict_mismatch():
+    """测试严格模式下请求不一致时报错"""
+    print("\n测试3: 严格模式")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.jsonl")
+        record(path)
+
+        replayer = Replayer(path, strict=True)
+        try:
+            list(replayer.dialogue_callback("2+3"))
+            raise AssertionError("应当报告不一致")
+        except ReplayMismatchError as e:
+            print(f"不一致: {e}")
+
+    print("✓ 严格模式生效")
+    return True
+
+
+def test_batched_turn():
+    """测试批量提交的工具调用被录制，回放时同样批量提交且结果一致"""
+    print("\n测试4: 批量工具调用")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.jsonl")
+        mcp = FakeMCP()
+        recorder = Recorder(path)
+        add, get_result, add_batch = recorder.wrap_mcp(mcp.add, mcp.get_result, mcp.add_batch)
+        agent = Agent(recorder.wrap_stream(batch_stream, "dialogue"), recorder.wrap_stream(batch_stream, "knowledge"),
+                      add, get_result, mcp_client_add_batch_callback=add_batch)
+        agent.run("1+2 和 3+4")
+        assert mcp.batches == 1, "录制时应批量提交"
+
+        records = [json.loads(line) for line in open(path, encoding="utf-8")]
+        tools = [r for r in records if r["kind"] == "tool"]
+        print(f"录制记录: {[r['kind'] for r in records]}")
+        assert [r["name"] for r in tools] == ["add", "add"], "批量提交的调用应被逐个录制"
+        recorded = [r["result"]["structuredContent"]["message"] for r in tools]
+        assert recorded == [3, 7], "录制的结果不正确"
+
+        replayer = Replayer(path, strict=True)
+        results = []
+        callbacks = replayer.agent_callbacks()
+        get = callbacks["mcp_client_execute_task_callback"]
+        callbacks["mcp_client_execute_task_callback"] = lambda task_id: results.append(get(task_id)) or results[-1]
+        replayed = Agent(**callbacks)
+        replayed.run("1+2 和 3+4")
+
+        assert replayed.last_turn_tools == agent.last_turn_tools, "回放的工具调用应与录制一致"
+        assert [r.structuredContent["message"] for r in results] == recorded, "回放的结果应与录制一致"
+        assert replayer.remaining() == {"dialogue": 0, "tool": 0}, "所有记录都应被回放"
+
+    print("✓ 批量工具调用回放一致")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("录制/回放 测试")
+    print("=" * 60)
+
+    test_record_and_replay()
+    test_realtime_replay()
+    test_strict_mismatch()
+    test_batched_turn()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 ResultCompactor 的各个压缩策略与句柄取回
+"""
+
+import os
+import sys
+import json
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from module.Agent.ResultCompactor import ResultCompactor, extractive_summary
+from module.Agent.Agent import Agent
+
+
+def test_small_result_unchanged():
+    """测试未超过预算的结果原样返回"""
+    print("\n测试1: 小结果原样返回")
+    print("-" * 60)
+
+    compactor = ResultCompactor(max_tokens=200)
+    text = '{"task_type": "add", "message": 3}'
+    result = compactor.compact(text, "add")
+
+    assert result == text, "小结果不应被修改"
+    assert compactor.turn_stats()["compacted"] == 0, "不应记录压缩"
+
+    print("✓ 小结果原样返回")
+    return True
+
+
+def test_row_list():
+    """测试行列表压缩：去重、保留首尾行、句柄取回完整结果"""
+    print("\n测试2: 行列表压缩")
+    print("-" * 60)
+
+    compactor = ResultCompactor(max_tokens=300)
+    rows = [[f"{i:04d}", f"第{i}条记录的内容"] for i in range(500)]
+    rows += rows[:100]  # 重复行
+    text = json.dumps(rows, ensure_ascii=False)
+
+    result = compactor.compact(text, "database_table_content")
+    body, footer = result.rsplit("\n", 1)
+    data = json.loads(body)
+    print(f"压缩结果: total_rows={data['total_rows']}, 保留 {len(data['rows']) + len(data['tail_rows'])} 行")
+
+    assert compactor.count_tokens(result) <= 300, "压缩结果超出预算"
+    assert data["total_rows"] == 600, "总行数不正确"
+    assert data["duplicates_removed"] == 100, "去重数量不正确"
+    assert data["rows"][0] == ["0000", "第0条记录的内容"], "应保留首行"
+    assert data["tail_rows"][-1] == ["0499", "第499条记录的内容"], "应保留尾行"
+
+    assert footer.startswith("[结果已压缩") and "result://" not in result, "句柄不应出现在回传给模型的文本中"
+    handle = compactor.turn_stats()["handles"][-1]
+    assert compactor.get(handle) == text, "句柄应能取回完整结果"
+
+    stats = compactor.turn_stats()
+    print(f"统计: {stats}")
+    assert stats["compacted"] == 1 and stats["saved_tokens"] > 0, "统计不正确"
+
+    print("✓ 行列表压缩正确")
+    return True
+
+
+def test_dict_rows_schema():
+    """测试字典行：列名只保留一次"""
+    print("\n测试3: 字典行结构化截断")
+    print("-" * 60)
+
+    compactor = ResultCompactor(max_tokens=200)
+    rows = {"users": [{"id": str(i), "content": "x" * 40} for i in range(200)]}
+    result = compactor.compact(json.dumps(rows), "database_content_fuzzy")
+    data = json.loads(result.rsplit("\n", 1)[0])
+
+    assert data["users"]["columns"] == ["id", "content"], "应提取列名"
+    assert isinstance(data["users"]["rows"][0], list), "行应只保留值"
+
+    print("✓ 字典行压缩正确")
+    return True
+
+
+def test_long_text():
+    """测试长文本保留首尾窗口"""
+    print("\n测试4: 长文本首尾窗口")
+    print("-" * 60)
+
+    compactor = ResultCompactor(max_tokens=100)
+    text = "开头" + "中间内容" * 2000 + "结尾"
+    result = compactor.compact(text, "read_all")
+
+    assert result.startswith("开头"), "应保留开头"
+    assert "结尾" in result, "应保留结尾"
+    assert compactor.count_tokens(result) <= 100, "压缩结果超出预算"
+
+    print("✓ 长文本压缩正确")
+    return True
+
+
+def test_extractive_summary():
+    """测试抽取式摘要"""
+    print("\n测试5: 抽取式摘要")
+    print("-" * 60)
+
+    compactor = ResultCompactor(max_tokens=60, summarize=True)
+    text = "数据库备份完成。" * 3 + "".join(f"无关句子{i}。" for i in range(50)) + "数据库备份成功校验。"
+    summary = extractive_summary(text, 40, compactor)
+    print(f"摘要: {summary}")
+
+    assert summary is not None and summary.startswith("[摘要"), "应生成摘要"
+    assert compactor.count_tokens(compactor.compact(text)) <= 60, "压缩结果超出预算"
+
+    print("✓ 抽取式摘要正确")
+    return True
+
+def test_state_tools_not_compacted():
+    """测试状态机解析的分类/规划工具结果不压缩，其它工具照常压缩"""
+    print("\n测试6: 状态机工具不压缩")
+    print("-" * 60)
+
+    agent = Agent(None, None, None, None, result_compactor=ResultCompactor(max_tokens=50))
+    todo = json.dumps({"task_type": "TODO_LIST", "todo_list": [{"id": i, "task": f"第{i}个任务"} for i in range(100)]}, ensure_ascii=False)
+    for name in ("generate_todo_list", "tasks__generate_todo_list"):
+        result = agent.compact(todo, name)
+        assert json.loads(result)["todo_list"][-1]["id"] == 99, f"{name} 的结果应原样返回"
+    assert agent.compact(todo, "read_all") != todo, "其它工具的结果应压缩"
+
+    print("✓ 状态机工具不压缩")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ResultCompactor 测试")
+    print("=" * 60)
+
+    test_small_result_unchanged()
+    test_row_list()
+    test_dict_rows_schema()
+    test_long_text()
+    test_extractive_summary()
+    test_state_tools_not_compacted()
+
+    print("\n✓ 所有测试通过！")
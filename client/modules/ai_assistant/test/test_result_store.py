@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试结果存储（过期、容量淘汰、孤儿统计）以及 MCPClient.cancel 取消执行中的调用
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import concurrent.futures
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from mcp import StdioServerParameters
+from module.MCP.client.MCPClient import MCPClient, builtin_server, next_request_id
+from module.MCP.client.ResultStore import ResultStore
+
+# 慢速服务：slow 完成后写入标记文件，被取消时不会写入
+SLOW_SERVER = '''
+import asyncio
+from fastmcp import FastMCP
+
+mcp = FastMCP("slow")
+
+@mcp.tool
+async def slow(seconds: float, marker: str) -> dict:
+    await asyncio.sleep(seconds)
+    with open(marker, "w") as f:
+        f.write("done")
+    return {"message": seconds}
+
+mcp.run(show_banner=False)
+'''
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def done_future(value="ok") -> concurrent.futures.Future:
+    future = concurrent.futures.Future()
+    future.set_result(value)
+    return future
+
+
+def test_ttl_and_eviction():
+    """测试已完成结果过期、超出容量时淘汰最早完成的结果、未完成的任务保留"""
+    print("\n测试1: 过期与淘汰")
+    print("-" * 60)
+
+    clock = FakeClock()
+    store = ResultStore(max_size=3, ttl=10, clock=clock)
+
+    pending = concurrent.futures.Future()
+    store.put("pending", pending)
+    store.put("a", done_future())
+    clock.now = 5
+    store.put("b", done_future())
+    assert store.pop("b").result() == "ok", "应能取走结果"
+
+    clock.now = 11
+    assert store.get("a") is None, "超过 TTL 的结果应过期"
+    assert store.get("pending") is pending, "未完成的任务不应过期"
+
+    for name in ("c", "d", "e"):
+        store.put(name, done_future())
+        clock.now += 1
+    metrics = store.metrics()
+    print(f"统计: {metrics}")
+    assert "c" not in store and "e" in store and "pending" in store, "应淘汰最早完成的结果"
+    assert metrics["expired"] == 1 and metrics["evicted"] == 1 and metrics["orphaned"] == 2, "孤儿统计不正确"
+    assert metrics["collected"] == 1 and metrics["pending"] == 1 and metrics["size"] == 3, "统计不正确"
+
+    print("✓ 过期与淘汰正确")
+    return True
+
+
+def test_cancel_in_flight():
+    """测试取消排队中和执行中的调用，执行中的调用在服务端被中止"""
+    print("\n测试2: 取消调用")
+    print("-" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "slow_server.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(SLOW_SERVER)
+
+        client = MCPClient(max_in_flight=1, result_ttl=None)
+        client.server_params = StdioServerParameters(command=sys.executable, args=[script])
+        client.start()
+        while not client.get_initialized():
+            time.sleep(0.05)
+        try:
+            running_marker = os.path.join(tmp, "running")
+            running = client.add({"name": "slow", "arguments": {"seconds": 0.5, "marker": running_marker}})
+            queued = client.add({"name": "slow", "arguments": {"seconds": 0.1, "marker": os.path.join(tmp, "queued")}})
+            time.sleep(0.2)
+
+            assert client.cancel(queued) and queued.cancelled(), "排队中的任务应直接取消"
+            assert client.cancel(running), "执行中的任务应可取消"
+            try:
+                running.result(timeout=5)
+                raise AssertionError("被取消的任务不应返回结果")
+            except concurrent.futures.CancelledError:
+                pass
+
+            time.sleep(0.6)
+            print(f"标记文件: {os.listdir(tmp)}")
+            assert not os.path.exists(running_marker), "服务端应中止被取消的调用"
+            assert not client.cancel(running), "已取消的任务不应再次取消"
+
+            future = client.add({"name": "slow", "arguments": {"seconds": 0.01, "marker": os.path.join(tmp, "after")}})
+            assert not client.get_result(future, timeout=5).isError, "取消后调用应正常"
+            metrics = client.result_metrics()
+            print(f"统计: {metrics}")
+            assert metrics["cancelled"] == 2 and metrics["size"] == 0, "统计不正确"
+        finally:
+            client.close()
+
+    print("✓ 取消调用正确")
+    return True
+
+def server_with_slow_tool():
+    """内置服务端（提供 call_batch），另外注册一个异步的慢速工具"""
+    from fastmcp.tools import Tool
+    mcp = builtin_server()
+
+    async def slow(seconds: float) -> dict:
+        await asyncio.sleep(seconds)
+        return {"message": seconds}
+
+    mcp.add_tool(Tool.from_function(slow))
+    return mcp
+
+
+def start_memory_client(**kwargs) -> MCPClient:
+    client = MCPClient(transport="memory", **kwargs)
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.01)
+    return client
+
+
+def test_cancel_batched():
+    """测试已在执行的批量请求中的调用不能单独取消：返回 False，调用照常完成"""
+    print("\n测试3: 取消批量中的调用")
+    print("-" * 60)
+
+    client = start_memory_client(server_factory=server_with_slow_tool)
+    try:
+        futures = client.add_batch([{"name": "slow", "arguments": {"seconds": 0.3}} for _ in range(2)])
+        time.sleep(0.1)
+        assert futures[0].running(), "批量请求应已在执行"
+        assert not client.cancel(futures[0]), "执行中的批量调用无法单独取消"
+        results = [client.get_result(future, timeout=5) for future in futures]
+        print(f"结果: {[r.content[0].text for r in results]}")
+        assert not any(r.isError for r in results), "批量调用应照常完成"
+        assert client.result_metrics()["cancelled"] == 0, "未取消的调用不应计入取消"
+    finally:
+        client.close()
+
+    print("✓ 取消批量中的调用正确")
+    return True
+
+
+def test_request_id():
+    """
+    测试 next_request_id：mcp 的 ClientSession 按 _request_id 递增分配请求ID
+    （cancel 依赖这一内部实现，升级 mcp 后这里失败说明需要调整取消通知）
+    """
+    print("\n测试4: 请求ID分配")
+    print("-" * 60)
+
+    client = start_memory_client()
+    try:
+        session = client.workers[0].session
+        before = next_request_id(session)
+        assert isinstance(before, int), "请求ID应为整数"
+        client.get_result(client.add({"name": "add", "arguments": {"a": 1, "b": 2}}), timeout=5)
+        assert next_request_id(session) == before + 1, "每个请求应使用 _request_id 并加一"
+    finally:
+        client.close()
+
+    print("✓ 请求ID分配正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("结果存储 测试")
+    print("=" * 60)
+
+    test_ttl_and_eviction()
+    test_cancel_in_flight()
+    test_cancel_batched()
+    test_request_id()
+
+    print("\n✓ 所有测试通过！")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试启动相关的优化：模型模块延迟导入 transformers/openai、分词器延迟加载与共用、启动耗时分析器
+"""
+
+import os
+import io
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+import contextlib
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from module.AICore.Tool.LazyTokenizer import LazyTokenizer
+from tools import StartupProfiler
+
+
+def test_deferred_imports():
+    """测试导入 AIManager（及全部模型模块）时不导入 transformers、openai、tiktoken"""
+    print("\n测试1: 延迟导入")
+    print("-" * 60)
+
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "import module.AICore.AIManager;"
+        "print(','.join(m for m in ('transformers', 'openai', 'tiktoken') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", script, parent_dir], capture_output=True, text=True, cwd=parent_dir)
+    print(f"已导入的重量级依赖: {output.stdout.strip() or '无'}")
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.strip() == "", "导入模型模块时不应导入重量级依赖"
+
+    print("✓ 延迟导入正确")
+    return True
+
+
+def test_lazy_tokenizer():
+    """测试分词器只在使用时加载一次、并发使用时不重复加载、加载失败在使用时抛出"""
+    print("\n测试2: 延迟加载的分词器")
+    print("-" * 60)
+
+    loads = []
+
+    class Encoder:
+        def encode(self, text):
+            return list(text)
+
+    def loader():
+        loads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return Encoder()
+
+    tokenizer = LazyTokenizer.shared("test:slow", loader)
+    assert LazyTokenizer.shared("test:slow", lambda: None) is tokenizer, "同一 key 应共用一个实例"
+    assert not tokenizer.loaded and loads == [], "创建时不应加载"
+
+    tokenizer.load_async()
+    threads = [threading.Thread(target=tokenizer.encode, args=("你好",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"加载次数: {len(loads)}, 加载线程: {loads}, 耗时: {tokenizer.load_time:.3f} 秒")
+    assert len(loads) == 1 and loads[0].startswith("tokenizer-"), "应只在后台线程中加载一次"
+    assert tokenizer.encode("abc") == ["a", "b", "c"], "encode 应委托给加载后的分词器"
+
+    def broken():
+        raise OSError("词表不存在")
+    failing = LazyTokenizer("test:broken", broken)
+    for _ in range(2):
+        try:
+            failing.encode("x")
+            raise AssertionError("加载失败应在使用时抛出")
+        except OSError:
+            pass
+
+    print("✓ 延迟加载的分词器正确")
+    return True
+
+
+def test_factory_shares_tokenizer():
+    """测试两个模型使用同一分词器时只加载一次"""
+    print("\n测试3: AIFactory 共用分词器")
+    print("-" * 60)
+
+    from module.AICore.AIManager import AIFactory
+
+    role_source = os.path.join(parent_dir, "module", "AICore", "role")
+    with tempfile.TemporaryDirectory() as role_dir:
+        for role in ("role_A", "role_B"):
+            os.makedirs(os.path.join(role_dir, role))
+            shutil.copy(os.path.join(role_source, role, "assistant.json"), os.path.join(role_dir, role))
+
+        factory = AIFactory(role_dir=role_dir)
+        model = "doubao-seed-1-6-lite-251015"
+        with contextlib.redirect_stdout(io.StringIO()):
+            factory.connect("doubao", model, "doubao", model)
+        tokenizers = factory.tokenizers()
+        print(f"分词器: {[t.key for t in tokenizers]}")
+        assert factory.dialogue_ai.tokenizer is factory.knowledge_ai.tokenizer, "同一分词器应共用"
+        assert len(tokenizers) == 1 and tokenizers[0].loaded, "连接后分词器应已加载"
+        assert factory.dialogue_ai.token_callback("你好") > 0, "token 计算应可用"
+
+    print("✓ AIFactory 共用分词器正确")
+    return True
+
+
+def test_profiler():
+    """测试分析器记录多个线程中的阶段，并测量导入耗时"""
+    print("\n测试4: 启动耗时分析器")
+    print("-" * 60)
+
+    profiler = StartupProfiler()
+
+    def work(name):
+        with profiler.phase(name):
+            time.sleep(0.2)
+
+    threads = [threading.Thread(target=work, args=(f"阶段{i}",), name=f"t{i}") for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    imports = profiler.measure_imports(["json", "no_such_module_for_test"])
+    report = profiler.report()
+    print(report)
+
+    assert {p["thread"] for p in profiler.phases} == {"t0", "t1", "t2"}, "应记录阶段所在的线程"
+    assert profiler.total() < 0.5, "并行的阶段总耗时应接近单个阶段"
+    assert imports["json"] is not None and imports["no_such_module_for_test"] is None, "未安装的模块应为 None"
+    assert "阶段0" in report and "未安装" in report, "报告应包含各阶段和导入耗时"
+
+    print("✓ 启动耗时分析器正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("启动优化 测试")
+    print("=" * 60)
+
+    test_deferred_imports()
+    test_lazy_tokenizer()
+    test_factory_shares_tokenizer()
+    test_profiler()
+
+    print("\n✓ 所有测试通过！")
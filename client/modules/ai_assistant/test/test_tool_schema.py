@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试工具参数的本地校验（结构化错误、不发给服务端）、list_tools 转换缓存，以及 tools/list_changed 通知后的刷新
+（服务端以内存模式在本进程内运行）
+"""
+
+import os
+import sys
+import json
+import time
+
+# 添加父目录到路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from fastmcp import FastMCP
+from module.MCP.client.MCPClient import MCPClient
+from module.MCP.client.ToolSchema import ToolArgumentError, parse_arguments, compile_validator, coerce
+
+# 服务端收到的调用次数
+CALLS = []
+
+
+def make_server() -> FastMCP:
+    mcp = FastMCP("schema")
+
+    @mcp.tool
+    def add(a: int, b: int) -> dict:
+        CALLS.append("add")
+        return {"message": a + b}
+
+    @mcp.tool
+    def grow() -> dict:
+        """运行时注册新工具，FastMCP 会向客户端发送 tools/list_changed"""
+        @mcp.tool
+        def added_later(x: int) -> dict:
+            return {"message": x}
+        return {"message": "ok"}
+
+    return mcp
+
+
+def start_client() -> MCPClient:
+    client = MCPClient(transport="memory", server_factory=make_server, health_interval=None)
+    client.start()
+    while not client.get_initialized():
+        time.sleep(0.01)
+    return client
+
+
+def test_validator():
+    """测试 schema 编译与结构化错误"""
+    print("\n测试1: 校验函数")
+    print("-" * 60)
+
+    validate = compile_validator({"type": "object", "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}}, "required": ["a", "b"]})
+    validate("add", {"a": 1, "b": 2})
+    try:
+        validate("add", {"a": "x"})
+        raise AssertionError("不合法的参数应抛出 ToolArgumentError")
+    except ToolArgumentError as e:
+        print(f"错误: {e.to_dict()}")
+        assert {err["validator"] for err in e.errors} == {"type", "required"}, "应报告全部错误"
+        assert any(err["path"] == "a" for err in e.errors), "错误应带参数路径"
+
+    assert parse_arguments("add", "") == {} and parse_arguments("add", None) == {}, "空参数应视为无参数"
+    for bad in ("{oops", "[1, 2]"):
+        try:
+            parse_arguments("add", bad)
+            raise AssertionError("无法解析或不是对象的参数应抛出 ToolArgumentError")
+        except ToolArgumentError as e:
+            assert e.errors[0]["validator"] in ("json", "type")
+    assert compile_validator(None) is None, "没有 schema 的工具不校验"
+
+    print("✓ 校验函数正确")
+    return True
+
+
+def test_coerce():
+    """测试校验前按 pydantic 宽松模式转换参数"""
+    print("\n测试4: 参数转换")
+    print("-" * 60)
+
+    schema = {"type": "object", "properties": {
+        "a": {"type": "integer"}, "x": {"type": "number"}, "flag": {"type": "boolean"},
+        "limit": {"anyOf": [{"type": "integer"}, {"type": "null"}]},
+        "ids": {"type": "array", "items": {"type": "integer"}}, "name": {"type": "string"},
+    }}
+    converted = coerce(schema, {"a": "3", "x": "1.5", "flag": "true", "limit": "10", "ids": ["1", 2.0], "name": "7", "other": "1"})
+    print(f"转换: {converted}")
+    assert converted == {"a": 3, "x": 1.5, "flag": True, "limit": 10, "ids": [1, 2], "name": "7", "other": "1"}, "转换结果不正确"
+    assert coerce(schema, {"limit": None, "a": True, "flag": 0}) == {"limit": None, "a": 1, "flag": False}
+    assert coerce(schema, {"a": "3.0", "ids": [True]}) == {"a": 3, "ids": [1]}
+    assert coerce(schema, {"a": "3.5", "x": "abc"}) == {"a": "3.5", "x": "abc"}, "无法转换的值应原样返回"
+
+    validate = compile_validator({"type": "object", "properties": {"a": {"type": "integer"}}, "required": ["a"]})
+    assert validate("add", {"a": "3"}) == {"a": 3}, "可转换的参数应通过校验"
+    try:
+        validate("add", {"a": "3.5"})
+        raise AssertionError("无法转换的参数应抛出 ToolArgumentError")
+    except ToolArgumentError as e:
+        assert e.errors[0]["validator"] == "type"
+
+    client = start_client()
+    try:
+        result = client.get_result(client.add({"name": "add", "arguments": {"a": "3", "b": 2.0}}), timeout=10)
+        print(f"结果: {result.content[0].text}")
+        assert not result.isError and json.loads(result.content[0].text)["message"] == 5, "转换后的参数应发给服务端"
+    finally:
+        client.close()
+
+    print("✓ 参数转换正确")
+    return True
+
+
+def test_rejected_locally():
+    """测试不合法的调用在本地得到 isError 结果，不发给服务端"""
+    print("\n测试2: 本地拒绝")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        CALLS.clear()
+        calls = [
+            {"type": "function", "function": {"name": "add", "arguments": json.dumps({"a": 1})}},
+            {"type": "function", "function": {"name": "add", "arguments": "{not json"}},
+            {"type": "function", "function": {"name": "add", "arguments": json.dumps({"a": 1, "b": 2})}},
+        ]
+        results = [client.get_result(client.add(call), timeout=10) for call in calls]
+        for result in results:
+            print(f"结果: isError={result.isError} {result.content[0].text}")
+        assert results[0].isError and results[0].structuredContent["errors"][0]["validator"] == "required", "缺少参数应返回结构化错误"
+        assert results[1].isError and results[1].structuredContent["errors"][0]["validator"] == "json", "无法解析的参数应返回结构化错误"
+        assert not results[2].isError, "合法的调用应正常执行"
+        assert CALLS == ["add"], "不合法的调用不应发给服务端"
+
+        batch = [client.get_result(f, timeout=10) for f in client.add_batch(calls)]
+        assert [r.isError for r in batch] == [True, True, False], "批量调用同样在本地校验"
+        assert client.result_metrics()["size"] == 0, "结果取走后应移出存储"
+    finally:
+        client.close()
+
+    print("✓ 本地拒绝正确")
+    return True
+
+
+def test_list_tools_cache():
+    """测试 list_tools 缓存，工具列表变化通知后刷新"""
+    print("\n测试3: 工具列表缓存")
+    print("-" * 60)
+
+    client = start_client()
+    try:
+        first = client.list_tools()
+        assert client._openai_tools is not None and client.list_tools() == first, "转换结果应被缓存"
+        first.clear()
+        assert client.list_tools(), "返回的列表应是副本"
+
+        version = client.tools_version
+        client.get_result(client.add({"name": "grow", "arguments": {}}), timeout=10)
+        deadline = time.time() + 5
+        while client.tools_version == version and time.time() < deadline:
+            time.sleep(0.01)
+        names = [tool["function"]["name"] for tool in client.list_tools()]
+        print(f"版本: {version} -> {client.tools_version}, 工具: {names}")
+        assert "added_later" in names, "收到 tools/list_changed 后应刷新工具列表"
+
+        result = client.get_result(client.add({"name": "added_later", "arguments": {"x": "y"}}), timeout=10)
+        assert result.isError and result.structuredContent["tool"] == "added_later", "新工具的参数也应在本地校验"
+    finally:
+        client.close()
+
+    print("✓ 工具列表缓存正确")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("工具参数校验 测试")
+    print("=" * 60)
+
+    test_validator()
+    test_rejected_locally()
+    test_list_tools_cache()
+    test_coerce()
+
+    print("\n✓ 所有测试通过！")
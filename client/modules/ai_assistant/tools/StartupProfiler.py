@@ -0,0 +1,86 @@
+import sys
+import time
+import threading
+import subprocess
+import contextlib
+from typing import Dict, Iterable, Optional
+
+# 启动时导入耗时较大的依赖
+HEAVY_IMPORTS = ("transformers", "openai", "fastmcp", "sqlalchemy")
+
+
+class StartupProfiler:
+    """
+    启动耗时分析器
+
+    按阶段记录墙钟时间，多个线程可以同时记录。report 输出每个阶段的开始时刻、耗时和所在线程，
+    可以看出哪些阶段在并行、总耗时卡在哪一段；measure_imports 在独立的子进程中测量
+    重量级依赖的冷启动导入耗时（不受本进程中已导入模块的影响）。
+
+    示例:
+        >>> profiler = StartupProfiler()
+        >>> with profiler.phase("MCP 服务"):
+        ...     start_mcp()
+        >>> profiler.measure_imports()
+        >>> print(profiler.report())
+    """
+    def __init__(self):
+        self.origin = time.perf_counter() # 计时起点
+        self.phases = [] # 阶段列表，每项为 {"name", "start", "end", "thread"}（相对起点的秒数）
+        self.imports = {} # 模块名 -> 冷启动导入耗时（秒），未安装为 None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """记录 with 块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name: str, start: float, end: float, thread: Optional[str] = None):
+        """记录一个阶段，start/end 为 time.perf_counter 的时刻"""
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "start": start - self.origin,
+                "end": end - self.origin,
+                "thread": thread or threading.current_thread().name,
+            })
+
+    def total(self) -> float:
+        """从起点到最后一个阶段结束的墙钟时间"""
+        with self._lock:
+            return max((p["end"] for p in self.phases), default=0.0)
+
+    def measure_imports(self, modules: Iterable[str] = HEAVY_IMPORTS, timeout: float = 60.0) -> Dict[str, Optional[float]]:
+        """
+        逐个在新的子进程中导入模块并计时
+
+        返回:
+            模块名 -> 导入耗时（秒），未安装或导入失败为 None
+        """
+        script = "import sys, time; t = time.perf_counter(); __import__(sys.argv[1]); print(time.perf_counter() - t)"
+        for module in modules:
+            try:
+                output = subprocess.run([sys.executable, "-c", script, module], capture_output=True, text=True, timeout=timeout)
+                self.imports[module] = float(output.stdout.strip()) if output.returncode == 0 else None
+            except (subprocess.TimeoutExpired, ValueError):
+                self.imports[module] = None
+        return dict(self.imports)
+
+    def report(self) -> str:
+        """各阶段耗时表"""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p["start"])
+        lines = [f"{'开始(s)':>8} {'耗时(s)':>8}  {'线程':<16} 阶段"]
+        for p in phases:
+            lines.append(f"{p['start']:>8.3f} {p['end'] - p['start']:>8.3f}  {p['thread']:<16} {p['name']}")
+        busy = sum(p["end"] - p["start"] for p in phases)
+        lines.append(f"总耗时 {self.total():.3f} 秒（各阶段耗时之和 {busy:.3f} 秒）")
+        if self.imports:
+            lines.append("冷启动导入耗时:")
+            for module, seconds in self.imports.items():
+                lines.append(f"  {module:<14} {'未安装' if seconds is None else f'{seconds:.3f} 秒'}")
+        return "\n".join(lines)
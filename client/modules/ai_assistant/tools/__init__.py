@@ -14,15 +14,18 @@
     - ExcelProcessor: Excel文件处理
     - ConfigValidator: 配置文件验证
     - logger: 日志系统
+    - StartupProfiler: 启动耗时分析
 """
 
 from .AllEventsHandler import AllEventsHandler
 from .log import logger
+from .StartupProfiler import StartupProfiler
 
 # 导出所有可用的符号
 __all__ = [
     'AllEventsHandler',
     'logger',
+    'StartupProfiler',
 ]
 
 # 版本信息